@@ -0,0 +1,46 @@
+-- 闭包/调用密集型：闭包创建、upvalue 读写、递归、变参
+
+local function MakeCounter()
+    local count = 0
+    return function(step)
+        count = count + step
+        return count
+    end
+end
+
+local sum = 0
+for i = 1, 20000 do
+    local counter = MakeCounter()
+    for j = 1, 10 do
+        sum = sum + counter(j)
+    end
+end
+
+local function Fib(n)
+    if n < 2 then return n end
+    return Fib(n - 1) + Fib(n - 2)
+end
+sum = sum + Fib(27)
+
+local function Sum(...)
+    local total = 0
+    for i = 1, select("#", ...) do
+        total = total + select(i, ...)
+    end
+    return total
+end
+for i = 1, 50000 do
+    sum = sum + Sum(i, 1, 2, 3, 4)
+end
+
+local function Compose(f, g)
+    return function(x) return f(g(x)) end
+end
+local inc = function(x) return x + 1 end
+local double = function(x) return x * 2 end
+local f = Compose(inc, Compose(double, inc))
+for i = 1, 200000 do
+    sum = sum + f(i)
+end
+
+print("closure", sum)
@@ -0,0 +1,35 @@
+-- 协程密集型：生成器、resume/yield 往返、wrap
+
+local function Range(n)
+    return coroutine.wrap(function()
+        for i = 1, n do
+            coroutine.yield(i)
+        end
+    end)
+end
+
+local sum = 0
+for round = 1, 20 do
+    for i in Range(10000) do
+        sum = sum + i
+    end
+end
+
+local co = coroutine.create(function(a)
+    while true do
+        a = coroutine.yield(a * 2)
+    end
+end)
+for i = 1, 100000 do
+    local ok, v = coroutine.resume(co, i)
+    sum = sum + v
+end
+
+local created = 0
+for i = 1, 10000 do
+    local c = coroutine.create(function(x, y) return x + y end)
+    local ok, v = coroutine.resume(c, i, 1)
+    created = created + v
+end
+
+print("coroutine", sum, created)
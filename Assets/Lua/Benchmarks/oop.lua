@@ -0,0 +1,48 @@
+-- 面向对象：元表 __index 链上的方法查找、全局访问、元方法
+
+local Base = {}
+Base.__index = Base
+
+function Base.new(x)
+    return setmetatable({ x = x }, Base)
+end
+
+function Base:get()
+    return self.x
+end
+
+local Derived = setmetatable({}, { __index = Base })
+Derived.__index = Derived
+
+function Derived.new(x, y)
+    local obj = Base.new(x)
+    obj.y = y
+    return setmetatable(obj, Derived)
+end
+
+function Derived:sum()
+    return self:get() + self.y
+end
+
+Vector = {}
+Vector.__index = Vector
+Vector.__add = function(a, b) return setmetatable({ a[1] + b[1], a[2] + b[2] }, Vector) end
+
+local total = 0
+for i = 1, 200000 do
+    local obj = Derived.new(i, 1)
+    total = total + obj:sum()
+end
+
+local v = setmetatable({ 0, 0 }, Vector)
+local one = setmetatable({ 1, 2 }, Vector)
+for i = 1, 100000 do
+    v = v + one
+end
+
+counter = 0
+for i = 1, 300000 do
+    counter = counter + math.max(i % 7, 3)
+end
+
+print("oop", total, v[1], v[2], counter)
@@ -0,0 +1,40 @@
+-- 字符串密集型：拼接、tostring、字符串作为表键（没有 string 库，只用语言本身的字符串操作）
+
+local N = 100000
+
+local keys = {}
+for i = 1, 1000 do
+    keys[i] = "key_" .. i
+end
+
+local map = {}
+for round = 1, 50 do
+    for i = 1, #keys do
+        local key = keys[i]
+        map[key] = (map[key] or 0) + round
+    end
+end
+
+local total = 0
+for i = 1, N do
+    local s = tostring(i) .. ":" .. tostring(i * 3)
+    total = total + #s
+end
+
+local parts = {}
+for i = 1, 2000 do
+    parts[#parts + 1] = "x" .. i
+end
+local joined = ""
+for i = 1, #parts do
+    joined = joined .. parts[i]
+end
+
+local equal = 0
+for i = 1, N do
+    if keys[i % 1000 + 1] == "key_" .. (i % 1000 + 1) then
+        equal = equal + 1
+    end
+end
+
+print("string", total, #joined, equal, map["key_1"])
@@ -0,0 +1,50 @@
+-- 表密集型：数组填充/遍历、哈希读写、table.insert、# 运算
+
+local N = 200000
+
+local array = {}
+for i = 1, N do
+    array[i] = i * 2
+end
+
+local sum = 0
+for round = 1, 10 do
+    for i = 1, #array do
+        sum = sum + array[i]
+    end
+end
+
+local list = {}
+for i = 1, N do
+    table.insert(list, i)
+end
+for _, v in ipairs(list) do
+    sum = sum + v
+end
+
+local hash = {}
+for i = 1, N do
+    hash["k" .. (i % 1000)] = i
+    hash[i * 7] = i
+end
+local count = 0
+for k, v in pairs(hash) do
+    count = count + 1
+end
+
+local matrix = {}
+for i = 1, 300 do
+    local row = {}
+    for j = 1, 300 do
+        row[j] = i + j
+    end
+    matrix[i] = row
+end
+for i = 1, 300 do
+    local row = matrix[i]
+    for j = 1, 300 do
+        sum = sum + row[j]
+    end
+end
+
+print("table", sum, count, #list)
@@ -7,15 +7,45 @@ from Const.ProjectConfig import AntlrProjectConfig, AntlrConfigs
 from Builder.BuilderBase import BuildResult, BuilderBase
 from Utils import CommandUtils, PathUtils
 
+ANTLR_JAR = "3rd/Antlr4/antlr-4.13.2-complete.jar"
+
 class AntlrBuilder(BuilderBase):
 
-    def BeforeBuild(self):
+    @property
+    def GrammarName(self) -> str:
+        return os.path.basename(self.projectConfig.g4Path).split(".")[0]
+
+    def GetInputs(self) -> list:
+        assert(isinstance(self.projectConfig, AntlrProjectConfig))
+        inputs = [self.projectConfig.g4Path, ANTLR_JAR]
+        if self.projectConfig.grammarType == "parser": # parser 依赖 lexer 生成的 .tokens
+            lexerConfig = AntlrConfigs[f"{self.projectConfig.name[:-6]}Lexer"]
+            lexerName = os.path.basename(lexerConfig.g4Path).split(".")[0]
+            inputs.append(os.path.join(os.path.dirname(self.projectConfig.g4Path), f"{lexerName}.tokens"))
+        return inputs
+
+    def GetOutputs(self) -> list:
+        assert(isinstance(self.projectConfig, AntlrProjectConfig))
+        outputDir = self.projectConfig.outputDir
+        name = self.GrammarName
+        if self.projectConfig.grammarType == "lexer":
+            return [
+                os.path.join(outputDir, f"{name}.cs"),
+                os.path.join(os.path.dirname(self.projectConfig.g4Path), f"{name}.tokens"),
+            ]
+        return [
+            os.path.join(outputDir, f"{name}.cs"),
+            os.path.join(outputDir, f"{name}Listener.cs"),
+            os.path.join(outputDir, f"{name}BaseListener.cs"),
+        ]
+
+    def GetDependencies(self) -> list:
         assert(isinstance(self.projectConfig, AntlrProjectConfig))
         # 如果编译 parser，则要先编译 lexer
         if self.projectConfig.grammarType == "parser":
             name = self.projectConfig.name
-            lexerBuilder = AntlrBuilder(AntlrConfigs[f"{name[:-6]}Lexer"])
-            lexerBuilder.Build()
+            return [(AntlrBuilder, AntlrConfigs[f"{name[:-6]}Lexer"])]
+        return []
 
     def DoBuild(self) -> BuildResult:
         assert(isinstance(self.projectConfig, AntlrProjectConfig))
@@ -24,7 +54,7 @@ class AntlrBuilder(BuilderBase):
         filename = os.path.basename(g4path).split(".")[0]
         PathUtils.CheckDir(self.projectConfig.outputDir, create=True)
         command = [
-            "java", "-jar", "3rd/Antlr4/antlr-4.13.2-complete.jar",
+            "java", "-jar", ANTLR_JAR,
             "-package", self.projectConfig.package,
             "-Dlanguage=CSharp",
             "-o", f"{self.projectConfig.outputDir}",
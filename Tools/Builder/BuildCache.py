@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import platform
+from typing import Optional
+from Utils import HashUtils, PathUtils
+
+CACHE_VERSION = 1
+DISABLE_ENV = "YALUATOY_NO_BUILD_CACHE"
+
+class BuildCache:
+    """
+    基于内容哈希的增量构建缓存，跨进程持久化为一个 json 文件。
+
+    命中条件（全部满足）：
+    1. 构建器类型、项目配置、宿主平台完全一致（由 key 区分）；
+    2. 声明的输入文件集合不变，且每个文件的内容哈希不变；
+    3. 上次记录的输出仍然存在，且 stat 签名没变（防止输出被手动删改）。
+    """
+
+    def __init__(self, cachePath: str, key: str):
+        self.cachePath = cachePath
+        self.key = key
+        self.data = self._Load()
+        self.inputDigests = None
+
+    @staticmethod
+    def Enabled() -> bool:
+        return os.environ.get(DISABLE_ENV, "") in ("", "0")
+
+    @staticmethod
+    def MakeKey(builder) -> str:
+        parts = [
+            type(builder).__name__,
+            repr(builder.projectConfig),
+            platform.system(),
+            platform.machine(),
+        ]
+        return HashUtils.HashString("\n".join(parts))
+
+    def Lookup(self, inputs: list, outputs: list) -> Optional[dict]:
+        """命中时返回上次保存的结果 {"result": ..., "output": ...}，否则返回 None"""
+        memo = self.data.get("memo", {}) if self.data.get("key") == self.key else {}
+        self.inputDigests = HashUtils.HashFiles(inputs, memo) # 构建前记录输入，构建期间的修改留给下次
+        self.data["memo"] = memo
+        if self.data.get("version") != CACHE_VERSION or self.data.get("key") != self.key:
+            return None
+        if self.inputDigests != self.data.get("inputs"):
+            return None
+        if self._OutputSignatures(outputs) != self.data.get("outputs"):
+            return None
+        self._Save() # memo 可能刷新了（比如文件只是被 touch 了）
+        return self.data.get("buildResult")
+
+    def Store(self, outputs: list, result: int, output):
+        """必须在 Lookup 之后调用，记录的是构建开始前的输入摘要"""
+        assert(self.inputDigests is not None)
+        self.data = {
+            "version": CACHE_VERSION,
+            "key": self.key,
+            "inputs": self.inputDigests,
+            "outputs": self._OutputSignatures(outputs),
+            "buildResult": {"result": result, "output": output},
+            "memo": self.data.get("memo", {}),
+        }
+        self._Save()
+
+    @staticmethod
+    def _OutputSignatures(outputs: list) -> dict:
+        signatures = {}
+        for output in outputs:
+            if os.path.isdir(output):
+                for filepath in PathUtils.ListFiles(output):
+                    signatures[filepath] = HashUtils.StatSignature(filepath)
+            else:
+                signatures[output] = HashUtils.StatSignature(output)
+        return signatures
+
+    def _Load(self) -> dict:
+        if not os.path.exists(self.cachePath):
+            return {}
+        try:
+            with open(self.cachePath, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _Save(self):
+        PathUtils.CheckDir(os.path.dirname(self.cachePath), create=True)
+        tempPath = f"{self.cachePath}.{os.getpid()}.tmp"
+        with open(tempPath, "w", encoding="utf-8") as file:
+            json.dump(self.data, file, indent=1)
+        os.replace(tempPath, self.cachePath) # 原子替换，并发构建不会读到写了一半的缓存
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Type
+from Builder.BuilderBase import BuilderBase, BuildResult
+from Utils import CommandUtils, TraceUtils
+
+def NodeKey(Builder: Type[BuilderBase], projectConfig) -> str:
+    return f"{Builder.__name__}:{projectConfig.name}"
+
+def _BuildNode(key: str, Builder: Type[BuilderBase], projectConfig) -> tuple:
+    """在进程池中执行，依赖已由调度器保证构建完成"""
+    startTime = time.perf_counter()
+    CommandUtils.SetDefaultPrefix(key) # 并行节点的输出加上节点名前缀
+    try:
+        buildResult = Builder(projectConfig, buildDependencies=False).TryBuild()
+        result, output, msg = buildResult.result, buildResult.output, buildResult.msg
+    except Exception as e:
+        result, output, msg = -1, None, str(e)
+    return result, output, msg, time.perf_counter() - startTime, TraceUtils.Drain()
+
+class BuildNode:
+
+    def __init__(self, key: str, Builder: Type[BuilderBase], projectConfig):
+        self.key = key
+        self.Builder = Builder
+        self.projectConfig = projectConfig
+        self.deps = []
+        self.state = "pending" # pending, running, success, failed, skipped
+        self.buildResult = None
+        self.duration = 0.0
+
+class BuildScheduler:
+    """
+    按依赖图并行构建：没有依赖关系的节点在进程池中同时执行，
+    某个节点失败后，它所有的下游节点都会被取消（标记为 skipped），其余节点照常执行。
+    """
+
+    def __init__(self, maxWorkers: Optional[int]=None):
+        self.maxWorkers = maxWorkers or os.cpu_count()
+        self.nodes = {} # key -> BuildNode，保持添加顺序
+
+    def Add(self, Builder: Type[BuilderBase], projectConfig, deps: list=(), key: Optional[str]=None) -> str:
+        """
+        添加一个构建节点，构建器通过 GetDependencies 声明的依赖会被自动加入。返回节点 key。
+        同一个项目的多个变体（如发布矩阵里的各个目标）需要显式指定不同的 key。
+        """
+        key = key or NodeKey(Builder, projectConfig)
+        node = self.nodes.get(key)
+        if node is None:
+            node = BuildNode(key, Builder, projectConfig)
+            self.nodes[key] = node
+            for DepBuilder, depConfig in Builder(projectConfig).GetDependencies():
+                node.deps.append(self.Add(DepBuilder, depConfig))
+        elif node.projectConfig != projectConfig:
+            raise Exception(f"Conflicting configs for build node '{key}'.")
+        for dep in deps:
+            if dep not in self.nodes:
+                raise Exception(f"Unknown dependency '{dep}' of build node '{key}'.")
+            if dep not in node.deps:
+                node.deps.append(dep)
+        return key
+
+    def Run(self) -> dict:
+        """执行所有节点，返回 {key: BuildResult}；被取消的节点没有结果"""
+        self._CheckAcyclic()
+        startTime = time.perf_counter()
+        running = {}
+        with ProcessPoolExecutor(max_workers=self.maxWorkers) as executor:
+            try:
+                while True:
+                    for node in self._ReadyNodes():
+                        node.state = "running"
+                        print(f"[BuildScheduler] start: {node.key}")
+                        running[executor.submit(_BuildNode, node.key, node.Builder, node.projectConfig)] = node
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = running.pop(future)
+                        result, output, msg, node.duration, events = future.result()
+                        TraceUtils.Extend(events)
+                        node.buildResult = BuildResult(result, output, msg)
+                        node.state = "success" if node.buildResult.Success else "failed"
+                        print(f"[BuildScheduler] {node.state}: {node.key} ({node.duration:.2f}s)")
+                        if node.buildResult.Failed:
+                            self._CancelDownstream(node.key)
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        self._PrintSummary(time.perf_counter() - startTime)
+        return {key: node.buildResult for key, node in self.nodes.items() if node.buildResult is not None}
+
+    @property
+    def Success(self) -> bool:
+        return all(node.state == "success" for node in self.nodes.values())
+
+    def _ReadyNodes(self) -> list:
+        ready = []
+        for node in self.nodes.values():
+            if node.state == "pending" and all(self.nodes[dep].state == "success" for dep in node.deps):
+                ready.append(node)
+        return ready
+
+    def _CancelDownstream(self, failedKey: str):
+        for node in self.nodes.values():
+            if node.state == "pending" and failedKey in node.deps:
+                node.state = "skipped"
+                print(f"[BuildScheduler] skipped: {node.key} (dependency '{failedKey}' failed)")
+                self._CancelDownstream(node.key)
+
+    def _CheckAcyclic(self):
+        visiting, visited = set(), set()
+        def Visit(key: str):
+            if key in visited:
+                return
+            if key in visiting:
+                raise Exception(f"Dependency cycle detected at build node '{key}'.")
+            visiting.add(key)
+            for dep in self.nodes[key].deps:
+                Visit(dep)
+            visiting.remove(key)
+            visited.add(key)
+        for key in self.nodes:
+            Visit(key)
+
+    def _CriticalPath(self) -> tuple:
+        finish = {}
+        def Finish(key: str) -> tuple:
+            if key not in finish:
+                node = self.nodes[key]
+                longest = max((Finish(dep) for dep in node.deps), default=(0.0, []), key=lambda x: x[0])
+                finish[key] = (longest[0] + node.duration, longest[1] + [key])
+            return finish[key]
+        return max((Finish(key) for key in self.nodes), default=(0.0, []), key=lambda x: x[0])
+
+    def _PrintSummary(self, wallTime: float):
+        print("\n[BuildScheduler] summary:")
+        for node in self.nodes.values():
+            print(f"  {node.state:<8} {node.duration:8.2f}s  {node.key}")
+        totalTime = sum(node.duration for node in self.nodes.values())
+        criticalTime, criticalPath = self._CriticalPath()
+        print(f"  wall: {wallTime:.2f}s, sum of steps: {totalTime:.2f}s, critical path: {criticalTime:.2f}s")
+        print(f"  critical path: {' -> '.join(criticalPath)}")
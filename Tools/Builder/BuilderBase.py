@@ -3,14 +3,18 @@ import os
 import sys
 import shutil
 from typing import Optional, Any
-from Utils import PathUtils
+from Utils import PathUtils, TraceUtils
+from Builder.BuildCache import BuildCache
+
+CACHE_DIR = "out/BuildCache"
 
 class BuildResult:
 
-    def __init__(self, result: int, output, msg: str=""):
+    def __init__(self, result: int, output, msg: str="", testFailed: bool=False):
         self.result = result
         self.output = output
         self.msg = msg
+        self.testFailed = testFailed # 编译通过，只是有测试没过（覆盖率之类的后续步骤照样要做）
 
     @property
     def Success(self):
@@ -22,21 +26,77 @@ class BuildResult:
 
 class BuilderBase:
 
-    def __init__(self, projectConfig):
+    def __init__(self, projectConfig, buildDependencies: bool=True):
         self.projectConfig = projectConfig
+        self.buildDependencies = buildDependencies # 由 BuildScheduler 调度时依赖已经构建过，不需要再串行构建
+
+    @property
+    def TraceName(self) -> str:
+        return f"{type(self).__name__}:{getattr(self.projectConfig, 'name', '')}"
 
     def TryBuild(self) -> BuildResult:
-        self.BeforeBuild()
-        buildResult = self.DoBuild()
-        self.AfterBuild(buildResult)
+        with TraceUtils.Span(f"Build {self.TraceName}", "build"):
+            self._BuildDependencies()
+            with TraceUtils.Span(f"BeforeBuild {self.TraceName}", "build"):
+                self.BeforeBuild()
+            buildResult = self._CachedBuild()
+            with TraceUtils.Span(f"AfterBuild {self.TraceName}", "build"):
+                self.AfterBuild(buildResult)
         return buildResult
     
     def Build(self) -> BuildResult:
-        self.BeforeBuild()
-        buildResult = self.DoBuild()
-        if buildResult.result != 0:
-            raise Exception("Build failed.", buildResult.msg)
-        self.AfterBuild(buildResult)
+        with TraceUtils.Span(f"Build {self.TraceName}", "build"):
+            self._BuildDependencies()
+            with TraceUtils.Span(f"BeforeBuild {self.TraceName}", "build"):
+                self.BeforeBuild()
+            buildResult = self._CachedBuild()
+            if buildResult.result != 0:
+                raise Exception("Build failed.", buildResult.msg)
+            with TraceUtils.Span(f"AfterBuild {self.TraceName}", "build"):
+                self.AfterBuild(buildResult)
+        return buildResult
+
+    def GetDependencies(self) -> list:
+        """声明构建前必须先完成的构建，格式为 [(BuilderClass, projectConfig), ...]"""
+        return []
+
+    def GetInputs(self) -> Optional[list]:
+        """构建输入文件列表，返回 None 表示不可缓存（每次都要真正构建）"""
+        return None
+
+    def GetOutputs(self) -> list:
+        """构建产物（文件或目录），缓存命中前会检查它们没有被删改"""
+        return []
+
+    def GetCacheDir(self) -> str:
+        return CACHE_DIR
+
+    def _BuildDependencies(self):
+        if not self.buildDependencies:
+            return
+        for Builder, projectConfig in self.GetDependencies():
+            Builder(projectConfig).Build()
+
+    def _CachedBuild(self) -> BuildResult:
+        inputs = self.GetInputs() if BuildCache.Enabled() else None
+        if inputs is None:
+            with TraceUtils.Span(f"DoBuild {self.TraceName}", "build"):
+                return self.DoBuild()
+
+        key = BuildCache.MakeKey(self)
+        name = getattr(self.projectConfig, "name", type(self).__name__)
+        cachePath = os.path.join(self.GetCacheDir(), f"{type(self).__name__}-{name}-{key[:12]}.json")
+        cache = BuildCache(cachePath, key)
+        with TraceUtils.Span(f"CacheLookup {self.TraceName}", "build"):
+            cached = cache.Lookup(inputs, self.GetOutputs())
+        if cached is not None:
+            print(f"Build cache hit: {name}")
+            return BuildResult(cached["result"], cached["output"], "cached")
+
+        with TraceUtils.Span(f"DoBuild {self.TraceName}", "build"):
+            buildResult = self.DoBuild()
+        if buildResult.Success:
+            cache.Store(self.GetOutputs(), buildResult.result, buildResult.output)
         return buildResult
 
     def DoBuild(self) -> BuildResult:
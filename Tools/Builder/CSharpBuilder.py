@@ -1,14 +1,39 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import re
 import platform
 import shutil
-from Const.ProjectConfig import CSharpProjectConfig, AntlrConfigs
+import asyncio
+from typing import Optional
+from Const.ProjectConfig import CSharpProjectConfig, AntlrConfigs, HostArch
 from Builder.AntlrBuilder import AntlrBuilder
 from Builder.BuilderBase import BuildResult, BuilderBase
-from Utils import CommandUtils, PathUtils
+from Utils import CommandUtils, InstallUtils, PathUtils, TestShardUtils, TraceUtils
 
 NET_VERSION = "9.0"
+SOURCE_IGNORE_DIRS = ("bin", "obj", "out", "TestResults")
+MATRIX_RIDS = ("win-x64", "osx-arm64", "linux-x64", "linux-arm64") # 发布矩阵共享的 restore 覆盖的全部 RID
+
+def GetAssemblyName(csprojPath: str) -> str:
+    with open(csprojPath, "r", encoding="utf-8-sig") as file:
+        match = re.search(r"<AssemblyName>\s*(.*?)\s*</AssemblyName>", file.read())
+    return match.group(1) if match else os.path.splitext(os.path.basename(csprojPath))[0]
+
+def GetProjectReferences(csprojPath: str) -> list:
+    """递归收集 csproj 自身及其引用的所有 csproj 路径"""
+    result = []
+    pending = [os.path.normpath(csprojPath)]
+    while pending:
+        path = pending.pop()
+        if path in result:
+            continue
+        result.append(path)
+        with open(path, "r", encoding="utf-8-sig") as file:
+            for reference in re.findall(r"<ProjectReference\s+Include=\"(.*?)\"", file.read()):
+                reference = reference.replace("\\", "/")
+                pending.append(os.path.normpath(os.path.join(os.path.dirname(path), reference)))
+    return result
 
 class CSharpBuilder(BuilderBase):
 
@@ -17,12 +42,51 @@ class CSharpBuilder(BuilderBase):
         assert(isinstance(self.projectConfig, CSharpProjectConfig))
         system = self.projectConfig.System
         if system == "Darwin":
-            return "osx-arm64"
+            return f"osx-{self.projectConfig._arch or 'arm64'}"
         elif system == "Windows":
-            return "win-x64"
+            return f"win-{self.projectConfig._arch or 'x64'}"
+        elif system == "Linux":
+            return f"linux-{self.projectConfig.Arch}"
         else:
             raise Exception(f"Unknown platform: {system}")
 
+    @property
+    def TargetName(self) -> str:
+        return f"{self.projectConfig.buildType}-{self.Machine}-{'aot' if self.NativeAot else 'jit'}"
+
+    @property
+    def OutputDir(self) -> str:
+        if self.projectConfig.isolatedBuild: # 发布矩阵的每个目标单独一个目录
+            return os.path.join("out", self.projectConfig.name, "Matrix", self.TargetName)
+        if self.projectConfig._arch is not None: # 显式指定架构时，不同架构装到不同目录
+            return os.path.join("out", self.projectConfig.name, f"{self.projectConfig.System}-{self.projectConfig._arch}")
+        return os.path.join("out", self.projectConfig.name, self.projectConfig.System)
+
+    @property
+    def NativeAot(self) -> bool:
+        """Native AOT 不支持跨平台/跨架构编译，默认只有目标和本机一致时才开启"""
+        if self.projectConfig.publishAot is not None:
+            return self.projectConfig.publishAot
+        return self.projectConfig.System == platform.system() and self.projectConfig.Arch == HostArch()
+
+    def GetInputs(self) -> Optional[list]:
+        assert(isinstance(self.projectConfig, CSharpProjectConfig))
+        if self.projectConfig.buildCommand == "test": # 测试每次都要跑
+            return None
+        inputs = []
+        for csprojPath in GetProjectReferences(self.projectConfig.csprojPath):
+            inputs.extend(PathUtils.ListFiles(os.path.dirname(csprojPath), SOURCE_IGNORE_DIRS))
+        return inputs
+
+    def GetOutputs(self) -> list:
+        assert(isinstance(self.projectConfig, CSharpProjectConfig))
+        if self.projectConfig.buildCommand == "publish":
+            return [self.OutputDir]
+        csprojPath = self.projectConfig.csprojPath
+        assemblyName = GetAssemblyName(csprojPath)
+        binDir = os.path.join(os.path.dirname(csprojPath), "bin", self.projectConfig.buildType, f"net{NET_VERSION}")
+        return [os.path.join(binDir, f"{assemblyName}.dll")]
+
     def BeforeBuild(self):
         # 不自动重编 Antlr Parser 了，解析器代码已经非常稳定
         # parserBuilder = AntlrBuilder(AntlrConfigs["YALuaToyParser"])
@@ -42,18 +106,34 @@ class CSharpBuilder(BuilderBase):
             csprojDir = os.path.dirname(csprojPath)
             csprojName = os.path.splitext(os.path.basename(csprojPath))[0]
 
-            aot = platform.system() == self.projectConfig.System
+            aot = self.NativeAot
 
             # publish command
             commands = ["dotnet", "publish", csprojPath, "-c", buildType, "-r", machine]
             if (aot):
                 commands.append("-p:PublishAot=true")
+            if self.projectConfig.isolatedBuild:
+                # 中间目录按目标隔离（相对路径，引用的项目也各自隔离），project.assets.json 仍在 obj/ 下共享
+                isolatedDir = f"Isolated/{self.TargetName}/"
+                publishDir = os.path.join(csprojDir, "bin", isolatedDir, "publish")
+                commands.extend([
+                    "--no-restore",
+                    f"-p:PublishAot={'true' if aot else 'false'}",
+                    f"-p:RuntimeIdentifiers={';'.join(MATRIX_RIDS)}", # 必须和 restore 时一致
+                    f"-p:BaseOutputPath=bin/{isolatedDir}",
+                    f"-p:IntermediateOutputPath=obj/{isolatedDir}",
+                    "-o", publishDir,
+                ])
             CommandUtils.ExecuteCommand(commands)
 
             # install to out
-            nativeDir = os.path.join(csprojDir, "bin", buildType, f"net{NET_VERSION}", machine, "native")
-            publishDir = os.path.join(csprojDir, "bin", buildType, f"net{NET_VERSION}", machine, "publish")
-            outputDir = os.path.join("out", self.projectConfig.name, self.projectConfig.System)
+            if self.projectConfig.isolatedBuild: # 指定了 -o，AOT 的可执行文件也在 publishDir 里
+                installDir = publishDir
+            else:
+                nativeDir = os.path.join(csprojDir, "bin", buildType, f"net{NET_VERSION}", machine, "native")
+                publishDir = os.path.join(csprojDir, "bin", buildType, f"net{NET_VERSION}", machine, "publish")
+                installDir = nativeDir if aot else publishDir
+            outputDir = self.OutputDir
 
             # iterate publishDir files:
             # if self.projectConfig.System == "Darwin":
@@ -71,17 +151,20 @@ class CSharpBuilder(BuilderBase):
             #         itemPath = os.path.join(publishDir, item)
             #         shutil.copy(itemPath, outputDir)
 
-            shutil.rmtree(outputDir, ignore_errors=True) # remove out dir
-            PathUtils.CheckDir(outputDir, create=True) # create out dir
-            if (aot):
-                shutil.copytree(nativeDir, outputDir, dirs_exist_ok=True) # copy publish files to out
-            else:
-                shutil.copytree(publishDir, outputDir, dirs_exist_ok=True) # copy publish files to out
+            # 增量安装：没变的文件硬链接，变了的才写，最后原子切换（并行的 runner 不会看到半个目录）
+            with TraceUtils.Span(f"Install {outputDir}", "build"):
+                stats = InstallUtils.InstallTree(installDir, outputDir)
+            print(f"Installed to '{outputDir}': {stats['linked']} unchanged, {stats['reflinked']} reflinked, {stats['copied']} copied")
             return BuildResult(0, outputDir)
+        elif buildCommand == "test" and self.projectConfig.testShards > 1 and self.projectConfig.testFilter is None:
+            return self._DoShardedTest()
         elif buildCommand == "test":
+            # 先单独编译，编译失败直接抛异常，dotnet test 返回非 0 就只可能是测试没过
+            CommandUtils.ExecuteCommand(["dotnet", "build", csprojPath, "-c", buildType])
             command = [
                 "dotnet", "test", csprojPath,
                 "-c", buildType,
+                "--no-build",
                 "--logger", "console;verbosity=normal",
             ]
             if self.projectConfig.coverlet:
@@ -89,12 +172,93 @@ class CSharpBuilder(BuilderBase):
                 command.append("/p:CoverletOutput=out/coverage")
                 # command.append("/p:MergeWith=out/coverage.json")
                 command.append("/p:CoverletOutputFormat=\"cobertura,json\"")
+            command.append("--filter")
             if self.projectConfig.testFilter is not None:
-                command.append("--filter")
                 command.append(self.projectConfig.testFilter)
-            CommandUtils.TryExecuteCommand(command)
+            else:
+                command.append(TestShardUtils.EXCLUDE_PERF_FILTER)
+            returncode = CommandUtils.TryExecuteCommand(command)
+            if returncode != 0:
+                return BuildResult(returncode, csprojPath, "Test failed.", testFailed=True)
         else:
             raise Exception("Unknown build command.")
 
         return BuildResult(0, csprojPath)
 
+    def _DoShardedTest(self) -> BuildResult:
+        """按测试类分片，多个 dotnet test 进程并行执行，最后合并各分片的覆盖率报告"""
+        csprojPath = self.projectConfig.csprojPath
+        buildType = self.projectConfig.buildType
+        csprojDir = os.path.dirname(csprojPath)
+        assemblyName = GetAssemblyName(csprojPath)
+        shardsDir = os.path.join(csprojDir, "out", "Shards")
+        durationsPath = os.path.join(csprojDir, "out", "TestDurations.json")
+
+        CommandUtils.ExecuteCommand(["dotnet", "build", csprojPath, "-c", buildType])
+
+        durations = TestShardUtils.LoadDurations(durationsPath)
+        shards = TestShardUtils.BalanceShards(TestShardUtils.DiscoverTestClasses(csprojDir), durations, self.projectConfig.testShards)
+        shutil.rmtree(shardsDir, ignore_errors=True)
+
+        # coverlet 会原地插桩测试目录下的程序集，所以每个分片用一份独立拷贝（目录深度保持不变，测试里的相对路径才能用）
+        binDir = os.path.join(csprojDir, "bin", buildType, f"net{NET_VERSION}")
+        commands = []
+        for i, shard in enumerate(shards):
+            shardBinDir = os.path.join(csprojDir, "bin", f"Shard{i}", f"net{NET_VERSION}")
+            shutil.rmtree(shardBinDir, ignore_errors=True)
+            shutil.copytree(binDir, shardBinDir)
+            resultsDir = os.path.join(shardsDir, f"shard{i}")
+            PathUtils.CheckDir(resultsDir, create=True)
+            command = [
+                "dotnet", "test", os.path.join(shardBinDir, f"{assemblyName}.dll"),
+                "--filter", TestShardUtils.MakeFilter(shard),
+                "--logger", f"trx;LogFileName=shard{i}.trx",
+                "--results-directory", resultsDir,
+            ]
+            if self.projectConfig.coverlet:
+                command.extend([
+                    "--collect", "XPlat Code Coverage",
+                    "--settings", os.path.join(csprojDir, "coverlet.runsettings"),
+                    "--", "DataCollectionRunSettings.DataCollectors.DataCollector.Configuration.Format=cobertura,json",
+                ])
+            print(f"Shard {i}: {len(shard)} test classes")
+            commands.append(command)
+
+        async def RunShards():
+            return await asyncio.gather(*(
+                CommandUtils.ExecuteCommandAsync(command, prefix=f"shard{i}", capture=True) for i, command in enumerate(commands)
+            ))
+        failed = []
+        for i, result in enumerate(asyncio.run(RunShards())):
+            logPath = os.path.join(shardsDir, f"shard{i}.log")
+            with open(logPath, "w", encoding="utf-8") as file:
+                file.write(result.output)
+            print(f"Shard {i} finished in {result.duration:.1f}s, return code: {result.returncode}, log: {logPath}")
+            if result.Failed:
+                failed.append(i)
+
+        # 记录各测试类耗时，供下次分片参考
+        for i in range(len(shards)):
+            trxPath = os.path.join(shardsDir, f"shard{i}", f"shard{i}.trx")
+            if os.path.exists(trxPath):
+                durations.update(TestShardUtils.ParseTrxDurations(trxPath))
+        TestShardUtils.SaveDurations(durationsPath, durations)
+
+        with TraceUtils.Span("MergeCoverage", "test"):
+            self._MergeShardCoverage(shardsDir)
+
+        if failed:
+            print(f"Test failed in shards: {failed}")
+            return BuildResult(1, csprojPath, f"Test failed in shards: {failed}", testFailed=True)
+        return BuildResult(0, csprojPath)
+
+    def _MergeShardCoverage(self, shardsDir: str):
+        csprojDir = os.path.dirname(self.projectConfig.csprojPath)
+        if self.projectConfig.coverlet:
+            shardFiles = PathUtils.ListFiles(shardsDir)
+            coberturaFiles = [f for f in shardFiles if os.path.basename(f) == "coverage.cobertura.xml"]
+            jsonFiles = [f for f in shardFiles if os.path.basename(f) == "coverage.json"]
+            if coberturaFiles:
+                TestShardUtils.MergeCobertura(coberturaFiles, os.path.join(csprojDir, "out", "coverage.cobertura.xml"))
+            if jsonFiles:
+                TestShardUtils.MergeCoverletJson(jsonFiles, os.path.join(csprojDir, "out", "coverage.json"))
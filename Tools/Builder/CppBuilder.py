@@ -8,6 +8,21 @@ from Utils import RunnerUtils, CommandUtils, PathUtils
 
 class CppBuilder(BuilderBase):
 
+    @property
+    def OutputDir(self) -> str:
+        return os.path.join(self.projectConfig.cmakeDir, "build")
+
+    def GetInputs(self) -> list:
+        assert isinstance(self.projectConfig, CppProjectConfig)
+        return PathUtils.ListFiles(self.projectConfig.cmakeDir, ("build",))
+
+    def GetOutputs(self) -> list:
+        assert isinstance(self.projectConfig, CppProjectConfig)
+        return [os.path.join(self.OutputDir, self.projectConfig.buildType, "bin")]
+
+    def GetCacheDir(self) -> str:
+        return os.path.join(self.OutputDir, "BuildCache") # 和 cmake 产物放在一起，清理 build 目录时一并失效
+
     def BeforeBuild(self):
         assert isinstance(self.projectConfig, CppProjectConfig)
         # if self.projectConfig.name in ("CLua", "CppPlayground"):  # 暂时不做 CAPI 支持了
@@ -20,7 +35,7 @@ class CppBuilder(BuilderBase):
         targetName = self.projectConfig.targetName
         buildType = self.projectConfig.buildType
 
-        outputDir = os.path.join(cmakeDir, "build")
+        outputDir = self.OutputDir
         # path to the target executable
         rawTargetPath = os.path.join(outputDir, buildType, "bin", targetName)
 
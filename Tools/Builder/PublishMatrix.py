@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# 发布矩阵：一次 restore 覆盖所有 RID，然后 (RID, buildType, AOT) 的每个组合作为独立的构建节点并发 publish，
+# 各目标的 bin/obj 中间目录互相隔离（见 CSharpProjectConfig.isolatedBuild），总耗时取决于最慢的单个目标。
+
+import os
+import sys
+import time
+from copy import copy
+from typing import Optional
+from Const.ProjectConfig import CSharpProjectConfig
+from Builder.CSharpBuilder import CSharpBuilder, MATRIX_RIDS, GetAssemblyName
+from Builder.BuildScheduler import BuildScheduler
+from Utils import CommandUtils, PathUtils
+
+RID_SYSTEMS = {"win": "Windows", "osx": "Darwin", "linux": "Linux"}
+AOT_MODES = ("auto", "on", "off")
+
+def ParseRid(rid: str) -> tuple:
+    """win-x64 -> ("Windows", "x64")"""
+    if rid not in MATRIX_RIDS:
+        raise Exception(f"Unsupported RID '{rid}', expected one of: {', '.join(MATRIX_RIDS)}")
+    os_, arch = rid.split("-")
+    return RID_SYSTEMS[os_], arch
+
+def MakeTargets(projectConfig: CSharpProjectConfig, rids: Optional[list]=None, buildTypes: Optional[list]=None, aotModes: Optional[list]=None) -> list:
+    """返回矩阵中每个目标的 projectConfig（重复的组合会被去掉，比如 AOT auto 和 on/off 解析成同一个目标）"""
+    targets = {}
+    for rid in rids or MATRIX_RIDS:
+        system, arch = ParseRid(rid)
+        for buildType in buildTypes or [projectConfig.buildType]:
+            for aotMode in aotModes or ["auto"]:
+                config = copy(projectConfig)
+                config.buildCommand = "publish"
+                config.buildType = buildType
+                config.isolatedBuild = True
+                config._system, config._arch = system, arch
+                config.publishAot = None if aotMode == "auto" else aotMode == "on"
+                targets.setdefault(CSharpBuilder(config).TargetName, config)
+    return list(targets.values())
+
+def Restore(projectConfig: CSharpProjectConfig, targets: list):
+    """所有目标共享一次 restore（project.assets.json 包含全部 RID），之后各目标 publish 都加 --no-restore"""
+    command = ["dotnet", "restore", projectConfig.csprojPath, f"-p:RuntimeIdentifiers={';'.join(MATRIX_RIDS)}"]
+    if any(CSharpBuilder(target).NativeAot for target in targets):
+        command.append("-p:PublishAot=true")
+    CommandUtils.ExecuteCommand(command, errorHint="restore for publish matrix failed")
+
+def RunMatrix(projectConfig: CSharpProjectConfig, targets: list, maxWorkers: Optional[int]=None) -> bool:
+    if not targets:
+        return True
+    startTime = time.perf_counter()
+    Restore(projectConfig, targets)
+    scheduler = BuildScheduler(maxWorkers or len(targets))
+    keys = {}
+    for target in targets:
+        builder = CSharpBuilder(target)
+        keys[scheduler.Add(CSharpBuilder, target, key=f"{target.name}:{builder.TargetName}")] = builder
+    results = scheduler.Run()
+    PrintReport(scheduler, keys, results, time.perf_counter() - startTime)
+    return scheduler.Success
+
+def PrintReport(scheduler: BuildScheduler, keys: dict, results: dict, wallTime: float):
+    print("\n[PublishMatrix] report:")
+    print(f"  {'target':<32} {'state':<8} {'time':>8}  {'binary':>10}  {'total':>10}")
+    for key, builder in keys.items():
+        node = scheduler.nodes[key]
+        binary = total = "-"
+        if key in results and results[key].Success:
+            outputDir = results[key].output
+            suffix = ".exe" if builder.projectConfig.System == "Windows" else "" # 按目标平台而不是本机平台
+            executable = os.path.join(outputDir, GetAssemblyName(builder.projectConfig.csprojPath) + suffix)
+            if os.path.exists(executable):
+                binary = _FormatSize(os.path.getsize(executable))
+            total = _FormatSize(sum(os.path.getsize(path) for path in PathUtils.ListFiles(outputDir)))
+        print(f"  {builder.TargetName:<32} {node.state:<8} {node.duration:7.1f}s  {binary:>10}  {total:>10}")
+    slowest = max((node.duration for node in scheduler.nodes.values()), default=0.0)
+    print(f"  wall (incl. restore): {wallTime:.1f}s, slowest target: {slowest:.1f}s")
+
+def _FormatSize(size: int) -> str:
+    return f"{size / (1 << 20):.1f}MB"
@@ -3,6 +3,9 @@ import platform
 from dataclasses import dataclass, field
 from typing import Literal, Optional
 
+def HostArch() -> str:
+    return "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "x64"
+
 @dataclass
 class CSharpProjectConfig:
     name: str = field()
@@ -14,14 +17,24 @@ class CSharpProjectConfig:
     # Test Config
     testFilter: Optional[str] = field(default=None)
     coverlet: bool = field(default=False)
+    testShards: int = field(default=0) # >1 时按测试类分片并行执行
+
+    # Publish Config
+    publishAot: Optional[bool] = field(default=None) # None 表示目标和本机一致时自动开启
+    isolatedBuild: bool = field(default=False) # 发布矩阵用：独立的 bin/obj 中间目录，共享事先做好的 restore，可以并发
 
     # Misc Config (can be automatically obtained)
     _system: Optional[str] = field(default=None)
+    _arch: Optional[str] = field(default=None) # x64 / arm64
 
     @property
     def System(self) -> str:
         return platform.system() if self._system is None else self._system
 
+    @property
+    def Arch(self) -> str:
+        return HostArch() if self._arch is None else self._arch
+
 CSharpConfigs = {
     "YALuaToy": CSharpProjectConfig("YALuaToy", "YALuaToy/YALuaToy.csproj", buildCommand="publish", needRun=False),
     "Playground": CSharpProjectConfig("Playground", "Playground/Playground.csproj", buildCommand="build", needRun=True),
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# 并行构建全部产物：Antlr lexer/parser -> YALuaToy.Interpreter，以及独立的 CLua（测试需要 luac）。
+# 用法：python Tools/RunPy.py Tools/Project/BuildAll.py [-j N]
+
+import os
+import sys
+import argparse
+from Const.ProjectConfig import CSharpConfigs, CppConfigs, AntlrConfigs
+from Builder.AntlrBuilder import AntlrBuilder
+from Builder.CSharpBuilder import CSharpBuilder
+from Builder.CppBuilder import CppBuilder
+from Builder.BuildScheduler import BuildScheduler
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("-j", "--jobs", type=int, default=None, help="max parallel build nodes")
+    args = argParser.parse_args()
+
+    scheduler = BuildScheduler(args.jobs)
+    parser = scheduler.Add(AntlrBuilder, AntlrConfigs["YALuaToyParser"])
+    scheduler.Add(CSharpBuilder, CSharpConfigs["YALuaToy.Interpreter"], deps=[parser])
+    scheduler.Add(CppBuilder, CppConfigs["CLua"])
+    scheduler.Run()
+    sys.exit(0 if scheduler.Success else 1)
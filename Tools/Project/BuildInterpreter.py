@@ -3,14 +3,19 @@ import os
 import sys
 from Const.ProjectConfig import CSharpConfigs, CSharpProjectConfig, AntlrConfigs
 from Builder.AntlrBuilder import AntlrBuilder
+from Builder.CSharpBuilder import CSharpBuilder
+from Builder.BuildScheduler import BuildScheduler
 from Runner.CSharpRunner import CSharpRunner
 from Utils import RunnerUtils
 
 if __name__ == "__main__":
-    # 编译 Antlr 模版
-    parserBuilder = AntlrBuilder(AntlrConfigs["YALuaToyParser"])
-    parserBuilder.Build()
+    # 编译 Antlr 模版，再编译 Interpreter
+    scheduler = BuildScheduler()
+    parser = scheduler.Add(AntlrBuilder, AntlrConfigs["YALuaToyParser"])
+    scheduler.Add(CSharpBuilder, CSharpConfigs["YALuaToy.Interpreter"], deps=[parser])
+    scheduler.Run()
+    if not scheduler.Success:
+        raise Exception("Build failed.")
 
-    # 编译 Interpreter
+    # 交叉编译（本平台的构建已缓存，不会重复执行）
     RunnerUtils.Launch(CSharpRunner, CSharpConfigs["YALuaToy.Interpreter"])
-    pass
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# 建立测试影响分析索引：每个测试类单独运行一次并收集 coverlet 覆盖率，得到 源文件 -> 测试类 的映射，
+# 写到 YALuaToy.Tests/out/TestImpact.json，并记录当前提交。之后 CSharpRunner 的 --impact 只跑受影响的测试类。
+# 用法：python Tools/RunPy.py Tools/Project/BuildTestImpactIndex.py [-j N]
+
+import os
+import sys
+import glob
+import shutil
+import asyncio
+import argparse
+from Const.ProjectConfig import CSharpConfigs
+from Builder.CSharpBuilder import GetAssemblyName, GetProjectReferences, NET_VERSION
+from Utils import CommandUtils, PathUtils, TestImpactUtils, TestShardUtils
+
+def MakeCommand(dllPath: str, testClass: str, resultsDir: str, settingsPath: str) -> list:
+    return [
+        "dotnet", "test", dllPath,
+        "--filter", TestShardUtils.MakeFilter([testClass]),
+        "--results-directory", resultsDir,
+        "--collect", "XPlat Code Coverage",
+        "--settings", settingsPath,
+        "--", "DataCollectionRunSettings.DataCollectors.DataCollector.Configuration.Format=json",
+    ]
+
+async def RunAll(workerDlls: list, jobs: list) -> dict:
+    """jobs: [(测试类, 结果目录)]，每个 worker 有自己的一份程序集拷贝（coverlet 会原地插桩），依次执行分到的测试类"""
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    coverage = {}
+    failed = []
+
+    async def Worker(i: int, dllPath: str, settingsPath: str):
+        while not queue.empty():
+            testClass, resultsDir = queue.get_nowait()
+            result = await CommandUtils.ExecuteCommandAsync(
+                MakeCommand(dllPath, testClass, resultsDir, settingsPath), prefix=f"impact{i}", capture=True, quiet=True
+            )
+            reports = glob.glob(os.path.join(resultsDir, "*", "coverage.json"))
+            if reports:
+                coverage[testClass] = reports[0]
+            else:
+                failed.append(testClass)
+            print(f"[{len(coverage) + len(failed)}/{len(jobs)}] {testClass}: {'ok' if reports else 'no coverage'} ({result.duration:.1f}s)")
+
+    settingsPath = os.path.join(os.path.dirname(CSharpConfigs["YALuaToy.Tests"].csprojPath), "coverlet.runsettings")
+    await asyncio.gather(*(Worker(i, dllPath, settingsPath) for i, dllPath in enumerate(workerDlls)))
+    if failed:
+        print(f"WARNING! no coverage for: {', '.join(failed)}")
+    return coverage
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("-j", "--jobs", type=int, default=None)
+    args = argParser.parse_args()
+
+    testsConfig = CSharpConfigs["YALuaToy.Tests"]
+    csprojPath = testsConfig.csprojPath
+    csprojDir = os.path.dirname(csprojPath)
+    impactDir = os.path.join(csprojDir, "out", "Impact")
+    commit = TestImpactUtils.GitHead() # 先记录提交，建索引期间的改动下次会被当作改动处理
+
+    CommandUtils.ExecuteCommand(["dotnet", "build", csprojPath, "-c", testsConfig.buildType])
+    testClasses = TestShardUtils.DiscoverTestClasses(csprojDir)
+    shutil.rmtree(impactDir, ignore_errors=True)
+
+    # 和分片测试一样，每个 worker 一份独立拷贝，目录深度保持不变
+    binDir = os.path.join(csprojDir, "bin", testsConfig.buildType, f"net{NET_VERSION}")
+    workerCount = max(1, min(args.jobs or os.cpu_count() or 1, len(testClasses)))
+    workerDlls = []
+    for i in range(workerCount):
+        workerBinDir = os.path.join(csprojDir, "bin", f"Impact{i}", f"net{NET_VERSION}")
+        shutil.rmtree(workerBinDir, ignore_errors=True)
+        shutil.copytree(binDir, workerBinDir)
+        workerDlls.append(os.path.join(workerBinDir, f"{GetAssemblyName(csprojPath)}.dll"))
+
+    jobs = [(testClass, os.path.join(impactDir, str(i))) for i, testClass in enumerate(testClasses)]
+    coverage = asyncio.run(RunAll(workerDlls, jobs))
+
+    sources = []
+    for referencePath in GetProjectReferences(csprojPath):
+        sources.extend(path for path in PathUtils.ListFiles(os.path.dirname(referencePath), TestImpactUtils.BUILD_DIRS) if path.endswith(".cs"))
+    index = TestImpactUtils.BuildIndex(coverage, sources, commit)
+    indexPath = TestImpactUtils.IndexPath(csprojDir)
+    TestImpactUtils.SaveIndex(indexPath, index)
+    print(f"Impact index: {len(index['tests'])} test classes, {len(index['files'])} covered files, commit {commit[:10]} -> '{indexPath}'")
+    sys.exit(0 if len(coverage) == len(testClasses) else 1)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# 并行预生成 luac -p -l 的输出，缓存到 out/LuacCache/<luac 哈希>/<lua 文件内容哈希>.clua，
+# 测试里的 LuacUtils 会优先读取这里的缓存，未命中时才启动 luac 进程。
+# 用法：python Tools/RunPy.py Tools/Project/GenerateLuacListings.py [-j N] [--prune]
+
+import os
+import sys
+import shutil
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from Utils import HashUtils, PathUtils
+
+LUAC_PATH = "CLua/build/Debug/bin/luac.exe" if platform.system() == "Windows" else "CLua/build/Debug/bin/luac"
+LUAC_CACHE_DIR = "out/LuacCache"
+LUA_DIRS = ["Assets/Lua/TranslatorTests", "Assets/Lua/LexerTests", "Assets/Lua/OfficialTests"]
+
+def GetCacheDir(luacPath: str) -> str:
+    return os.path.join(LUAC_CACHE_DIR, HashUtils.HashFile(luacPath)[:16])
+
+def CompileListing(luacPath: str, filepath: str, cachePath: str) -> str:
+    """在进程池中执行，成功返回空字符串，失败返回错误信息"""
+    process = subprocess.run([luacPath, "-p", "-l", filepath], capture_output=True, text=True)
+    if process.returncode != 0:
+        return process.stderr.strip() or f"luac return code: {process.returncode}"
+    tempPath = f"{cachePath}.{os.getpid()}.tmp"
+    with open(tempPath, "w", encoding="utf-8", newline="") as file:
+        file.write(process.stdout)
+    os.replace(tempPath, cachePath)
+    return ""
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("-j", "--jobs", type=int, default=None)
+    argParser.add_argument("--prune", action="store_true", help="remove listings of other luac builds")
+    args = argParser.parse_args()
+
+    if not os.path.exists(LUAC_PATH):
+        raise Exception(f"luac not found at {LUAC_PATH}, please build CLua first.")
+    cacheDir = GetCacheDir(LUAC_PATH)
+    PathUtils.CheckDir(cacheDir, create=True)
+    if args.prune:
+        for item in os.listdir(LUAC_CACHE_DIR):
+            itemPath = os.path.join(LUAC_CACHE_DIR, item)
+            if os.path.isdir(itemPath) and not os.path.samefile(itemPath, cacheDir):
+                shutil.rmtree(itemPath)
+
+    pending = {}
+    total = 0
+    for luaDir in LUA_DIRS:
+        for filepath in PathUtils.ListFiles(luaDir):
+            if not filepath.endswith(".lua"):
+                continue
+            total += 1
+            cachePath = os.path.join(cacheDir, f"{HashUtils.HashFile(filepath)}.clua")
+            if not os.path.exists(cachePath):
+                pending[cachePath] = filepath # 内容相同的文件只编译一次
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(CompileListing, LUAC_PATH, filepath, cachePath): filepath for cachePath, filepath in pending.items()}
+        for future, filepath in futures.items():
+            error = future.result()
+            if error:
+                failed += 1
+                print(f"luac failed: {filepath}\n  {error}")
+    print(f"luac listings: {total} files, {len(pending)} compiled, {total - len(pending)} up to date, {failed} failed. Cache: {cacheDir}")
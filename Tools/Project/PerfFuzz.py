@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# 差分性能模糊测试：随机生成一定会结束的 Lua 程序（见 Utils/LuaGenUtils），在进程池里分别用 CLua 和发布版 YALuaToy 执行，
+# 比较输出和耗时比（扣除各自的启动时间）。输出不一致、或耗时比超过本轮中位数的 --factor 倍（且不低于 --min-ratio）的用例，
+# 会按块最小化后写到语料目录。
+# 用法：python Tools/RunPy.py Tools/Project/PerfFuzz.py [--count 200] [--seed 0] [--factor 3] [-j N]
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Const.ProjectConfig import CSharpConfigs
+from Builder.CSharpBuilder import CSharpBuilder
+from Builder.CppBuilder import CppBuilder
+from Runner.BenchRunner import GetCLuaConfig, GetCLuaPath
+from Utils import CommandUtils, LuaGenUtils, PathUtils
+
+CORPUS_DIR = "out/PerfFuzz/corpus"
+WORK_DIR = "out/PerfFuzz/work"
+MIN_TIME = 0.001 # 扣除启动时间后 CLua 耗时的下限，避免除以接近 0 的数
+
+def Measure(executable: str, path: str, runs: int, timeout: float) -> dict:
+    """执行 runs 次取最短耗时（最不受干扰的一次）"""
+    best = None
+    for _ in range(runs):
+        result = CommandUtils.RunCommand([executable, path], capture=True, quiet=True, timeout=timeout)
+        if result.timedOut or result.Failed:
+            return {"status": "timeout" if result.timedOut else "error", "time": result.duration, "output": result.output}
+        if best is None or result.duration < best["time"]:
+            best = {"status": "ok", "time": result.duration, "output": result.output}
+    return best
+
+def Compare(env: dict, blocks: list, tag: str) -> dict:
+    """在进程池中执行：写出程序，分别执行并比较"""
+    path = os.path.join(WORK_DIR, f"{tag}-{os.getpid()}.lua")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(LuaGenUtils.Render(blocks))
+    clua = Measure(env["clua"], path, env["runs"], env["timeout"])
+    yaluatoy = Measure(env["yaluatoy"], path, env["runs"], env["timeout"] * env["timeoutFactor"])
+    os.remove(path)
+    result = {"clua": clua, "yaluatoy": yaluatoy, "ratio": None, "mismatch": False}
+    if clua["status"] != "ok": # CLua 都跑不通的程序是生成器的问题，不算 YALuaToy 的
+        result["invalid"] = True
+        return result
+    result["mismatch"] = yaluatoy["status"] != "ok" or yaluatoy["output"] != clua["output"]
+    if yaluatoy["status"] == "ok":
+        cluaTime = max(clua["time"] - env["cluaStartup"], MIN_TIME)
+        result["ratio"] = max(yaluatoy["time"] - env["yaluatoyStartup"], 0.0) / cluaTime
+    return result
+
+def Fuzz(env: dict, seed: int) -> tuple:
+    blocks = LuaGenUtils.LuaGenerator(seed, env["scale"]).Generate()
+    return seed, blocks, Compare(env, blocks, f"seed{seed}")
+
+def Minimize(env: dict, seed: int, blocks: list, kind: str, limit: float) -> tuple:
+    """贪心地逐个去掉块，只要问题（不一致 / 耗时比超过 limit）仍然存在就保留删除"""
+    def Interesting(candidate: list) -> bool:
+        result = Compare(env, candidate, f"min{seed}")
+        if result.get("invalid"):
+            return False
+        if kind == "mismatch":
+            return result["mismatch"]
+        return result["ratio"] is not None and result["ratio"] >= limit
+
+    i = len(blocks) - 1
+    while i >= 0 and len(blocks) > 1:
+        candidate = blocks[:i] + blocks[i + 1:]
+        if Interesting(candidate):
+            blocks = candidate
+        i -= 1
+    return seed, blocks, Compare(env, blocks, f"min{seed}")
+
+def Startup(executable: str) -> float:
+    """空程序的执行时间（进程启动 + 运行时初始化）"""
+    path = os.path.join(WORK_DIR, "empty.lua")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("")
+    return Measure(executable, path, 5, 60.0)["time"]
+
+def WriteCase(corpusDir: str, kind: str, seed: int, blocks: list, result: dict):
+    ratio = result["ratio"]
+    name = f"{kind}-seed{seed}" + (f"-x{ratio:.0f}" if ratio is not None else "") + ".lua"
+    header = (
+        f"-- perf fuzz case: {kind}, seed {seed}\n"
+        f"-- clua {result['clua']['time']:.3f}s, yaluatoy {result['yaluatoy']['time']:.3f}s ({result['yaluatoy']['status']})"
+        + (f", ratio {ratio:.1f}x\n" if ratio is not None else "\n")
+    )
+    path = os.path.join(corpusDir, name)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(header + LuaGenUtils.Render(blocks))
+    print(f"  -> {path}")
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("--count", type=int, default=200, help="number of generated programs")
+    argParser.add_argument("--seed", type=int, default=0, help="first seed")
+    argParser.add_argument("--scale", type=float, default=1.0, help="multiplier of the loop counts")
+    argParser.add_argument("--runs", type=int, default=1, help="runs per program, the fastest one is used")
+    argParser.add_argument("--factor", type=float, default=3.0, help="report programs slower than factor * median ratio")
+    argParser.add_argument("--min-ratio", type=float, default=10.0, help="never report programs below this ratio")
+    argParser.add_argument("--timeout", type=float, default=10.0, help="CLua timeout in seconds, YALuaToy gets 20x")
+    argParser.add_argument("--corpus", default=CORPUS_DIR)
+    argParser.add_argument("-j", "--jobs", type=int, default=None)
+    args = argParser.parse_args()
+
+    CppBuilder(GetCLuaConfig()).Build()
+    buildResult = CSharpBuilder(CSharpConfigs["YALuaToy.Interpreter"]).Build()
+    PathUtils.CheckDir(WORK_DIR, create=True)
+    PathUtils.CheckDir(args.corpus, create=True)
+
+    env = {
+        "clua": GetCLuaPath(),
+        "yaluatoy": PathUtils.GetExecutable(os.path.join(buildResult.output, "YALuaToy.Interpreter")),
+        "scale": args.scale, "runs": args.runs, "timeout": args.timeout, "timeoutFactor": 20.0,
+    }
+    env["cluaStartup"] = Startup(env["clua"])
+    env["yaluatoyStartup"] = Startup(env["yaluatoy"])
+    print(f"startup: clua {env['cluaStartup'] * 1000:.1f}ms, yaluatoy {env['yaluatoyStartup'] * 1000:.1f}ms")
+
+    startTime = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(Fuzz, env, seed) for seed in range(args.seed, args.seed + args.count)]
+        for future in as_completed(futures):
+            seed, blocks, result = future.result()
+            results[seed] = (blocks, result)
+            ratio = f"{result['ratio']:.1f}x" if result["ratio"] is not None else "-"
+            state = "invalid" if result.get("invalid") else "MISMATCH" if result["mismatch"] else "ok"
+            print(f"[{len(results)}/{args.count}] seed {seed}: {state} {ratio}")
+
+        ratios = [result["ratio"] for _, result in results.values() if result["ratio"] is not None and not result["mismatch"]]
+        median = statistics.median(ratios) if ratios else 0.0
+        limit = max(args.min_ratio, median * args.factor)
+        print(f"\nmedian ratio: {median:.1f}x, reporting programs above {limit:.1f}x")
+
+        minimizing = []
+        for seed, (blocks, result) in sorted(results.items()):
+            if result["mismatch"]:
+                minimizing.append(executor.submit(Minimize, env, seed, blocks, "mismatch", limit))
+            elif result["ratio"] is not None and result["ratio"] >= limit:
+                minimizing.append(executor.submit(Minimize, env, seed, blocks, "slow", limit))
+        for future in as_completed(minimizing):
+            seed, blocks, result = future.result()
+            kind = "mismatch" if results[seed][1]["mismatch"] else "slow"
+            print(f"seed {seed}: {kind}, minimized to {len(blocks)} of {len(results[seed][0])} blocks")
+            WriteCase(args.corpus, kind, seed, blocks, result)
+
+    summary = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"), "seeds": [args.seed, args.seed + args.count], "scale": args.scale,
+        "median": median, "limit": limit, "reported": len(minimizing),
+    }
+    with open(os.path.join(args.corpus, "last-run.json"), "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=1)
+    print(f"\n{len(minimizing)} cases reported in {time.perf_counter() - startTime:.1f}s")
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# 常驻的 watch 模式：工具模块只加载一次，监听语法文件、C# 项目和 Lua 资源的变化（防抖），
+# 每次变化只重编受影响的目标（dotnet 使用常驻的 MSBuild/编译服务器），可选地重跑受影响的测试类。
+# 用法：python Tools/RunPy.py Tools/Project/Watch.py [--test] [--debounce 0.3]
+
+import os
+import sys
+import time
+import argparse
+from copy import copy
+from Const.ProjectConfig import CSharpConfigs, AntlrConfigs
+from Builder.AntlrBuilder import AntlrBuilder
+from Builder.CSharpBuilder import CSharpBuilder, GetProjectReferences, SOURCE_IGNORE_DIRS
+from Runner.CSharpRunner import CSharpRunner
+from Utils import CommandUtils, PathUtils, TestImpactUtils, WatchUtils
+
+LUA_ASSETS_DIR = "Assets/Lua"
+TESTS_CONFIG = CSharpConfigs["YALuaToy.Tests"]
+
+def GetWatchBuildConfig():
+    """watch 模式下解释器只做增量 build（不做 AOT publish），反馈更快"""
+    config = copy(CSharpConfigs["YALuaToy.Interpreter"])
+    config.buildCommand = "build"
+    config.buildType = "Debug"
+    return config
+
+def FindTestFile(sourcePath: str) -> str:
+    """YALuaToy/Core/LuaTable.cs -> YALuaToy.Tests/Core/LuaTableTests.cs（测试目录和源码目录结构一一对应），找不到返回空串"""
+    testsDir = os.path.dirname(TESTS_CONFIG.csprojPath)
+    if PathUtils.SameRoot(sourcePath, testsDir):
+        return sourcePath
+    for csprojPath in GetProjectReferences(TESTS_CONFIG.csprojPath):
+        projectDir = os.path.dirname(csprojPath)
+        if projectDir != testsDir and PathUtils.SameRoot(sourcePath, projectDir):
+            relPath = os.path.relpath(sourcePath, projectDir)
+            testPath = os.path.join(testsDir, os.path.dirname(relPath), os.path.splitext(os.path.basename(relPath))[0] + "Tests.cs")
+            return testPath if os.path.exists(testPath) else ""
+    return ""
+
+class WatchSession:
+
+    def __init__(self, runTests: bool):
+        self.runTests = runTests
+        self.buildConfig = GetWatchBuildConfig()
+        self.grammarPaths = {os.path.realpath(config.g4Path): config for config in AntlrConfigs.values()}
+        self.generatedDirs = {os.path.realpath(config.outputDir) for config in AntlrConfigs.values()}
+        self.buildProjectDirs = {os.path.realpath(os.path.dirname(path)) for path in GetProjectReferences(self.buildConfig.csprojPath)}
+
+    @property
+    def WatchRoots(self) -> list:
+        roots = {os.path.dirname(path) for path in GetProjectReferences(TESTS_CONFIG.csprojPath)}
+        roots |= {os.path.dirname(path) for path in GetProjectReferences(self.buildConfig.csprojPath)}
+        roots |= {os.path.dirname(config.g4Path) for config in AntlrConfigs.values()}
+        roots.add(LUA_ASSETS_DIR)
+        roots = [root for root in roots if os.path.isdir(root)]
+        return sorted(root for root in roots if not any(other != root and PathUtils.SameRoot(root, other) for other in roots)) # 去掉嵌套的目录
+
+    def IsRelevant(self, path: str) -> bool:
+        realpath = os.path.realpath(path)
+        if any(PathUtils.SameRoot(realpath, dir) for dir in self.generatedDirs): # Antlr 的生成结果由本进程写出，不再触发
+            return False
+        return realpath in self.grammarPaths or path.endswith((".cs", ".csproj", ".lua"))
+
+    def Handle(self, changes: set):
+        startTime = time.perf_counter()
+        changes = sorted(path for path in changes if self.IsRelevant(path))
+        if not changes:
+            return
+        print(f"\n[Watch] {len(changes)} changed: {', '.join(os.path.relpath(path) for path in changes[:5])}{' ...' if len(changes) > 5 else ''}")
+
+        grammarChanged = [self.grammarPaths[os.path.realpath(path)] for path in changes if os.path.realpath(path) in self.grammarPaths]
+        sourceChanged = [path for path in changes if path.endswith((".cs", ".csproj"))]
+        luaChanged = [path for path in changes if path.endswith(".lua")] # 解释器运行时才读取，不需要重编
+        try:
+            if grammarChanged: # 改 lexer 也要重新生成 parser
+                AntlrBuilder(AntlrConfigs["YALuaToyParser"]).Build()
+            needBuild = grammarChanged or any(
+                any(PathUtils.SameRoot(path, dir) for dir in self.buildProjectDirs) for path in sourceChanged
+            )
+            if needBuild:
+                CSharpBuilder(self.buildConfig).Build()
+            if self.runTests:
+                self._RunTests(sourceChanged, luaChanged)
+        except Exception as e: # 构建失败不退出，等下一次修改
+            print(f"[Watch] failed: {e}")
+            return
+        print(f"[Watch] done in {time.perf_counter() - startTime:.2f}s")
+
+    def _RunTests(self, sourceChanged: list, luaChanged: list):
+        testFiles = {testFile for testFile in (FindTestFile(path) for path in sourceChanged) if testFile}
+        for path in luaChanged:
+            testFiles.update(TestImpactUtils.FindLuaTestFiles(path, os.path.dirname(TESTS_CONFIG.csprojPath)))
+        testFiles = sorted(testFiles)
+        for testFile in testFiles:
+            print(f"[Watch] test: {os.path.relpath(testFile)}")
+            CSharpRunner(CSharpRunner.GetConfigByPath(testFile), []).Run()
+
+def Main():
+    argParser = argparse.ArgumentParser(prog="Watch")
+    argParser.add_argument("--test", action="store_true", help="re-run the test classes impacted by each change")
+    argParser.add_argument("--debounce", type=float, default=0.3, help="seconds without changes before rebuilding")
+    args = argParser.parse_args()
+
+    # 常驻 MSBuild 节点和 Roslyn 编译服务器，后续增量构建不用再冷启动
+    os.environ["DOTNET_CLI_USE_MSBUILD_SERVER"] = "1"
+    os.environ["MSBUILDDISABLENODEREUSE"] = "0"
+
+    session = WatchSession(args.test)
+    watcher = WatchUtils.Watcher(session.WatchRoots, ignoreDirs=SOURCE_IGNORE_DIRS, debounce=args.debounce)
+    print(f"[Watch] watching ({watcher.Backend}): {', '.join(session.WatchRoots)}")
+    print("[Watch] press Ctrl+C to stop")
+    try:
+        while True:
+            session.Handle(watcher.Wait())
+    except KeyboardInterrupt:
+        print("\n[Watch] stopped")
+    finally:
+        watcher.Close()
+        CommandUtils.TryExecuteCommand(["dotnet", "build-server", "shutdown"], quiet=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(Main())
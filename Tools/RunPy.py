@@ -26,6 +26,10 @@ if __name__ == "__main__":
             if arg[1:] == "q" or arg[1:] == "quiet":
                 quiet = True
                 continue
+            elif arg[1:] == "t" or arg[1:] == "trace" or arg.startswith("-trace="): # 输出 Chrome trace
+                from Utils import TraceUtils
+                env[TraceUtils.TRACE_ENV] = arg[len("-trace="):] if "=" in arg else TraceUtils.DEFAULT_TRACE_PATH
+                continue
             else:
                 raise Exception(f"Unknown argument: {arg}")
         break
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# 解释器性能基准：分别用 AOT 发布的 YALuaToy.Interpreter 和 CLua 的 lua 执行一组 Lua 脚本，
+# 统计中位数/分位数，写入历史记录，并与历史基线比较，变慢超过阈值则失败。
+# 用法：python Tools/RunPy.py Tools/Runner/BenchRunner.py YALuaToy.Interpreter/YALuaToy.Interpreter.csproj [options]
+
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import argparse
+import statistics
+from copy import copy
+from Const.ProjectConfig import CSharpProjectConfig, CSharpConfigs, CppConfigs
+from Runner.RunnerBase import RunnerBase
+from Builder.BuilderBase import BuildResult
+from Builder.CSharpBuilder import CSharpBuilder
+from Builder.CppBuilder import CppBuilder
+from Utils import CommandUtils, RunnerUtils, PathUtils
+
+BENCH_SUITES = {
+    "curated": "Assets/Lua/Benchmarks/*.lua",
+    "tests": "Assets/Lua/Tests/*.lua",
+    "official": "Assets/Lua/OfficialTests/*.lua",
+}
+HISTORY_PATH = "out/Bench/history.json"
+BASELINE_WINDOW = 5 # 基线取最近几次记录的中位数
+
+def GetCLuaConfig():
+    config = copy(CppConfigs["CLua"])
+    config.buildType = "Release" # 和 Release 版本的 CLua 比较才公平
+    return config
+
+def GetCLuaPath() -> str:
+    config = GetCLuaConfig()
+    return PathUtils.GetExecutable(os.path.join(config.cmakeDir, "build", config.buildType, "bin", "lua"))
+
+def Percentile(samples: list, percent: float) -> float:
+    ordered = sorted(samples)
+    index = (len(ordered) - 1) * percent
+    low, high = int(index), min(int(index) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+def Summarize(samples: list) -> dict:
+    return {
+        "median": statistics.median(samples),
+        "p10": Percentile(samples, 0.1),
+        "p90": Percentile(samples, 0.9),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+class BenchRunner(RunnerBase):
+    BUILDER_CLASS = CSharpBuilder
+
+    def __init__(self, projectConfig, args: list):
+        super().__init__(projectConfig, args)
+        argParser = argparse.ArgumentParser(prog="BenchRunner")
+        argParser.add_argument("--suite", action="append", choices=list(BENCH_SUITES), help="workload suites (default: curated)")
+        argParser.add_argument("--filter", default="", help="only run workloads whose path contains this text")
+        argParser.add_argument("--warmup", type=int, default=1)
+        argParser.add_argument("--runs", type=int, default=5)
+        argParser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown against the baseline, 0.10 means 10%%")
+        argParser.add_argument("--timeout", type=float, default=600.0, help="timeout of a single run in seconds")
+        argParser.add_argument("--history", default=HISTORY_PATH)
+        argParser.add_argument("--no-clua", action="store_true", help="skip the reference CLua runs")
+        argParser.add_argument("--no-record", action="store_true", help="do not append this run to the history")
+        argParser.add_argument("--accept-regression", action="store_true", help="record a regressed run as the new baseline instead of failing")
+        self.options = argParser.parse_args(args)
+        self.regressions = []
+
+    @property
+    def NeedRun(self) -> bool:
+        return True
+
+    def BeforeRun(self):
+        if not self.options.no_clua:
+            CppBuilder(GetCLuaConfig()).Build()
+
+    def DoRun(self, buildResult: BuildResult):
+        assert(isinstance(self.projectConfig, CSharpProjectConfig))
+        interpreter = PathUtils.GetExecutable(os.path.join(buildResult.output, self.projectConfig.name))
+        clua = None if self.options.no_clua else GetCLuaPath()
+
+        results = {}
+        for workload in self._CollectWorkloads():
+            print(f"\n[Bench] {workload}")
+            result = {}
+            yaluatoy = self._Measure(interpreter, workload)
+            if yaluatoy is None:
+                continue
+            result["yaluatoy"], output = yaluatoy
+            if clua is not None:
+                reference = self._Measure(clua, workload)
+                if reference is not None:
+                    result["clua"], cluaOutput = reference
+                    result["ratio"] = result["yaluatoy"]["median"] / result["clua"]["median"]
+                    if cluaOutput != output:
+                        print(f"  WARNING! output differs from CLua")
+            results[workload] = result
+            self._PrintResult(result)
+
+        history = self._LoadHistory()
+        self._CheckRegressions(results, history)
+        # 变慢的记录不能进历史，否则连续失败几次后基线被拉高，回归就再也检测不出来了
+        if self.regressions and not self.options.accept_regression:
+            print("\n[Bench] regression detected, this run is not recorded (use --accept-regression to accept it)")
+        elif not self.options.no_record:
+            history.append({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "commit": self._GitCommit(),
+                "host": f"{platform.system()}-{platform.machine()}",
+                "results": results,
+            })
+            PathUtils.CheckDir(os.path.dirname(self.options.history), create=True)
+            with open(self.options.history, "w", encoding="utf-8") as file:
+                json.dump(history, file, indent=1)
+
+    def AfterRun(self, ran: bool):
+        if self.regressions:
+            for workload, current, baseline in self.regressions:
+                print(f"REGRESSION {workload}: {current:.3f}s vs baseline {baseline:.3f}s (+{(current / baseline - 1) * 100:.1f}%)")
+            if self.options.accept_regression:
+                print("Regression accepted.")
+                return
+            raise Exception(f"Benchmark regression detected, threshold: {self.options.threshold * 100:.0f}%.")
+
+    @staticmethod
+    def GetConfigByPath(filepath: str) -> CSharpProjectConfig:
+        return CSharpConfigs["YALuaToy.Interpreter"]
+
+    def _CollectWorkloads(self) -> list:
+        workloads = []
+        for suite in self.options.suite or ["curated"]:
+            workloads.extend(sorted(glob.glob(BENCH_SUITES[suite])))
+        return [w for w in workloads if self.options.filter in w]
+
+    def _Measure(self, executable: str, workload: str):
+        """返回 (统计结果, 最后一次的输出)，执行失败返回 None（失败的用例不参与比较）"""
+        samples = []
+        peakRss = []
+        output = None
+        for i in range(self.options.warmup + self.options.runs):
+            result = CommandUtils.RunCommand([executable, workload], capture=True, quiet=True, timeout=self.options.timeout)
+            if result.timedOut:
+                print(f"  {os.path.basename(executable)}: timeout")
+                return None
+            if result.Failed:
+                print(f"  {os.path.basename(executable)}: failed, return code: {result.returncode}")
+                return None
+            if i >= self.options.warmup:
+                samples.append(result.duration)
+                if result.peakRss is not None:
+                    peakRss.append(result.peakRss)
+            output = result.output
+        stats = Summarize(samples)
+        stats["peakRss"] = max(peakRss) if peakRss else None
+        return stats, output
+
+    def _PrintResult(self, result: dict):
+        for name in ("yaluatoy", "clua"):
+            if name in result:
+                stats = result[name]
+                rss = f"  rss {stats['peakRss'] / (1 << 20):.1f}MB" if stats.get("peakRss") else ""
+                print(f"  {name:<9} median {stats['median']:.3f}s  p10 {stats['p10']:.3f}s  p90 {stats['p90']:.3f}s  stdev {stats['stdev']:.3f}s{rss}")
+        if "ratio" in result:
+            print(f"  yaluatoy/clua: {result['ratio']:.2f}x")
+
+    def _LoadHistory(self) -> list:
+        if not os.path.exists(self.options.history):
+            return []
+        with open(self.options.history, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _CheckRegressions(self, results: dict, history: list):
+        host = f"{platform.system()}-{platform.machine()}"
+        for workload, result in results.items():
+            previous = [
+                entry["results"][workload]["yaluatoy"]["median"] for entry in history
+                if entry.get("host") == host and workload in entry.get("results", {})
+            ][-BASELINE_WINDOW:]
+            if not previous:
+                continue
+            baseline = statistics.median(previous)
+            current = result["yaluatoy"]["median"]
+            if current > baseline * (1 + self.options.threshold):
+                self.regressions.append((workload, current, baseline))
+
+    @staticmethod
+    def _GitCommit() -> str:
+        try:
+            result = CommandUtils.RunCommand(["git", "rev-parse", "HEAD"], capture=True, quiet=True)
+        except OSError:
+            return ""
+        return result.output.strip() if result.Success else ""
+
+
+if __name__ == "__main__":
+    RunnerUtils.Launch(BenchRunner)
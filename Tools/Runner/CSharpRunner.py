@@ -5,16 +5,55 @@ from copy import copy
 from Const.ProjectConfig import CSharpProjectConfig, CSharpConfigs
 from Runner.RunnerBase import RunnerBase
 from Builder.BuilderBase import BuildResult
-from Builder.CSharpBuilder import CSharpBuilder
-from Utils import CommandUtils, RunnerUtils, PathUtils
+from Builder.CSharpBuilder import CSharpBuilder, GetProjectReferences, MATRIX_RIDS
+from Builder import PublishMatrix
+from Utils import CommandUtils, RunnerUtils, PathUtils, TestImpactUtils, TestShardUtils
 
 class CSharpRunner(RunnerBase):
     BUILDER_CLASS = CSharpBuilder
 
+    def __init__(self, projectConfig, args: list):
+        super().__init__(projectConfig, args)
+        # 测试项目支持 --shards N（或 --shards auto）按测试类分片并行执行
+        if projectConfig.buildCommand == "test" and "--shards" in args:
+            index = args.index("--shards")
+            if index + 1 >= len(args):
+                raise Exception("Missing value of '--shards'.")
+            value = args[index + 1]
+            self.projectConfig = copy(projectConfig)
+            self.projectConfig.testShards = os.cpu_count() if value == "auto" else int(value)
+            self.args = args[:index] + args[index + 2:]
+        # 测试项目支持 --impact：按影响分析索引只跑受改动影响的测试类，索引过期时跑全量
+        self.skipTests = False
+        if projectConfig.buildCommand == "test" and "--impact" in self.args:
+            self.args = [arg for arg in self.args if arg != "--impact"]
+            self._SelectImpactedTests()
+        # 发布项目支持 --matrix [--rids a,b] [--configs Debug,Release] [--aot auto,on,off] 并发发布多个目标
+        self.matrix = None
+        if projectConfig.buildCommand == "publish" and "--matrix" in self.args:
+            self.matrix = {"rids": None, "buildTypes": None, "aotModes": None}
+            self.args = [arg for arg in self.args if arg != "--matrix"]
+            for option, key in (("--rids", "rids"), ("--configs", "buildTypes"), ("--aot", "aotModes")):
+                if option in self.args:
+                    index = self.args.index(option)
+                    if index + 1 >= len(self.args):
+                        raise Exception(f"Missing value of '{option}'.")
+                    self.matrix[key] = self.args[index + 1].split(",")
+                    self.args = self.args[:index] + self.args[index + 2:]
+            for aotMode in self.matrix["aotModes"] or []:
+                if aotMode not in PublishMatrix.AOT_MODES:
+                    raise Exception(f"Unknown aot mode '{aotMode}'.")
+
     @property
     def NeedRun(self) -> bool:
         return self.projectConfig.needRun
 
+    def Run(self) -> bool:
+        if self.skipTests:
+            print("No impacted tests.")
+            return True
+        return super().Run()
+
     def DoRun(self, buildResult: BuildResult):
         assert(isinstance(self.projectConfig, CSharpProjectConfig))
         command = ["dotnet", "run", "--project", self.projectConfig.csprojPath, "--"]
@@ -31,11 +70,14 @@ class CSharpRunner(RunnerBase):
                 "-reporttypes:Html"
             ]
             CommandUtils.TryExecuteCommand(command)
-        if self.projectConfig.buildCommand == "publish": # 如果是 publish，则交叉编译一下 macOS 和 windows
-            if self.projectConfig.System != "Windows":
-                self._CrossCompileHelper("Windows")
-            if self.projectConfig.System != "Darwin":
-                self._CrossCompileHelper("Darwin")
+        if self.projectConfig.buildCommand == "publish": # 如果是 publish，则并发交叉编译其他平台
+            if self.matrix is not None:
+                targets = PublishMatrix.MakeTargets(self.projectConfig, **self.matrix)
+            else:
+                hostRid = CSharpBuilder(self.projectConfig).Machine
+                targets = PublishMatrix.MakeTargets(self.projectConfig, [rid for rid in MATRIX_RIDS if rid != hostRid])
+            if not PublishMatrix.RunMatrix(self.projectConfig, targets):
+                print("Cross compile failed, see the publish matrix report above.")
 
     @staticmethod
     def GetConfigByPath(filepath: str) -> CSharpProjectConfig:
@@ -50,12 +92,22 @@ class CSharpRunner(RunnerBase):
             return projectConfig
         raise Exception("Unknown C# project.")
 
-    def _CrossCompileHelper(self, system: str):
-        projectConfig = copy(self.projectConfig)
-        projectConfig._system = system
-        buildResult = self.BUILDER_CLASS(projectConfig).TryBuild()
-        if (buildResult.Failed):
-            print(f"Cross compile failed, target platform: {projectConfig._system}, result: {buildResult.result}")
+    def _SelectImpactedTests(self):
+        testsDir = os.path.dirname(self.projectConfig.csprojPath)
+        sourceDirs = [os.path.dirname(path) for path in GetProjectReferences(self.projectConfig.csprojPath)]
+        index = TestImpactUtils.LoadIndex(TestImpactUtils.IndexPath(testsDir))
+        testClasses, reason = TestImpactUtils.SelectTests(index, testsDir, sourceDirs)
+        if testClasses is None:
+            print(f"[Impact] full suite: {reason}")
+            return
+        print(f"[Impact] {len(testClasses)} impacted test classes ({reason})")
+        for testClass in testClasses:
+            print(f"  {testClass}")
+        if not testClasses:
+            self.skipTests = True
+            return
+        self.projectConfig = copy(self.projectConfig)
+        self.projectConfig.testFilter = TestShardUtils.MakeFilter(testClasses)
 
 
 if __name__ == "__main__":
@@ -4,7 +4,7 @@ import sys
 from typing import Any
 
 from Builder.BuilderBase import BuilderBase, BuildResult
-from Utils import CommandUtils
+from Utils import CommandUtils, TraceUtils
 
 class RunnerBase:
     BUILDER_CLASS = BuilderBase
@@ -17,21 +17,31 @@ class RunnerBase:
     def NeedRun(self) -> bool:
         raise NotImplemented
 
-    def Run(self):
+    def Run(self) -> bool:
+        """返回是否成功（构建、测试都通过）"""
         Builder = self.BUILDER_CLASS
         builder = Builder(self.projectConfig)
-        self.BeforeRun()
+        name = f"{type(self).__name__}:{getattr(self.projectConfig, 'name', '')}"
+        with TraceUtils.Span(f"BeforeRun {name}", "run"):
+            self.BeforeRun()
         buildResult = builder.TryBuild()
         if buildResult.Failed:
             print(f"Build failed, result: {buildResult.result}")
-            return
+            if buildResult.testFailed: # 测试没过也要生成覆盖率报告等
+                with TraceUtils.Span(f"AfterRun {name}", "run"):
+                    self.AfterRun(False)
+            return False
 
         if self.NeedRun:
-            self.DoRun(buildResult)
-            self.AfterRun(True)
+            with TraceUtils.Span(f"DoRun {name}", "run"):
+                self.DoRun(buildResult)
+            with TraceUtils.Span(f"AfterRun {name}", "run"):
+                self.AfterRun(True)
         else:
             print("Only build.")
-            self.AfterRun(False)
+            with TraceUtils.Span(f"AfterRun {name}", "run"):
+                self.AfterRun(False)
+        return True
 
     def DoRun(self, buildResult: BuildResult):
         command = [buildResult.output] # 默认实现，把 outputData 当作可执行文件路径
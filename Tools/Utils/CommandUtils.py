@@ -1,22 +1,142 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+import time
+import signal
+import asyncio
 import platform
 import subprocess
+from typing import Optional
+from Utils import TraceUtils
+
+RSS_SAMPLE_INTERVAL = 0.05
+_defaultPrefix = None # 非空时，TryExecuteCommand 会捕获输出并加上前缀（并行构建时区分各节点的输出）
+
+class CommandResult:
+
+    def __init__(self, command: list, returncode: int, duration: float, peakRss: Optional[int]=None, output: Optional[str]=None, timedOut: bool=False):
+        self.command = command
+        self.returncode = returncode
+        self.duration = duration # 秒
+        self.peakRss = peakRss   # 字节，整个进程树的采样峰值；无法采样的平台为 None
+        self.output = output     # capture=True 时为合并后的 stdout/stderr
+        self.timedOut = timedOut
+
+    @property
+    def Success(self):
+        return self.returncode == 0
+
+    @property
+    def Failed(self):
+        return self.returncode != 0
+
+def SetDefaultPrefix(prefix: Optional[str]):
+    global _defaultPrefix
+    _defaultPrefix = prefix
+
+async def ExecuteCommandAsync(
+    command: list,
+    env=None,
+    cwd: Optional[str]=None,
+    timeout: Optional[float]=None,
+    prefix: Optional[str]=None,
+    capture: bool=False,
+    quiet: bool=False,
+    encoding=None,
+) -> CommandResult:
+    """
+    执行一条命令。
+    prefix 和 capture 都为空时直接继承控制台的 stdin/stdout/stderr（交互程序可用）；
+    否则 stdout/stderr 合并后逐行读取，按需加前缀输出、保存到结果里。
+    超时后会杀掉整个进程树，结果的 timedOut 为 True。
+    """
+    if not quiet: print(f"\n{f'[{prefix}] ' if prefix else ''}ExecuteCommand:", *command)
+    piped = prefix is not None or capture
+    traceStart = TraceUtils.Now()
+    startTime = time.perf_counter()
+    kwargs = {}
+    if piped: # 独立的进程组，方便超时时杀掉整个进程树
+        if platform.system() == "Windows":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=subprocess.DEVNULL if piped else None,
+        stdout=subprocess.PIPE if piped else None,
+        stderr=subprocess.STDOUT if piped else None,
+        env=env, cwd=cwd, **kwargs,
+    )
+
+    lines = []
+    async def ReadOutput():
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            text = line.decode(encoding or "utf-8", errors="replace")
+            if capture:
+                lines.append(text)
+            if prefix is not None:
+                sys.stdout.write(f"[{prefix}] {text}" if text.endswith("\n") else f"[{prefix}] {text}\n")
+                sys.stdout.flush()
+
+    peakRss = [None]
+    async def SampleRss():
+        while True:
+            rss = _TreeRss(process.pid)
+            if rss is not None and (peakRss[0] is None or rss > peakRss[0]):
+                peakRss[0] = rss
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    sampler = asyncio.ensure_future(SampleRss())
+    reader = asyncio.ensure_future(ReadOutput()) if piped else None
+    timedOut = False
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        timedOut = True
+        _KillTree(process.pid, piped)
+        await process.wait()
+    except asyncio.CancelledError:
+        _KillTree(process.pid, piped)
+        raise
+    finally:
+        sampler.cancel()
+        if reader is not None:
+            await reader
+
+    result = CommandResult(command, process.returncode, time.perf_counter() - startTime, peakRss[0], "".join(lines) if capture else None, timedOut)
+    if TraceUtils.Enabled(): # 每个子进程单独一条轨道（以子进程 pid 区分），并发的命令不会叠在一起
+        TraceUtils.NameTrack(process.pid, f"{prefix or 'process'} {os.path.basename(command[0])}")
+        TraceUtils.AddSpan(
+            " ".join([os.path.basename(command[0]), *command[1:3]]), "process", traceStart, result.duration * 1e6, tid=process.pid,
+            args={"command": " ".join(command), "returncode": result.returncode, "peakRss": result.peakRss},
+        )
+    if result.Failed and not quiet:
+        print(f"Execute failed, return code: {result.returncode}{' (timeout)' if timedOut else ''}.")
+    return result
+
+async def ExecuteCommandsAsync(commands: list, maxParallel: Optional[int]=None, **kwargs) -> list:
+    """并发执行多条命令，最多同时执行 maxParallel 条（默认为 CPU 核数），结果顺序和 commands 一致"""
+    semaphore = asyncio.Semaphore(maxParallel or os.cpu_count() or 1)
+    async def Execute(command):
+        async with semaphore:
+            return await ExecuteCommandAsync(command, **kwargs)
+    return list(await asyncio.gather(*(Execute(command) for command in commands)))
+
+def RunCommand(command: list, **kwargs) -> CommandResult:
+    return asyncio.run(ExecuteCommandAsync(command, **kwargs))
+
+def RunCommands(commands: list, maxParallel: Optional[int]=None, **kwargs) -> list:
+    return asyncio.run(ExecuteCommandsAsync(commands, maxParallel, **kwargs))
 
 def TryExecuteCommand(command: list, env=None, quiet: bool=False, encoding=None) -> int:
-    if not quiet: print("\nExecuteCommand:", *command)
-    process = subprocess.Popen(command, stdin=sys.stdin, stdout=sys.stdout, stderr=sys.stderr, text=True, shell=False, env=env, encoding=encoding)
     try:
-        process.wait()
+        return RunCommand(command, env=env, quiet=quiet, encoding=encoding, prefix=_defaultPrefix).returncode
     except KeyboardInterrupt:
-        pass
-    except Exception as e:
-        raise e
-
-    if process.returncode != 0:
-        print(f"Execute failed, return code: {process.returncode}.")
-    return process.returncode
+        print(f"Execute interrupted: {command[0]}")
+        return 130
 
 def ExecuteCommand(command: list, env=None, errorHint: str="", quiet: bool=False, encoding=None):
     returncode = TryExecuteCommand(command, env=env, quiet=quiet, encoding=encoding)
@@ -28,3 +148,47 @@ def ExecuteCommands(command: list[list], env=None, errorHint: str="", quiet: boo
     for command in command:
         result = ExecuteCommand(command, env=env, errorHint=errorHint, quiet=quiet, encoding=encoding)
     return 0
+
+# ---------------- Process Tree ---------------- #
+
+def _ChildPids(pid: int) -> list:
+    """Linux 下通过 /proc 查找子进程（递归），其他平台返回空列表"""
+    children = []
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as file:
+            children = [int(child) for child in file.read().split()]
+    except (OSError, ValueError):
+        return []
+    result = list(children)
+    for child in children:
+        result.extend(_ChildPids(child))
+    return result
+
+def _TreeRss(pid: int) -> Optional[int]:
+    total = None
+    for treePid in [pid, *_ChildPids(pid)]:
+        try:
+            with open(f"/proc/{treePid}/status", "r") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        total = (total or 0) + int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            continue
+    return total
+
+def _KillTree(pid: int, ownGroup: bool):
+    if platform.system() == "Windows":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    if ownGroup:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    for treePid in [*reversed(_ChildPids(pid)), pid]:
+        try:
+            os.kill(treePid, signal.SIGKILL)
+        except OSError:
+            pass
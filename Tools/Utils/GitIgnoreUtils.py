@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# gitignore 匹配：每个 .gitignore 文件编译一次，无通配符的规则走字典查找（文件名、扩展名、相对路径），
+# 其余规则编译成正则；配合 Walk 的单次 os.scandir 遍历，被忽略的子树直接剪掉，不再进入。
+# 支持的语义：注释与转义、取反（!）、锚定（含 / 的规则相对于所在 .gitignore 的目录）、
+# 仅目录规则（末尾 /）、**（前缀 **/、后缀 /**、中间 /**/）、嵌套的 .gitignore（深层的优先）、.git/info/exclude。
+
+import os
+import re
+from typing import Optional
+
+GITIGNORE_NAME = ".gitignore"
+_WILDCARDS = ("*", "?", "[", "\\")
+
+class GitIgnoreRule:
+
+    def __init__(self, pattern: str, negate: bool, dirOnly: bool, anchored: bool):
+        self.pattern = pattern   # 已去掉 !、开头和末尾的 /
+        self.negate = negate
+        self.dirOnly = dirOnly
+        self.anchored = anchored # True 时和相对路径匹配，否则只和文件名匹配
+        self.regex = None if not any(c in pattern for c in _WILDCARDS) else re.compile(_Translate(pattern) + r"\Z", re.DOTALL)
+
+    def __repr__(self):
+        return f"{'!' if self.negate else ''}{'/' if self.anchored else ''}{self.pattern}{'/' if self.dirOnly else ''}"
+
+def ParseRule(line: str) -> Optional[GitIgnoreRule]:
+    line = line.rstrip("\n").rstrip("\r")
+    if not line or line.startswith("#"):
+        return None
+    # 末尾未转义的空格会被忽略
+    end = len(line)
+    while end > 0 and line[end - 1] == " " and (end < 2 or line[end - 2] != "\\"):
+        end -= 1
+    line = line[:end]
+    if not line:
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+    dirOnly = line.endswith("/") and not line.endswith("\\/")
+    if dirOnly:
+        line = line.rstrip("/")
+    anchored = "/" in line
+    line = line.lstrip("/")
+    if not line:
+        return None
+    return GitIgnoreRule(line, negate, dirOnly, anchored)
+
+def _Translate(pattern: str) -> str:
+    """把 gitignore 通配符翻译成正则（不含结尾的 \\Z）"""
+    result = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                j = i + 2
+                if j == n: # "a/**" 或 "**"：任意层级
+                    result.append(".*")
+                    i = j
+                    continue
+                if pattern[j] == "/": # "**/a" 或 "a/**/b"：零或多层目录
+                    result.append("(?:.*/)?")
+                    i = j + 1
+                    continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            result.append("[^/]*")
+            continue
+        if c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n: # 没有闭合，按字面处理
+                result.append(re.escape(c))
+            else:
+                content = pattern[i + 1:j]
+                if content[0] in "!^":
+                    content = "^" + content[1:]
+                result.append("[" + content.replace("\\", "\\\\") + "]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return "".join(result)
+
+class GitIgnoreRules:
+    """一个 .gitignore 文件编译后的规则，后出现的规则优先"""
+
+    def __init__(self, lines: list):
+        self.rules = [rule for rule in (ParseRule(line) for line in lines) if rule is not None]
+        self._names = {}    # 文件名 -> [规则下标]，如 "bin/"
+        self._suffixes = {} # 扩展名 -> [规则下标]，如 "*.so"
+        self._paths = {}    # 相对路径 -> [规则下标]，如 "/CLua/build/"
+        self._regexes = []  # [(规则下标, 规则)]，按下标倒序
+        for index, rule in enumerate(self.rules):
+            if rule.regex is None:
+                (self._paths if rule.anchored else self._names).setdefault(rule.pattern, []).append(index)
+            elif not rule.anchored and rule.pattern.startswith("*.") and not any(c in rule.pattern[1:] for c in _WILDCARDS):
+                self._suffixes.setdefault(rule.pattern[1:], []).append(index)
+            else:
+                self._regexes.append((index, rule))
+        self._regexes.reverse()
+
+    @staticmethod
+    def FromFile(path: str) -> "GitIgnoreRules":
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            return GitIgnoreRules(file.readlines())
+
+    def Match(self, relPath: str, name: str, isDir: bool) -> Optional[bool]:
+        """relPath 相对于本 .gitignore 所在目录。返回 True 表示忽略，False 表示被 ! 重新包含，None 表示没有规则匹配"""
+        best = -1
+        best = self._Best(self._names.get(name), isDir, best)
+        best = self._Best(self._paths.get(relPath), isDir, best)
+        dot = name.find(".")
+        while dot >= 0:
+            best = self._Best(self._suffixes.get(name[dot:]), isDir, best)
+            dot = name.find(".", dot + 1)
+        for index, rule in self._regexes:
+            if index <= best:
+                break
+            if rule.dirOnly and not isDir:
+                continue
+            if rule.regex.match(relPath if rule.anchored else name):
+                best = index
+                break
+        return None if best < 0 else not self.rules[best].negate
+
+    def _Best(self, indices: Optional[list], isDir: bool, best: int) -> int:
+        if indices:
+            for index in reversed(indices):
+                if index <= best:
+                    break
+                if isDir or not self.rules[index].dirOnly:
+                    return index
+        return best
+
+class GitIgnoreMatcher:
+    """按目录层级叠加的 .gitignore 规则栈，Walk 进入/离开目录时压栈/出栈"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._stack = [] # [(相对根目录的目录前缀, GitIgnoreRules)]，越往后越深
+        excludePath = os.path.join(self.root, ".git", "info", "exclude")
+        if os.path.isfile(excludePath): # 优先级最低
+            self._stack.append(("", GitIgnoreRules.FromFile(excludePath)))
+
+    def Push(self, relDir: str, rules: GitIgnoreRules):
+        self._stack.append((relDir + "/" if relDir else "", rules))
+
+    def Pop(self):
+        self._stack.pop()
+
+    def IsIgnored(self, relPath: str, isDir: bool) -> bool:
+        """relPath 相对于根目录，用 / 分隔；调用方需保证父目录没有被忽略（Walk 会剪掉被忽略的子树）"""
+        name = relPath.rsplit("/", 1)[-1]
+        if isDir and name == ".git":
+            return True
+        for prefix, rules in reversed(self._stack):
+            result = rules.Match(relPath[len(prefix):], name, isDir)
+            if result is not None:
+                return result
+        return False
+
+def Walk(root: str, matcher: Optional[GitIgnoreMatcher]=None):
+    """
+    类似 os.walk（自顶向下），但每个目录只 scandir 一次，并跳过被忽略的文件和目录。
+    生成 (dirpath, relDir, dirnames, filenames)，relDir 用 / 分隔，根目录为 ""。
+    符号链接按文件处理，不会进入（和 git 一致）。
+    """
+    matcher = matcher or GitIgnoreMatcher(root)
+    yield from _Walk(matcher.root, "", matcher)
+
+def _Walk(dirpath: str, relDir: str, matcher: GitIgnoreMatcher):
+    try:
+        with os.scandir(dirpath) as it:
+            entries = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+    except OSError:
+        return
+
+    pushed = any(name == GITIGNORE_NAME and not isDir for name, isDir in entries)
+    if pushed:
+        matcher.Push(relDir, GitIgnoreRules.FromFile(os.path.join(dirpath, GITIGNORE_NAME)))
+    try:
+        dirnames, filenames = [], []
+        for name, isDir in entries:
+            relPath = f"{relDir}/{name}" if relDir else name
+            if not matcher.IsIgnored(relPath, isDir):
+                (dirnames if isDir else filenames).append(name)
+        yield dirpath, relDir, dirnames, filenames
+        for name in dirnames: # 调用方可以像 os.walk 一样修改 dirnames 来剪枝
+            yield from _Walk(os.path.join(dirpath, name), f"{relDir}/{name}" if relDir else name, matcher)
+    finally:
+        if pushed:
+            matcher.Pop()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import hashlib
+from typing import Optional
+
+CHUNK_SIZE = 1 << 20
+
+def HashBytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def HashString(text: str) -> str:
+    return HashBytes(text.encode("utf-8"))
+
+def HashFile(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def StatSignature(path: str) -> Optional[list]:
+    """返回 [mtime_ns, size]，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def HashFileMemo(path: str, memo: dict) -> Optional[str]:
+    """
+    带 stat 备忘的文件哈希：mtime 和 size 都没变时直接复用上次的摘要，否则重新计算。
+    memo 的格式为 {path: [mtime_ns, size, digest]}，调用方负责持久化。
+    """
+    signature = StatSignature(path)
+    if signature is None:
+        memo.pop(path, None)
+        return None
+    entry = memo.get(path)
+    if entry is not None and entry[:2] == signature:
+        return entry[2]
+    digest = HashFile(path)
+    memo[path] = [*signature, digest]
+    return digest
+
+def HashFiles(paths: list, memo: Optional[dict]=None) -> dict:
+    """返回 {path: digest}，不存在的文件摘要为 None"""
+    if memo is None:
+        memo = {}
+    return {path: HashFileMemo(path, memo) for path in sorted(set(paths))}
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# 增量安装：把构建产物目录安装到输出目录。
+# - 内容哈希没变的文件直接硬链接上一次安装的文件，变了的文件优先 reflink（写时复制，Linux 的 FICLONE），否则才真正拷贝；
+# - 新内容先装到一个新的版本目录，再原子地切换：POSIX 下输出目录是指向版本目录的符号链接，用 os.replace 替换链接，
+#   并行执行的程序不会看到删到一半的目录；Windows 下退化为两次 rename。
+# 安装过的文件不会被原地修改，所以硬链接是安全的。
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+from typing import Optional
+from Utils import HashUtils, PathUtils
+
+_FICLONE = 0x40049409 # <linux/fs.h>
+KEEP_GENERATIONS = 2  # 保留当前版本和上一个版本（上一个版本可能还有进程在用）
+
+def _Reflink(src: str, dst: str) -> bool:
+    if platform.system() != "Linux":
+        return False
+    import fcntl
+    try:
+        with open(src, "rb") as srcFile, open(dst, "wb") as dstFile:
+            fcntl.ioctl(dstFile.fileno(), _FICLONE, srcFile.fileno())
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+def _Link(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        return False
+
+def _ManifestPath(outputDir: str) -> str:
+    return os.path.join(os.path.dirname(outputDir), f".{os.path.basename(outputDir)}.install.json")
+
+def _LoadManifest(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def _CurrentGeneration(outputDir: str) -> Optional[str]:
+    if os.path.islink(outputDir):
+        target = os.path.join(os.path.dirname(outputDir), os.readlink(outputDir))
+        return target if os.path.isdir(target) else None
+    return outputDir if os.path.isdir(outputDir) else None
+
+def InstallTree(sourceDir: str, outputDir: str) -> dict:
+    """
+    把 sourceDir 的内容安装到 outputDir，返回 {"linked": n, "reflinked": n, "copied": n}。
+    manifest（outputDir 旁边的隐藏 json）记录源文件和已安装文件的哈希，源文件 stat 没变时不再重新计算哈希。
+    """
+    outputDir = os.path.normpath(outputDir)
+    parentDir = os.path.dirname(outputDir) or "."
+    name = os.path.basename(outputDir)
+    PathUtils.CheckDir(parentDir, create=True)
+    manifestPath = _ManifestPath(outputDir)
+    manifest = _LoadManifest(manifestPath)
+    sourceMemo = manifest.get("sources", {})
+    installed = manifest.get("installed", {}) # 相对路径 -> 摘要
+    current = _CurrentGeneration(outputDir)
+
+    generation = os.path.join(parentDir, f".{name}.{time.time_ns()}")
+    stats = {"linked": 0, "reflinked": 0, "copied": 0}
+    newInstalled = {}
+    for sourcePath in PathUtils.ListFiles(sourceDir):
+        relPath = os.path.relpath(sourcePath, sourceDir)
+        targetPath = os.path.join(generation, relPath)
+        PathUtils.CheckDir(os.path.dirname(targetPath), create=True)
+        digest = HashUtils.HashFileMemo(sourcePath, sourceMemo)
+        newInstalled[relPath.replace(os.sep, "/")] = digest
+
+        previous = os.path.join(current, relPath) if current is not None else None
+        if previous is not None and installed.get(relPath.replace(os.sep, "/")) == digest and os.path.isfile(previous) and _Link(previous, targetPath):
+            stats["linked"] += 1
+        elif _Reflink(sourcePath, targetPath):
+            stats["reflinked"] += 1
+        else:
+            shutil.copy2(sourcePath, targetPath)
+            stats["copied"] += 1
+
+    _Swap(generation, outputDir)
+    sourceMemo = {path: entry for path, entry in sourceMemo.items() if PathUtils.SameRoot(path, sourceDir)}
+    with open(manifestPath + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"sources": sourceMemo, "installed": newInstalled}, file)
+    os.replace(manifestPath + ".tmp", manifestPath)
+    _RemoveOldGenerations(parentDir, name, generation)
+    return stats
+
+def _Swap(generation: str, outputDir: str):
+    if platform.system() == "Windows": # Windows 上创建符号链接需要权限，退化为两次 rename
+        backup = f"{outputDir}.old.{time.time_ns()}"
+        if os.path.exists(outputDir):
+            os.rename(outputDir, backup)
+        os.rename(generation, outputDir)
+        shutil.rmtree(backup, ignore_errors=True)
+        return
+    if os.path.isdir(outputDir) and not os.path.islink(outputDir): # 旧的安装是普通目录：先挪开，之后都走符号链接
+        os.rename(outputDir, os.path.join(os.path.dirname(outputDir), f".{os.path.basename(outputDir)}.{time.time_ns()}"))
+    link = f"{outputDir}.link.{os.getpid()}"
+    os.symlink(os.path.basename(generation), link)
+    os.replace(link, outputDir)
+
+def _RemoveOldGenerations(parentDir: str, name: str, generation: str):
+    prefix = f".{name}."
+    generations = []
+    for entry in os.scandir(parentDir):
+        suffix = entry.name[len(prefix):]
+        if entry.name.startswith(prefix) and suffix.isdigit() and entry.is_dir(follow_symlinks=False):
+            generations.append((int(suffix), entry.path))
+    generations.sort(reverse=True)
+    for _, path in generations[KEEP_GENERATIONS:]:
+        if os.path.normpath(path) != os.path.normpath(generation):
+            shutil.rmtree(path, ignore_errors=True)
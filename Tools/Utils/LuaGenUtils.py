@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# 随机 Lua 程序生成：程序由若干互相独立的 do ... end 块组成，每个块覆盖一类特性（表、闭包、变长参数、协程、元表、字符串、控制流），
+# 块内的整数表达式和语句按语法随机生成。所有循环都是有界的数值 for，递归有深度上限，保证程序一定会结束。
+# 每个块只通过 mix() 把整数结果累加到全局校验和里，最后打印校验和，所以去掉任意块程序仍然合法（方便最小化）。
+# 只使用 YALuaToy 已实现的标准库（没有 string 库，字符串操作只用 ..、#、比较、tostring/tonumber）。
+
+import random
+
+MOD = 1000003
+PROLOGUE = """local acc = 0
+local function mix(x)
+    acc = (acc * 31 + x) % 1000000007
+end
+"""
+EPILOGUE = "print(acc)\n"
+
+class LuaGenerator:
+
+    def __init__(self, seed: int, scale: float=1.0):
+        self.random = random.Random(seed)
+        self.scale = scale
+        self._names = 0
+
+    def Generate(self, blockCount: int=0) -> list:
+        """返回块列表，用 Render 拼成完整程序"""
+        kinds = [self.Table, self.Closure, self.Varargs, self.Coroutine, self.Metatable, self.String, self.Control]
+        blocks = []
+        for i in range(blockCount or self.random.randint(4, 10)):
+            kind = self.random.choice(kinds)
+            body = kind()
+            blocks.append(f"-- block {i}: {kind.__name__.lower()}\ndo\n{_Indent(body)}end\n")
+        return blocks
+
+    # ---------------- Helpers ---------------- #
+
+    def _N(self, low: int, high: int) -> int:
+        return max(1, int(self.random.randint(low, high) * self.scale))
+
+    def _Name(self, prefix: str="v") -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def Expr(self, names: list, depth: int=3) -> str:
+        """随机整数表达式，只用整数运算（除法和取模的除数保证非零），结果可能很大，使用处会再取模"""
+        r = self.random
+        if depth <= 0 or r.random() < 0.25:
+            return r.choice(names) if names and r.random() < 0.7 else str(r.randint(0, 99))
+        a, b = self.Expr(names, depth - 1), self.Expr(names, depth - 1)
+        op = r.choice(["+", "-", "*", "//", "%", "&", "|", "~", "<<", ">>", "neg", "max", "min"])
+        if op in ("//", "%"):
+            return f"({a} {op} ({b} % 7 + 1))"
+        if op in ("<<", ">>"):
+            return f"({a} {op} ({b} % 8))"
+        if op == "neg":
+            return f"(-{a})"
+        if op in ("max", "min"):
+            return f"math.{op}({a}, {b})"
+        return f"({a} {op} {b})"
+
+    def Cond(self, names: list) -> str:
+        op = self.random.choice(["<", "<=", ">", ">=", "==", "~="])
+        return f"{self.Expr(names, 2)} {op} {self.Expr(names, 2)}"
+
+    def Stmts(self, names: list, depth: int=2, count: int=3) -> str:
+        """随机语句序列：局部变量、赋值、if/elseif、有界 for，names 中的变量都是整数"""
+        r = self.random
+        lines = []
+        names = list(names)
+        for _ in range(count):
+            choice = r.random()
+            if choice < 0.3 or not names:
+                name = self._Name()
+                lines.append(f"local {name} = {self.Expr(names)} % {MOD}\n")
+                names.append(name)
+            elif choice < 0.55:
+                lines.append(f"{r.choice(names)} = {self.Expr(names)} % {MOD}\n")
+            elif choice < 0.8 and depth > 0:
+                body = self.Stmts(names, depth - 1, 2)
+                other = self.Stmts(names, depth - 1, 1)
+                lines.append(f"if {self.Cond(names)} then\n{_Indent(body)}else\n{_Indent(other)}end\n")
+            elif depth > 0:
+                index = self._Name("i")
+                body = self.Stmts(names + [index], depth - 1, 2)
+                lines.append(f"for {index} = 1, {r.randint(2, 6)} do\n{_Indent(body)}end\n")
+            else:
+                lines.append(f"mix({r.choice(names)} % {MOD})\n")
+        lines.append(f"mix({r.choice(names)} % {MOD})\n")
+        return "".join(lines)
+
+    # ---------------- Blocks ---------------- #
+
+    def Table(self) -> str:
+        r = self.random
+        n = self._N(500, 20000)
+        expr = self.Expr(["i"], 2)
+        variant = r.choice(["array", "hash", "string", "insert", "nested", "holes"])
+        if variant == "array":
+            fill = f"for i = 1, {n} do t[i] = {expr} % {MOD} end\n"
+            read = "for i = 1, #t do s = (s + t[i]) % MOD end\n"
+        elif variant == "hash":
+            stride = r.randint(2, 97)
+            fill = f"for i = 1, {n} do t[i * {stride}] = {expr} % {MOD} end\n"
+            read = "for k, v in pairs(t) do s = (s + k % 1000 + v) % MOD end\n"
+        elif variant == "string":
+            keys = r.randint(1, 500)
+            fill = f"for i = 1, {n} do t[\"k\" .. (i % {keys})] = {expr} % {MOD} end\n"
+            read = f"for i = 0, {keys - 1} do s = (s + (t[\"k\" .. i] or 0)) % MOD end\n"
+        elif variant == "insert":
+            fill = f"for i = 1, {n} do table.insert(t, {expr} % {MOD}) end\n"
+            read = "for _, v in ipairs(t) do s = (s + v) % MOD end\n"
+        elif variant == "nested":
+            fill = f"for i = 1, {n} do t[i] = {{ i, {expr} % {MOD}, tag = i % 3 }} end\n"
+            read = "for i = 1, #t do local e = t[i]; s = (s + e[1] + e[2] + e.tag) % MOD end\n"
+        else:
+            fill = f"for i = 1, {n} do t[i] = i end\nfor i = 1, {n}, {r.randint(2, 5)} do t[i] = nil end\n"
+            read = "for k, v in pairs(t) do s = (s + v) % MOD end\n"
+        return f"local MOD = {MOD}\nlocal t = {{}}\n{fill}local s = 0\n{read}mix(s)\n"
+
+    def Closure(self) -> str:
+        r = self.random
+        n, k = self._N(2000, 50000), r.randint(1, 50)
+        step = self.Expr(["x", "c"], 2)
+        if r.random() < 0.5:
+            return (
+                f"local function make(a)\n    local c = a\n    return function(x)\n        c = ({step}) % {MOD}\n        return c\n    end\nend\n"
+                f"local fs = {{}}\nfor i = 1, {k} do fs[i] = make(i) end\n"
+                f"local s = 0\nfor x = 1, {n} do s = (s + fs[x % {k} + 1](x)) % {MOD} end\nmix(s)\n"
+            )
+        depth = r.randint(2, 6)
+        return ( # 多层嵌套闭包，访问外层的 upvalue
+            f"local function nest(d, base)\n    if d == 0 then return function(x) return (base + x) % {MOD} end end\n"
+            f"    local inner = nest(d - 1, base * 3 + d)\n    return function(x) return inner(x + d) end\nend\n"
+            f"local f = nest({depth}, {r.randint(1, 9)})\nlocal s = 0\nfor x = 1, {n} do s = (s + f(x)) % {MOD} end\nmix(s)\n"
+        )
+
+    def Varargs(self) -> str:
+        r = self.random
+        n, k = self._N(1000, 20000), r.randint(1, 12)
+        args = ", ".join(f"x + {j}" for j in range(k))
+        variant = r.choice(["select", "pack", "unpack", "forward"])
+        if variant == "select":
+            body = "local n = select('#', ...)\n    local s = n\n    for i = 1, n do s = s + (select(i, ...)) end\n    return s"
+        elif variant == "pack":
+            body = "local t = { ... }\n    local s = #t\n    for i = 1, #t do s = s + t[i] end\n    return s"
+        elif variant == "unpack":
+            body = "local t = { ... }\n    local a, b = table.unpack(t)\n    return (a or 0) + (b or 0) + #t"
+        else:
+            body = "local function g(a, ...) return a + select('#', ...) end\n    return g(...)"
+        return f"local function f(...)\n    {body}\nend\nlocal s = 0\nfor x = 1, {n} do s = (s + f({args})) % {MOD} end\nmix(s)\n"
+
+    def Coroutine(self) -> str:
+        r = self.random
+        n = self._N(500, 20000)
+        expr = self.Expr(["i"], 2)
+        variant = r.choice(["wrap", "resume", "many"])
+        if variant == "wrap":
+            return (
+                f"local gen = coroutine.wrap(function() for i = 1, {n} do coroutine.yield({expr} % {MOD}) end end)\n"
+                f"local s = 0\nfor i = 1, {n} do s = (s + gen()) % {MOD} end\nmix(s)\n"
+            )
+        if variant == "resume":
+            return (
+                f"local co = coroutine.create(function(a)\n    local s = a\n    for i = 1, {n} do s = (s + coroutine.yield(s)) % {MOD} end\n    return s\nend)\n"
+                f"local ok, v = coroutine.resume(co, 1)\nlocal i = 0\nwhile coroutine.status(co) ~= \"dead\" do\n    i = i + 1\n    ok, v = coroutine.resume(co, i)\nend\nmix(v)\n"
+            )
+        count = r.randint(2, 200)
+        return ( # 大量短命协程
+            f"local s = 0\nfor c = 1, {count} do\n    local co = coroutine.wrap(function(a) local x = a; for i = 1, {max(1, n // count)} do x = (x + coroutine.yield(x)) % {MOD} end; return x end)\n"
+            f"    local v = co(c)\n    for i = 1, {max(1, n // count)} do v = co(i) end\n    s = (s + v) % {MOD}\nend\nmix(s)\n"
+        )
+
+    def Metatable(self) -> str:
+        r = self.random
+        n = self._N(500, 20000)
+        variant = r.choice(["index", "newindex", "arith", "compare", "len_call", "chain"])
+        if variant == "index":
+            expr = self.Expr(["k"], 2)
+            return (
+                f"local t = setmetatable({{}}, {{ __index = function(t, k) return ({expr}) % {MOD} end }})\n"
+                f"local s = 0\nfor i = 1, {n} do s = (s + t[i]) % {MOD} end\nmix(s)\n"
+            )
+        if variant == "newindex":
+            return (
+                f"local store = {{}}\nlocal t = setmetatable({{}}, {{ __newindex = function(t, k, v) rawset(store, k, v + 1) end, __index = store }})\n"
+                f"for i = 1, {n} do t[i] = i end\nlocal s = 0\nfor i = 1, {n} do s = (s + t[i]) % {MOD} end\nmix(s + #store)\n"
+            )
+        if variant == "arith":
+            return (
+                f"local V = {{}}\nV.__index = V\nV.__add = function(a, b) return setmetatable({{ v = (a.v + b.v) % {MOD} }}, V) end\n"
+                f"V.__mul = function(a, b) return setmetatable({{ v = (a.v * b.v) % {MOD} }}, V) end\n"
+                f"V.__unm = function(a) return setmetatable({{ v = ({MOD} - a.v) % {MOD} }}, V) end\n"
+                f"local x = setmetatable({{ v = 1 }}, V)\nfor i = 1, {n} do x = x * setmetatable({{ v = i % 13 + 1 }}, V) + (-x) + setmetatable({{ v = i }}, V) end\nmix(x.v)\n"
+            )
+        if variant == "compare":
+            return (
+                f"local P = {{}}\nP.__lt = function(a, b) return a.v < b.v end\nP.__le = function(a, b) return a.v <= b.v end\n"
+                f"P.__eq = function(a, b) return a.v == b.v end\n"
+                f"local items = {{}}\nfor i = 1, {min(n, 2000)} do items[i] = setmetatable({{ v = (i * 7919) % {r.randint(50, 1000)} }}, P) end\n"
+                f"local s = 0\nfor i = 2, #items do\n    if items[i - 1] < items[i] then s = s + 1 end\n    if items[i - 1] == items[i] then s = s + 2 end\n    if items[i] <= items[i - 1] then s = s + 3 end\nend\nmix(s)\n"
+            )
+        if variant == "len_call":
+            return (
+                f"local C = setmetatable({{ n = 0 }}, {{\n    __call = function(self, x) self.n = (self.n + x) % {MOD}; return self.n end,\n"
+                f"    __len = function(self) return self.n % 97 end,\n    __concat = function(a, b) return (type(a) == \"table\" and a.n or 0) + #tostring(b) end,\n}})\n"
+                f"local s = 0\nfor i = 1, {n} do s = (s + C(i) + #C) % {MOD} end\nmix((s + (C .. \"abc\")) % {MOD})\n"
+            )
+        depth = r.randint(2, 8)
+        return ( # __index 链
+            f"local base = {{ value = 7 }}\nlocal cur = base\nfor d = 1, {depth} do cur = setmetatable({{ [\"f\" .. d] = d }}, {{ __index = cur }}) end\n"
+            f"local s = 0\nfor i = 1, {n} do s = (s + cur.value + (cur[\"f\" .. (i % {depth} + 1)] or 0)) % {MOD} end\nmix(s)\n"
+        )
+
+    def String(self) -> str:
+        r = self.random
+        n = self._N(200, 5000)
+        variant = r.choice(["concat", "compare", "convert", "keys"])
+        if variant == "concat":
+            return ( # 逐段拼接（会产生大量中间字符串）
+                f"local s = \"\"\nfor i = 1, {n} do s = s .. tostring(i % {r.randint(2, 1000)}) .. \",\" end\nmix(#s)\n"
+            )
+        if variant == "compare":
+            return (
+                f"local c = 0\nfor i = 1, {n} do\n    local a, b = \"k\" .. i, \"k\" .. ({n} - i)\n"
+                f"    if a < b then c = c + 1 elseif a == b then c = c + 2 end\nend\nmix(c)\n"
+            )
+        if variant == "convert":
+            return (
+                f"local s = 0\nfor i = 1, {n} do s = (s + tonumber(tostring(i * {r.randint(1, 999)})) + #tostring(i)) % {MOD} end\nmix(s)\n"
+            )
+        return (
+            f"local t = {{}}\nfor i = 1, {n} do local k = \"key\" .. (i % {r.randint(1, 300)}); t[k] = (t[k] or 0) + i end\n"
+            f"local s = 0\nfor k, v in pairs(t) do s = (s + #k + v) % {MOD} end\nmix(s)\n"
+        )
+
+    def Control(self) -> str:
+        r = self.random
+        n = self._N(100, 3000)
+        variant = r.choice(["loop", "pcall", "recursion"])
+        if variant == "loop":
+            body = self.Stmts(["i"], depth=2, count=r.randint(2, 5))
+            return f"for i = 1, {n} do\n{_Indent(body)}end\n"
+        if variant == "pcall":
+            body = self.Stmts(["i"], depth=2, count=r.randint(2, 5))
+            return ( # error 的消息不参与校验（两边的错误信息格式可能不同）
+                f"local ok = 0\nfor i = 1, {n} do\n    local success = pcall(function()\n        if i % {r.randint(2, 9)} == 0 then error(\"x\") end\n"
+                f"{_Indent(_Indent(body))}        return i\n    end)\n    if success then ok = ok + 1 end\nend\nmix(ok)\n"
+            )
+        body = self.Stmts(["k"], depth=1, count=r.randint(1, 3)) # 在递归的叶子上执行
+        depth = r.randint(5, 18)
+        return (
+            f"local function fib(k)\n    if k < 2 then\n{_Indent(_Indent(body))}        return k\n    end\n    return fib(k - 1) + fib(k - 2)\nend\n"
+            f"local s = 0\nfor i = 1, {max(1, n // 100)} do s = (s + fib({depth})) % {MOD} end\nmix(s)\n"
+        )
+
+def Render(blocks: list) -> str:
+    return PROLOGUE + "".join(blocks) + EPILOGUE
+
+def _Indent(text: str) -> str:
+    return "".join(f"    {line}" if line.strip() else line for line in text.splitlines(keepends=True))
@@ -39,5 +39,17 @@ def GetTop(path: str) -> str:
             return part
     return ""
 
+def ListFiles(root: str, ignoreDirs: tuple=()) -> list:
+    """递归列出 root 下的所有文件（名字在 ignoreDirs 中的目录整个跳过），结果已排序"""
+    result = []
+    if os.path.isfile(root):
+        return [root]
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in ignoreDirs]
+        for filename in filenames:
+            result.append(os.path.join(dirpath, filename))
+    result.sort()
+    return result
+
 def CopyDirContents(fromDir: str, toDir: str):
     pass
@@ -10,4 +10,5 @@ def Launch(Runner: Type[RunnerBase], projectConfig=None, argv: Optional[list]=No
     if argv is None:
         argv = [] if len(sys.argv) <= 2 else sys.argv[2:]
     runner = Runner(projectConfig, argv)
-    runner.Run()
+    if not runner.Run(): # 构建或测试失败时进程返回非 0，CI 才能发现
+        sys.exit(1)
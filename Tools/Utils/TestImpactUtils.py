@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# 测试影响分析：用每个测试类单独运行得到的 coverlet 覆盖率建立 源文件 -> 测试类 的索引，
+# 再对比工作区和建索引时的提交，只运行受影响的测试类；索引过期或有无法判断的改动时退回全量测试。
+# coverlet 只能按进程统计覆盖率，所以索引粒度是测试类（每个测试类跑一次 dotnet test）。
+
+import os
+import sys
+import json
+from typing import Optional
+from Utils import CommandUtils, PathUtils, TestShardUtils
+
+INDEX_VERSION = 1
+LUA_ASSETS_DIR = "Assets/Lua"
+FULL_SUITE_SUFFIXES = (".csproj", ".props", ".targets", ".g4", ".runsettings", ".json") # 改了这些就没法按覆盖率判断了
+BUILD_DIRS = ("bin", "obj", "out", "TestResults")
+
+def IndexPath(testsDir: str) -> str:
+    return os.path.join(testsDir, "out", "TestImpact.json")
+
+def GitHead() -> str:
+    result = CommandUtils.RunCommand(["git", "rev-parse", "HEAD"], capture=True, quiet=True)
+    return result.output.strip() if result.Success else ""
+
+def ChangedFiles(commit: str) -> Optional[list]:
+    """工作区（含未提交和未跟踪的文件）相对 commit 改动过的文件，commit 不存在时返回 None"""
+    if not commit or CommandUtils.RunCommand(["git", "cat-file", "-e", f"{commit}^{{commit}}"], capture=True, quiet=True).Failed:
+        return None
+    diff = CommandUtils.RunCommand(["git", "diff", "--name-only", commit], capture=True, quiet=True)
+    untracked = CommandUtils.RunCommand(["git", "ls-files", "--others", "--exclude-standard"], capture=True, quiet=True)
+    if diff.Failed or untracked.Failed:
+        return None
+    return sorted({line.strip() for line in (diff.output + untracked.output).splitlines() if line.strip()})
+
+def CoveredFiles(coverletJsonPath: str) -> list:
+    """coverlet json 中至少有一行被执行过的源文件（相对于项目根目录，用 / 分隔）"""
+    with open(coverletJsonPath, "r", encoding="utf-8") as file:
+        report = json.load(file)
+    result = set()
+    for files in report.values():
+        for filepath, classes in files.items():
+            hit = any(
+                hits > 0
+                for methods in classes.values() for method in methods.values() for hits in method.get("Lines", {}).values()
+            )
+            if hit and PathUtils.SameRoot(filepath, "."):
+                result.add(os.path.relpath(filepath).replace(os.sep, "/"))
+    return sorted(result)
+
+def BuildIndex(coverage: dict, sources: list, commit: str) -> dict:
+    """
+    coverage: {测试类全名: 该测试类单独运行得到的 coverlet json 路径}
+    sources: 建索引时存在的所有源文件，用来区分"没有测试覆盖的旧文件"和"建索引之后新增的文件"
+    """
+    files = {}
+    for testClass, jsonPath in sorted(coverage.items()):
+        for filepath in CoveredFiles(jsonPath):
+            files.setdefault(filepath, []).append(testClass)
+    sources = sorted(os.path.relpath(path).replace(os.sep, "/") for path in sources)
+    return {"version": INDEX_VERSION, "commit": commit, "tests": sorted(coverage), "sources": sources, "files": files}
+
+def LoadIndex(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        index = json.load(file)
+    return index if index.get("version") == INDEX_VERSION else None
+
+def SaveIndex(path: str, index: dict):
+    PathUtils.CheckDir(os.path.dirname(path), create=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=1, sort_keys=True)
+
+def FindLuaTestFiles(luaPath: str, testsDir: str) -> list:
+    """测试里直接以 "Assets/Lua/..." 字面量引用 Lua 资源（单个文件或整个目录），引用了它的测试文件都算受影响"""
+    relPath = os.path.relpath(luaPath).replace(os.sep, "/")
+    keys = (f"\"{relPath}\"", f"\"{os.path.dirname(relPath)}\"", f"\"{os.path.dirname(relPath)}/\"")
+    result = []
+    for filepath in PathUtils.ListFiles(testsDir, BUILD_DIRS):
+        if filepath.endswith(".cs"):
+            with open(filepath, "r", encoding="utf-8-sig") as file:
+                text = file.read()
+            if any(key in text for key in keys):
+                result.append(filepath)
+    return result
+
+def SelectTests(index: Optional[dict], testsDir: str, sourceDirs: list) -> tuple:
+    """
+    返回 (受影响的测试类列表, 说明)；测试类列表为 None 表示需要跑全量测试。
+    sourceDirs 是测试项目引用的所有项目目录（含测试项目自身），只有这些目录下的改动才会影响测试。
+    """
+    if index is None:
+        return None, "no impact index, run Tools/Project/BuildTestImpactIndex.py first"
+    changed = ChangedFiles(index["commit"])
+    if changed is None:
+        return None, f"indexed commit {index['commit'][:10]} is unknown"
+
+    knownTests = set(index["tests"])
+    knownSources = set(index["sources"])
+    selected = set()
+    for filepath in changed:
+        if filepath.startswith(LUA_ASSETS_DIR + "/"):
+            for testFile in FindLuaTestFiles(filepath, testsDir):
+                selected.update(TestShardUtils.DiscoverTestClassesInFile(testFile))
+            continue
+        if not any(PathUtils.SameRoot(filepath, dir) for dir in sourceDirs) or any(part in BUILD_DIRS for part in filepath.split("/")):
+            continue # 和测试无关的改动（文档、工具脚本、构建产物等）
+        if filepath.endswith(FULL_SUITE_SUFFIXES):
+            return None, f"'{filepath}' changed"
+        if not filepath.endswith(".cs"):
+            continue
+        if PathUtils.SameRoot(filepath, testsDir) and os.path.exists(filepath):
+            testClasses = TestShardUtils.DiscoverTestClassesInFile(filepath)
+            if any(testClass not in knownTests for testClass in testClasses):
+                return None, f"new test class in '{filepath}'"
+            selected.update(testClasses)
+        if filepath in index["files"]:
+            selected.update(index["files"][filepath])
+        elif filepath not in knownSources:
+            return None, f"'{filepath}' is new since the index was built"
+    return sorted(selected), f"{len(changed)} changed files since {index['commit'][:10]}"
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import sys
+import json
+import heapq
+import xml.etree.ElementTree as ET
+from Utils import PathUtils
+
+DEFAULT_DURATION = 1.0 # 没有历史记录的测试类的预估耗时（秒）
+TRX_NS = "{http://microsoft.com/schemas/VisualStudio/TeamTest/2010}"
+PERF_TRAIT = '[Trait("Category", "Performance")]' # 性能测试，默认不跑，要显式指定测试文件
+EXCLUDE_PERF_FILTER = "Category!=Performance"
+
+def DiscoverTestClasses(projectDir: str) -> list:
+    """扫描测试项目源码，返回包含 [Fact]/[Theory] 的测试类全名（不含性能测试类）"""
+    result = []
+    for filepath in PathUtils.ListFiles(projectDir, ("bin", "obj", "out", "TestResults")):
+        if filepath.endswith(".cs"):
+            result.extend(DiscoverTestClassesInFile(filepath))
+    return sorted(set(result))
+
+def DiscoverTestClassesInFile(filepath: str) -> list:
+    with open(filepath, "r", encoding="utf-8-sig") as file:
+        text = file.read()
+    if "[Fact" not in text and "[Theory" not in text:
+        return []
+    namespace = re.search(r"^\s*namespace\s+([\w.]+)", text, re.MULTILINE)
+    prefix = f"{namespace.group(1)}." if namespace else ""
+    pattern = r"^((?:\s*\[.*\]\s*?\n)*)\s*public\s+(?:sealed\s+)?class\s+(\w+)"
+    return [prefix + match.group(2) for match in re.finditer(pattern, text, re.MULTILINE) if PERF_TRAIT not in match.group(1)]
+
+def LoadDurations(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def SaveDurations(path: str, durations: dict):
+    PathUtils.CheckDir(os.path.dirname(path), create=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(durations, file, indent=1, sort_keys=True)
+
+def BalanceShards(testClasses: list, durations: dict, shardCount: int) -> list:
+    """最长处理时间优先（LPT）贪心：按耗时从大到小，依次放进当前总耗时最小的分片"""
+    known = sorted(durations[name] for name in testClasses if name in durations)
+    fallback = known[len(known) // 2] if known else DEFAULT_DURATION # 中位数，避免被个别重量级测试类带偏
+    costs = sorted(((durations.get(name, fallback), name) for name in testClasses), reverse=True)
+
+    shardCount = max(1, min(shardCount, len(testClasses)))
+    heap = [(0.0, i) for i in range(shardCount)]
+    shards = [[] for _ in range(shardCount)]
+    for cost, name in costs:
+        total, i = heapq.heappop(heap)
+        shards[i].append(name)
+        heapq.heappush(heap, (total + cost, i))
+    return shards
+
+def MakeFilter(testClasses: list) -> str:
+    # 末尾加 "." 避免 LuaTableTests 误匹配 LuaTableTestsXXX
+    return "|".join(f"FullyQualifiedName~{name}." for name in testClasses)
+
+def ParseTrxDurations(trxPath: str) -> dict:
+    """从 trx 报告中统计每个测试类的总耗时（秒）"""
+    root = ET.parse(trxPath).getroot()
+    classById = {}
+    for unitTest in root.iter(f"{TRX_NS}UnitTest"):
+        method = unitTest.find(f"{TRX_NS}TestMethod")
+        if method is not None:
+            classById[unitTest.get("id")] = method.get("className")
+
+    durations = {}
+    for result in root.iter(f"{TRX_NS}UnitTestResult"):
+        className = classById.get(result.get("testId"))
+        duration = result.get("duration")
+        if className is None or duration is None:
+            continue
+        hours, minutes, seconds = duration.split(":")
+        durations[className] = durations.get(className, 0.0) + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return durations
+
+def MergeCoverletJson(paths: list, outPath: str):
+    """合并 coverlet json 报告：行命中次数相加，分支按 (Line, Offset, EndOffset, Path, Ordinal) 合并后相加"""
+    merged = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            report = json.load(file)
+        for module, files in report.items():
+            for filename, classes in files.items():
+                for className, methods in classes.items():
+                    for methodName, method in methods.items():
+                        target = merged.setdefault(module, {}).setdefault(filename, {}).setdefault(className, {})
+                        if methodName not in target:
+                            target[methodName] = {"Lines": {}, "Branches": []}
+                        _MergeMethod(target[methodName], method)
+    PathUtils.CheckDir(os.path.dirname(outPath), create=True)
+    with open(outPath, "w", encoding="utf-8") as file:
+        json.dump(merged, file, indent=2)
+
+def _MergeMethod(target: dict, method: dict):
+    lines = target["Lines"]
+    for line, hits in method.get("Lines", {}).items():
+        lines[line] = lines.get(line, 0) + hits
+    branches = {_BranchKey(branch): branch for branch in target["Branches"]}
+    for branch in method.get("Branches", []):
+        key = _BranchKey(branch)
+        if key in branches:
+            branches[key]["Hits"] += branch["Hits"]
+        else:
+            branches[key] = dict(branch)
+            target["Branches"].append(branches[key])
+
+def _BranchKey(branch: dict) -> tuple:
+    return (branch.get("Line"), branch.get("Offset"), branch.get("EndOffset"), branch.get("Path"), branch.get("Ordinal"))
+
+def MergeCobertura(paths: list, outPath: str):
+    """
+    合并 cobertura 报告：以第一份为骨架，行命中次数相加；
+    分支覆盖取各分片中覆盖数最多的一份（cobertura 不记录具体是哪个分支被覆盖），最后重算各级覆盖率。
+    """
+    trees = [ET.parse(path) for path in paths]
+    base = trees[0]
+    lineHits = {}
+    conditions = {}
+    for tree in trees:
+        for cls in tree.getroot().iter("class"):
+            for line in cls.iter("line"):
+                key = (cls.get("filename"), cls.get("name"), line.get("number"))
+                lineHits[key] = lineHits.get(key, 0) + int(line.get("hits", "0"))
+                covered = _ParseCondition(line.get("condition-coverage"))
+                if covered is not None and (key not in conditions or covered[0] > conditions[key][0]):
+                    conditions[key] = covered
+
+    for cls in base.getroot().iter("class"):
+        for line in cls.iter("line"):
+            key = (cls.get("filename"), cls.get("name"), line.get("number"))
+            line.set("hits", str(lineHits.get(key, 0)))
+            if key in conditions:
+                covered, total = conditions[key]
+                line.set("condition-coverage", f"{int(100 * covered / total) if total else 0}% ({covered}/{total})")
+    _RecomputeRates(base.getroot())
+    PathUtils.CheckDir(os.path.dirname(outPath), create=True)
+    base.write(outPath, encoding="utf-8", xml_declaration=True)
+
+def _ParseCondition(text) -> tuple:
+    if not text:
+        return None
+    match = re.search(r"\((\d+)/(\d+)\)", text)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def _RecomputeRates(element) -> tuple:
+    """返回 (linesValid, linesCovered, branchesValid, branchesCovered)，并回写 line-rate/branch-rate"""
+    if element.tag == "class":
+        linesValid = linesCovered = branchesValid = branchesCovered = 0
+        seen = set()
+        lines = element.find("lines")
+        for line in (lines if lines is not None else []):
+            number = line.get("number")
+            if number in seen:
+                continue
+            seen.add(number)
+            linesValid += 1
+            linesCovered += int(line.get("hits", "0")) > 0
+            condition = _ParseCondition(line.get("condition-coverage"))
+            if condition is not None:
+                branchesCovered += condition[0]
+                branchesValid += condition[1]
+    else:
+        linesValid = linesCovered = branchesValid = branchesCovered = 0
+        for child in element:
+            if child.tag in ("packages", "package", "classes", "class"):
+                counts = _RecomputeRates(child)
+                linesValid += counts[0]
+                linesCovered += counts[1]
+                branchesValid += counts[2]
+                branchesCovered += counts[3]
+
+    if element.tag in ("coverage", "package", "class"):
+        element.set("line-rate", f"{linesCovered / linesValid if linesValid else 1:.4f}")
+        element.set("branch-rate", f"{branchesCovered / branchesValid if branchesValid else 1:.4f}")
+    if element.tag == "coverage":
+        element.set("lines-valid", str(linesValid))
+        element.set("lines-covered", str(linesCovered))
+        element.set("branches-valid", str(branchesValid))
+        element.set("branches-covered", str(branchesCovered))
+    return linesValid, linesCovered, branchesValid, branchesCovered
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# 构建/测试耗时追踪：记录各阶段和子进程的时间段，退出时写出 Chrome/Perfetto 可读的 trace json（chrome://tracing 或 ui.perfetto.dev），
+# 并打印按总耗时排序的汇总表。设置环境变量 YALUATOY_TRACE=<输出路径> 开启（RunPy.py -trace 会自动设置）。
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from typing import Optional
+
+TRACE_ENV = "YALUATOY_TRACE"
+DEFAULT_TRACE_PATH = "out/Trace/trace.json"
+
+_events = []
+_lock = threading.Lock()
+_registered = False
+
+def Enabled() -> bool:
+    return os.environ.get(TRACE_ENV, "") != ""
+
+def Now() -> float:
+    """当前时间（微秒），使用墙钟，不同进程的记录可以直接合并"""
+    return time.time_ns() / 1000
+
+def AddSpan(name: str, category: str, start: float, duration: float, tid: Optional[int]=None, args: Optional[dict]=None):
+    """start 和 duration 的单位都是微秒"""
+    if not Enabled():
+        return
+    event = {
+        "name": name, "cat": category, "ph": "X",
+        "ts": start, "dur": duration,
+        "pid": os.getpid(), "tid": threading.get_ident() if tid is None else tid,
+    }
+    if args:
+        event["args"] = args
+    _Append(event)
+
+def NameTrack(tid: int, name: str):
+    if not Enabled():
+        return
+    _Append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}})
+
+@contextmanager
+def Span(name: str, category: str="tools", **args):
+    if not Enabled():
+        yield
+        return
+    start = Now()
+    startTime = time.perf_counter()
+    try:
+        yield
+    finally:
+        AddSpan(name, category, start, (time.perf_counter() - startTime) * 1e6, args=args or None)
+
+def Drain() -> list:
+    """取出本进程记录的所有事件（进程池的 worker 用它把记录带回主进程）"""
+    with _lock:
+        events = list(_events)
+        _events.clear()
+    return events
+
+def Extend(events: list):
+    if events:
+        with _lock:
+            _events.extend(events)
+        _Register()
+
+def _Append(event: dict):
+    with _lock:
+        _events.append(event)
+    _Register()
+
+def _Register():
+    global _registered
+    if not _registered and multiprocessing.parent_process() is None: # 只有主进程负责写文件
+        _registered = True
+        atexit.register(_Flush)
+
+def _Flush():
+    path = os.environ.get(TRACE_ENV, "")
+    events = Drain()
+    if not path or not events:
+        return
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    PrintSummary(events)
+    print(f"Trace written to '{path}'.")
+
+def PrintSummary(events: list):
+    totals = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        key = (event["cat"], event["name"])
+        count, total, longest = totals.get(key, (0, 0.0, 0.0))
+        totals[key] = (count + 1, total + event["dur"], max(longest, event["dur"]))
+
+    print("\n[Trace] summary:")
+    print(f"  {'total':>10}  {'max':>10}  {'count':>5}  name")
+    for (category, name), (count, total, longest) in sorted(totals.items(), key=lambda x: -x[1][1]):
+        print(f"  {total / 1e6:9.2f}s  {longest / 1e6:9.2f}s  {count:5d}  [{category}] {name}")
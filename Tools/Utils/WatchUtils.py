@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# 文件变化监听：Linux 下通过 ctypes 调用 inotify（递归监听，新建的子目录会自动加入），其他平台退化为定时扫描 stat。
+# Wait() 阻塞到有变化为止，并在变化停止 debounce 秒后才返回，一次保存多个文件只触发一次。
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import platform
+from typing import Optional
+
+POLL_INTERVAL = 0.5
+
+# inotify 常量，见 <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _ListDirs(root: str, ignoreDirs: tuple) -> list:
+    result = []
+    pending = [root]
+    while pending:
+        dir = pending.pop()
+        result.append(dir)
+        try:
+            with os.scandir(dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in ignoreDirs:
+                        pending.append(entry.path)
+        except OSError:
+            continue
+    return result
+
+def _ListFiles(dir: str) -> list:
+    try:
+        with os.scandir(dir) as it:
+            return [entry.path for entry in it if entry.is_file(follow_symlinks=False)]
+    except OSError:
+        return []
+
+class Watcher:
+
+    def __init__(self, roots: list, ignoreDirs: tuple=(), debounce: float=0.3):
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.ignoreDirs = ignoreDirs
+        self.debounce = debounce
+        self._fd = None
+        self._watches = {} # wd -> dir
+        self._files = {} # dir -> 目录下已知的文件路径，目录被删掉或移走时靠它报告里面消失的文件
+        self._snapshot = {}
+        if platform.system() == "Linux":
+            self._InitInotify()
+        if self._fd is None:
+            self._snapshot = self._Scan()
+
+    @property
+    def Backend(self) -> str:
+        return "inotify" if self._fd is not None else "polling"
+
+    def Wait(self, timeout: Optional[float]=None) -> set:
+        """阻塞直到有文件变化，返回变化的路径集合；超时返回空集合"""
+        changes = self._Read(timeout)
+        while changes: # 防抖：持续有变化就继续收集
+            more = self._Read(self.debounce)
+            if not more:
+                break
+            changes |= more
+        return changes
+
+    def Drain(self) -> set:
+        """取出当前已经积累的变化（不等待）"""
+        return self._Read(0)
+
+    def Close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _Read(self, timeout: Optional[float]) -> set:
+        if self._fd is not None:
+            return self._ReadInotify(timeout)
+        return self._Poll(timeout)
+
+    # ---------------- inotify ---------------- #
+
+    def _InitInotify(self):
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        self._fd = fd
+        for root in self.roots:
+            for dir in _ListDirs(root, self.ignoreDirs):
+                self._AddWatch(dir)
+
+    def _AddWatch(self, dir: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                print("WARNING! inotify watch limit reached, raise fs.inotify.max_user_watches")
+            return
+        self._watches[wd] = dir
+        self._files[dir] = set(_ListFiles(dir))
+
+    def _RemoveWatches(self, path: str) -> set:
+        """目录被删掉或移出监听范围：移除它和所有子目录的监听，返回其中已知的文件"""
+        removed = set()
+        prefix = path + os.sep
+        for wd, dir in list(self._watches.items()):
+            if dir != path and not dir.startswith(prefix):
+                continue
+            del self._watches[wd]
+            self._libc.inotify_rm_watch(self._fd, wd) # 已经删掉的目录会返回 EINVAL，不用管
+            removed.update(self._files.pop(dir, ()))
+        return removed
+
+    def _ReadInotify(self, timeout: Optional[float]) -> set:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changes = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & _IN_Q_OVERFLOW: # 事件队列溢出，只能当作所有监听目录都变了
+                    changes.update(self._watches.values())
+                    continue
+                if mask & _IN_IGNORED:
+                    self._files.pop(self._watches.pop(wd, None), None)
+                    continue
+                dir = self._watches.get(wd)
+                if dir is None:
+                    continue
+                path = os.path.join(dir, name) if name else dir
+                if mask & _IN_ISDIR:
+                    if name in self.ignoreDirs:
+                        continue
+                    if mask & (_IN_CREATE | _IN_MOVED_TO): # 新目录：加入监听，里面已有的文件也算变化（git checkout、mv 进来的整个目录不会再产生文件事件）
+                        for subdir in _ListDirs(path, self.ignoreDirs):
+                            self._AddWatch(subdir)
+                            changes.update(_ListFiles(subdir))
+                        continue
+                    if mask & (_IN_DELETE | _IN_MOVED_FROM): # 目录没了：里面的文件都算变化，移出去的目录之后的事件也不能再报成树内的路径
+                        changes.update(self._RemoveWatches(path))
+                        continue
+                elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._files.setdefault(dir, set()).add(path)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    self._files.get(dir, set()).discard(path)
+                changes.add(path)
+        return changes
+
+    # ---------------- Polling ---------------- #
+
+    def _Scan(self) -> dict:
+        snapshot = {}
+        for root in self.roots:
+            for dir in _ListDirs(root, self.ignoreDirs):
+                try:
+                    with os.scandir(dir) as it:
+                        for entry in it:
+                            if entry.is_file(follow_symlinks=False):
+                                stat = entry.stat(follow_symlinks=False)
+                                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def _Poll(self, timeout: Optional[float]) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._Scan()
+            changes = {path for path in snapshot.keys() | self._snapshot.keys() if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changes:
+                return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(POLL_INTERVAL if deadline is None else max(0.0, min(POLL_INTERVAL, deadline - time.monotonic())))
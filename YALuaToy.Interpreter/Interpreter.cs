@@ -144,6 +144,7 @@ static class Interpreter
         /* 支持多行输入 */
         state.OpenSTD();
         if (state.TopLdx == 0) {    /* 交互模式 */
+            LuaParseOptions.PrewarmAsync(); /* 等用户输入的时候在后台预热解析器 */
             state.Push(PrintError); /* 先压入错误打印函数 */
             Console.WriteLine($"YALuaToy 5.3.6  Encoding: {Console.OutputEncoding.WebName}  {hellos[random.Next(hellos.Length)]}");
             while (true) {
@@ -187,15 +188,19 @@ static class Interpreter
         return 1;
     }
 
-    /* 只提供两个功能：要么指定 .lua 文件，要么交互模式 */
+    /* 只提供两个功能：要么指定 .lua 文件，要么交互模式；最前面加 -O 会开启字节码优化 */
     static int Main(string[] args) {
         Trace.Listeners.Add(new TextWriterTraceListener(Console.Out));
         Trace.AutoFlush = true;
         Console.OutputEncoding = Encoding.UTF8;
+        bool optimize = args.Length > 0 && args[0] == "-O";
+        if (optimize)
+            args = args[1..];
 
         LuaState state = LuaState.NewState();
         if (state == null)
             throw new Exception("cannot create state");
+        state.OptimizeCode = optimize;
 
         state.Push(PrintError);
         state.Push(PMain);
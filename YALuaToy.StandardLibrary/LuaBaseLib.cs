@@ -128,23 +128,23 @@ internal static class LuaBaseLib
     }
     private static int _LoadFile(this LuaState state) {
         string       filepath     = state.GetStringArg(1, "");
-        string       mode         = state.GetStringArg(2, "");
+        string       mode         = state.GetStringArg(2, "bt");
         int          envLdx       = state.IsNone(3) ? 0 : 3;
-        ThreadStatus threadStatus = state.LoadFile(filepath);
+        ThreadStatus threadStatus = state.LoadFile(filepath, mode);
         return state._HandleLoadResult(threadStatus, envLdx);
     }
     private static int _Load(this LuaState state) {
         string       chunk  = state.ToString(1, out bool success);
-        string       mode   = state.GetStringArg(3, "");
+        string       mode   = state.GetStringArg(3, "bt");
         int          envLdx = state.IsNone(4) ? 0 : 4;
         ThreadStatus threadStatus;
         if (success) {
             string chunkname = state.GetStringArg(2, "chunk");
-            threadStatus     = state.LoadString(chunk, chunkname);
+            threadStatus     = state.LoadString(chunk, chunkname, mode);
         } else { /* loading from a reader function */
             string chunkname = state.GetStringArg(2, "=(load)");
             state.CheckArgType(1, LuaConst.TFUNCTION);
-            threadStatus = state.Load(new ChunkReader(state), chunkname);
+            threadStatus = state.Load(new ChunkReader(state), chunkname, mode);
         }
         return state._HandleLoadResult(threadStatus, envLdx);
     }
@@ -374,6 +374,11 @@ internal class ChunkReader : TextReader
         _sb    = new StringBuilder();
     }
 
+    public override int Peek() { /* Load 靠第一个字符区分文本和预编译块 */
+        if (_sb.Length == 0)
+            _DoRead();
+        return _sb.Length > 0 ? _sb[0] : -1;
+    }
     public override int Read() { /* 先提供一个能用的实现，后续再完善 */
         if (_sb.Length == 0)
             _DoRead();
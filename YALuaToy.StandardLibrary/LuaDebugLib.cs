@@ -0,0 +1,154 @@
+namespace YALuaToy.StandardLibrary {
+
+using System;
+using System.Linq;
+using System.Text;
+using System.IO;
+using System.Diagnostics;
+using System.Runtime.CompilerServices;
+using System.Collections.Generic;
+using YALuaToy.Core;
+using YALuaToy.Const;
+
+/* 目前只有钩子相关的函数和 traceback，其他反射接口还没实现 */
+internal static class LuaDebugLib
+{
+    public const string LIB_NAME = "debug";
+
+    private const string HOOK_KEY = "_HOOKKEY"; /* registry 里的钩子表，thread -> Lua 钩子函数，弱键 */
+
+    private static readonly string[] hookNames = ["call", "return", "line", "count", "tail call"];
+    private static readonly LuaHook  hookF     = _HookF;
+
+    private static readonly List<(string, LuaCFunction)> debugFuncs = [
+        ("gethook", _GetHook),
+        ("sethook", _SetHook),
+        ("traceback", _Traceback),
+    ];
+
+    internal static int OpenLib_Debug(this LuaState state) {
+        state.NewLib(debugFuncs);
+        return 1;
+    }
+
+    /* ---------------- Lib Funcs ---------------- */
+
+    private static int _SetHook(this LuaState state) {
+        LuaState thread = _GetThread(state, out int arg);
+        LuaHook? func;
+        HookMask mask;
+        int      count;
+        if (state.IsNoneOrNil(arg + 1)) { /* no hook? */
+            state.TopLdx = arg + 1;
+            func         = null;
+            mask         = 0;
+            count        = 0; /* turn off hooks */
+        } else {
+            string smask = state.GetStringArg(arg + 2);
+            state.CheckArgType(arg + 1, LuaConst.TFUNCTION);
+            count = (int)state.GetIntegerArg(arg + 3, 0);
+            func  = hookF;
+            mask  = _MakeMask(smask, count);
+        }
+        if (state.RawGetTable(LuaConst.REGISTRYINDEX, HOOK_KEY) == LuaConst.TNIL) {
+            state.Pop();
+            state.NewTable(); /* create a hook table */
+            state.PushValue(-1);
+            state.RawSetTable(LuaConst.REGISTRYINDEX, HOOK_KEY); /* set it in position */
+            state.Push("k");
+            state.SetTable(-2, "__mode"); /* hooktable.__mode = "k" */
+            state.PushValue(-1);
+            state.SetMetatable(-2); /* setmetatable(hooktable) = hooktable */
+        }
+        _PushThread(state, thread); /* key (thread) */
+        state.PushValue(arg + 1);   /* value (hook function) */
+        state.RawSetTable(-3);      /* hooktable[thread] = new Lua hook */
+        thread.SetHook(func, mask, count);
+        return 0;
+    }
+    private static int _GetHook(this LuaState state) {
+        LuaState thread = _GetThread(state, out _);
+        LuaHook? hook   = thread.GetHook();
+        if (hook == null) { /* no hook? */
+            state.PushNil();
+        } else if (hook != hookF) { /* external hook? */
+            state.Push("external hook");
+        } else { /* hook table must exist */
+            state.RawGetTable(LuaConst.REGISTRYINDEX, HOOK_KEY);
+            _PushThread(state, thread);
+            state.RawGetTable(-2); /* 1st result = hooktable[thread] */
+            state.Remove(-2);      /* remove hook table */
+        }
+        state.Push(_UnmakeMask(thread.GetHookMask())); /* 2nd result = mask */
+        state.Push(thread.GetHookCount());            /* 3rd result = count */
+        return 3;
+    }
+    private static int _Traceback(this LuaState state) {
+        LuaState thread = _GetThread(state, out int arg);
+        if (!state.IsNoneOrNil(arg + 1) && !state.IsString(arg + 1)) { /* non-string 'msg'? */
+            state.PushValue(arg + 1); /* return it untouched */
+        } else {
+            string msg   = state.IsNoneOrNil(arg + 1) ? "" : state.GetStringArg(arg + 1);
+            int    level = (int)state.GetIntegerArg(arg + 2, state == thread ? 1 : 0);
+            state.Push(thread.Traceback(level, string.IsNullOrEmpty(msg) ? "stack traceback:" : $"{msg}\nstack traceback:", false));
+        }
+        return 1;
+    }
+
+    /* ---------------- Utils ---------------- */
+
+    /* 第一个参数可以是线程，没有的话就是当前线程；arg 是之后参数的偏移 */
+    private static LuaState _GetThread(LuaState state, out int arg) {
+        if (state.IsThread(1)) {
+            arg = 1;
+            return state.ToThread(1);
+        }
+        arg = 0;
+        return state;
+    }
+    private static void _PushThread(LuaState state, LuaState thread) {
+        state.ForcedCheckStack(1);
+        thread.PushSelf();
+        if (thread != state)
+            thread.XMove(state, 1);
+    }
+
+    /* 在被挂钩的线程上调用对应的 Lua 钩子函数：f(event, line) */
+    private static void _HookF(LuaState state, LuaDebugInfo info) {
+        state.RawGetTable(LuaConst.REGISTRYINDEX, HOOK_KEY);
+        state.PushSelf();
+        if (state.RawGetTable(-2) == LuaConst.TFUNCTION) { /* is there a hook function? */
+            state.Push(hookNames[(int)info.Event]); /* push event name */
+            if (info.CurrentLine >= 0)
+                state.Push(info.CurrentLine); /* push current line */
+            else
+                state.PushNil();
+            state.Call(2, 0); /* call hook function */
+        }
+    }
+
+    private static HookMask _MakeMask(string smask, int count) {
+        HookMask mask = 0;
+        if (smask.Contains('c'))
+            mask |= HookMask.CALL;
+        if (smask.Contains('r'))
+            mask |= HookMask.RET;
+        if (smask.Contains('l'))
+            mask |= HookMask.LINE;
+        if (count > 0)
+            mask |= HookMask.COUNT;
+        return mask;
+    }
+    private static string _UnmakeMask(HookMask mask) {
+        StringBuilder sb = new StringBuilder();
+        if ((mask & HookMask.CALL) != 0)
+            sb.Append('c');
+        if ((mask & HookMask.RET) != 0)
+            sb.Append('r');
+        if ((mask & HookMask.LINE) != 0)
+            sb.Append('l');
+        return sb.ToString();
+    }
+}
+
+}
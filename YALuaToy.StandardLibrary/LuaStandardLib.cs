@@ -22,6 +22,8 @@ public static class LuaStandardLib
         (LuaCoroutineLib.LIB_NAME, LuaCoroutineLib.OpenLib_Coroutine),
         (LuaTableLib.LIB_NAME, LuaTableLib.OpenLib_Table),
         (LuaMathLib.LIB_NAME, LuaMathLib.OpenLib_Math),
+        (LuaStringLib.LIB_NAME, LuaStringLib.OpenLib_String),
+        (LuaDebugLib.LIB_NAME, LuaDebugLib.OpenLib_Debug),
     ];
 
     public static void OpenSTD(this LuaState state) {
@@ -0,0 +1,43 @@
+namespace YALuaToy.StandardLibrary {
+
+using System;
+using System.Linq;
+using System.Text;
+using System.IO;
+using System.Diagnostics;
+using System.Runtime.CompilerServices;
+using System.Collections.Generic;
+using YALuaToy.Core;
+using YALuaToy.Const;
+
+/* 目前只有 dump，其他字符串函数还没实现 */
+internal static class LuaStringLib
+{
+    public const string LIB_NAME = "string";
+
+    private static readonly List<(string, LuaCFunction)> stringFuncs = [
+        ("dump", _Dump),
+    ];
+
+    internal static int OpenLib_String(this LuaState state) {
+        state.NewLib(stringFuncs);
+        return 1;
+    }
+
+    /* ---------------- Lib Funcs ---------------- */
+
+    private static int _Dump(this LuaState state) {
+        /* 结果是每个字符对应一个字节的字符串，可以直接交给 load */
+        bool strip = state.ToBoolean(2);
+        state.CheckArgType(1, LuaConst.TFUNCTION);
+        state.TopLdx = 1;
+        using (StringWriter writer = new StringWriter()) {
+            if (state.Dump(writer, strip) != ThreadStatus.OK)
+                throw new LuaRuntimeError("unable to dump given function");
+            state.Push(writer.ToString());
+        }
+        return 1;
+    }
+}
+
+}
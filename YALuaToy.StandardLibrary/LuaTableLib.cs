@@ -5,6 +5,7 @@ using System.Linq;
 using System.Text;
 using System.IO;
 using System.Diagnostics;
+using System.Diagnostics.CodeAnalysis;
 using System.Runtime.CompilerServices;
 using System.Collections.Generic;
 using YALuaToy.Core;
@@ -36,6 +37,12 @@ internal static class LuaTableLib
         ulong count = (ulong)end - (ulong)start; /* number of elements minus 1 (avoid overflows) */
         if (count >= uint.MaxValue || !state.LuaCheckStack((int)++count))
             throw new LuaRuntimeError($"too many results to unpack: {count}");
+        if (state._TryGetPlainTable(1, out LuaTable? table)) { /* 没有元表，直接读数组部分 */
+            for (long i = start; i < end; i++)
+                state.PushStack(table.GetInt(i));
+            state.PushStack(table.GetInt(end));
+            return (int)count;
+        }
         for (long i = start; i < end; i++) /* push arg[start..end - 1] (to avoid overflows) */
             state.GetTable(1, i);
         state.GetTable(1, end); /* push last element */
@@ -53,6 +60,11 @@ internal static class LuaTableLib
             pos = state.GetIntegerArg(2); /* 2nd argument is the position */
             if (!(1 <= pos && pos <= firstEmpty))
                 throw new LuaArgError(state, 2, $"position out of bounds: {pos}, valid range: {1}~{firstEmpty}");
+            if (state._TryGetPlainTable(1, out LuaTable? table)) { /* 没有元表，直接在数组部分上移动 */
+                for (long i = firstEmpty; i > pos; i--)
+                    table.SetInt(i, table.GetInt(i - 1));
+                break;
+            }
             for (long i = firstEmpty; i > pos; i--) { /* move up elements */
                 state.GetTable(1, i - 1);
                 state.SetTable(1, i); /* t[i] = t[i - 1] */
@@ -63,7 +75,11 @@ internal static class LuaTableLib
             throw new LuaRuntimeError($"wrong number of arguments to 'insert', {state.TopLdx}");
         }
         }
-        state.SetTable(1, pos); /* t[pos] = v */
+        if (state._TryGetPlainTable(1, out LuaTable? plainTable)) {
+            plainTable.SetInt(pos, state._Get(-1));
+            state.Pop();
+        } else
+            state.SetTable(1, pos); /* t[pos] = v */
         return 0;
     }
 
@@ -101,6 +117,15 @@ internal static class LuaTableLib
                 state.CheckArgType(argLdx, LuaConst.TTABLE); /* force an error */
         }
     }
+    /* 没有元表的表读写不会触发元方法，可以跳过 LuaState 的 Index/NewIndex 直接访问 LuaTable（整数键走数组部分） */
+    private static bool _TryGetPlainTable(this LuaState state, int argLdx, [NotNullWhen(true)] out LuaTable? table) {
+        LuaValue value = state._Get(argLdx);
+        table          = value.IsTable ? value.LObject<LuaTable>() : null;
+        if (table != null && table.Metatable == null)
+            return true;
+        table = null;
+        return false;
+    }
     private static long _GetLengthHelper(this LuaState state, int argLdx, TableFlags flags) {
         state._CheckTableArg(argLdx, flags | TableFlags.LEN);
         return state.LengthAt(argLdx);
@@ -0,0 +1,138 @@
+namespace YALuaToy.Tests.Compilation {
+
+using System;
+using System.IO;
+using System.Linq;
+using System.Collections.Generic;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.Compilation;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+public class LuaCodeOptimizerTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaCodeOptimizerTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const string LOOP_CHUNK = @"
+local n = 100
+local limit = n * 2 + 1
+local count, sum = 0, 0
+for i = 1, 1000 do
+    if i < 500 then count = count + 1 end
+    if i == 7 then sum = sum + limit end
+    sum = sum + i
+    tostring(i)
+end
+return count, sum, limit
+";
+
+    private static LuaProto Compile(string chunk, bool optimize) {
+        LuaState state = LuaState.NewState();
+        state.OptimizeCode = optimize;
+        Assert.Equal(ThreadStatus.OK, state.LoadString(chunk, "=optimizer"));
+        return state.GetStack(state.Top - 1).LObject<LClosure>().proto;
+    }
+    private static ThreadStatus DoString(LuaState state, string chunk, bool optimize) {
+        state.OptimizeCode = optimize;
+        return state.DoString(chunk);
+    }
+
+    [Fact]
+    public void Optimize_Case_Instructions() {
+        LuaProto plain     = Compile(LOOP_CHUNK, false);
+        LuaProto optimized = Compile(LOOP_CHUNK, true);
+        Assert.Equal(optimized._instructions.Count, optimized.Lines.Count);
+        Assert.True(optimized._instructions.Count < plain._instructions.Count);
+        _output.WriteLine(string.Join("\n", optimized._instructions));
+
+        List<OpCode> ops = optimized._instructions.Select(inst => inst.OpCode).ToList();
+        Assert.DoesNotContain(OpCode.MUL, ops); /* n * 2 + 1 折叠成了常量 */
+        Assert.Contains(OpCode.LTK, ops);
+        Assert.Contains(OpCode.EQK, ops);
+        Assert.Contains(OpCode.INCR, ops);
+        Assert.Contains(OpCode.GETTABUPCALL, ops);
+
+        /* 默认关闭，和 luac 一致的代码里不会出现融合指令 */
+        Assert.False(LuaState.NewState().OptimizeCode);
+        Assert.DoesNotContain(plain._instructions, inst => inst.OpCode > OpCode.EXTRAARG);
+    }
+
+    [Theory]
+    [InlineData(LOOP_CHUNK)]
+    [InlineData("local a = 3 local b = a * a - 1 local c = -b return b, c, 7 // 2, 1 / 0, 3 % -2, 1 << 62")]
+    [InlineData("local x = 1 x = 2 x = x + 0.5 local y = 10 y = y - x return x, y")]
+    [InlineData("local r = {} for i = 1, 5 do local j = i r[i] = function() j = j + 1 return j end end return r[1](), r[1](), r[5]()")]
+    [InlineData("local s = '' for i = 10, 1, -3 do if i <= 4 then s = s .. 'x' elseif i ~= 7 then s = s .. i end end return s")]
+    [InlineData("local t = setmetatable({}, {__add = function(a, b) return b end, __lt = function(a, b) return true end}) t = t + 1 return t, 1.5 == 1.5")]
+    [InlineData("local i = 0 ::top:: i = i + 1 if i < 3 then goto top end while true do if i >= 5 then break end i = i + 1 end return i")]
+    [InlineData("local f = false local t = not f and 1 or 2 return t, math.maxinteger + 1 == math.mininteger, select('#', tostring(1), 2)")]
+    public void Optimize_Case_SameResults(string chunk) {
+        string Run(bool optimize) {
+            LuaState state = LuaState.NewState();
+            state.OpenSTD();
+            string   join  = "local function join(...) local s = '' for i = 1, select('#', ...) do s = s .. tostring((select(i, ...))) .. ',' end return s end";
+            Assert.Equal(ThreadStatus.OK, DoString(state, $"{join} return join((function() {chunk} end)())", optimize));
+            return state.ToString(-1, out _);
+        }
+        string expected = Run(false);
+        _output.WriteLine(expected);
+        Assert.Equal(expected, Run(true));
+    }
+
+    [Fact]
+    public void Optimize_Case_Yield() {
+        /* LTK/LEK 遇到元方法时和 LT/LE 一样可以在元方法里挂起，恢复后由 FinishOp 完成比较和跳转 */
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, DoString(state, @"
+            local mt = {__lt = function(a, b)
+                coroutine.yield('lt')
+                if type(a) == 'table' then return a.v < b else return a < b.v end
+            end}
+            local co = coroutine.wrap(function()
+                local t = setmetatable({v = 1}, mt)
+                local r = {}
+                r[1] = t < 2
+                r[2] = t <= 0 -- 没有 __le，用 not (0 < t) 代替
+                r[3] = t < 1
+                return tostring(r[1]) .. ',' .. tostring(r[2]) .. ',' .. tostring(r[3])
+            end)
+            assert(co() == 'lt' and co() == 'lt' and co() == 'lt')
+            local result = co()
+            assert(result == 'true,false,false', result)
+        ", true));
+    }
+
+    [Theory]
+    [InlineData("Assets/Lua/Tests/bitwise.lua")]
+    [InlineData("Assets/Lua/Tests/calls.lua")]
+    [InlineData("Assets/Lua/Tests/closure.lua")]
+    [InlineData("Assets/Lua/Tests/constructs.lua")]
+    [InlineData("Assets/Lua/Tests/coroutine.lua")]
+    [InlineData("Assets/Lua/Tests/events.lua")]
+    [InlineData("Assets/Lua/Tests/goto.lua")]
+    [InlineData("Assets/Lua/Tests/locals.lua")]
+    [InlineData("Assets/Lua/Tests/nextvar.lua")]
+    [InlineData("Assets/Lua/Tests/vararg.lua")]
+    public void Optimize_Case_Scripts(string filepath) {
+        string       text = File.ReadAllText(CommonTestUtils.GetPath(filepath));
+        ThreadStatus Run(bool optimize) {
+            LuaState state = LuaState.NewState();
+            state.OpenSTD();
+            ThreadStatus threadStatus = DoString(state, text, optimize);
+            if (threadStatus != ThreadStatus.OK)
+                _output.WriteLine($"[{threadStatus}] {state.ToString(-1, out _)}");
+            return threadStatus;
+        }
+        Assert.Equal(Run(false), Run(true)); /* 和不优化时的结果一致 */
+    }
+}
+
+}
@@ -63,6 +63,24 @@ public class LuaParserUtilsTests
         AntlrInputStream inputStream = new AntlrInputStream(fileText);
         LClosure         lclosure    = LuaParserUtils._RawParse(state, inputStream, filepath);
     }
+
+    private static string ParseTree(string text, bool twoStage) {
+        bool oldTwoStage = LuaParseOptions.TwoStage;
+        LuaParseOptions.TwoStage = twoStage;
+        try {
+            return LuaParserUtils._ParseStart(new AntlrInputStream(text), null).ToStringTree();
+        } finally {
+            LuaParseOptions.TwoStage = oldTwoStage;
+        }
+    }
+    [Fact]
+    public void ParseStart_Case_TwoStage() { /* 两阶段解析（SLL+LL）的结果必须和直接 LL 一样 */
+        string dir = Path.Join(CommonTestUtils.CWD(), "Assets/Lua/OfficialTests");
+        foreach (string filepath in Directory.GetFiles(dir, "*.lua")) {
+            string text = File.ReadAllText(filepath);
+            Assert.Equal(ParseTree(text, false), ParseTree(text, true));
+        }
+    }
 }
 
 }
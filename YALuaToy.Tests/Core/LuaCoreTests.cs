@@ -13,6 +13,8 @@ using System.Diagnostics;
 using Microsoft.VisualStudio.TestPlatform.Utilities;
 using System.Text;
 using System.ComponentModel;
+using System.IO;
+using YALuaToy.StandardLibrary;
 
 public class LuaCoreTests
 {
@@ -182,6 +184,27 @@ public class LuaCoreTests
         Assert.True(result);
     }
 
+    [Fact]
+    public void GrowStack_Case_Metamethod() {
+        /* 元方法里递归把栈撑大（换了新数组），VM 要把结果写到新的栈上；每次都在新协程里跑，保证栈是从小的开始长 */
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(@"
+            local function deep(n) if n == 0 then return 0 end return 1 + deep(n - 1) end
+            local function grow() return deep(500) end
+            local t = setmetatable({}, {__add = grow, __unm = grow, __index = grow, __concat = grow, __len = grow})
+            local function fresh(f) return coroutine.wrap(f)() end
+            assert(fresh(function() local x = t + 1 return x end) == 500)
+            assert(fresh(function() local x = 1 x = x + t return x end) == 500)
+            assert(fresh(function() return -t end) == 500)
+            assert(fresh(function() return t.k end) == 500)
+            assert(fresh(function() local k = 'k' return t[k] end) == 500)
+            assert(fresh(function() return t .. 'a' end) == 500)
+            assert(fresh(function() return #t end) == 500)
+            assert(fresh(function() return deep(20000) end) == 20000)
+        "));
+    }
+
     [Fact]
     public void GetType_MiscCase() {
         LuaState state   = LuaState.NewState();
@@ -937,6 +960,39 @@ public class LuaCoreTests
         }
     }
 
+    [Fact]
+    public void Next_Case_Interleaved() {
+        LuaState state = LuaState.NewState();
+        LuaStateMockUtils.CreateTable(state, "a", 1, "b", 2, 1, 10, 2, 20, "c", 3);
+
+        /* 嵌套遍历同一个表，内外两层互不影响 */
+        int count = 0;
+        state.PushNil();
+        while (state.Next(-2)) {
+            state.Pop();
+            state.PushNil();
+            while (state.Next(-3)) {
+                state.Pop();
+                count++;
+            }
+        }
+        Assert.Equal(25, count);
+
+        /* 遍历时删除当前字段 */
+        count = 0;
+        state.PushNil();
+        while (state.Next(-2)) {
+            state.Pop();
+            state.PushValue(-1);
+            state.PushNil();
+            state.SetTable(-4);
+            count++;
+        }
+        Assert.Equal(5, count);
+        state.PushNil();
+        Assert.False(state.Next(-2));
+    }
+
     [Fact]
     public void LuaConcat_MiscCase() {
         LuaState state = LuaState.NewState();
@@ -1433,6 +1489,84 @@ public class LuaCoreTests
         Assert.Equal(ThreadStatus.OK, thread.Resume(state, 3));
         Assert.Equal(2, counter.Count);
     }
+
+    [Fact]
+    public void Dump_Case_RoundTrip() {
+        const string chunk = @"
+            local t = {}
+            local function add(a, b) return a + b end
+            for i = 1, 10 do t[i] = add(i, 0.5) end
+            local s = ''
+            for _, v in ipairs({'a', 'b', 'c'}) do s = s .. v end
+            return #t, t[10], s, add(1, 2), 'end'
+        ";
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.LoadString(chunk));
+
+        foreach (bool strip in new[] { false, true }) {
+            /* 二进制 */
+            MemoryStream stream = new MemoryStream();
+            Assert.Equal(ThreadStatus.OK, state.Dump(new BinaryWriter(stream), strip));
+            stream.Position = 0;
+            Assert.Equal(ThreadStatus.OK, state.Load(new BinaryReader(stream), "binary"));
+            Assert.Equal(ThreadStatus.OK, state.PCall(0, LuaConst.MULTRET, 0));
+            LuaStateTestUtils.TestTopElems(state, 10, 10.5, "abc", 3, "end");
+            state.TopLdx = 1;
+
+            /* 字符串（string.dump 的形式），Load 靠第一个字符识别预编译块 */
+            StringWriter writer = new StringWriter();
+            Assert.Equal(ThreadStatus.OK, state.Dump(writer, strip));
+            Assert.Equal(ThreadStatus.OK, state.LoadString(writer.ToString(), "text"));
+            Assert.Equal(ThreadStatus.OK, state.PCall(0, LuaConst.MULTRET, 0));
+            LuaStateTestUtils.TestTopElems(state, 10, 10.5, "abc", 3, "end");
+            state.TopLdx = 1;
+        }
+
+        state.Push(1);
+        Assert.Equal(ThreadStatus.ERRRUN, state.Dump(new StringWriter())); /* 不是 Lua 函数 */
+    }
+
+    [Fact]
+    public void Load_Case_BinaryError() {
+        LuaState state = LuaState.NewState();
+        Assert.Equal(ThreadStatus.OK, state.LoadString("return 1"));
+        StringWriter writer = new StringWriter();
+        Assert.Equal(ThreadStatus.OK, state.Dump(writer));
+        string binary = writer.ToString();
+        state.Pop();
+
+        Assert.Equal(ThreadStatus.ERRSYNTAX, state.LoadString(binary, "chunk", "t"));
+        Assert.Contains("attempt to load a binary chunk", state.ToString(-1, out _));
+        state.Pop();
+        Assert.Equal(ThreadStatus.ERRSYNTAX, state.LoadString("return 1", "chunk", "b"));
+        Assert.Contains("attempt to load a text chunk", state.ToString(-1, out _));
+        state.Pop();
+        Assert.Equal(ThreadStatus.ERRSYNTAX, state.LoadString(binary.Substring(0, binary.Length / 2)));
+        Assert.Contains("truncated", state.ToString(-1, out _));
+        state.Pop();
+        Assert.Equal(ThreadStatus.ERRSYNTAX, state.LoadString(binary.Substring(0, 5) + "\0" + binary.Substring(6)));
+        Assert.Contains("format mismatch", state.ToString(-1, out _));
+        state.Pop();
+
+        /* 数量被改成 0x7FFFFFFF 时报 corrupted，而不是按这个数量分配内存。
+           strip 后的块：头部 33 字节（含上值数量），空源码名 1 字节，行号范围、参数数等 11 字节，然后是指令数 */
+        const int CODE_COUNT_OFFSET = 33 + 1 + 11;
+        Assert.Equal(ThreadStatus.OK, state.LoadString("return 1"));
+        writer = new StringWriter();
+        Assert.Equal(ThreadStatus.OK, state.Dump(writer, true));
+        state.Pop();
+        char[] corrupted = writer.ToString().ToCharArray();
+        Assert.Equal('\x03', corrupted[CODE_COUNT_OFFSET]); /* LOADK、RETURN、RETURN */
+        corrupted[CODE_COUNT_OFFSET]     = '\xFF';
+        corrupted[CODE_COUNT_OFFSET + 1] = '\xFF';
+        corrupted[CODE_COUNT_OFFSET + 2] = '\xFF';
+        corrupted[CODE_COUNT_OFFSET + 3] = '\x7F';
+        Assert.Equal(ThreadStatus.ERRSYNTAX, state.LoadString(new string(corrupted)));
+        Assert.Contains("corrupted", state.ToString(-1, out _));
+        state.Pop();
+        Assert.Equal(0, state.TopLdx);
+    }
 }
 
 }
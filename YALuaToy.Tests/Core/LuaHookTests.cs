@@ -0,0 +1,107 @@
+namespace YALuaToy.Tests.Core {
+
+using System;
+using System.Linq;
+using System.Collections.Generic;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+public class LuaHookTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaHookTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const string CHUNK = @"local function f(n) return n + n end
+local x = f(3)
+return f(x)
+";
+
+    [Fact]
+    public void SetHook_Case_Events() {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        List<string> events = new List<string>();
+        int          counts = 0;
+        Assert.Equal(ThreadStatus.OK, state.LoadString(CHUNK, "=hook"));
+        state.SetHook((state_, info) => {
+            if (info.Event == HookEvent.COUNT)
+                counts++;
+            else
+                events.Add(info.Event == HookEvent.LINE ? $"line {info.CurrentLine}" : $"{info.Event} {info.What}");
+        }, HookMask.CALL | HookMask.RET | HookMask.LINE | HookMask.COUNT, 1);
+        Assert.Equal(ThreadStatus.OK, state.PCall(0, 1, 0));
+        Assert.Equal(12, state.ToInteger(-1));
+        _output.WriteLine(string.Join(", ", events));
+
+        /* 尾调用：f(x) 替换掉主函数，之后只有 f 的 return */
+        Assert.Equal(new[] { "CALL main", "line 1", "line 2", "CALL Lua", "line 1", "RET Lua", "line 3", "TAILCALL Lua", "line 1", "RET Lua" }, events);
+        Assert.True(counts > 0);
+
+        /* 关闭钩子 */
+        state.SetHook(null, 0);
+        Assert.Null(state.GetHook());
+        Assert.Equal((HookMask)0, state.GetHookMask());
+    }
+
+    [Fact]
+    public void SetHook_Case_DebugLib() {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(@"
+            local lines = {}
+            local function hook(event, line) lines[#lines + 1] = event .. ':' .. tostring(line) end
+            debug.sethook(hook, 'l')
+            local a = 1
+            local b = 2
+            debug.sethook()
+            assert(lines[1] == 'line:5' and lines[2] == 'line:6', tostring(lines[1]) .. ',' .. tostring(lines[2]))
+
+            debug.sethook(hook, 'cr', 100)
+            local f, mask, count = debug.gethook()
+            debug.sethook()
+            assert(f == hook and mask == 'cr' and count == 100)
+            assert(debug.gethook() == nil)
+
+            local co = coroutine.create(function() coroutine.yield() end)
+            debug.sethook(co, hook, 'c')
+            assert(debug.gethook(co) == hook and debug.gethook() == nil)
+        "));
+    }
+
+    [Fact]
+    public void Profiler_Case_Counts() {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        LuaProfiler profiler = new LuaProfiler();
+        Assert.Equal(ThreadStatus.OK, state.LoadString(CHUNK, "=prof"));
+        profiler.Start(state);
+        Assert.Equal(ThreadStatus.OK, state.PCall(0, 1, 0));
+        profiler.Stop();
+        Assert.Null(state.GetHook());
+
+        List<LuaFunctionProfile> functions = profiler.Functions();
+        foreach (var function in functions)
+            _output.WriteLine(function.ToString());
+        LuaFunctionProfile main = functions.Single(function => function.Name == "=prof:main");
+        LuaFunctionProfile f    = functions.Single(function => function.Name == "=prof:1");
+        Assert.Equal(1, main.Calls);
+        Assert.Equal(2, f.Calls);
+        Assert.Equal(f.Instructions, f.LineInstructions.Values.Sum());
+        Assert.True(f.LineInstructions.ContainsKey(1));
+
+        /* 折叠栈：第一次调用 f 在主函数下面，第二次是尾调用，替换了主函数 */
+        string[] stacks = profiler.CollapsedStacks().Split('\n', StringSplitOptions.RemoveEmptyEntries);
+        _output.WriteLine(string.Join("\n", stacks));
+        Assert.Contains(stacks, stack => stack.StartsWith("=prof:main;=prof:1 "));
+        Assert.Contains(stacks, stack => stack.StartsWith("=prof:1 "));
+    }
+}
+
+}
@@ -0,0 +1,170 @@
+namespace YALuaToy.Tests.Core {
+
+using System;
+using System.Runtime.CompilerServices;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+using YALuaToy.Tests.Utils.Mock;
+
+public class LuaInlineCacheTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaInlineCacheTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private static LuaValue K(string key) => new LuaValue(key);
+
+    [Fact]
+    public void CachedGet_Case_Receiver() {
+        LuaTable            table = new LuaTable();
+        LuaTable.FieldCache slot  = null;
+        table.Set(K("x"), new LuaValue(1L));
+        Assert.True(table.CachedGet(ref slot, K("x"), out LuaValue value));
+        Assert.Equal(1, value.Int);
+
+        /* 覆盖值不会让缓存失效，读到的是新值 */
+        LuaTable.FieldCache cache = slot;
+        table.Set(K("x"), new LuaValue(2L));
+        Assert.True(table.CachedGet(ref slot, K("x"), out value));
+        Assert.Equal(2, value.Int);
+        Assert.Same(cache, slot);
+        Assert.True(table.CachedSet(slot, new LuaValue(3L)));
+        Assert.Equal(3, table.Get(K("x")).Int);
+
+        /* rehash 之后旧的位置失效 */
+        for (int i = 0; i < 100; i++)
+            table.Set(K($"k{i}"), new LuaValue((long)i));
+        Assert.False(table.CachedSet(cache, new LuaValue(4L)));
+        Assert.True(table.CachedGet(ref slot, K("x"), out value));
+        Assert.Equal(3, value.Int);
+        Assert.NotSame(cache, slot);
+
+        /* 不存在的键：插入新键后失效 */
+        LuaTable.FieldCache missing = null;
+        Assert.True(table.CachedGet(ref missing, K("y"), out value));
+        Assert.True(value.IsNil);
+        table.Set(K("y"), new LuaValue(5L));
+        Assert.True(table.CachedGet(ref missing, K("y"), out value));
+        Assert.Equal(5, value.Int);
+        table.Set(K("y"), LuaValue.NIL);
+        Assert.True(table.CachedGet(ref missing, K("y"), out value));
+        Assert.True(value.IsNil);
+    }
+
+    [Fact]
+    public void CachedGet_Case_IndexChain() {
+        LuaTable baseClass = new LuaTable();
+        baseClass.Set(K("foo"), new LuaValue(1L));
+        baseClass.Set(K("__index"), new LuaValue(baseClass));
+        baseClass._InvalidateFlags();
+        LuaTable derivedClass = new LuaTable();
+        derivedClass.Set(K("__index"), new LuaValue(derivedClass));
+        derivedClass._InvalidateFlags();
+        derivedClass.Metatable = baseClass;
+        LuaTable NewInstance() {
+            LuaTable instance = new LuaTable();
+            instance.Set(K("a"), new LuaValue(0L));
+            instance.Metatable = derivedClass;
+            return instance;
+        }
+
+        /* 不同实例共用同一条链的缓存 */
+        LuaTable.FieldCache slot = null;
+        Assert.True(NewInstance().CachedGet(ref slot, K("foo"), out LuaValue value));
+        Assert.Equal(1, value.Int);
+        LuaTable.FieldCache cache = slot;
+        for (int i = 0; i < 10; i++) {
+            Assert.True(NewInstance().CachedGet(ref slot, K("foo"), out value));
+            Assert.Equal(1, value.Int);
+        }
+        Assert.Same(cache, slot);
+
+        /* 链上任何一张表插入、删除字段，或者换了元表，结果都要跟着变 */
+        derivedClass.Set(K("foo"), new LuaValue(2L));
+        Assert.True(NewInstance().CachedGet(ref slot, K("foo"), out value));
+        Assert.Equal(2, value.Int);
+        derivedClass.Set(K("foo"), LuaValue.NIL);
+        Assert.True(NewInstance().CachedGet(ref slot, K("foo"), out value));
+        Assert.Equal(1, value.Int);
+        LuaTable.FieldCache missing = null;
+        Assert.True(NewInstance().CachedGet(ref missing, K("bar"), out value));
+        Assert.True(value.IsNil);
+        baseClass.Set(K("bar"), new LuaValue(3L));
+        Assert.True(NewInstance().CachedGet(ref missing, K("bar"), out value));
+        Assert.Equal(3, value.Int);
+        derivedClass.Metatable = null;
+        Assert.True(NewInstance().CachedGet(ref slot, K("foo"), out value));
+        Assert.True(value.IsNil);
+
+        /* __index 是函数时不缓存 */
+        derivedClass.Set(K("__index"), new LuaValue((LuaCFunction)(state => 0)));
+        Assert.False(NewInstance().CachedGet(ref slot, K("foo"), out value));
+        Assert.Same(LuaTable.FieldCache.disabled, slot);
+    }
+
+    [Fact]
+    public void Execute_Case_InlineCache() {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(@"
+            local Base = {}
+            Base.__index = Base
+            function Base.new(x) return setmetatable({x = x}, Base) end
+            function Base:get() return self.x end
+            local Derived = setmetatable({}, Base)
+            Derived.__index = Derived
+            function Derived.new(x) return setmetatable({x = x}, Derived) end
+
+            local function sum(objs)
+                local s = 0
+                for i = 1, #objs do s = s + objs[i]:get() end
+                return s
+            end
+            local objs = {}
+            for i = 1, 10 do objs[i] = (i % 2 == 0 and Base or Derived).new(i) end
+            assert(sum(objs) == 55)
+            function Derived:get() return self.x * 2 end -- 子类覆盖
+            assert(sum(objs) == 80)
+            Derived.get = nil
+            assert(sum(objs) == 55)
+            Base.__index = function(t, k) return function() return 1 end end
+            assert(sum(objs) == 10)
+
+            count = 0
+            for i = 1, 100 do count = count + 1 end
+            assert(count == 100)
+            count = nil
+            assert(count == nil)
+            setmetatable(_ENV, {__index = function(t, k) return k end})
+            assert(count == 'count')
+        "));
+    }
+
+    [MethodImpl(MethodImplOptions.NoInlining)]
+    private static WeakReference IndexTemporaryTable(LuaState state) {
+        Assert.Equal(ThreadStatus.OK, state.LoadString("local t = ... return t.field", "=weak"));
+        LuaTable table = new LuaTable();
+        table.Set(K("field"), new LuaValue(1L));
+        state.PushStack(new LuaValue(table));
+        Assert.Equal(ThreadStatus.OK, state.PCall(1, 1, 0));
+        Assert.Equal(1, state.ToInteger(-1));
+        state.Pop();
+        LuaStateMockUtils.Sweep(state); /* 清掉栈上残留的参数 */
+        return new WeakReference(table);
+    }
+    [Fact]
+    public void Execute_Case_NoRetention() {
+        LuaState      state     = LuaState.NewState();
+        WeakReference reference = IndexTemporaryTable(state);
+        CommonTestUtils.SuperGC();
+        Assert.False(reference.IsAlive); /* 缓存里只有布局编号和下标，不会让表一直存活 */
+    }
+}
+
+}
@@ -0,0 +1,181 @@
+namespace YALuaToy.Tests.Core {
+
+using System;
+using System.Linq;
+using System.Threading;
+using System.Threading.Tasks;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+public class LuaStatePoolTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaStatePoolTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const string INIT_CHUNK = @"
+        local n = 10
+        function counter() n = n + 1 return n end
+        function counter2() n = n + 1 return n end -- 和 counter 共享上值
+        Point = {}
+        Point.__index = Point
+        function Point.new(x) return setmetatable({x = x}, Point) end
+        function Point:get() return self.x end
+        origin = Point.new(0)
+        origin.self = origin
+        cache = setmetatable({}, {__mode = 'k'})
+        cache[origin] = true
+        function fib(k) if k < 2 then return k end return fib(k - 1) + fib(k - 2) end
+    ";
+
+    private static void Init(LuaState state) {
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(INIT_CHUNK));
+    }
+
+    [Fact]
+    public void Snapshot_Case_Copy() {
+        LuaState         template = LuaState.NewState();
+        Init(template);
+        LuaStateSnapshot snapshot = LuaStateSnapshot.Capture(template);
+        LuaState         state1   = snapshot.NewState();
+        LuaState         state2   = snapshot.NewState();
+
+        Assert.Equal(ThreadStatus.OK, state1.DoString(@"
+            assert(counter() == 11 and counter2() == 12)
+            assert(origin.self == origin and origin:get() == 0 and Point.new(3):get() == 3)
+            assert(cache[origin] and getmetatable(cache).__mode == 'k')
+            assert(('ab'):rep(2) == 'abab') -- 字符串的元表也复制了
+            assert(package.loaded.string == string and fib(10) == 55)
+            origin.x = 5
+            leaked = true
+        "));
+        /* 各个 LuaState 互不影响，也不影响原来的 */
+        foreach (LuaState state in new[] { state2, template })
+            Assert.Equal(ThreadStatus.OK, state.DoString("assert(counter() == 11 and origin:get() == 0 and leaked == nil)"));
+        /* 快照建好之后再改原来的 LuaState，不影响快照 */
+        Assert.Equal(ThreadStatus.OK, template.DoString("Point.get = nil"));
+        Assert.Equal(ThreadStatus.OK, snapshot.NewState().DoString("assert(origin:get() == 0)"));
+    }
+
+    [Fact]
+    public void Snapshot_Case_Create() {
+        /* 从快照复制出来的 LuaState 和直接初始化的一样能用 */
+        LuaStateSnapshot snapshot = LuaStateSnapshot.Create(Init);
+        foreach (LuaState state in new[] { snapshot.NewState(), snapshot.NewState() })
+            Assert.Equal(ThreadStatus.OK, state.DoString("assert(fib(18) == 2584 and counter() == 11 and Point.new(2):get() == 2)"));
+    }
+
+    [Fact]
+    public void Snapshot_Case_Coroutine() {
+        LuaState template = LuaState.NewState();
+        template.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, template.DoString("co = coroutine.create(function() end)"));
+        Assert.ThrowsAny<LuaException>(() => LuaStateSnapshot.Capture(template));
+    }
+
+    [Fact]
+    public void Pool_Case_Results() {
+        using (LuaStatePool pool = new LuaStatePool(Init, 4)) {
+            Task<(long, LuaProto)>[] tasks = Enumerable.Range(0, 32).Select(i => pool.Submit(state => {
+                Assert.Equal(ThreadStatus.OK, pool.Load(state, "return fib(...)", "=job"));
+                LuaProto proto = state.GetStack(state.Top - 1).LObject<LClosure>().proto;
+                state.PushStack(i % 16);
+                Assert.Equal(ThreadStatus.OK, state.PCall(1, 1, 0));
+                return (state.ToInteger(-1), proto);
+            })).ToArray();
+            Task.WaitAll(tasks);
+
+            long[] fibs = { 0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610 };
+            for (int i = 0; i < tasks.Length; i++)
+                Assert.Equal(fibs[i % 16], tasks[i].Result.Item1);
+            /* 同一段代码只编译一次，所有工作线程上的 LuaState 共用一个 LuaProto */
+            Assert.Single(tasks.Select(task => task.Result.Item2).Distinct());
+
+            Assert.Equal(ThreadStatus.OK, pool.DoString("assert(fib(10) == 55)").Result);
+            Assert.Equal(ThreadStatus.ERRRUN, pool.DoString("error('boom')").Result);
+            Assert.Equal(ThreadStatus.ERRSYNTAX, pool.DoString("return +").Result);
+        }
+    }
+
+    [Fact]
+    public void Pool_Case_ChunkCache() {
+        using (LuaStatePool pool = new LuaStatePool(Init, 1, 0, 4)) {
+            Assert.Equal(4, pool.ChunkCacheCapacity);
+            LuaProto Load(string chunk) {
+                return pool.Submit(state => {
+                    Assert.Equal(ThreadStatus.OK, pool.Load(state, chunk, "=job"));
+                    return state.GetStack(state.Top - 1).LObject<LClosure>().proto;
+                }).Result;
+            }
+            LuaProto first = Load("return 0");
+            for (int i = 1; i < 16; i++) {
+                Load($"return {i}");
+                Assert.Same(first, Load("return 0")); /* 一直在用的不会被淘汰 */
+                Assert.True(pool.CachedChunkCount <= 4);
+            }
+            /* 超出容量后最久没用过的被淘汰，再加载时重新编译 */
+            Assert.Equal(4, pool.CachedChunkCount);
+            LuaProto reloaded = Load("return 1");
+            Assert.Same(reloaded, Load("return 1"));
+            Assert.Equal(ThreadStatus.OK, pool.DoString("return 1", "=other").Result); /* chunkname 不同也分开缓存 */
+            Assert.Equal(4, pool.CachedChunkCount);
+        }
+        Assert.Throws<ArgumentOutOfRangeException>(() => new LuaStatePool(state => { }, 1, 0, -1));
+    }
+
+    private static long Count(LuaStatePool pool) {
+        return pool.Submit(state => {
+            state.GetGlobal("counter");
+            Assert.Equal(ThreadStatus.OK, state.PCall(0, 1, 0));
+            return state.ToInteger(-1);
+        }).Result;
+    }
+    [Fact]
+    public void Pool_Case_Reset() {
+        using (LuaStatePool pool = new LuaStatePool(Init, 1)) {
+            /* 默认同一个工作线程上的任务共用 LuaState */
+            Assert.Equal(11, Count(pool));
+            Assert.Equal(12, Count(pool));
+            /* 任务抛出异常后换一个新的 */
+            Task<int> failed = pool.Submit<int>(state => throw new InvalidOperationException("job failed"));
+            Assert.Throws<AggregateException>(() => failed.Wait());
+            Assert.Equal(11, Count(pool));
+        }
+        using (LuaStatePool pool = new LuaStatePool(Init, 1) { ResetAfterJob = true }) {
+            Assert.Equal(11, Count(pool));
+            Assert.Equal(11, Count(pool));
+        }
+    }
+
+    [Fact]
+    public void Pool_Case_BackPressure() {
+        using (LuaStatePool pool = new LuaStatePool(state => { }, 1, 1)) {
+            Assert.Equal(1, pool.WorkerCount);
+            Assert.Equal(1, pool.QueueCapacity);
+            using (ManualResetEventSlim started = new ManualResetEventSlim(false))
+            using (ManualResetEventSlim gate = new ManualResetEventSlim(false)) {
+                Task<int> running = pool.Submit(state => {
+                    started.Set();
+                    gate.Wait();
+                    return 1;
+                });
+                started.Wait();
+                Assert.True(pool.TrySubmit(state => 2, 0, out Task<int> queued));
+                Assert.False(pool.TrySubmit(state => 3, 50, out _)); /* 队列满了 */
+                Assert.Equal(1, pool.QueuedCount);
+                gate.Set();
+                Assert.Equal(1, running.Result);
+                Assert.Equal(2, queued.Result);
+            }
+        }
+    }
+}
+
+}
@@ -0,0 +1,61 @@
+namespace YALuaToy.Tests.Core {
+
+using System;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.Tests.Utils;
+
+public class LuaStringTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaStringTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    [Fact]
+    public void LuaString_Case_Intern() {
+        /* 短字符串：同内容只有一个对象 */
+        LuaString short1 = LuaString.New("hello" + 1);
+        LuaString short2 = LuaString.New("hello1");
+        Assert.True(short1.Short);
+        Assert.Same(short1, short2);
+        Assert.Equal(short1.GetHashCode(), short2.GetHashCode());
+        Assert.NotSame(short1, LuaString.New("hello2"));
+        Assert.False(short1.Equals(LuaString.New("hello2")));
+
+        /* 长字符串：不内部化，但按内容比较 */
+        string    longStr = new string('x', LuaConfig.LUAI_MAXSHORTLEN + 1);
+        LuaString long1   = LuaString.New(longStr);
+        LuaString long2   = LuaString.New(new string('x', LuaConfig.LUAI_MAXSHORTLEN + 1));
+        Assert.False(long1.Short);
+        Assert.NotSame(long1, long2);
+        Assert.True(long1.Equals(long2));
+        Assert.Equal(long1.GetHashCode(), long2.GetHashCode());
+        Assert.True(new LuaValue(long1).Equals(new LuaValue(long2)));
+        Assert.True(LuaString.New(new string('x', LuaConfig.LUAI_MAXSHORTLEN)).Short);
+
+        /* 保留字：返回预先内部化的对象 */
+        LuaString[] reservedWords = LuaGlobalState.ReservedWords();
+        foreach (var word in reservedWords) {
+            Assert.True(word.Reserved);
+            Assert.Same(word, LuaString.New(string.Copy(word.Str)));
+        }
+        Assert.False(LuaString.New("hello1").Reserved);
+    }
+
+    [Fact]
+    public void LuaString_Case_TableKey() {
+        /* 不同来源的同内容字符串作为表键时命中同一个键 */
+        LuaTable table   = new LuaTable();
+        string   longStr = new string('y', LuaConfig.LUAI_MAXSHORTLEN * 2);
+        table.Set(new LuaValue("key"), new LuaValue(1L));
+        table.Set(new LuaValue(longStr), new LuaValue(2L));
+        Assert.Equal(new LuaValue(1L), table.Get(new LuaValue("ke" + "y".ToString())));
+        Assert.Equal(new LuaValue(2L), table.Get(new LuaValue(new string('y', LuaConfig.LUAI_MAXSHORTLEN * 2))));
+    }
+}
+
+}
@@ -6,6 +6,7 @@ using Xunit.Abstractions;
 using YALuaToy.Core;
 using YALuaToy.Const;
 using YALuaToy.Debug;
+using YALuaToy.StandardLibrary;
 using YALuaToy.Tests.Utils;
 using YALuaToy.Tests.Utils.Mock;
 using YALuaToy.Tests.Utils.Test;
@@ -13,6 +14,7 @@ using System.Diagnostics;
 using Microsoft.VisualStudio.TestPlatform.Utilities;
 using System.Text;
 using System.ComponentModel;
+using System.Runtime.CompilerServices;
 
 public class LuaTableTests
 {
@@ -41,6 +43,63 @@ public class LuaTableTests
         Assert.Equal(1, removeCount);
     }
 
+    [Fact]
+    public void LuaTable_Case_ArrayPart() {
+        LuaTable table = new LuaTable();
+        for (int i = 1; i <= 100; i++)
+            table.Set(new LuaValue(i), new LuaValue(i * 10));
+        Assert.Equal(128, table.ArraySize); /* 连续整数键都进数组部分 */
+        Assert.Equal(100, table.GetArrayLength());
+        Assert.Equal(500, table.GetInt(50).Int);
+        Assert.Equal(500, table.Get(new LuaValue(50.0)).Int);
+
+        table.SetInt(100, LuaValue.NIL); /* 数组部分末尾的空洞 */
+        Assert.Equal(99, table.GetArrayLength());
+        table.SetInt(1000, new LuaValue(1)); /* 稀疏的键放哈希部分 */
+        Assert.Equal(128, table.ArraySize);
+        Assert.Equal(1, table.GetInt(1000).Int);
+
+        LuaTable sparse = new LuaTable(); /* 先放哈希部分，rehash 时迁移到数组部分 */
+        sparse.Set(new LuaValue("a"), LuaValue.ONE);
+        for (int i = 4; i >= 1; i--)
+            sparse.Set(new LuaValue(i), new LuaValue(i));
+        sparse.Set(new LuaValue("b"), LuaValue.ONE);
+        Assert.Equal(4, sparse.ArraySize);
+        Assert.Equal(4, sparse.GetArrayLength());
+        int count = 0;
+        foreach (var pair in sparse) {
+            if (count < 4) /* 先遍历数组部分 */
+                Assert.Equal(count + 1, pair.Key.Int);
+            count++;
+        }
+        Assert.Equal(6, count);
+    }
+
+    [Fact]
+    public void LuaTable_Case_MixedValues() {
+        /* 每个条目是一对 LuaValue：64 位下是一个 8 字节的基元、一个引用、两字节的类型和 weak 标记 */
+        int valueSize = Unsafe.SizeOf<LuaValue>();
+        Assert.True(valueSize <= 8 + 2 * IntPtr.Size, $"LuaValue is {valueSize} bytes");
+
+        /* 数组部分放整数，哈希部分放字符串键、浮点值、表，遍历时一个都不能少 */
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(@"
+            local n = 1000
+            local t = {}
+            for i = 1, n do t[i] = i end
+            for i = 1, n do t['k' .. i] = i + 0.5 end
+            for i = 1, n // 10 do t[-i] = {} end
+            local s, count = 0, 0
+            for k, v in pairs(t) do
+                count = count + 1
+                if type(v) == 'number' then s = s + v end
+            end
+            assert(#t == n and t.k7 == 7.5 and type(t[-7]) == 'table')
+            assert(count == n * 2 + n // 10 and s == n * (n + 1) + n * 0.5)
+        "));
+    }
+
     [Fact]
     public void LuaTable_MiscCase_ToString() {
         LuaState state = LuaState.NewState();
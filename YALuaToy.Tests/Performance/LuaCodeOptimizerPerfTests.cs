@@ -0,0 +1,68 @@
+namespace YALuaToy.Tests.Performance {
+
+using System;
+using System.Diagnostics;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+[Trait("Category", "Performance")]
+public class LuaCodeOptimizerPerfTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaCodeOptimizerPerfTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const int ROUNDS = 5;
+
+    /* 和 LuaCodeOptimizerTests 里的 LOOP_CHUNK 一样，融合指令和常量折叠都能用上 */
+    private const string LOOP_CHUNK = @"
+        local count, sum, limit
+        for _ = 1, 200 do
+            count, sum, limit = (function()
+                local n = 100
+                local limit = n * 2 + 1
+                local count, sum = 0, 0
+                for i = 1, 1000 do
+                    if i < 500 then count = count + 1 end
+                    if i == 7 then sum = sum + limit end
+                    sum = sum + i
+                    tostring(i)
+                end
+                return count, sum, limit
+            end)()
+        end
+        return count, sum, limit
+    ";
+
+    private (double time, long count, long sum, long limit) Measure(bool optimize) {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        state.OptimizeCode = optimize;
+        double best = double.MaxValue;
+        for (int round = 0; round < ROUNDS; round++) {
+            state.TopLdx = 0;
+            Stopwatch stopwatch = Stopwatch.StartNew();
+            Assert.Equal(ThreadStatus.OK, state.DoString(LOOP_CHUNK));
+            best = Math.Min(best, stopwatch.Elapsed.TotalMilliseconds);
+        }
+        return (best, state.ToInteger(1), state.ToInteger(2), state.ToInteger(3));
+    }
+
+    [Fact]
+    public void Optimize_Case_Throughput() {
+        var plain     = Measure(false);
+        var optimized = Measure(true);
+        Assert.Equal((499L, 500701L, 201L), (plain.count, plain.sum, plain.limit));
+        Assert.Equal((plain.count, plain.sum, plain.limit), (optimized.count, optimized.sum, optimized.limit)); /* 优化不能改变结果 */
+        _output.WriteLine($"luac-compatible: {plain.time:F1} ms");
+        _output.WriteLine($"optimized:       {optimized.time:F1} ms ({plain.time / optimized.time:F2}x)");
+    }
+}
+
+}
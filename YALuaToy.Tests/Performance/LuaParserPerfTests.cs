@@ -0,0 +1,62 @@
+namespace YALuaToy.Tests.Performance {
+
+using System;
+using System.IO;
+using System.Linq;
+using System.Diagnostics;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Compilation;
+using YALuaToy.Tests.Utils;
+using Antlr4.Runtime;
+
+[Trait("Category", "Performance")]
+public class LuaParserPerfTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaParserPerfTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const int ROUNDS = 5;
+
+    private static string[] OfficialTexts() {
+        string dir = Path.Join(CommonTestUtils.CWD(), "Assets/Lua/OfficialTests");
+        return Directory.GetFiles(dir, "*.lua").OrderBy(path => path).Select(File.ReadAllText).ToArray();
+    }
+    /* 取最快的一轮，减少 GC 和调度的干扰 */
+    private static double ParseAll(string[] texts, bool twoStage) {
+        bool oldTwoStage = LuaParseOptions.TwoStage;
+        LuaParseOptions.TwoStage = twoStage;
+        try {
+            double best = double.MaxValue;
+            for (int round = 0; round < ROUNDS; round++) {
+                Stopwatch stopwatch = Stopwatch.StartNew();
+                foreach (string text in texts)
+                    LuaParserUtils._ParseStart(new AntlrInputStream(text), null);
+                best = Math.Min(best, stopwatch.Elapsed.TotalMilliseconds);
+            }
+            return best;
+        } finally {
+            LuaParseOptions.TwoStage = oldTwoStage;
+        }
+    }
+
+    [Fact]
+    public void Parse_Case_TwoStage() {
+        string[] texts = OfficialTexts();
+        long     bytes = texts.Sum(text => (long)text.Length);
+
+        /* 吞吐量：预热后分别测 LL 和 SLL+LL，只输出数字，结果是否一致由 LuaParserUtilsTests 检查 */
+        LuaParseOptions.Prewarm();
+        Assert.True(LuaParseOptions.Prewarmed);
+        double llTime       = ParseAll(texts, false);
+        double twoStageTime = ParseAll(texts, true);
+        _output.WriteLine($"OfficialTests: {texts.Length} files, {bytes / 1024} KB");
+        _output.WriteLine($"LL:        {llTime:F1} ms ({bytes / 1024.0 / llTime * 1000:F0} KB/s)");
+        _output.WriteLine($"SLL + LL:  {twoStageTime:F1} ms ({bytes / 1024.0 / twoStageTime * 1000:F0} KB/s, {llTime / twoStageTime:F2}x)");
+    }
+}
+
+}
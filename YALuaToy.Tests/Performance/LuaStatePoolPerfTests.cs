@@ -0,0 +1,91 @@
+namespace YALuaToy.Tests.Performance {
+
+using System;
+using System.Linq;
+using System.Diagnostics;
+using System.Threading.Tasks;
+using System.Collections.Generic;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+[Trait("Category", "Performance")]
+public class LuaStatePoolPerfTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaStatePoolPerfTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const int JOBS      = 64;
+    private const int NEW_STATE = 200;
+
+    private const string INIT_CHUNK = @"
+        function fib(n) if n < 2 then return n end return fib(n - 1) + fib(n - 2) end
+        words = {}
+        for i = 1, 200 do words[i] = 'w' .. i end
+    ";
+    private const string JOB_CHUNK = @"
+        local s = 0
+        for i = 1, #words do s = s + #words[i] end
+        return fib(18) + s
+    ";
+
+    private static void Init(LuaState state) {
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString(INIT_CHUNK));
+    }
+
+    [Fact]
+    public void Snapshot_Case_NewState() {
+        /* 每次都打开标准库、执行初始化脚本 vs 从快照复制 */
+        Stopwatch stopwatch = Stopwatch.StartNew();
+        for (int i = 0; i < NEW_STATE; i++)
+            Init(LuaState.NewState());
+        double initTime = stopwatch.Elapsed.TotalMilliseconds / NEW_STATE;
+
+        LuaStateSnapshot snapshot = LuaStateSnapshot.Create(Init);
+        stopwatch.Restart();
+        for (int i = 0; i < NEW_STATE; i++)
+            snapshot.NewState();
+        double snapshotTime = stopwatch.Elapsed.TotalMilliseconds / NEW_STATE;
+        _output.WriteLine($"OpenSTD + init: {initTime:F3} ms/state");
+        _output.WriteLine($"snapshot:       {snapshotTime:F3} ms/state ({initTime / snapshotTime:F1}x)");
+    }
+
+    [Fact]
+    public void Pool_Case_Scaling() {
+        /* 互不相关的任务，工作线程从 1 个加到 CPU 核数，理想情况下吞吐量线性增长 */
+        List<int> workerCounts = new List<int>();
+        for (int workers = 1; workers < Environment.ProcessorCount; workers *= 2)
+            workerCounts.Add(workers);
+        workerCounts.Add(Environment.ProcessorCount);
+
+        double baseline = 0;
+        _output.WriteLine($"{JOBS} jobs, {Environment.ProcessorCount} cores");
+        foreach (int workers in workerCounts) {
+            using (LuaStatePool pool = new LuaStatePool(Init, workers)) {
+                Task.WaitAll(Enumerable.Range(0, workers).Select(_ => pool.DoString(JOB_CHUNK)).ToArray()); /* 预热：每个线程先建好 LuaState、编译好代码 */
+
+                Stopwatch            stopwatch = Stopwatch.StartNew();
+                Task<ThreadStatus>[] tasks     = Enumerable.Range(0, JOBS).Select(_ => pool.DoString(JOB_CHUNK)).ToArray();
+                Task.WaitAll(tasks);
+                double elapsed = stopwatch.Elapsed.TotalMilliseconds;
+                Assert.All(tasks, task => Assert.Equal(ThreadStatus.OK, task.Result));
+
+                double throughput = JOBS / elapsed * 1000;
+                if (workers == 1)
+                    baseline = throughput;
+                _output.WriteLine(
+                    $"{workers,3} workers: {elapsed,8:F1} ms, {throughput,8:F1} jobs/s, speedup {throughput / baseline:F2}x, efficiency {throughput / baseline / workers:P0}"
+                );
+            }
+        }
+    }
+}
+
+}
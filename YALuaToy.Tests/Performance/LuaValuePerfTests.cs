@@ -0,0 +1,86 @@
+namespace YALuaToy.Tests.Performance {
+
+using System;
+using System.Diagnostics;
+using System.Runtime.CompilerServices;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+
+[Trait("Category", "Performance")]
+public class LuaValuePerfTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaValuePerfTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private const int ENTRIES = 1000000;
+    private const int DEPTH   = 100000;
+
+    /* 数组部分放整数，哈希部分放字符串键、浮点值、表，每个条目都是一对 LuaValue */
+    private const string BUILD_CHUNK = @"
+        local n = ...
+        local t = {}
+        for i = 1, n do t[i] = i end
+        for i = 1, n do t['k' .. i] = i + 0.5 end
+        for i = 1, n // 10 do t[-i] = {} end
+        big = t
+    ";
+    private const string SCAN_CHUNK = @"
+        local s = 0
+        for k, v in pairs(big) do
+            if type(v) == 'number' then s = s + v end
+        end
+        return s
+    ";
+    private const string RECURSE_CHUNK = @"
+        local function down(k, a, b, c, d) if k == 0 then return 0 end return down(k - 1, a, b, c, d) + 1 end
+        return down(...)
+    ";
+
+    private static long Run(LuaState state, string chunk, int arg, short resultCount) {
+        Assert.Equal(ThreadStatus.OK, state.LoadString(chunk));
+        state.PushStack(arg);
+        Assert.Equal(ThreadStatus.OK, state.PCall(1, resultCount, 0));
+        return GC.GetTotalMemory(true);
+    }
+
+    [Fact]
+    public void Value_Case_TableHeavy() {
+        /* 64 位下 LuaValue 是一个 8 字节的基元、一个引用、两字节的类型和 weak 标记，对齐后 24 字节 */
+        int valueSize = Unsafe.SizeOf<LuaValue>();
+        Assert.True(valueSize <= 8 + 2 * IntPtr.Size, $"LuaValue is {valueSize} bytes");
+        _output.WriteLine($"sizeof(LuaValue): {valueSize} bytes");
+
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        long      before    = GC.GetTotalMemory(true);
+        Stopwatch stopwatch = Stopwatch.StartNew();
+        long      built     = Run(state, BUILD_CHUNK, ENTRIES, 0);
+        double    buildTime = stopwatch.Elapsed.TotalMilliseconds;
+        int       entries   = ENTRIES * 2 + ENTRIES / 10;
+        _output.WriteLine($"build: {entries} entries, {buildTime,8:F1} ms, {(built - before) / 1024.0 / 1024:F1} MB ({(double)(built - before) / entries:F1} B/entry)");
+
+        stopwatch.Restart();
+        for (int i = 0; i < 5; i++)
+            Run(state, SCAN_CHUNK, 0, 1);
+        double scanTime = stopwatch.Elapsed.TotalMilliseconds / 5;
+        Assert.Equal((double)ENTRIES * (ENTRIES + 1) + ENTRIES * 0.5, state.ToNumber(-1));
+        _output.WriteLine($"scan:  {scanTime,8:F1} ms ({entries / scanTime / 1000:F1} M entries/s)");
+
+        /* 深递归：每层要 7 个左右的栈槽，栈长上去之后不会缩回来，所以递归完测到的内存里包含了整个栈 */
+        LuaState deep       = LuaState.NewState();
+        long     deepBefore = GC.GetTotalMemory(true);
+        stopwatch.Restart();
+        long     deepAfter  = Run(deep, RECURSE_CHUNK, DEPTH, 1);
+        Assert.Equal(DEPTH, deep.ToInteger(-1));
+        _output.WriteLine($"recursion: depth {DEPTH}, {stopwatch.Elapsed.TotalMilliseconds,8:F1} ms, {(deepAfter - deepBefore) / 1024.0 / 1024:F1} MB");
+    }
+}
+
+}
@@ -0,0 +1,96 @@
+namespace YALuaToy.Tests.StandardLibrary {
+
+using System;
+using System.IO;
+using Xunit;
+using Xunit.Abstractions;
+using YALuaToy.Core;
+using YALuaToy.Const;
+using YALuaToy.StandardLibrary;
+using YALuaToy.Tests.Utils;
+using YALuaToy.Tests.Utils.Test;
+
+public class LuaLibLoaderTests
+{
+    private readonly ITestOutputHelper _output;
+    public LuaLibLoaderTests(ITestOutputHelper output) {
+        _output = output;
+        CommonTestUtils.InitTest();
+    }
+
+    private static LuaState NewState(string moduleDir) {
+        LuaState state = LuaState.NewState();
+        state.OpenSTD();
+        Assert.Equal(ThreadStatus.OK, state.DoString($"package.path = '{moduleDir.Replace('\\', '/')}/?.lua'"));
+        return state;
+    }
+    private static LuaProto RequireProto(LuaState state, string filepath) {
+        Assert.Equal(ThreadStatus.OK, state.DoString("mod = require('cachemod')"));
+        Assert.True(LuaChunkCache.TryGet(new FileInfo(filepath), state.OptimizeCode, out LuaChunkCache.Entry entry));
+        return entry.proto;
+    }
+
+    [Fact]
+    public void Require_Case_ChunkCache() {
+        string moduleDir = Path.Combine(Path.GetTempPath(), $"YALuaToy-{Guid.NewGuid():N}");
+        Directory.CreateDirectory(moduleDir);
+        string filepath = Path.Combine(moduleDir, "cachemod.lua");
+        try {
+            File.WriteAllText(filepath, "return { value = 1 }");
+
+            /* 不同 LuaState 共享同一份编译结果 */
+            LuaState state1 = NewState(moduleDir);
+            LuaState state2 = NewState(moduleDir);
+            LuaProto proto1 = RequireProto(state1, filepath);
+            LuaProto proto2 = RequireProto(state2, filepath);
+            Assert.Same(proto1, proto2);
+            Assert.Equal(ThreadStatus.OK, state2.DoString("assert(mod.value == 1)"));
+
+            /* 文件改了就重新编译 */
+            File.WriteAllText(filepath, "return { value = 2, extra = true }");
+            LuaState state3 = NewState(moduleDir);
+            Assert.NotSame(proto1, RequireProto(state3, filepath));
+            Assert.Equal(ThreadStatus.OK, state3.DoString("assert(mod.value == 2)"));
+
+            /* 磁盘缓存：清空内存缓存后从磁盘读回来 */
+            LuaChunkCache.DiskCacheDir = Path.Combine(moduleDir, "cache");
+            LuaChunkCache.Clear();
+            RequireProto(NewState(moduleDir), filepath);
+            Assert.Single(Directory.GetFiles(LuaChunkCache.DiskCacheDir));
+            LuaChunkCache.Clear();
+            LuaState state4 = NewState(moduleDir);
+            RequireProto(state4, filepath);
+            Assert.Equal(ThreadStatus.OK, state4.DoString("assert(mod.value == 2 and mod.extra)"));
+        } finally {
+            LuaChunkCache.DiskCacheDir = null;
+            Directory.Delete(moduleDir, true);
+        }
+    }
+
+    [Fact]
+    public void Require_Case_SearchOrder() {
+        string moduleDir = Path.Combine(Path.GetTempPath(), $"YALuaToy-{Guid.NewGuid():N}");
+        string firstDir  = Path.Combine(moduleDir, "first").Replace('\\', '/');
+        string secondDir = Path.Combine(moduleDir, "second").Replace('\\', '/');
+        Directory.CreateDirectory(firstDir);
+        Directory.CreateDirectory(secondDir);
+        string setPath = $"package.path = '{firstDir}/?.lua;{secondDir}/?.lua'";
+        try {
+            File.WriteAllText(Path.Combine(secondDir, "ordermod.lua"), "return 2");
+            LuaState state1 = LuaState.NewState();
+            state1.OpenSTD();
+            Assert.Equal(ThreadStatus.OK, state1.DoString($"{setPath} assert(require('ordermod') == 2)"));
+
+            /* path 里更靠前的位置后来出现了同名文件，之后的查找要用它 */
+            File.WriteAllText(Path.Combine(firstDir, "ordermod.lua"), "return 1");
+            LuaState state2 = LuaState.NewState();
+            state2.OpenSTD();
+            Assert.Equal(ThreadStatus.OK, state2.DoString($"{setPath} assert(require('ordermod') == 1)"));
+            Assert.Equal(ThreadStatus.OK, state2.DoString($"assert(package.searchpath('ordermod', package.path) == '{firstDir}/ordermod.lua')"));
+        } finally {
+            Directory.Delete(moduleDir, true);
+        }
+    }
+}
+
+}
@@ -4,7 +4,9 @@ using System;
 using System.IO;
 using System.Text;
 using System.Collections.Generic;
+using System.Linq;
 using System.Diagnostics;
+using System.Security.Cryptography;
 using System.Runtime.CompilerServices;
 using YALuaToy.Core;
 using YALuaToy.Const;
@@ -301,23 +303,31 @@ internal class FileIR
 
 internal static class LuacUtils
 {
-    public static FileIR DecompileByLuac(string filepath) {
-        string luacpath = CommonTestUtils.GetPath(
-            RuntimeInformation.IsOSPlatform(OSPlatform.Windows) ? "CLua/build/Debug/bin/luac.exe" : "CLua/build/Debug/bin/luac"
-        );
+    /* luac 输出缓存，以 luac 程序和 lua 文件的内容哈希为键，和 Tools/Project/GenerateLuacListings.py 保持一致 */
+    private const string                               LUAC_CACHE_DIR = "out/LuacCache";
+    private static readonly Dictionary<string, string> _luacHashCache = [];
 
-        /* 检查 luac 是否存在 */
-        if (!File.Exists(filepath))
-            throw new FileNotFoundException($"lua file not found at {filepath}, please check it.");
-        if (!File.Exists(luacpath))
-            throw new FileNotFoundException($"luac not found at {luacpath}, please build it first.");
+    private static string Sha256Hex(byte[] data) {
+        return Convert.ToHexString(SHA256.HashData(data)).ToLowerInvariant();
+    }
+
+    private static string GetLuacCacheDir(string luacpath) {
+        lock (_luacHashCache) {
+            if (!_luacHashCache.TryGetValue(luacpath, out string? luacHash)) {
+                luacHash                 = Sha256Hex(File.ReadAllBytes(luacpath));
+                _luacHashCache[luacpath] = luacHash;
+            }
+            return CommonTestUtils.GetPath($"{LUAC_CACHE_DIR}/{luacHash[..16]}");
+        }
+    }
+
+    /* 优先读取预生成的 luac 输出，未命中时才启动 luac 进程，并把结果写回缓存 */
+    private static string GetLuacListing(string luacpath, string filepath) {
+        string cacheDir  = GetLuacCacheDir(luacpath);
+        string cachepath = Path.Join(cacheDir, $"{Sha256Hex(File.ReadAllBytes(filepath))}.clua");
+        if (File.Exists(cachepath))
+            return File.ReadAllText(cachepath);
 
-        /* 用 luac 将反编译结果输出到缓存 */
-        string filename = Path.GetFileNameWithoutExtension(filepath);
-        string cacheDir = CommonTestUtils.GetPath("out/DecompileCache");
-        if (!Directory.Exists(cacheDir))
-            Directory.CreateDirectory(cacheDir);
-        string           cachepath = CommonTestUtils.GetPath($"out/DecompileCache/{filename}.clua");
         ProcessStartInfo startInfo = new(luacpath, $"-p -l \"{filepath}\"") {
             UseShellExecute        = false,
             RedirectStandardOutput = true,
@@ -332,10 +342,36 @@ internal static class LuacUtils
         process.WaitForExit();
         if (process.ExitCode != 0)
             throw new Exception($"luac failed with error code {process.ExitCode}: {error}");
+
+        Directory.CreateDirectory(cacheDir);
+        string temppath = $"{cachepath}.{Environment.ProcessId}.tmp"; /* 先写临时文件再改名，并发写入也不会读到半个文件 */
+        File.WriteAllText(temppath, output);
+        File.Move(temppath, cachepath, true);
+        return output;
+    }
+
+    public static FileIR DecompileByLuac(string filepath) {
+        string luacpath = CommonTestUtils.GetPath(
+            RuntimeInformation.IsOSPlatform(OSPlatform.Windows) ? "CLua/build/Debug/bin/luac.exe" : "CLua/build/Debug/bin/luac"
+        );
+
+        /* 检查 luac 是否存在 */
+        if (!File.Exists(filepath))
+            throw new FileNotFoundException($"lua file not found at {filepath}, please check it.");
+        if (!File.Exists(luacpath))
+            throw new FileNotFoundException($"luac not found at {luacpath}, please build it first.");
+
+        /* 获取 luac 反编译结果，并输出一份到 DecompileCache，便于和 .cslua 对比 */
+        string filename = Path.GetFileNameWithoutExtension(filepath);
+        string cacheDir = CommonTestUtils.GetPath("out/DecompileCache");
+        if (!Directory.Exists(cacheDir))
+            Directory.CreateDirectory(cacheDir);
+        string cachepath = CommonTestUtils.GetPath($"out/DecompileCache/{filename}.clua");
+        string output    = GetLuacListing(luacpath, filepath);
         File.WriteAllText(cachepath, output);
 
-        /* 从缓存中解析 IR 表示 */
-        string[] decompile = File.ReadAllLines(cachepath);
+        /* 解析 IR 表示 */
+        string[] decompile = output.Split('\n').Select(line => line.TrimEnd('\r')).ToArray();
         FileIR fileIR      = new() { filepath = filepath };
         for (int i = 0; i < decompile.Length; i++) {
             string line = decompile[i];
@@ -3,3 +3,4 @@ using System.Runtime.CompilerServices;
 
 [assembly: InternalsVisibleTo("Playground")]
 [assembly: InternalsVisibleTo("YALuaToy.Tests")]
+[assembly: InternalsVisibleTo("YALuaToy.StandardLibrary")]
@@ -0,0 +1,527 @@
+namespace YALuaToy.Compilation {
+
+using System;
+using System.Collections.Generic;
+using YALuaToy.Const;
+using YALuaToy.Debug;
+using YALuaToy.Core;
+
+/* 可选的字节码优化，翻译完成后对整棵 LuaProto 树执行，默认关闭（按 LuaState 开启，见 LuaState.OptimizeCode）
+   LuaCode 和 LuaCodeTranslator 生成的代码和 luac 逐条一致（测试会对比），所以优化只能放在翻译之后单独做：
+   - 跳转穿透：跳到另一条 JMP（A == 0）的跳转直接跳到最终目标；跳到下一条指令的 JMP 删掉
+   - 跨语句的常量折叠：基本块内记录哪些寄存器存放着 LOADK 写入的数字常量，运算的操作数都已知时折叠成 LOADK，
+     只有一边已知时把寄存器操作数换成常量（这样后面的比较和加法就能融合）
+   - 死寄存器消除：基本块内没有被读过就被覆盖的无副作用写入（MOVE、LOADK 等）直接删掉
+   - 融合指令：和数字常量比较的 EQK/LTK/LEK，局部变量加常量的 INCR，全局函数调用的 GETTABUPCALL（见 LuaOpCodes.cs）
+   被闭包捕获的寄存器（CLOSURE 的 instack 上值）可能在任何一次调用里被改掉，不参与常量传播和死寄存器消除。
+   删除、移动指令时行号表（proto.Lines）跟着一起改，所以指令数和行号数始终相等，但指令不再和源码逐行对应：
+   被删掉或折叠掉的指令所在的行不会再触发行钩子，也不会出现在出错信息和 traceback 里；GETTABUPCALL 挪到参数准备之后，
+   带着原来 GETTABUP 的行号，行号表不再是单调的。所以开启优化后行钩子的触发次数和顺序都可能和 luac 的代码不同 */
+internal static class LuaCodeOptimizer
+{
+    private const int MAX_JUMP_HOPS = 100; /* 防止跳转成环时死循环（比如 `::a:: goto b ::b:: goto a`） */
+    private const int REGISTER_COUNT = LuaOpCodes.MAXARG_A + 1;
+
+    public static void Optimize(LuaProto proto) {
+        for (int i = 0; i < proto.SubProtosCount; i++)
+            Optimize(proto.SubProtos[i]);
+
+        bool[] captured = _FindCaptured(proto);
+        _ThreadJumps(proto);
+        _FoldConstants(proto, _FindLeaders(proto._instructions), captured);
+        _RemoveDeadCode(proto, _FindLeaders(proto._instructions), captured);
+        _Fuse(proto, _FindLeaders(proto._instructions), captured);
+    }
+
+    /* ---------------- Passes ---------------- */
+
+    private static void _ThreadJumps(LuaProto proto) {
+        List<Instruction> code = proto._instructions;
+        for (int pc = 0; pc < code.Count; pc++) {
+            Instruction inst = code[pc];
+            if (inst.OpCode != OpCode.JMP)
+                continue;
+            int target = _JumpTarget(pc, inst);
+            for (int hops = 0; hops < MAX_JUMP_HOPS && target != pc; hops++) {
+                Instruction targetInst = code[target];
+                if (targetInst.OpCode != OpCode.JMP || targetInst.A.RKValue != 0) /* 目标要关闭上值的话不能跳过它 */
+                    break;
+                target = _JumpTarget(target, targetInst);
+            }
+            code[pc] = inst.CoplaceSBx(target - pc - 1);
+        }
+    }
+
+    private static void _FoldConstants(LuaProto proto, bool[] leaders, bool[] captured) {
+        List<Instruction> code  = proto._instructions;
+        int[]             known = new int[REGISTER_COUNT]; /* 寄存器 -> 常量索引 + 1，0 表示未知 */
+        for (int pc = 0; pc < code.Count; pc++) {
+            if (leaders[pc])
+                Array.Clear(known, 0, known.Length);
+            Instruction inst = code[pc];
+            OpCode      op   = inst.OpCode;
+            int         a    = inst.A.RKValue;
+            switch (op) {
+            case OpCode.LOADK:
+                known[a] = !captured[a] && proto.Constants[inst.Bx].IsNumber ? inst.Bx + 1 : 0;
+                continue;
+            case OpCode.ADD:
+            case OpCode.SUB:
+            case OpCode.MUL:
+            case OpCode.MOD:
+            case OpCode.POW:
+            case OpCode.DIV:
+            case OpCode.IDIV:
+            case OpCode.BAND:
+            case OpCode.BOR:
+            case OpCode.BXOR:
+            case OpCode.SHL:
+            case OpCode.SHR: {
+                ArgValue b = _Substitute(inst.B, known);
+                ArgValue c = _Substitute(inst.C, known);
+                if (b.IsConstantsIndex && c.IsConstantsIndex
+                    && _TryFold(proto, (Op)(op - OpCode.ADD), proto.Constants[b.RKValue], proto.Constants[c.RKValue], out int index)) {
+                    code[pc] = new Instruction(OpCode.LOADK, (byte)a, index, false);
+                    known[a] = captured[a] ? 0 : index + 1;
+                    continue;
+                }
+                code[pc] = inst.CoplaceB((ushort)b.Raw).CoplaceC((ushort)c.Raw);
+                break;
+            }
+            case OpCode.UNM:
+            case OpCode.BNOT: {
+                int b = known[inst.B.RKValue] - 1;
+                if (b >= 0 && _TryFold(proto, op == OpCode.UNM ? Op.UNM : Op.BNOT, proto.Constants[b], LuaValue.ZERO, out int index)) {
+                    code[pc] = new Instruction(OpCode.LOADK, (byte)a, index, false);
+                    known[a] = captured[a] ? 0 : index + 1;
+                    continue;
+                }
+                break;
+            }
+            case OpCode.EQ:
+            case OpCode.LT:
+            case OpCode.LE:
+                code[pc] = inst.CoplaceB((ushort)_Substitute(inst.B, known).Raw).CoplaceC((ushort)_Substitute(inst.C, known).Raw);
+                break;
+            }
+            _KillWrites(inst, known);
+        }
+    }
+
+    private static void _RemoveDeadCode(LuaProto proto, bool[] leaders, bool[] captured) {
+        List<Instruction> code    = proto._instructions;
+        bool[]            deleted = new bool[code.Count];
+        bool[]            dead    = new bool[REGISTER_COUNT]; /* 之后在读到之前就会被覆盖的寄存器 */
+        int               end     = code.Count;
+        for (int pc = code.Count - 1; pc >= 0; pc--) {
+            if (pc + 1 == end) /* 块的出口处所有寄存器都可能被用到 */
+                Array.Clear(dead, 0, dead.Length);
+            Instruction inst = code[pc];
+            int         a    = inst.A.RKValue;
+            if (_IsPureWrite(inst) && !captured[a] && dead[a] && !_SkipsNext(code, pc - 1)) {
+                deleted[pc] = true;
+            } else {
+                _MarkWrites(inst, dead);
+                _MarkReads(inst, dead);
+            }
+            if (leaders[pc])
+                end = pc;
+        }
+
+        /* 跳到下一条保留的指令的 JMP（中间的指令都被删掉了也算）；前一条是条件指令的话，这条 JMP 是配对的，不能删 */
+        int nextAlive = code.Count;
+        for (int pc = code.Count - 1; pc >= 0; pc--) {
+            Instruction inst   = code[pc];
+            int         target = _JumpTarget(pc, inst);
+            if (inst.OpCode == OpCode.JMP && inst.A.RKValue == 0 && target > pc && target <= nextAlive && !_SkipsNext(code, pc - 1)
+                && !(pc > 0 && code[pc - 1].Modes.Conditional))
+                deleted[pc] = true;
+            if (!deleted[pc])
+                nextAlive = pc;
+        }
+        _Compact(proto, deleted);
+    }
+
+    private static void _Fuse(LuaProto proto, bool[] leaders, bool[] captured) {
+        List<Instruction> code = proto._instructions;
+        for (int pc = 0; pc < code.Count; pc++) {
+            Instruction inst = code[pc];
+            ArgValue    b    = inst.B;
+            ArgValue    c    = inst.C;
+            switch (inst.OpCode) {
+            case OpCode.EQ:
+                if (b.IsConstantsIndex && c.IsRegister && _IsNumber(proto, b)) { /* 数字和任何值比较都不会触发 __eq，可以交换 */
+                    code[pc] = inst.CoplaceOp(OpCode.EQK).CoplaceB((ushort)c.Raw).CoplaceC((ushort)b.Raw);
+                    break;
+                }
+                if (b.IsRegister && _IsNumber(proto, c))
+                    code[pc] = inst.CoplaceOp(OpCode.EQK);
+                break;
+            case OpCode.LT:
+                if (b.IsRegister && _IsNumber(proto, c))
+                    code[pc] = inst.CoplaceOp(OpCode.LTK);
+                break;
+            case OpCode.LE:
+                if (b.IsRegister && _IsNumber(proto, c))
+                    code[pc] = inst.CoplaceOp(OpCode.LEK);
+                break;
+            case OpCode.ADD: /* 操作数不能交换，否则 __add 的参数顺序就变了 */
+                if (b.IsRegister && b.RKValue == inst.A.RKValue && _IsNumber(proto, c))
+                    code[pc] = inst.CoplaceOp(OpCode.INCR);
+                break;
+            case OpCode.GETTABUP:
+                if (c.IsConstantsIndex)
+                    pc = _FuseCall(proto, leaders, captured, pc);
+                break;
+            }
+        }
+    }
+    /* 全局函数调用是 GETTABUP A；准备参数；CALL A，把 GETTABUP 挪到 CALL 前面才能融合。
+       只越过没有副作用、也不碰 R(A) 的参数准备指令（GETTABUP 可能调用 __index，期间能改的只有上值和被捕获的寄存器），返回处理到的位置 */
+    private static int _FuseCall(LuaProto proto, bool[] leaders, bool[] captured, int pc) {
+        List<Instruction> code  = proto._instructions;
+        List<int>         lines = proto.Lines;
+        int               a     = code[pc].A.RKValue;
+        int               call  = pc + 1;
+        while (call < code.Count && !leaders[call] && _IsPureArg(code[call], a, captured))
+            call++;
+        if (call == code.Count || leaders[call] || code[call].OpCode != OpCode.CALL || code[call].A.RKValue != a)
+            return pc;
+        if (call > pc + 1 && _SkipsNext(code, pc - 1))
+            return pc;
+
+        Instruction getInst = code[pc];
+        int         getLine = lines[pc];
+        for (int i = pc; i < call - 1; i++) {
+            code[i]  = code[i + 1];
+            lines[i] = lines[i + 1];
+        }
+        code[call - 1]  = getInst.CoplaceOp(OpCode.GETTABUPCALL);
+        lines[call - 1] = getLine;
+        return call;
+    }
+
+    /* ---------------- Utils ---------------- */
+
+    private static int _JumpTarget(int pc, Instruction inst) {
+        return pc + 1 + inst.sBx;
+    }
+    private static bool _IsJump(OpCode op) {
+        return op == OpCode.JMP || op == OpCode.FORLOOP || op == OpCode.FORPREP || op == OpCode.TFORLOOP;
+    }
+    private static bool _SkipsNext(List<Instruction> code, int pc) { /* LOADBOOL A B 1 会跳过下一条指令 */
+        return pc >= 0 && code[pc].OpCode == OpCode.LOADBOOL && code[pc].C.RKValue != 0;
+    }
+    private static bool _IsNumber(LuaProto proto, ArgValue arg) {
+        return arg.IsConstantsIndex && proto.Constants[arg.RKValue].IsNumber;
+    }
+
+    /* 基本块的起点：0、跳转目标、跳转或返回之后的指令、条件指令和 LOADBOOL A B 1 可能跳到的两个位置 */
+    private static bool[] _FindLeaders(List<Instruction> code) {
+        bool[] leaders = new bool[code.Count + 2];
+        leaders[0]     = true;
+        for (int pc = 0; pc < code.Count; pc++) {
+            Instruction inst = code[pc];
+            OpCode      op   = inst.OpCode;
+            if (_IsJump(op)) {
+                leaders[_JumpTarget(pc, inst)] = true;
+                leaders[pc + 1]                = true;
+            } else if (op == OpCode.RETURN || op == OpCode.TAILCALL) {
+                leaders[pc + 1] = true;
+            } else if (inst.Modes.Conditional || _SkipsNext(code, pc)) {
+                leaders[pc + 1] = true;
+                leaders[pc + 2] = true;
+            }
+        }
+        return leaders;
+    }
+    private static bool[] _FindCaptured(LuaProto proto) {
+        bool[] captured = new bool[REGISTER_COUNT];
+        foreach (Instruction inst in proto._instructions) {
+            if (inst.OpCode != OpCode.CLOSURE)
+                continue;
+            LuaProto subProto = proto.SubProtos[inst.Bx];
+            for (int i = 0; i < subProto.UpvalueDescCount; i++) {
+                UpvalueDesc desc = subProto.UpvalueDescList[i];
+                if (desc.InStack)
+                    captured[desc.Ldx - 1] = true;
+            }
+        }
+        return captured;
+    }
+
+    /* 寄存器操作数的值已知时换成常量（RK 只能表示前 MAX_RK_INDEX 个常量） */
+    private static ArgValue _Substitute(ArgValue arg, int[] known) {
+        if (arg.IsConstantsIndex || !arg.HasRegister)
+            return arg;
+        int index = known[arg.RKValue] - 1;
+        return index >= 0 && index <= LuaOpCodes.MAX_RK_INDEX ? ArgValue.FromConstantsIndex(index) : arg;
+    }
+    /* 和 LuaCode 的常量折叠规则一样：不折叠会出错的运算，结果不能是 nan 或 0.0 */
+    private static bool _TryFold(LuaProto proto, Op op, in LuaValue v1, in LuaValue v2, out int index) {
+        index = -1;
+        switch (op) {
+        case Op.BAND:
+        case Op.BOR:
+        case Op.BXOR:
+        case Op.SHL:
+        case Op.SHR:
+        case Op.BNOT:
+            if (!v1.ToInteger(out _) || !v2.ToInteger(out _))
+                return false;
+            break;
+        case Op.DIV:
+        case Op.IDIV:
+        case Op.MOD:
+            if (v2.Number == 0)
+                return false;
+            break;
+        }
+        if (!LuaOperation.Arith(op, v1, v2, out LuaValue result))
+            return false;
+        if (result.IsFloat && (double.IsNaN(result.Float) || result.Float == 0))
+            return false;
+        index = _AddConstant(proto, result);
+        return index >= 0;
+    }
+    private static int _AddConstant(LuaProto proto, in LuaValue value) {
+        List<LuaValue> constants = proto.GetConstants();
+        for (int i = 0; i < constants.Count; i++) {
+            LuaValue constant = constants[i];
+            if (constant.IsInt && value.IsInt && constant.Int == value.Int || constant.IsFloat && value.IsFloat && constant.Float.Equals(value.Float))
+                return i;
+        }
+        if (constants.Count > LuaOpCodes.MAXARG_Bx)
+            return -1;
+        constants.Add(value);
+        return constants.Count - 1;
+    }
+
+    /* 可能写入的寄存器（保守估计），常量传播用 */
+    private static void _KillWrites(Instruction inst, int[] known) {
+        int a = inst.A.RKValue;
+        switch (inst.OpCode) {
+        case OpCode.LOADNIL:
+            Array.Clear(known, a, Math.Min(inst.B.RKValue + 1, known.Length - a));
+            break;
+        case OpCode.SELF:
+            known[a] = known[a + 1] = 0;
+            break;
+        case OpCode.FORLOOP:
+        case OpCode.FORPREP:
+            Array.Clear(known, a, 4);
+            break;
+        case OpCode.CALL:
+        case OpCode.TAILCALL:
+        case OpCode.TFORCALL:
+        case OpCode.VARARG:
+            Array.Clear(known, a, known.Length - a);
+            break;
+        case OpCode.CONCAT: { /* B 到 C 之间的寄存器会被当作临时空间 */
+            int from = Math.Min(a, inst.B.RKValue);
+            Array.Clear(known, from, known.Length - from);
+            break;
+        }
+        default:
+            if (inst.Modes.SetRegister)
+                known[a] = 0;
+            break;
+        }
+    }
+
+    private static bool _IsPureWrite(Instruction inst) {
+        switch (inst.OpCode) {
+        case OpCode.MOVE:
+        case OpCode.LOADK:
+        case OpCode.GETUPVAL:
+        case OpCode.NEWTABLE:
+            return true;
+        case OpCode.LOADBOOL:
+            return inst.C.RKValue == 0;
+        case OpCode.LOADNIL:
+            return inst.B.RKValue == 0;
+        }
+        return false;
+    }
+    private static bool _IsPureArg(Instruction inst, int a, bool[] captured) {
+        switch (inst.OpCode) {
+        case OpCode.LOADK:
+        case OpCode.LOADNIL:
+            return inst.A.RKValue > a;
+        case OpCode.LOADBOOL:
+            return inst.A.RKValue > a && inst.C.RKValue == 0;
+        case OpCode.MOVE:
+            return inst.A.RKValue > a && inst.B.RKValue != a && !captured[inst.B.RKValue];
+        }
+        return false;
+    }
+
+    /* 一定会写入的寄存器，死寄存器消除用；条件写入（TESTSET、循环指令）和写入范围不确定的指令都不算 */
+    private static void _MarkWrites(Instruction inst, bool[] dead) {
+        int a = inst.A.RKValue;
+        switch (inst.OpCode) {
+        case OpCode.MOVE:
+        case OpCode.LOADK:
+        case OpCode.LOADKX:
+        case OpCode.LOADBOOL:
+        case OpCode.GETUPVAL:
+        case OpCode.GETTABUP:
+        case OpCode.GETTABLE:
+        case OpCode.NEWTABLE:
+        case OpCode.ADD:
+        case OpCode.SUB:
+        case OpCode.MUL:
+        case OpCode.MOD:
+        case OpCode.POW:
+        case OpCode.DIV:
+        case OpCode.IDIV:
+        case OpCode.BAND:
+        case OpCode.BOR:
+        case OpCode.BXOR:
+        case OpCode.SHL:
+        case OpCode.SHR:
+        case OpCode.UNM:
+        case OpCode.BNOT:
+        case OpCode.NOT:
+        case OpCode.LEN:
+        case OpCode.CLOSURE:
+            dead[a] = true;
+            break;
+        case OpCode.LOADNIL:
+            for (int r = a; r <= a + inst.B.RKValue && r < dead.Length; r++)
+                dead[r] = true;
+            break;
+        case OpCode.SELF:
+            dead[a] = dead[a + 1] = true;
+            break;
+        }
+    }
+    /* 可能读取的寄存器（保守估计），没有列出的指令当作读取所有寄存器 */
+    private static void _MarkReads(Instruction inst, bool[] dead) {
+        int a = inst.A.RKValue;
+        int b = inst.B.RKValue;
+        switch (inst.OpCode) {
+        case OpCode.LOADK:
+        case OpCode.LOADKX:
+        case OpCode.LOADBOOL:
+        case OpCode.LOADNIL:
+        case OpCode.GETUPVAL:
+        case OpCode.NEWTABLE:
+        case OpCode.JMP:
+        case OpCode.CLOSURE: /* 捕获的寄存器本来就不参与消除 */
+        case OpCode.VARARG:
+        case OpCode.EXTRAARG:
+            break;
+        case OpCode.MOVE:
+        case OpCode.UNM:
+        case OpCode.BNOT:
+        case OpCode.NOT:
+        case OpCode.LEN:
+        case OpCode.TESTSET:
+            dead[b] = false;
+            break;
+        case OpCode.GETTABUP:
+            _MarkRK(inst.C, dead);
+            break;
+        case OpCode.GETTABLE:
+        case OpCode.SELF:
+            dead[b] = false;
+            _MarkRK(inst.C, dead);
+            break;
+        case OpCode.SETTABLE:
+            dead[a] = false;
+            _MarkRK(inst.B, dead);
+            _MarkRK(inst.C, dead);
+            break;
+        case OpCode.SETTABUP:
+        case OpCode.ADD:
+        case OpCode.SUB:
+        case OpCode.MUL:
+        case OpCode.MOD:
+        case OpCode.POW:
+        case OpCode.DIV:
+        case OpCode.IDIV:
+        case OpCode.BAND:
+        case OpCode.BOR:
+        case OpCode.BXOR:
+        case OpCode.SHL:
+        case OpCode.SHR:
+        case OpCode.EQ:
+        case OpCode.LT:
+        case OpCode.LE:
+            _MarkRK(inst.B, dead);
+            _MarkRK(inst.C, dead);
+            break;
+        case OpCode.SETUPVAL:
+        case OpCode.TEST:
+            dead[a] = false;
+            break;
+        case OpCode.CONCAT:
+            _MarkRange(dead, b, inst.C.RKValue + 1);
+            break;
+        case OpCode.CALL:
+        case OpCode.TAILCALL:
+            _MarkRange(dead, a, b == 0 ? dead.Length : a + b);
+            break;
+        case OpCode.RETURN:
+            _MarkRange(dead, a, b == 0 ? dead.Length : a + b - 1);
+            break;
+        case OpCode.SETLIST:
+            _MarkRange(dead, a, b == 0 ? dead.Length : a + b + 1);
+            break;
+        case OpCode.FORLOOP:
+        case OpCode.FORPREP:
+        case OpCode.TFORCALL:
+        case OpCode.TFORLOOP:
+            _MarkRange(dead, a, a + 3);
+            break;
+        default:
+            _MarkRange(dead, 0, dead.Length);
+            break;
+        }
+    }
+    private static void _MarkRK(ArgValue arg, bool[] dead) {
+        if (arg.HasRegister)
+            dead[arg.RKValue] = false;
+    }
+    private static void _MarkRange(bool[] dead, int from, int to) {
+        for (int r = from; r < to && r < dead.Length; r++)
+            dead[r] = false;
+    }
+
+    /* 删掉标记的指令，重新计算跳转偏移、行号和局部变量的有效范围；被删掉的位置映射到它后面第一条保留的指令 */
+    private static void _Compact(LuaProto proto, bool[] deleted) {
+        List<Instruction> code  = proto._instructions;
+        List<int>         lines = proto.Lines;
+        int[]             map   = new int[code.Count + 1];
+        int               count = 0;
+        for (int pc = 0; pc < code.Count; pc++) {
+            map[pc] = count;
+            if (!deleted[pc])
+                count++;
+        }
+        map[code.Count] = count;
+        if (count == code.Count)
+            return;
+
+        for (int pc = 0; pc < code.Count; pc++) {
+            if (deleted[pc])
+                continue;
+            Instruction inst = code[pc];
+            if (_IsJump(inst.OpCode))
+                inst = inst.CoplaceSBx(map[_JumpTarget(pc, inst)] - map[pc] - 1);
+            code[map[pc]]  = inst;
+            lines[map[pc]] = lines[pc];
+        }
+        code.RemoveRange(count, code.Count - count);
+        lines.RemoveRange(count, lines.Count - count);
+        for (int i = 0; i < proto.LocalVarsCount; i++) {
+            LocalVar localVar = proto.LocalVars[i];
+            localVar.startPC  = map[Math.Min(localVar.startPC, map.Length - 1)];
+            localVar.endPC    = map[Math.Min(localVar.endPC, map.Length - 1)];
+        }
+        LuaDebug.Assert(code.Count == lines.Count);
+    }
+}
+
+}
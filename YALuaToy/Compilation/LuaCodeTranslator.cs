@@ -30,19 +30,11 @@ internal partial class LuaCodeTranslator
     private FuncState   _funcState;
     private LuaString   _srouce;
 
-    private Dictionary<string, LuaString> _reservedWords;
-
     public LuaCodeTranslator(LuaState state, LuaTable constantsIMap, LuaString source) {
         _state         = state;
         _constantsIMap = constantsIMap;
         _srouce        = source;
         _dyd           = new DynamicData();
-        _reservedWords = new Dictionary<string, LuaString>();
-
-        LuaString[] reservedWords = LuaGlobalState.ReservedWords();
-        foreach (var word in reservedWords) {
-            _reservedWords.Add(word.Str, word);
-        }
     }
 
     /* ---------------- Translation Handler ---------------- */
@@ -739,11 +731,11 @@ internal partial class LuaCodeTranslator
     }
     private void _TranslateString(LuaParser.StringContext context, ExpDesc output) {
         if (context.NORMALSTRING() != null)
-            output.Reset(_funcState, new LuaString(((LToken)context.NORMALSTRING().Symbol).str));
+            output.Reset(_funcState, LuaString.New(((LToken)context.NORMALSTRING().Symbol).str));
         else if (context.CHARSTRING() != null)
-            output.Reset(_funcState, new LuaString(((LToken)context.CHARSTRING().Symbol).str));
+            output.Reset(_funcState, LuaString.New(((LToken)context.CHARSTRING().Symbol).str));
         else
-            output.Reset(_funcState, new LuaString(((LToken)context.LONGSTRING().Symbol).str));
+            output.Reset(_funcState, LuaString.New(((LToken)context.LONGSTRING().Symbol).str));
     }
 
     /* ---------------- Translation Helper ---------------- */
@@ -1062,7 +1054,7 @@ internal partial class LuaCodeTranslator
     }
 
     private void _OpenFunc(string funcname, int firstLine = 0, int lastLine = 0) {
-        LuaString source = new LuaString($"'{funcname}' at {_srouce.Str}:{firstLine}");
+        LuaString source = LuaString.New($"'{funcname}' at {_srouce.Str}:{firstLine}");
         if (_funcState == null) {
             _funcState = new FuncState(_state, this, _constantsIMap, _funcState, _dyd.activeVarList.Count, source);
         } else {
@@ -1123,11 +1115,8 @@ internal partial class LuaCodeTranslator
             throw new LuaOverLimitError(_funcState, limit, what);
     }
     private LuaString _NewLuaString(string str) {
-        /* 其实不是所有地方都要调用这个，感觉在遇到 Name 的时候调用一下就可以了，像什么字符串就不需要管 */
-        if (_reservedWords.ContainsKey(str)) /* 检查一下 reserved 的字符串 */
-            return _reservedWords[str];
-        else
-            return new LuaString(str);
+        /* 保留字已经在字符串表里了，短字符串会直接拿到保留字对象 */
+        return LuaString.New(str);
     }
     private bool _IsEmptyContext(ParserRuleContext context) {
         return context == null || context.ChildCount == 0;
@@ -1 +0,0 @@
-/* Todo - dump and undump，因时间关系砍掉 இ௰இ */
@@ -7,6 +7,8 @@ using System.IO;
 using System.Diagnostics;
 using System.Runtime.CompilerServices;
 using Antlr4.Runtime;
+using Antlr4.Runtime.Atn;
+using Antlr4.Runtime.Misc;
 using YALuaToy.Const;
 using YALuaToy.Debug;
 using YALuaToy.Core;
@@ -387,25 +389,50 @@ internal partial class FuncState
 
 internal static class LuaParserUtils
 {
+    /* 两阶段解析：先用 SLL 预测（不回看完整调用栈，快得多），SLL 失败再用完整的 LL 重新解析一次。
+       SLL 能成功解析的输入，得到的语法树和 LL 一样；只有真正的语法错误（或极少数 SLL 判断不了的写法）才会走第二遍，
+       第二遍会产生和之前一样的报错信息。DFA 缓存是生成代码里的静态成员，进程内所有编译共享 */
+    internal static bool twoStage = true;
+
+    /* 预热用的代码片段，尽量覆盖所有语法结构，让常用的 DFA 状态提前建好 */
+    private const string PREWARM_CHUNK = @"
+local a, b <const> = 1, 2.5
+local t = { 1, 2, x = 'str', [""k""] = { nested = true }, f = function(...) return ... end; }
+t.x, t[1] = t.y or nil, not a and -b or #t
+a = (a + b - a * b / a // b % a ^ b) .. 's' .. [[long]]
+a = a & b | a ~ b << 1 >> 1 ~= 0 and a <= b or a >= b or a < b or a > b or a == b
+local function f(x, y, ...)
+    if x then return x elseif y then return y else return ... end
+end
+function t.m(self) return self end
+function t:n(x) return self:m(x), t.m { x }, t.m 'a', f(x)(x)[1].x end
+for i = 1, 10, 2 do goto continue ::continue:: end
+for k, v in pairs(t) do while k do break end repeat local r = v until r end
+do local _ENV = { print = print } end
+return f(t:n(a)), select('#', ...)
+";
+
     public static ThreadStatus Parse(LuaState state, AntlrInputStream inputStream, string source) {
-        int DoParse(LuaState state_) {
-            _RawParse(state_, inputStream, source);
-            return 1;
-        }
-        state.PushStack(DoParse);
-        ThreadStatus threadStatus = state.PCall(0, 1, 0);
-        if (threadStatus == ThreadStatus.OK) { /* 完成 lua_load 上的环境变量初始化 */
-            LClosure lclosure = state.GetStack(state.Top - 1).LObject<LClosure>();
-            if (lclosure.UpvalueCount >= 1) {
-                LuaValue _G = state.globalState.Registry.Get(new LuaValue(LuaConst.RIDX_GLOBALS));
-                lclosure.SetUpvalue(1, _G); /* 把 env 设为 _G */
-            }
-        }
-        return threadStatus;
+        return state._ProtectedLoad(state_ => _RawParse(state_, inputStream, source), source, null, "text");
     }
     internal static LClosure _RawParse(LuaState state, AntlrInputStream inputStream, string source) {
         LuaTable constantsIMap = new LuaTable(); /* 新建常量索引映射表 */
 
+        /* Lexer + Parser */
+        LuaParser.StartContext root = _ParseStart(inputStream, constantsIMap);
+
+        /* Translator */
+        LuaCodeTranslator translator = new LuaCodeTranslator(state, constantsIMap, LuaString.New(source));
+        LClosure          lclosure   = translator.TranslateStart(root);
+        LuaDebug.Assert(lclosure.UpvalueCount == lclosure.proto.UpvalueCount);
+        if (state.OptimizeCode)
+            LuaCodeOptimizer.Optimize(lclosure.proto);
+
+        /* Prepare LClosure */
+        lclosure._InitAllUpvalues();
+        return lclosure;
+    }
+    internal static LuaParser.StartContext _ParseStart(ICharStream inputStream, LuaTable constantsIMap) {
         /* Lexer */
         LuaLexer lexer                = new LuaLexer(inputStream, constantsIMap);
         lexer.TokenFactory            = new LTokenFactory();
@@ -414,17 +441,25 @@ internal static class LuaParserUtils
         /* Parser */
         LuaParser parser = new LuaParser(tokenStream);
         parser.RemoveErrorListeners();
+        if (twoStage) {
+            /* 第一遍：SLL，遇到错误直接放弃（BailErrorStrategy 抛 ParseCanceledException），不做错误恢复 */
+            parser.Interpreter.PredictionMode = PredictionMode.SLL;
+            parser.ErrorHandler               = new BailErrorStrategy();
+            try {
+                return parser.start();
+            } catch (ParseCanceledException) {
+                /* 第二遍：LL。token 已经缓存在 tokenStream 里，不需要重新词法分析 */
+                parser.Reset();
+                parser.Interpreter.PredictionMode = PredictionMode.LL;
+                parser.ErrorHandler               = new DefaultErrorStrategy();
+            }
+        }
         parser.AddErrorListener(new LuaParserErrorListener()); /* 覆盖异常处理 */
-        LuaParser.StartContext root = parser.start();
-
-        /* Translator */
-        LuaCodeTranslator translator = new LuaCodeTranslator(state, constantsIMap, new LuaString(source));
-        LClosure          lclosure   = translator.TranslateStart(root);
-        LuaDebug.Assert(lclosure.UpvalueCount == lclosure.proto.UpvalueCount);
-
-        /* Prepare LClosure */
-        lclosure._InitAllUpvalues();
-        return lclosure;
+        return parser.start();
+    }
+    /* 解析一段内置代码（不翻译），把共享的 DFA 缓存建起来，可以在启动时（比如后台线程）调用，减少第一次加载的耗时 */
+    internal static void Prewarm() {
+        _ParseStart(new AntlrInputStream(PREWARM_CHUNK), null);
     }
 
     internal static void Check(bool condition, string msg) {
@@ -48,6 +48,10 @@ public static class LuaConfig
     internal const int ERROR_STACK_SIZE  = LUAI_MAXSTACK + 200;
 
     internal const int LUA_TABLE_SWEEP_THRESHOLD = 20;
+    internal const int LUA_TABLE_MAXABITS        = 30; /* 表数组部分最大为 2^MAXABITS（ltable.c 的 MAXABITS） */
+
+    internal const int LUAI_MAXSHORTLEN           = 40;   /* 不超过该长度（UTF-16 字符数）的字符串会被内部化 */
+    internal const int LUA_STRING_PURGE_THRESHOLD = 1024; /* 字符串表的条目数达到阈值时清理已回收的字符串 */
 
     internal const int LUAI_MAXCCALLS = 200; /* 该配置最大不能超过 255 */
 
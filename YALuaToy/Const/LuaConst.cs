@@ -148,6 +148,24 @@ public enum Comp {
     LE,
 }
 
+/* 钩子事件，和 CLua 的 LUA_HOOK* 一致 */
+public enum HookEvent {
+    CALL,
+    RET,
+    LINE,
+    COUNT,
+    TAILCALL,
+}
+
+/* 钩子掩码，和 CLua 的 LUA_MASK* 一致；尾调用事件归在 CALL 里 */
+[Flags]
+public enum HookMask {
+    CALL  = 1 << (int)HookEvent.CALL,
+    RET   = 1 << (int)HookEvent.RET,
+    LINE  = 1 << (int)HookEvent.LINE,
+    COUNT = 1 << (int)HookEvent.COUNT,
+}
+
 internal enum TagMethod {
     INDEX,
     NEWINDEX,
@@ -308,7 +308,8 @@ public partial class LuaState
     }
     public sbyte GetTable(int tableLdx) {
         LuaValue table        = _Get(tableLdx);
-        _stack[(int)_top - 1] = Index(table, _stack[(int)_top - 1]);
+        LuaValue value        = Index(table, _stack[(int)_top - 1]); /* Index 可能调用元方法扩栈，先算出值再写 */
+        _stack[(int)_top - 1] = value;
         return _stack[(int)_top - 1].Type.Tag;
     }
     public sbyte GetTable(int tableLdx, string key) {
@@ -339,7 +340,7 @@ public partial class LuaState
     }
     public sbyte RawGetTable(int tableLdx, long key) {
         _Get(tableLdx).LObject(out LuaTable table);
-        LuaValue value = table.Get(new LuaValue(key));
+        LuaValue value = table.GetInt(key);
         PushStack(value);
         return value.Type.Tag;
     }
@@ -424,7 +425,7 @@ public partial class LuaState
     public void RawSetTable(int tableLdx, long key) {
         CheckArgOrResultCount(1);
         _Get(tableLdx).LObject(out LuaTable table);
-        table.Set(new LuaValue(key), _stack[(int)_top - 1]);
+        table.SetInt(key, _stack[(int)_top - 1]);
         _top--;
     }
     public void RawSetTable(int tableLdx, IntPtr key) {
@@ -573,18 +574,49 @@ public partial class LuaState
         return PCall(argCount, resultCount, errorFuncLdx, IntPtr.Zero, null);
     }
 
-    public ThreadStatus Load(TextReader reader, string source) {
+    /* mode 和 CLua 一样："b" 只允许预编译块，"t" 只允许文本，"bt" 或 null 两者都可以 */
+    public ThreadStatus Load(TextReader reader, string source, string mode = null) {
+        if (reader.Peek() == LuaConst.SIGNATURE[0]) { /* 预编译块被当作字符串读进来了（每个字符对应一个字节） */
+            string chunk = reader.ReadToEnd();
+            return _ProtectedLoad(state_ => LuaDump.Undump(state_, chunk, source), source, mode, "binary");
+        }
         AntlrInputStream inputStream = new AntlrInputStream(reader);
-        return LuaParserUtils.Parse(this, inputStream, source);
-    }
-    public ThreadStatus Load(BinaryReader reader) {
-        throw new NotImplementedException(); /* lua_load */
-    }
-    public ThreadStatus Dump(TextWriter writer) {
-        throw new NotImplementedException(); /* lua_dump */
-    }
-    public ThreadStatus Dump(BinaryWriter writer) {
-        throw new NotImplementedException(); /* lua_dump */
+        return _ProtectedLoad(state_ => LuaParserUtils._RawParse(state_, inputStream, source), source, mode, "text");
+    }
+    public ThreadStatus Load(BinaryReader reader, string source, string mode = null) {
+        return _ProtectedLoad(state_ => LuaDump.Undump(state_, reader, source), source, mode, "binary");
+    }
+    /* lua_dump：把栈顶的 Lua 函数写成预编译块，栈顶不是 Lua 函数时返回 ERRRUN */
+    public ThreadStatus Dump(TextWriter writer, bool strip = false) {
+        if (!_Get(-1).IsFunction || _Get(-1).Type.Variant != LuaConst.TLCL)
+            return ThreadStatus.ERRRUN;
+        writer.Write(LuaDump.DumpToString(_Get(-1).LObject<LClosure>(), strip));
+        return ThreadStatus.OK;
+    }
+    public ThreadStatus Dump(BinaryWriter writer, bool strip = false) {
+        if (!_Get(-1).IsFunction || _Get(-1).Type.Variant != LuaConst.TLCL)
+            return ThreadStatus.ERRRUN;
+        LuaDump.Dump(_Get(-1).LObject<LClosure>(), writer, strip);
+        return ThreadStatus.OK;
+    }
+    internal ThreadStatus _ProtectedLoad(Func<LuaState, LClosure> load, string source, string mode, string what) {
+        /* f_parser：在保护模式下解析或读取预编译块，完成后栈顶是新建的主函数 */
+        int DoLoad(LuaState state_) {
+            if (mode != null && mode.IndexOf(what[0]) < 0) /* checkmode */
+                throw new LuaSyntaxError($"attempt to load a {what} chunk (mode is '{mode}')");
+            load(state_);
+            return 1;
+        }
+        PushStack(DoLoad);
+        ThreadStatus threadStatus = PCall(0, 1, 0);
+        if (threadStatus == ThreadStatus.OK) { /* 完成 lua_load 上的环境变量初始化 */
+            LClosure lclosure = GetStack(Top - 1).LObject<LClosure>();
+            if (lclosure.UpvalueCount >= 1) {
+                LuaValue _G = globalState.Registry.Get(new LuaValue(LuaConst.RIDX_GLOBALS));
+                lclosure.SetUpvalue(1, _G); /* 把 env 设为 _G */
+            }
+        }
+        return threadStatus;
     }
 
     /* ---------------- Coroutine Manipulation ---------------- */
@@ -597,16 +629,12 @@ public partial class LuaState
         throw new LuaRuntimeError(value);
     }
     public bool Next(int tableLdx) {
-        /* 这个 Next 的实现需要一点技巧：在 LuaTable 上存放一个迭代器“缓存”。
-           如果压入的是 nil，则直接缓存默认迭代器对象；如果压入的不是 nil，则要遍历直到遇到对应的 key；
-           如果字典发生修改，迭代器缓存失效；如果调用 Next 时，top 位置的 key 和缓存的迭代器的 key 不一样，迭代器失效（要重新索引获取）
-           该实现在连续遍历时速度较快，但如果从中途遍历效率就低很多 */
+        /* 表的数组部分和哈希节点都是按位置存放的，next 由当前键直接定位到它的位置再往后找，不需要保存遍历状态，
+           所以多个遍历（嵌套、交错、从任意键开始）互不影响，每次都是 O(1)（跳过空位除外） */
         _Get(tableLdx).LObject(out LuaTable table);
-        LuaValue currkey = _stack[(int)_top - 1];
-        if (table.GetEnumeratorNext(currkey, out var enumerator)) {
-            Pop();
-            PushStack(enumerator.Current.Key);
-            PushStack(enumerator.Current.Value);
+        if (table.Next(_stack[(int)_top - 1], out LuaValue key, out LuaValue value)) {
+            _stack[(int)_top - 1] = key;
+            PushStack(value);
             return true;
         } else {
             _top--;
@@ -0,0 +1,327 @@
+namespace YALuaToy.Core {
+
+using System;
+using System.IO;
+using System.Text;
+using System.Collections.Generic;
+using YALuaToy.Const;
+
+/* 预编译块（对应 CLua 的 ldump.c 和 lundump.c），跳过 Antlr 解析和翻译，直接还原 LuaProto 树
+   整体布局和 CLua 一致：头部 + 主函数上值数量 + 主函数（递归包含子函数）。但 LUAC_FORMAT 是 YALuaToy 自己的：
+   字符串按 UTF-8 存储、长度用 7-bit 变长编码，所以和 luac 的输出互不兼容，头部校验会直接拒绝对方的块
+   读取时只顺序读 BinaryReader，不需要 Seek，所以既可以读内存映射文件（LoadFile），也可以读内存里的字符串（string.dump 的结果） */
+internal static class LuaDump
+{
+    internal const byte   LUAC_VERSION = 0x53; /* 5.3 */
+    internal const byte   LUAC_FORMAT  = 0x59; /* 'Y'，CLua 的官方格式是 0 */
+    internal const long   LUAC_INT     = 0x5678;
+    internal const double LUAC_NUM     = 370.5;
+    internal static readonly byte[] LUAC_DATA = { 0x19, 0x93, (byte)'\r', (byte)'\n', 0x1A, (byte)'\n' }; /* 用于检测传输过程中的损坏 */
+    private const int MIN_FUNCTION_SIZE = 1 + 4 + 4 + 1 + 1 + 1 + 7 * 4; /* 空源码名、行号范围、参数数、vararg、栈大小和 7 个数量 */
+
+    /* ---------------- Dump ---------------- */
+
+    /* luaU_dump，strip 为 true 时不写调试信息（源码名、行号、局部变量名、上值名） */
+    public static void Dump(LClosure lclosure, BinaryWriter writer, bool strip) {
+        Dump(lclosure.proto, lclosure.UpvalueCount, writer, strip);
+    }
+    public static void Dump(LuaProto proto, int upvalueCount, BinaryWriter writer, bool strip) {
+        _DumpHeader(writer);
+        writer.Write((byte)upvalueCount);
+        _DumpFunction(proto, null, writer, strip);
+    }
+    /* 写成每个字符对应一个字节的字符串，这是 Lua 层面“二进制字符串”的约定（见 LuaString 的注释） */
+    public static string DumpToString(LClosure lclosure, bool strip) {
+        using (MemoryStream stream = new MemoryStream()) {
+            using (BinaryWriter writer = new BinaryWriter(stream, Encoding.UTF8, leaveOpen: true))
+                Dump(lclosure, writer, strip);
+            byte[]        bytes = stream.ToArray();
+            StringBuilder sb    = new StringBuilder(bytes.Length);
+            foreach (byte b in bytes)
+                sb.Append((char)b);
+            return sb.ToString();
+        }
+    }
+
+    private static void _DumpHeader(BinaryWriter writer) {
+        foreach (char c in LuaConst.SIGNATURE)
+            writer.Write((byte)c);
+        writer.Write(LUAC_VERSION);
+        writer.Write(LUAC_FORMAT);
+        writer.Write(LUAC_DATA);
+        writer.Write((byte)sizeof(int));
+        writer.Write((byte)sizeof(uint)); /* Instruction */
+        writer.Write((byte)sizeof(long));
+        writer.Write((byte)sizeof(double));
+        writer.Write(LUAC_INT);
+        writer.Write(LUAC_NUM);
+    }
+    private static void _DumpFunction(LuaProto proto, LuaString parentSource, BinaryWriter writer, bool strip) {
+        if (strip || proto.source == parentSource)
+            _DumpString(null, writer); /* 和父函数相同的源码名不重复写 */
+        else
+            _DumpString(proto.source, writer);
+        writer.Write(proto._firstLine);
+        writer.Write(proto._lastLine);
+        writer.Write(proto._paramCount);
+        writer.Write(proto._vararg);
+        writer.Write(proto._frameSize);
+        _DumpCode(proto, writer);
+        _DumpConstants(proto, writer);
+        _DumpUpvalues(proto, writer);
+        _DumpProtos(proto, writer, strip);
+        _DumpDebug(proto, writer, strip);
+    }
+    private static void _DumpCode(LuaProto proto, BinaryWriter writer) {
+        writer.Write(proto._instructions.Count);
+        foreach (Instruction inst in proto._instructions)
+            writer.Write(inst._RawInst);
+    }
+    private static void _DumpConstants(LuaProto proto, BinaryWriter writer) {
+        writer.Write(proto.ConstantsCount);
+        for (int i = 0; i < proto.ConstantsCount; i++) {
+            LuaValue constant = proto.Constants[i];
+            switch (constant.Type.NotNoneVariant) {
+            case LuaConst.TNIL:
+                writer.Write((byte)LuaConst.TNIL);
+                break;
+            case LuaConst.TBOOLEAN:
+                writer.Write((byte)LuaConst.TBOOLEAN);
+                writer.Write(constant.Bool);
+                break;
+            case LuaConst.TNUMFLT:
+                writer.Write((byte)LuaConst.TNUMFLT);
+                writer.Write(constant.Float);
+                break;
+            case LuaConst.TNUMINT:
+                writer.Write((byte)LuaConst.TNUMINT);
+                writer.Write(constant.Int);
+                break;
+            case LuaConst.TNORMALSTR:
+            case LuaConst.TRESERVEDSTR: /* 读回来时由字符串表还原保留字 */
+                writer.Write((byte)LuaConst.TNORMALSTR);
+                _DumpString(constant.LObject<LuaString>(), writer);
+                break;
+            default:
+                throw new LuaCoreError($"unexpected constant type: {constant.Type}");
+            }
+        }
+    }
+    private static void _DumpUpvalues(LuaProto proto, BinaryWriter writer) {
+        writer.Write(proto.UpvalueDescCount);
+        for (int i = 0; i < proto.UpvalueDescCount; i++) {
+            UpvalueDesc desc = proto.UpvalueDescList[i];
+            writer.Write(desc.InStack);
+            writer.Write(desc.Ldx);
+        }
+    }
+    private static void _DumpProtos(LuaProto proto, BinaryWriter writer, bool strip) {
+        writer.Write(proto.SubProtosCount);
+        for (int i = 0; i < proto.SubProtosCount; i++)
+            _DumpFunction(proto.SubProtos[i], proto.source, writer, strip);
+    }
+    private static void _DumpDebug(LuaProto proto, BinaryWriter writer, bool strip) {
+        int lineCount = strip ? 0 : proto.Lines.Count;
+        writer.Write(lineCount);
+        for (int i = 0; i < lineCount; i++)
+            writer.Write(proto.Lines[i]);
+        int localVarCount = strip ? 0 : proto.LocalVarsCount;
+        writer.Write(localVarCount);
+        for (int i = 0; i < localVarCount; i++) {
+            LocalVar localVar = proto.LocalVars[i];
+            _DumpString(localVar.varName, writer);
+            writer.Write(localVar.startPC);
+            writer.Write(localVar.endPC);
+        }
+        int upvalueNameCount = strip ? 0 : proto.UpvalueDescCount;
+        writer.Write(upvalueNameCount);
+        for (int i = 0; i < upvalueNameCount; i++)
+            _DumpString(proto.UpvalueDescList[i]._NameObject, writer);
+    }
+    private static void _DumpString(LuaString str, BinaryWriter writer) {
+        if (str == null) {
+            writer.Write7BitEncodedInt(0);
+            return;
+        }
+        byte[] bytes = str.GetUTF8();
+        writer.Write7BitEncodedInt(bytes.Length + 1); /* 和 CLua 一样，长度 +1，0 表示 NULL */
+        writer.Write(bytes);
+    }
+
+    /* ---------------- Undump ---------------- */
+
+    /* luaU_undump，成功时把新建的 LClosure 压栈并返回，失败时抛出 LuaUndumpError */
+    public static LClosure Undump(LuaState state, BinaryReader reader, string chunkname) {
+        LuaProto proto    = UndumpProto(reader, chunkname, out int upvalueCount);
+        LClosure lclosure = new LClosure(proto, upvalueCount);
+        lclosure._InitAllUpvalues();
+        state.PushStack(lclosure);
+        return lclosure;
+    }
+    /* 只还原 LuaProto 树，不需要 LuaState（LuaChunkCache 的磁盘缓存用） */
+    public static LuaProto UndumpProto(BinaryReader reader, string chunkname, out int upvalueCount) {
+        try {
+            _CheckHeader(reader, chunkname);
+            upvalueCount = reader.ReadByte();
+            return _UndumpFunction(reader, null, chunkname);
+        } catch (EndOfStreamException) {
+            throw new LuaUndumpError(chunkname, "truncated");
+        } catch (FormatException) { /* Read7BitEncodedInt 读到了非法的长度 */
+            throw new LuaUndumpError(chunkname, "corrupted");
+        }
+    }
+    /* 字符串形式的二进制块，每个字符对应一个字节 */
+    public static LClosure Undump(LuaState state, string chunk, string chunkname) {
+        byte[] bytes = new byte[chunk.Length];
+        for (int i = 0; i < chunk.Length; i++) {
+            if (chunk[i] > 0xFF)
+                throw new LuaUndumpError(chunkname, "bad binary format (not a byte string)");
+            bytes[i] = (byte)chunk[i];
+        }
+        using (BinaryReader reader = new BinaryReader(new MemoryStream(bytes, false)))
+            return Undump(state, reader, chunkname);
+    }
+
+    private static void _CheckHeader(BinaryReader reader, string chunkname) {
+        foreach (char c in LuaConst.SIGNATURE)
+            if (reader.ReadByte() != c)
+                throw new LuaUndumpError(chunkname, "not a");
+        if (reader.ReadByte() != LUAC_VERSION)
+            throw new LuaUndumpError(chunkname, "version mismatch in");
+        if (reader.ReadByte() != LUAC_FORMAT)
+            throw new LuaUndumpError(chunkname, "format mismatch in");
+        foreach (byte b in LUAC_DATA)
+            if (reader.ReadByte() != b)
+                throw new LuaUndumpError(chunkname, "corrupted");
+        _CheckSize(reader, sizeof(int), "int", chunkname);
+        _CheckSize(reader, sizeof(uint), "Instruction", chunkname);
+        _CheckSize(reader, sizeof(long), "lua_Integer", chunkname);
+        _CheckSize(reader, sizeof(double), "lua_Number", chunkname);
+        if (reader.ReadInt64() != LUAC_INT)
+            throw new LuaUndumpError(chunkname, "endianness mismatch in");
+        if (reader.ReadDouble() != LUAC_NUM)
+            throw new LuaUndumpError(chunkname, "float format mismatch in");
+    }
+    private static void _CheckSize(BinaryReader reader, int size, string what, string chunkname) {
+        if (reader.ReadByte() != size)
+            throw new LuaUndumpError(chunkname, $"{what} size mismatch in");
+    }
+    private static LuaProto _UndumpFunction(BinaryReader reader, LuaString parentSource, string chunkname) {
+        LuaString source = _UndumpString(reader, chunkname);
+        if (source == null) /* 和父函数相同；主函数被 strip 后没有源码名，和 CLua 一样显示为 "=?" */
+            source = parentSource ?? LuaString.New("=?");
+        LuaProto proto    = new LuaProto(source);
+        proto._firstLine  = reader.ReadInt32();
+        proto._lastLine   = reader.ReadInt32();
+        proto._paramCount = reader.ReadByte();
+        proto._vararg     = reader.ReadBoolean();
+        proto._frameSize  = reader.ReadByte();
+        _UndumpCode(reader, proto, chunkname);
+        _UndumpConstants(reader, proto, chunkname);
+        _UndumpUpvalues(reader, proto, chunkname);
+        _UndumpProtos(reader, proto, chunkname);
+        _UndumpDebug(reader, proto, chunkname);
+        return proto;
+    }
+    private static void _UndumpCode(BinaryReader reader, LuaProto proto, string chunkname) {
+        int count           = _ReadCount(reader, sizeof(uint), chunkname);
+        proto._instructions = new List<Instruction>(count);
+        for (int i = 0; i < count; i++)
+            proto._instructions.Add(Instruction._FromRaw(reader.ReadUInt32()));
+    }
+    private static void _UndumpConstants(BinaryReader reader, LuaProto proto, string chunkname) {
+        int count = _ReadCount(reader, 1, chunkname); /* nil 只有一个类型字节 */
+        if (count == 0)
+            return;
+        List<LuaValue> constants = proto.GetConstants();
+        for (int i = 0; i < count; i++) {
+            switch ((sbyte)reader.ReadByte()) {
+            case LuaConst.TNIL:
+                constants.Add(LuaValue.NIL);
+                break;
+            case LuaConst.TBOOLEAN:
+                constants.Add(reader.ReadBoolean() ? LuaValue.TRUE : LuaValue.FALSE);
+                break;
+            case LuaConst.TNUMFLT:
+                constants.Add(new LuaValue(reader.ReadDouble()));
+                break;
+            case LuaConst.TNUMINT:
+                constants.Add(new LuaValue(reader.ReadInt64()));
+                break;
+            case LuaConst.TNORMALSTR:
+                LuaString str = _UndumpString(reader, chunkname);
+                if (str == null)
+                    throw new LuaUndumpError(chunkname, "bad format for constant string in");
+                constants.Add(new LuaValue(str));
+                break;
+            default:
+                throw new LuaUndumpError(chunkname, "bad constant in");
+            }
+        }
+    }
+    private static void _UndumpUpvalues(BinaryReader reader, LuaProto proto, string chunkname) {
+        int count = _ReadCount(reader, sizeof(bool) + sizeof(int), chunkname);
+        if (count == 0)
+            return;
+        List<UpvalueDesc> descList = proto.GetUpvalueDescList();
+        for (int i = 0; i < count; i++) {
+            bool instack = reader.ReadBoolean();
+            int  ldx     = reader.ReadInt32();
+            descList.Add(new UpvalueDesc((LuaString)null, instack, ldx));
+        }
+    }
+    private static void _UndumpProtos(BinaryReader reader, LuaProto proto, string chunkname) {
+        int count = _ReadCount(reader, MIN_FUNCTION_SIZE, chunkname);
+        if (count == 0)
+            return;
+        List<LuaProto> subProtos = proto.GetSubProtos();
+        for (int i = 0; i < count; i++)
+            subProtos.Add(_UndumpFunction(reader, proto.source, chunkname));
+    }
+    private static void _UndumpDebug(BinaryReader reader, LuaProto proto, string chunkname) {
+        int lineCount = _ReadCount(reader, sizeof(int), chunkname);
+        for (int i = 0; i < lineCount; i++)
+            proto.Lines.Add(reader.ReadInt32());
+        if (lineCount == 0) /* strip 掉了行号，补 0 以保证和指令一一对应 */
+            for (int i = 0; i < proto._instructions.Count; i++)
+                proto.Lines.Add(0);
+        int localVarCount = _ReadCount(reader, 1 + 2 * sizeof(int), chunkname);
+        for (int i = 0; i < localVarCount; i++) {
+            LocalVar localVar = new LocalVar(_UndumpString(reader, chunkname));
+            localVar.startPC  = reader.ReadInt32();
+            localVar.endPC    = reader.ReadInt32();
+            proto.GetLocalVars().Add(localVar);
+        }
+        int upvalueNameCount = _ReadCount(reader, 1, chunkname);
+        if (upvalueNameCount > proto.UpvalueDescCount)
+            throw new LuaUndumpError(chunkname, "bad upvalue names in");
+        for (int i = 0; i < upvalueNameCount; i++) {
+            UpvalueDesc desc         = proto.UpvalueDescList[i];
+            proto.UpvalueDescList[i] = new UpvalueDesc(_UndumpString(reader, chunkname), desc.InStack, desc.Ldx);
+        }
+    }
+    private static LuaString _UndumpString(BinaryReader reader, string chunkname) {
+        int size = reader.Read7BitEncodedInt();
+        if (size == 0)
+            return null;
+        if (size - 1 > _Remaining(reader)) /* ReadBytes 会先按 size 分配缓冲区 */
+            throw new LuaUndumpError(chunkname, "corrupted");
+        byte[] bytes = reader.ReadBytes(size - 1);
+        if (bytes.Length != size - 1)
+            throw new EndOfStreamException();
+        return LuaString.New(Encoding.UTF8.GetString(bytes));
+    }
+    /* 数量按剩下的字节数检查（每个元素至少 minSize 字节），损坏的块不会因为一个巨大的数量去分配内存 */
+    private static int _ReadCount(BinaryReader reader, int minSize, string chunkname) {
+        int count = reader.ReadInt32();
+        if (count < 0 || (long)count * minSize > _Remaining(reader))
+            throw new LuaUndumpError(chunkname, "corrupted");
+        return count;
+    }
+    private static long _Remaining(BinaryReader reader) {
+        Stream stream = reader.BaseStream;
+        return stream.CanSeek ? stream.Length - stream.Position : long.MaxValue;
+    }
+}
+
+}
@@ -29,7 +29,7 @@ public class LuaException : Exception
 
     public virtual ThreadStatus threadStatus => ThreadStatus.ERRRUN;
 
-    public LuaException(string errorMsg): this(new LuaString(errorMsg)) { }
+    public LuaException(string errorMsg): this(LuaString.New(errorMsg)) { }
     internal LuaException(LuaString errorMsg): base(errorMsg.Str) {
         errorValue = new LuaValue(errorMsg);
     }
@@ -41,7 +41,7 @@ public class LuaException : Exception
 /* ThreadStatus.YIELD */
 internal class LuaYield : LuaException
 {
-    private static readonly LuaString msg = new LuaString("LuaYield");
+    private static readonly LuaString msg = LuaString.New("LuaYield");
 
     public LuaYield(): base(msg) { }
 
@@ -84,7 +84,7 @@ internal class LuaMemoryError : LuaException
 /* ThreadStatus.ERRGCMM */
 internal class LuaGCError : LuaException
 {
-    private static readonly LuaString msg = new LuaString("GC Error.");
+    private static readonly LuaString msg = LuaString.New("GC Error.");
     public LuaGCError(): base(msg) { }
 
     public override ThreadStatus threadStatus => ThreadStatus.ERRGCMM;
@@ -194,6 +194,13 @@ internal class LuaOverLimitError : LuaSyntaxError
     }
 }
 
+/* ---------------- Undump ---------------- */
+
+internal class LuaUndumpError : LuaSyntaxError
+{
+    public LuaUndumpError(string chunkname, string why): base($"{chunkname}: {why} precompiled chunk") { }
+}
+
 internal class LuaUndefinedGoto : LuaSyntaxError
 {
     public LuaUndefinedGoto(in LabelDesc pendingGoto): base(GetMsg(pendingGoto)) { }
@@ -268,7 +268,9 @@ public partial class LuaState
     private bool _PosCall(CallInfo ci, RawIdx firstResult, int realResultCount) {
         int    wantedResultCount = ci.ResultCount;
         RawIdx destFirstResult   = ci.Func;
-        _currCI                  = _currCI.prev;
+        if ((_hookMask & (HookMask.RET | HookMask.LINE)) != 0)
+            _RetHook(ci);
+        _currCI = _currCI.prev;
         return _MoveResults(firstResult, destFirstResult, realResultCount, wantedResultCount);
     }
 
@@ -279,6 +281,8 @@ public partial class LuaState
         CallInfo ci = NewCI();
         ci.Reset(resultCount, func, _top + LuaConst.MINSTACK); /* 注意这里没有修改 _top，而是只改了 ci->top */
         CheckCorrectTopPos(ci.Top);
+        if ((_hookMask & HookMask.CALL) != 0)
+            _Hook(HookEvent.CALL, -1);
         int realResultCount = cfunc(this);
         CheckArgOrResultCount(realResultCount);
         _PosCall(ci, _top - realResultCount, realResultCount);
@@ -307,6 +311,8 @@ public partial class LuaState
         ci.Reset(resultCount, func, _top);
         ci.ResetLuaInfo(firstArg, func, 0);
         ci.SetCallStatusFlag(CallStatus.LUA, true);
+        if ((_hookMask & HookMask.CALL) != 0)
+            _CallHook(ci);
     }
     private RawIdx _AdjustVarargs(LuaProto proto, int actualArgCount) {
         /* 将参数复制到正确位置，具体来说就是把固定参数复制到 vararg 后面，然后以第一个固定参数为 frameBase */
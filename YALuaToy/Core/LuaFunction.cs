@@ -20,10 +20,11 @@ internal struct UpvalueDesc
                                           但是！就算 instack == false，也不意味着从上值列表取出的 Upvalue 就不在栈上了。
                                           Upvalue 一开始永远在栈上，在运行时关闭，这是编译期不可知的。要把这两个概念区分开来 */
     public int    Ldx     => _ldx;
+    internal LuaString _NameObject => _name;
 
     /* 构造时注意一下，CLua 中 _ldx 对应的字段是 idx，它在 instack==false 时是从 0 开始的；
        重点关注一下 `uv[i].idx` 这种，或者直接搜 Upvaldesc，看 CLua 全部使用案例 */
-    public UpvalueDesc(string name, bool instack, int ldx): this(new LuaString(name), instack, ldx) { }
+    public UpvalueDesc(string name, bool instack, int ldx): this(LuaString.New(name), instack, ldx) { }
     public UpvalueDesc(LuaString name, bool instack, int ldx) {
         _name    = name;
         _instack = instack;
@@ -66,7 +67,8 @@ internal class LuaProto : LuaObject
     private List<LuaProto>     _subProtos;       /* 子原型列表，先初始化为 null，如果发现真的有子函数再创建 */
     private List<LocalVar>     _localVars;       /* 局部变量表，注意可能有无效变量在里面；这里 CLua 初始化为 null，但我还是初始化了 */
     private List<UpvalueDesc>  _upvalueDescList; /* 上值列表，先初始化为 null，如果发现真的有上值再创建 */
-    private LClosure           _lclosureCache;   /* 闭包缓存 */
+    private readonly WeakReference<LClosure> _lclosureCache; /* 闭包缓存，和 CLua 一样是弱引用，不能让缓存的闭包（及其线程）一直存活 */
+    private LuaTable.FieldCache[]            _fieldCaches;   /* 每条指令的内联缓存，第一次执行时才分配，见 LuaInlineCache.cs */
     /* debug */
     internal int                _firstLine; /* 原型代码定义所在行 */
     internal int                _lastLine;  /* 原型代码最后一行 */
@@ -83,8 +85,15 @@ internal class LuaProto : LuaObject
     public List<UpvalueDesc> UpvalueDescList => _upvalueDescList;
     public List<int>         Lines           => _lines;
     internal LClosure        LClosureCache {
-        get => _lclosureCache;
-        set => _lclosureCache = value;
+        get => _lclosureCache.TryGetTarget(out LClosure lclosure) ? lclosure : null;
+        set => _lclosureCache.SetTarget(value);
+    }
+    internal LuaTable.FieldCache[] FieldCaches {
+        get {
+            if (_fieldCaches == null) /* 多个线程同时分配也没关系，只是丢掉一些缓存 */
+                _fieldCaches = new LuaTable.FieldCache[_instructions.Count];
+            return _fieldCaches;
+        }
     }
 
     public LuaProto(LuaString source) {
@@ -92,7 +101,7 @@ internal class LuaProto : LuaObject
         _constants       = null;
         _subProtos       = null;
         _instructions    = new List<Instruction>();
-        _lclosureCache   = null;
+        _lclosureCache   = new WeakReference<LClosure>(null);
         _lines           = new List<int>();
         _upvalueDescList = null;
         _paramCount      = 0;
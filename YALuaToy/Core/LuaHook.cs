@@ -0,0 +1,146 @@
+/* 即，CLua 里 ldebug.c 和 ldo.c 的钩子部分 */
+namespace YALuaToy.Core {
+
+using System;
+using System.Collections.Generic;
+using YALuaToy.Const;
+
+/* 钩子函数，对应 lua_Hook。钩子执行期间不会再触发钩子，也不能 yield */
+public delegate void LuaHook(LuaState state, LuaDebugInfo info);
+
+/* 对应 lua_Debug，只有钩子用得到的那部分信息 */
+public readonly struct LuaDebugInfo
+{
+    public readonly HookEvent Event;
+    public readonly int       CurrentLine; /* 只有 LINE 事件有行号，其他事件为 -1 */
+    internal readonly LuaProto proto;      /* 宿主函数为 null */
+
+    internal LuaDebugInfo(HookEvent event_, int currentLine, LuaProto proto) {
+        Event       = event_;
+        CurrentLine = currentLine;
+        this.proto  = proto;
+    }
+
+    public bool   IsLua           => proto != null;
+    public string Source          => proto == null ? "=[C]" : proto.source.Str;
+    public int    LineDefined     => proto == null ? -1 : proto._firstLine;
+    public int    LastLineDefined => proto == null ? -1 : proto._lastLine;
+    public string What            => proto == null ? "C" : proto._firstLine == 0 ? "main" : "Lua";
+
+    public override string ToString() {
+        return $"<debuginfo event: {Event}, currentline: {CurrentLine}, source: {Source}, linedefined: {LineDefined}>";
+    }
+}
+
+public partial class LuaState
+{
+    private LuaHook  _hook;
+    private HookMask _hookMask; /* 为 0 时没有任何钩子，VM 和调用流程里只检查这一个字段，没开钩子时几乎没有开销 */
+    private int      _baseHookCount;
+    private int      _hookCount; /* 距离下次 COUNT 事件还剩几条指令 */
+    private bool     _allowHook; /* 钩子执行期间为 false，防止钩子里再触发钩子 */
+    private int      _oldPC;     /* 上次 traceexec 时的 pc，用来判断是否进入了新行或者跳回去了 */
+
+    /* ---------------- Hook API ---------------- */
+
+    /* lua_sethook：func 为 null 或 mask 为 0 时关闭钩子；count <= 0 时不会有 COUNT 事件 */
+    public void SetHook(LuaHook func, HookMask mask, int count = 0) {
+        if (count <= 0)
+            mask &= ~HookMask.COUNT;
+        if (func == null || mask == 0) {
+            mask = 0;
+            func = null;
+        }
+        if (_currCI != null && _currCI.IsLua)
+            _oldPC = _currCI.PC;
+        _hook          = func;
+        _baseHookCount = count;
+        _hookCount     = count;
+        _hookMask      = mask;
+    }
+    public LuaHook GetHook() {
+        return _hook;
+    }
+    public HookMask GetHookMask() {
+        return _hookMask;
+    }
+    public int GetHookCount() {
+        return _baseHookCount;
+    }
+
+    /* ---------------- Internal ---------------- */
+
+    private void _InheritHook(LuaState from) { /* 新线程继承创建者的钩子，和 lua_newthread 一样 */
+        _hook          = from._hook;
+        _hookMask      = from._hookMask;
+        _baseHookCount = from._baseHookCount;
+        _hookCount     = _baseHookCount;
+    }
+
+    /* luaD_hook：在当前调用上执行钩子，钩子用到的栈空间不能覆盖当前 Lua 函数的寄存器 */
+    internal void _Hook(HookEvent event_, int line) {
+        LuaHook hook = _hook;
+        if (hook == null || !_allowHook)
+            return;
+        CallInfo ci     = _currCI;
+        RawIdx   oldTop = _top;
+        RawIdx   ciTop  = ci.Top;
+        if (ci.IsLua && _top < ci.Top)
+            _top = ci.Top; /* protect entire activation register */
+        _CheckStack(LuaConst.MINSTACK);
+        if (ci.Top < _top + LuaConst.MINSTACK)
+            ci.Top = _top + LuaConst.MINSTACK;
+        _allowHook = false;
+        _nny++;
+        ci.SetCallStatusFlag(CallStatus.HOOKED, true);
+        try {
+            hook(this, new LuaDebugInfo(event_, line, ci.IsLua ? ci.LClosure.proto : null));
+        } finally {
+            ci.SetCallStatusFlag(CallStatus.HOOKED, false);
+            _nny--;
+            _allowHook = true;
+            ci.Top     = ciTop;
+            _top       = oldTop;
+        }
+    }
+    /* callhook：新的 Lua 调用，如果调用者正在执行 TAILCALL，事件就是尾调用 */
+    private void _CallHook(CallInfo ci) {
+        HookEvent event_ = HookEvent.CALL;
+        CallInfo  prev   = ci.prev;
+        if (prev.IsLua && prev.PC > 0 && prev.GetInstruction(prev.PC - 1).OpCode == OpCode.TAILCALL)
+            event_ = HookEvent.TAILCALL;
+        _Hook(event_, -1);
+    }
+    /* rethook：在 PosCall 移动返回值之前调用，之后 oldpc 要切回调用者的 pc */
+    private void _RetHook(CallInfo ci) {
+        if ((_hookMask & HookMask.RET) != 0)
+            _Hook(HookEvent.RET, -1);
+        CallInfo prev = ci.prev;
+        if (prev != null && prev.IsLua)
+            _oldPC = prev.PC;
+    }
+    /* luaG_traceexec：VM 取完指令（pc 已自增）后调用，只有开启了 LINE 或 COUNT 钩子时才会进来 */
+    internal void _TraceExec(CallInfo ci) {
+        bool countHook = (_hookMask & HookMask.COUNT) != 0 && --_hookCount == 0;
+        if (countHook)
+            _hookCount = _baseHookCount; /* reset count */
+        else if ((_hookMask & HookMask.LINE) == 0)
+            return; /* no line hook and count != 0; nothing to be done */
+        if (countHook)
+            _Hook(HookEvent.COUNT, -1);
+        if ((_hookMask & HookMask.LINE) != 0) {
+            List<int> lines   = ci.LClosure.proto.Lines;
+            int       npc     = ci.PC - 1;
+            int       newLine = _GetLine(lines, npc);
+            /* 进入新函数、跳回去（循环）、或者进入新的一行时触发 */
+            if (npc == 0 || ci.PC <= _oldPC || newLine != _GetLine(lines, _oldPC - 1))
+                _Hook(HookEvent.LINE, newLine);
+        }
+        _oldPC = ci.PC;
+    }
+    private static int _GetLine(List<int> lines, int pc) {
+        return pc >= 0 && pc < lines.Count ? lines[pc] : -1;
+    }
+}
+
+}
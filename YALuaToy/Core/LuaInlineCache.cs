@@ -0,0 +1,191 @@
+/* 常量字符串键的内联缓存，给 GETTABUP / SETTABUP / GETTABLE / SELF 用，每条指令一个，挂在 LuaProto 上 */
+namespace YALuaToy.Core {
+
+using System;
+using System.Threading;
+using System.Collections.Generic;
+using YALuaToy.Const;
+
+/* - 哈希部分每次重新分配 _nodes 时都会换一个全局唯一的布局编号 _layout，同一个布局下节点的位置不会变，
+     所以只要布局编号没变，“键在第几个节点上”就一直有效，命中时直接读这个节点，不需要算哈希；
+     “键不存在”还要求没有插入过新节点，也就是 _nodeCount 没变。没有哈希部分的表布局编号都是 0，这时键一定不存在，不区分是哪张表也没关系
+   - 缓存里只有编号和下标，不引用任何表，所以不会让表（以及弱表里的东西）一直存活
+   - LuaProto 可能被多个 LuaState 共享（见 LuaChunkCache），甚至在不同的 OS 线程上执行，所以缓存对象是不可变的，更新时整个替换
+   - 接收者里没有这个键时，沿元表的 __index 往下找（类原型的常见写法：Class.__index = Class），每一跳都记下元表里 __index 的位置，
+     以及它指向的表里这个键的位置，找到和找不到的结果都会缓存；__index 是函数时没法缓存，这条指令以后就不再尝试
+   - 同一条指令的缓存更新太多次（比如每次都是不同的表），同样不再尝试 */
+internal partial class LuaTable
+{
+    private const int MAX_CACHE_UPDATES = 16;
+
+    private static readonly LuaValue indexKey = new LuaValue("__index");
+    private static readonly Probe    noProbe  = new Probe(0, -1, -1); /* 不匹配任何表 */
+    private static long              nextLayout;
+
+    /* 某张表上某个键的位置：布局编号相同时，index >= 0 说明键在这个节点上（值可能已经被删成了 nil）；
+       index < 0 说明键不存在，且 count 要和 _nodeCount 相同 */
+    internal readonly struct Probe
+    {
+        public readonly long layout;
+        public readonly int  count;
+        public readonly int  index;
+
+        public Probe(long layout, int count, int index) {
+            this.layout = layout;
+            this.count  = count;
+            this.index  = index;
+        }
+    }
+
+    internal sealed class FieldCache
+    {
+        internal static readonly FieldCache empty    = new FieldCache(noProbe, null, 0);
+        internal static readonly FieldCache disabled = new FieldCache(noProbe, null, MAX_CACHE_UPDATES);
+
+        internal readonly Probe   receiver; /* 被索引的表本身 */
+        internal readonly Probe[] chain;    /* __index 链：偶数位是元表里的 __index，奇数位是 __index 指向的表里的键；null 表示还没有缓存 */
+        internal readonly int     updates;
+
+        private FieldCache(in Probe receiver, Probe[] chain, int updates) {
+            this.receiver = receiver;
+            this.chain    = chain;
+            this.updates  = updates;
+        }
+
+        internal FieldCache Update(in Probe receiver, Probe[] chain) {
+            return updates >= MAX_CACHE_UPDATES ? disabled : new FieldCache(receiver, chain, updates + 1);
+        }
+    }
+
+    private static long _NewLayout() {
+        return Interlocked.Increment(ref nextLayout);
+    }
+
+    /* ---------------- Cached Access ---------------- */
+
+    /* 返回 true 时 value 就是 this[key] 的结果（已经走完 __index 链，可能是 nil）；返回 false 时调用者要走完整的 Index */
+    internal bool CachedGet(ref FieldCache slot, in LuaValue key, out LuaValue value) {
+        FieldCache cache = slot ?? FieldCache.empty;
+        if (cache == FieldCache.disabled) {
+            value = LuaValue.NIL;
+            return false;
+        }
+        Probe receiver = cache.receiver;
+        bool  hit      = _Read(receiver, out value);
+        if (!hit) { /* 接收者没命中，正常查找一次 */
+            _AddSweepCount(1);
+            if (!_MakeProbe(key, out receiver, out value))
+                return !value.IsNil;
+        }
+        if (!value.IsNil || _metatable == null) {
+            if (!hit)
+                slot = cache.Update(receiver, cache.chain);
+            return true;
+        }
+
+        /* 接收者里没有，沿 __index 链找。链命中时只在第一次记录接收者，免得每个实例都换一次缓存 */
+        if (cache.chain != null && _WalkChain(cache.chain, out value)) {
+            if (!hit && cache.receiver.count < 0)
+                slot = cache.Update(receiver, cache.chain);
+            return true;
+        }
+        List<Probe> chain = new List<Probe>();
+        if (!_BuildChain(key, chain, out value)) {
+            slot = FieldCache.disabled;
+            return false;
+        }
+        slot = cache.Update(receiver, chain.ToArray());
+        return true;
+    }
+    /* 键已经存在（值不为 nil）时赋值不会触发 __newindex，命中时直接原地写入 */
+    internal bool CachedSet(FieldCache cache, in LuaValue value) {
+        if (cache == null || cache.receiver.index < 0 || cache.receiver.layout != _layout)
+            return false;
+        ref Node node = ref _nodes[cache.receiver.index];
+        if (_ReadValue(node.value).IsNil)
+            return false;
+        node.value = value.IsNil ? LuaValue.NIL : _WrapValue(value);
+        _OnSet();
+        return true;
+    }
+    /* CachedSet 没命中，调用者走完 NewIndex 后再记下键的位置 */
+    internal void UpdateSetCache(ref FieldCache slot, in LuaValue key) {
+        FieldCache cache = slot ?? FieldCache.empty;
+        if (cache != FieldCache.disabled && _MakeProbe(key, out Probe receiver, out LuaValue value) && !value.IsNil)
+            slot = cache.Update(receiver, null);
+    }
+
+    /* ---------------- Probe ---------------- */
+
+    private bool _Read(in Probe probe, out LuaValue value) {
+        value = LuaValue.NIL;
+        if (_layout != probe.layout)
+            return false;
+        if (probe.index < 0)
+            return _nodeCount == probe.count;
+        value = _ReadValue(_nodes[probe.index].value);
+        return true;
+    }
+    /* 弱键的节点不能缓存：键失效后查找就找不到它了，但节点上的值还在 */
+    private bool _MakeProbe(in LuaValue key, out Probe probe, out LuaValue value) {
+        int index = _FindNode(key, key.GetHashCode());
+        probe     = new Probe(_layout, _nodeCount, index);
+        value     = index < 0 ? LuaValue.NIL : _ReadValue(_nodes[index].value);
+        return index < 0 || !_nodes[index].key.weak;
+    }
+
+    /* 和 LuaState.Index（luaV_finishget）的查找过程一致，只是 __index 只能是表 */
+    private bool _WalkChain(Probe[] chain, out LuaValue value) {
+        LuaTable metatable = _metatable;
+        value              = LuaValue.NIL;
+        for (int i = 0; i + 1 < chain.Length; i += 2) {
+            if (!metatable._Read(chain[i], out LuaValue tagMethod))
+                return false;
+            if (metatable.GetFlags(TagMethod.INDEX) || tagMethod.IsNil) /* 没有 __index */
+                return true;
+            if (!tagMethod.IsTable)
+                return false;
+            LuaTable holder = tagMethod.LObject<LuaTable>();
+            if (!holder._Read(chain[i + 1], out value))
+                return false;
+            if (!value.IsNil)
+                return true;
+            metatable = holder._metatable;
+            if (metatable == null)
+                return true;
+        }
+        return _ReadNoIndex(metatable, chain, out value);
+    }
+    private bool _BuildChain(in LuaValue key, List<Probe> chain, out LuaValue value) {
+        LuaTable metatable = _metatable;
+        value              = LuaValue.NIL;
+        for (int loop = 0; loop < LuaConfig.MAX_TAG_LOOP; loop++) {
+            if (!metatable._MakeProbe(indexKey, out Probe metaProbe, out LuaValue tagMethod))
+                return false;
+            chain.Add(metaProbe);
+            if (metatable.GetFlags(TagMethod.INDEX) || tagMethod.IsNil)
+                return true;
+            if (!tagMethod.IsTable) /* __index 是函数或者其他值，交给 Index 处理 */
+                return false;
+            LuaTable holder = tagMethod.LObject<LuaTable>();
+            if (!holder._MakeProbe(key, out Probe holderProbe, out value))
+                return false;
+            chain.Add(holderProbe);
+            if (!value.IsNil)
+                return true;
+            metatable = holder._metatable;
+            if (metatable == null)
+                return true;
+        }
+        return false; /* 链太长，让 Index 报错 */
+    }
+    /* 链的最后一跳是“元表里没有 __index” */
+    private static bool _ReadNoIndex(LuaTable metatable, Probe[] chain, out LuaValue value) {
+        value = LuaValue.NIL;
+        if (chain.Length % 2 == 0 || !metatable._Read(chain[chain.Length - 1], out LuaValue tagMethod))
+            return false;
+        return metatable.GetFlags(TagMethod.INDEX) || tagMethod.IsNil;
+    }
+}
+
+}
@@ -54,13 +54,12 @@ public abstract class LuaObject : IEquatable<LuaObject>
 /* LuaValue 有三种空状态：nil, none, invalid weak。对用户来说，只有 nil；对 Core 来说 none 表示没有值；invalid weak 是弱表需要考虑的情况，其他地方无感 */
 internal struct LuaValue : IEquatable<LuaValue>
 {
-    public static readonly LuaValue      NIL               = new LuaValue((LuaType)LuaConst.TNIL);
-    public static readonly LuaValue      NONE              = new LuaValue((LuaType)LuaConst.TNONE);
-    public static readonly LuaValue      TRUE              = new LuaValue(true);
-    public static readonly LuaValue      FALSE             = new LuaValue(false);
-    public static readonly LuaValue      ZERO              = new LuaValue(0);
-    public static readonly LuaValue      ONE               = new LuaValue(1);
-    private static readonly LuaCFunction compareByHashMark = (s) => { return 0; }; /* 仅供弱表中使用，一个标记 */
+    public static readonly LuaValue NIL   = new LuaValue((LuaType)LuaConst.TNIL);
+    public static readonly LuaValue NONE  = new LuaValue((LuaType)LuaConst.TNONE);
+    public static readonly LuaValue TRUE  = new LuaValue(true);
+    public static readonly LuaValue FALSE = new LuaValue(false);
+    public static readonly LuaValue ZERO  = new LuaValue(0);
+    public static readonly LuaValue ONE   = new LuaValue(1);
 
     [StructLayout(LayoutKind.Explicit)]
     private struct Primitive
@@ -80,21 +79,20 @@ internal struct LuaValue : IEquatable<LuaValue>
 
     /* ---------------- Members ---------------- */
 
-    private Primitive                _primitive;
-    private LuaObject                _obj;
-    private WeakReference<LuaObject> _weakObj;
-    private LuaCFunction             _func; /* light C# function */
-    private LuaType                  _type;
-    internal readonly bool           weak; /* 仅限于 LuaTable 使用，LuaValue 内大部份接口都无时该字段，由 LuaTable 保证不泄漏弱值 */
+    /* 栈和表里的每个槽位都是一个 LuaValue，所以要尽量紧凑：64 位下是 8 字节 _primitive + 8 字节 _ref + 2 字节 _bits，对齐后 24 字节
+      （原来 LuaObject、WeakReference、LuaCFunction 各占一个引用字段，类型和 weak 各占一个字段，对齐后 48 字节）
+       _ref 里放的是什么由类型和 weak 决定：LuaObject（weak 时是 WeakReference<LuaObject>）、LuaCFunction，其他类型为 null */
+    private const short WEAK_BIT = 0x100;
+
+    private Primitive _primitive;
+    private object    _ref;
+    private short     _bits; /* 低 8 位是 LuaType，WEAK_BIT 是 weak，构造之后 weak 不会再变 */
 
     /* 不需要构造 None、nil、bool 的情况，直接以静态常量提供 */
     private LuaValue(LuaType type, bool weak = false) {
         _primitive = new Primitive();
-        _obj       = null;
-        _weakObj   = null;
-        _func      = null;
-        _type      = type;
-        this.weak  = weak;
+        _ref       = null;
+        _bits      = (short)((byte)type.Raw | (weak ? WEAK_BIT : 0));
     }
     public LuaValue(IntPtr l, bool weak = false): this(new LuaType(LuaConst.TLIGHTUSERDATA), weak) {
         _primitive.l = l;
@@ -111,13 +109,13 @@ internal struct LuaValue : IEquatable<LuaValue>
     }
     public LuaValue(LuaCFunction func, bool weak = false): this(new LuaType(LuaConst.TLCF), weak) {
         LuaDebug.AssertNotNull(func);
-        _func = func;
+        _ref = func;
     }
     public LuaValue(LuaObject obj, bool weak = false): this(obj.Type, weak) {
         LuaDebug.AssertNotNull(obj);
         _SetLuaObject(obj);
     }
-    public LuaValue(string s, bool weak = false): this(new LuaString(s), weak) { }
+    public LuaValue(string s, bool weak = false): this(LuaString.New(s), weak) { }
 
     internal LuaValue _Clone(bool wantWeak = false) {
         LuaValue  clone = new LuaValue((LuaType)LuaConst.TNIL, wantWeak);
@@ -127,13 +125,14 @@ internal struct LuaValue : IEquatable<LuaValue>
                 if (!_TryGetLuaObject(out obj)) /* 若弱值已失效，会返回 Nil */
                     return clone;
             } else
-                obj = _obj;
+                obj = _Obj;
         }
         clone._primitive = _primitive;
-        clone._func      = _func;
         clone._type      = _type;
         if (obj != null)
             clone._SetLuaObject(obj); /* 设置弱值、类型、哈希值 */
+        else
+            clone._ref = _ref; /* LuaCFunction 不区分强弱 */
         return clone;
     }
 
@@ -141,24 +140,28 @@ internal struct LuaValue : IEquatable<LuaValue>
     /* 以下函数只能用于构造新对象（如：构造器或 Clone），其他地方不能用！（因为无法保证调用者是引用而不是拷贝） */
 
     private void _SetLuaObject(LuaObject obj) {
-        _ClearValue();
         if (weak) {
-            if (_weakObj == null)
-                _weakObj = new WeakReference<LuaObject>(obj);
-            else
-                _weakObj.SetTarget(obj);
+            _ref         = new WeakReference<LuaObject>(obj);
             _primitive.i = obj.GetHashCode(); /* weakObj 每次都直接算哈希值 */
         } else {
-            _obj = obj;
+            _ref = obj;
         }
         _type = obj.Type;
     }
-    private void _ClearValue() {
-        _obj     = null;
-        _weakObj = null;
-        _func    = null;
-        _type    = LuaConst.TNONE;
+
+    /* [ Packed Fields ] */
+
+    private LuaType _type {
+        get => (sbyte)_bits; /* 截掉高位的 WEAK_BIT，TNONE 的 0xFF 也能还原成 -1 */
+        set => _bits = (short)((_bits & WEAK_BIT) | (byte)value.Raw);
     }
+    /* 仅限于 LuaTable 使用，LuaValue 内大部份接口都无视该标记，由 LuaTable 保证不泄漏弱值 */
+    internal bool weak => (_bits & WEAK_BIT) != 0;
+
+    /* 以下按类型解释 _ref，调用前必须先判断好类型（和 weak），这里不再做类型检查 */
+    private LuaObject                _Obj     => Unsafe.As<LuaObject>(_ref);
+    private WeakReference<LuaObject> _WeakObj => Unsafe.As<WeakReference<LuaObject>>(_ref);
+    private LuaCFunction             _Func    => Unsafe.As<LuaCFunction>(_ref);
 
     /* ---------------- Properties ---------------- */
 
@@ -271,7 +274,7 @@ internal struct LuaValue : IEquatable<LuaValue>
         case LuaConst.TNUMFLT:
             return _primitive.n.ToString();
         case LuaConst.TLCF:
-            return $"<lcf {CommonUtils.ToHexStrintg(RuntimeHelpers.GetHashCode(_func))}>";
+            return $"<lcf {CommonUtils.ToHexStrintg(RuntimeHelpers.GetHashCode(_Func))}>";
         }
         LuaDebug.Check(false, $"Unknown type: {_type}.");
         return "<unknown>";
@@ -318,25 +321,25 @@ internal struct LuaValue : IEquatable<LuaValue>
     public LuaCFunction LightFunc {
         get {
             LuaDebug.AssertVariant(_type, LuaConst.TLCF);
-            return _func;
+            return _Func;
         }
     }
     public LuaObject Object {
         get {
             LuaDebug.AssertLuaObject(_type);
             AssertNotWeak("get object");
-            return _obj;
+            return _Obj;
         }
     }
     public T  LObject<T>()
         where T : LuaObject {
-        LuaDebug.AssertNotNull(_obj);
+        LuaDebug.AssertNotNull(_ref);
         AssertNotWeak("get object, use _TryGetLuaObject instead.");
-        return (T)_obj;
+        return (T)_Obj;
     }
     public void LObject<T>(out T result)
         where   T : LuaObject {
-        LuaDebug.AssertNotNull(_obj);
+        LuaDebug.AssertNotNull(_ref);
         AssertNotWeak("get object, use _TryGetLuaObject instead.");
         result = LObject<T>();
     }
@@ -354,7 +357,7 @@ internal struct LuaValue : IEquatable<LuaValue>
             if (weak) {
                 return _TryGetLuaObject(out obj);
             } else {
-                obj = _obj;
+                obj = _Obj;
                 return true;
             }
         }
@@ -365,19 +368,12 @@ internal struct LuaValue : IEquatable<LuaValue>
         if (!_type.IsLuaObject)
             return false;
         if (!weak) {
-            obj = _obj;
+            obj = _Obj;
             return true;
-        } else if (_weakObj == null) {
+        } else if (_ref == null) {
             return false;
         }
-        return _weakObj.TryGetTarget(out obj);
-    }
-
-    internal bool _IsCompareByHash() {
-        return _func == compareByHashMark;
-    }
-    internal void MarkCompareByHash() {
-        _func = compareByHashMark;
+        return _WeakObj.TryGetTarget(out obj);
     }
 
     /* ---------------- Value Convert ---------------- */
@@ -420,16 +416,17 @@ internal struct LuaValue : IEquatable<LuaValue>
     internal void _RefChangeValue(LuaCFunction func) {
         LuaDebug.AssertVariant(_type, LuaConst.TLCF);
         LuaDebug.AssertNotNull(func);
-        _func = func;
+        _ref = func;
     }
     internal void _RefChangeValue(LuaObject obj) {
         LuaDebug.AssertNotNull(obj);
         _SetLuaObject(obj);
     }
     internal void _RefChangeValue(string s) {
-        _RefChangeValue(new LuaString(s));
+        _RefChangeValue(LuaString.New(s));
     }
     internal void _RefChangeNil() {
+        _ref  = null; /* 不再拉着原来的对象 */
         _type = LuaConst.TNIL;
     }
 
@@ -442,7 +439,7 @@ internal struct LuaValue : IEquatable<LuaValue>
        如果需要 Lua 值的逻辑等价判断，使用 LuaState.Equal，该函数会在必要时读取元表 */
     public override int GetHashCode() {
         if (_type.IsLuaObject)
-            return weak ? (int)_primitive.i : _obj.GetHashCode(); /* weakObj 的哈希值直接存在 _primitive 里 */
+            return weak ? (int)_primitive.i : _Obj.GetHashCode(); /* weakObj 的哈希值直接存在 _primitive 里 */
         switch (_type.Tag) {
         case LuaConst.TNONE:
         case LuaConst.TNIL:
@@ -462,7 +459,7 @@ internal struct LuaValue : IEquatable<LuaValue>
                 throw new LuaRuntimeError("Can't hash NaN.");
             return _primitive.n.GetHashCode();
         case LuaConst.TLCF:
-            return _func.GetHashCode();
+            return _Func.GetHashCode();
         }
         throw new LuaCoreError("Unknown type.");
     }
@@ -480,8 +477,8 @@ internal struct LuaValue : IEquatable<LuaValue>
             return false;
         }
 
-        if (_type.IsLuaObject) /* LuaObject 派生类可自定义实现，默认就是比较地址，字符串则是比较字符串 */
-            return _obj.Equals(other._obj);
+        if (_type.IsLuaObject) /* LuaObject 派生类可自定义实现，默认就是比较地址；短字符串已内部化，同样只需比较地址 */
+            return ReferenceEquals(_ref, other._ref) || _Obj.Equals(other._Obj);
 
         switch (_type.Tag) {
         case LuaConst.TNONE:
@@ -500,7 +497,7 @@ internal struct LuaValue : IEquatable<LuaValue>
         case LuaConst.TNUMINT:
             return _primitive.i == other._primitive.i;
         case LuaConst.TLCF:
-            return _func.Equals(other._func);
+            return _Func.Equals(other._Func);
         }
         LuaDebug.Check(false, $"Unknown type in rawequal, lhs: {_type}, rhs: {other._type}");
         return false;
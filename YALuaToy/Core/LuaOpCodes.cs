@@ -89,6 +89,14 @@ internal enum OpCode {
     CLOSURE,   // A Bx    R(A) := closure(KPROTO[Bx])
     VARARG,    // A B     R(A), R(A+1), ..., R(A+B-2) = vararg
     EXTRAARG,  // Ax      extra (larger) argument for previous opcode
+
+    /* 下面是 LuaCodeOptimizer 生成的融合指令，luac 不会生成，只在开启优化（LuaState.OptimizeCode）时出现。
+       参数布局和被替换的指令一样，所以 RK、FinishOp 之类的逻辑可以直接共用 */
+    EQK,          // A B C   if ((R(B) == Kst(C)) ~= A) then pc++，Kst(C) 是数字
+    LTK,          // A B C   if ((R(B) <  Kst(C)) ~= A) then pc++，Kst(C) 是数字
+    LEK,          // A B C   if ((R(B) <= Kst(C)) ~= A) then pc++，Kst(C) 是数字
+    INCR,         // A B C   R(A) := R(A) + Kst(C)，B == A，Kst(C) 是数字
+    GETTABUPCALL, // A B C   R(A) := Upvalue[B][RK(C)]，下一条指令一定是 CALL A，没有行/计数钩子时直接接着执行
     N,         // COUNT
 }
 
@@ -197,6 +205,9 @@ internal readonly struct Instruction
     public Instruction(OpCode op, uint ax) { /* 创建 Ax 模式的指令 */
         _inst = ((uint)op << LuaOpCodes.POS_OP) | (ax << LuaOpCodes.POS_Ax);
     }
+    internal static Instruction _FromRaw(RawInst inst) { /* undump 用 */
+        return new Instruction(inst);
+    }
 
     public OpCode    OpCode   => (OpCode)(_inst >> LuaOpCodes.POS_OP & LuaUtils.Mask1(LuaOpCodes.SIZE_OP, 0));
     public ArgValue  A        => new ArgValue(GetRawArg(_inst, LuaOpCodes.POS_A, LuaOpCodes.SIZE_A));
@@ -313,7 +324,8 @@ internal static class LuaOpCodes
         "SETTABLE", "NEWTABLE", "SELF",     "ADD",      "SUB",     "MUL",      "MOD",      "POW",      "DIV",      "IDIV",
         "BAND",     "BOR",      "BXOR",     "SHL",      "SHR",     "UNM",      "BNOT",     "NOT",      "LEN",      "CONCAT",
         "JMP",      "EQ",       "LT",       "LE",       "TEST",    "TESTSET",  "CALL",     "TAILCALL", "RETURN",   "FORLOOP",
-        "FORPREP",  "TFORCALL", "TFORLOOP", "SETLIST",  "CLOSURE", "VARARG",   "EXTRAARG", null
+        "FORPREP",  "TFORCALL", "TFORLOOP", "SETLIST",  "CLOSURE", "VARARG",   "EXTRAARG", "EQK",      "LTK",      "LEK",
+        "INCR",     "GETTABUPCALL", null
     };
 
     public static readonly OpModes[] OP_CODE_MODES = new OpModes[] {
@@ -364,7 +376,12 @@ internal static class LuaOpCodes
         new OpModes(false, false, OpArgMask.ArgU, OpArgMask.ArgU, OpType.ABC),  /* OP_SETLIST */
         new OpModes(false, true, OpArgMask.ArgU, OpArgMask.ArgN, OpType.ABx),   /* OP_CLOSURE */
         new OpModes(false, true, OpArgMask.ArgU, OpArgMask.ArgN, OpType.ABC),   /* OP_VARARG */
-        new OpModes(false, false, OpArgMask.ArgU, OpArgMask.ArgU, OpType.Ax)    /* OP_EXTRAARG */
+        new OpModes(false, false, OpArgMask.ArgU, OpArgMask.ArgU, OpType.Ax),   /* OP_EXTRAARG */
+        new OpModes(true, false, OpArgMask.ArgK, OpArgMask.ArgK, OpType.ABC),   /* OP_EQK */
+        new OpModes(true, false, OpArgMask.ArgK, OpArgMask.ArgK, OpType.ABC),   /* OP_LTK */
+        new OpModes(true, false, OpArgMask.ArgK, OpArgMask.ArgK, OpType.ABC),   /* OP_LEK */
+        new OpModes(false, true, OpArgMask.ArgK, OpArgMask.ArgK, OpType.ABC),   /* OP_INCR */
+        new OpModes(false, true, OpArgMask.ArgU, OpArgMask.ArgK, OpType.ABC)    /* OP_GETTABUPCALL */
     };
 }
 
@@ -1,7 +1,6 @@
 namespace YALuaToy.Core {
 
 using System;
-using System.Linq;
 using System.Diagnostics;
 using System.Collections.Generic;
 using System.Reflection.Metadata;
@@ -76,10 +75,9 @@ internal struct RawIdx
 
 internal partial class LuaGlobalState
 {
-    public static readonly LuaString tmName    = new LuaString("__name");
-    public static readonly LuaString env       = new LuaString(LuaConst.ENV);
-    public static readonly LuaString emptyName = new LuaString("");
-    private static LuaString[] reservedWords;
+    public static readonly LuaString tmName    = LuaString.New("__name");
+    public static readonly LuaString env       = LuaString.New(LuaConst.ENV);
+    public static readonly LuaString emptyName = LuaString.New("");
     private const int reservedWordCount = LuaLexer.reservedWordCount;
 
     private LuaTable         _registry;
@@ -89,6 +87,7 @@ internal partial class LuaGlobalState
     private LuaTable[] _metaTables; /* 基元类型的元表 */
     private LuaString _memerrMsg;   /* 内存分配错误时的错误对象，因为内存错误后无法再分配，所以提前分配好 */
     internal LuaState _twups;       /* twups 链表的头节点 */
+    internal bool optimizeCode;     /* 编译时是否经过 LuaCodeOptimizer，见 LuaState.OptimizeCode */
 
     public LuaCFunction PanicFunc         => _panicFunc;
     public LuaString[] TagMethodNames     => _tagMethodNames;
@@ -106,6 +105,7 @@ internal partial class LuaGlobalState
         _tagMethodNames = null;
         _metaTables     = new LuaTable[LuaConst.TOTALTAGS];
         _memerrMsg      = null;
+        optimizeCode    = false;
     }
     internal void _Init() {
         /* init_registry */
@@ -116,22 +116,15 @@ internal partial class LuaGlobalState
         /* luaT_init */
         _tagMethodNames = new LuaString[LuaConst.TAG_METHOD_NAMES.Length];
         for (int i = 0; i < LuaConst.TAG_METHOD_NAMES.Length; i++)
-            _tagMethodNames[i] = new LuaString(LuaConst.TAG_METHOD_NAMES[i]);
+            _tagMethodNames[i] = LuaString.New(LuaConst.TAG_METHOD_NAMES[i]);
     }
     internal static LuaString GetReservedWord(int type) {
         if (type < 1 || type > reservedWordCount)
             throw new LuaErrorError($"Reserved word type out of range: {type}");
-        return ReservedWords()[type - 1];
-    }
-    internal static LuaString[] ReservedWords() {
-        if (reservedWords != null)
-            return reservedWords;
-        reservedWords = new LuaString[reservedWordCount];
-        for (int type = 1; type <= reservedWordCount; type++) {
-            string word             = LuaLexerUtils.GetTypeName(type);
-            reservedWords[type - 1] = new LuaString(word, reserved: true);
-        }
-        return reservedWords;
+        return LuaString.ReservedWords[type - 1];
+    }
+    internal static LuaString[] ReservedWords() { /* 保留字在 LuaString 的字符串表里预先内部化 */
+        return LuaString.ReservedWords;
     }
 
     /* ---------------- API ---------------- */
@@ -149,7 +142,7 @@ public partial class LuaState : LuaObject
     private ThreadStatus             _threadStatus;
     internal ThreadStatus             prevThreadStatus; /* 给错误恢复函数用的，其他地方不要用，不可靠 */
     /* Stack */
-    private List<LuaValue> _stack;
+    private LuaValue[]     _stack;     /* 扩栈会换一个新数组，拿着旧数组的引用（ref、Span、还没写完的 _stack[i] = ...）会写丢，见 ResizeStack */
     private RawIdx         _top;       /* 下一个可用位置，当前使用到的最高元素的下个位置（总是满足 <= _currCI.Top） */
     private RawIdx         _last;      /* 栈最后一个空闲位置，后面还有 EXTRA_STACK 长度的备用空间 */
     private RawIdx         _errorFunc; /* 错误处理函数的 rawindex，为 -1 时表示没有错误处理函数，建议用 IsValidErrorFunc 判定是否有效 */
@@ -186,6 +179,7 @@ public partial class LuaState : LuaObject
         from.PushStack(this);
         _PreInitThread();
         _InitStack();
+        _InheritHook(from);
     }
 
     ~LuaState() {
@@ -199,7 +193,7 @@ public partial class LuaState : LuaObject
 
     /* Init helper */
     private void _InitStack() {
-        _stack  = Enumerable.Repeat(LuaValue.NIL, LuaConfig.BASIC_STACK_SIZE).ToList();
+        _stack  = new LuaValue[LuaConfig.BASIC_STACK_SIZE]; /* default(LuaValue) 就是 nil */
         _last   = new RawIdx(_StackSize - LuaConfig.EXTRA_STACK - 1);
         _currCI = _headCI = new CallInfo(this); /* 注意分配了 ci 但不增加 _ciLength，这块 ci 是初始化后给宿主侧用的 */
         _currCI.Func      = _top;
@@ -224,6 +218,13 @@ public partial class LuaState : LuaObject
         _pcallCount = 0;
         cCalls      = 0;
         _vmCI       = null;
+
+        _hook          = null;
+        _hookMask      = 0;
+        _baseHookCount = 0;
+        _hookCount     = 0;
+        _allowHook     = true;
+        _oldPC         = 0;
     }
     public void CloseState() {
         LuaState mainThread = globalState.mainThread;
@@ -266,7 +267,7 @@ public partial class LuaState : LuaObject
 
     /* ---------------- Properties ---------------- */
 
-    private int     _StackSize => _stack.Count;
+    private int     _StackSize => _stack.Length;
     internal RawIdx Top { /* 申请空间请用 IncreaseTop，会做空余空间检查 */
         get => _top;
         set {
@@ -288,6 +289,12 @@ public partial class LuaState : LuaObject
     public bool         InPCall      => _pcallCount > 0;
     public ThreadStatus ThreadStatus => _threadStatus;
     public ThreadStatus PrevThreadStatus => prevThreadStatus;
+    /* 之后在这个 LuaState（包括它的所有协程）上编译的代码是否经过 LuaCodeOptimizer，默认关闭；已经编译好的不会变。
+       打开后生成的字节码不再和 luac 一致，dump 出来的块也只能由 YALuaToy 加载 */
+    public bool OptimizeCode {
+        get => globalState.optimizeCode;
+        set => globalState.optimizeCode = value;
+    }
     public int CallLevel {
         get {
             int level = 0;
@@ -430,16 +437,18 @@ public partial class LuaState : LuaObject
     internal void _CheckStack(int needSpace) {
         _CheckStack(needSpace, () => { }, () => { });
     }
-    /* 只改变空闲空间大小，不改变空闲空间和预留空间。 */
+    /* 只改变空闲空间大小，不改变空闲空间和预留空间。
+       参考 luaD_reallocstack：分配新数组，把旧的内容拷过去，多出来的部分是 nil。CLua 之后还要用 correctstack 修正 CallInfo、上值里的指针，
+       这里 CallInfo、上值、_top 等记的都是 RawIdx 偏移，换数组后不需要修正；但调用方手里旧数组的引用会失效，
+       所以任何可能扩栈的调用（调用函数、元方法、CheckStack 等）之后都要重新从 _stack 取 */
     internal void ResizeStack(int newSize) {
         LuaDebug.Assert(newSize <= LuaConfig.LUAI_MAXSTACK || newSize == LuaConfig.ERROR_STACK_SIZE);
         LuaDebug.Assert(newSize - (int)_top - LuaConfig.EXTRA_STACK > 0, $"New size too small: {newSize}.");
-        int diff = newSize - _StackSize;
-        if (diff > 0) {
-            for (int i = 0; i < diff; i++)
-                _stack.Add(LuaValue.NIL);
-        } else if (diff < 0) {
-            _stack.RemoveRange(newSize, -diff);
+        LuaDebug.Assert(_openUpVals == null || (int)_openUpVals.RawIdx < newSize, "Open upvalue out of new stack.");
+        if (newSize != _StackSize) {
+            LuaValue[] newStack = new LuaValue[newSize]; /* default(LuaValue) 就是 nil */
+            Array.Copy(_stack, newStack, Math.Min(_StackSize, newSize));
+            _stack = newStack;
         }
         _last = (RawIdx)newSize - LuaConfig.EXTRA_STACK - 1;
         CheckCorrectLastPos();
@@ -0,0 +1,158 @@
+/* 把一个 LuaState 的全局数据（注册表、基元类型的元表）以及从它们能访问到的对象复制到另一个 LuaState，给 LuaStateSnapshot 用 */
+namespace YALuaToy.Core {
+
+using System;
+using System.Collections.Generic;
+using YALuaToy.Const;
+using YALuaToy.Debug;
+
+/* - 字符串和 LuaProto 是只读的，直接共享；C# 函数（包括 CClosure 的 func）也原样共享
+   - 表、闭包、上值、userdata 各复制一份，同一个对象只复制一次，所以共享和循环引用的关系都保持不变
+   - 先建出空的副本再放进队列里慢慢填，不递归，很深的表也不会爆栈
+   - 全程只读源对象，多个线程可以同时从同一个源复制 */
+internal class LuaStateCopier
+{
+    private readonly LuaState                   _from; /* 源主线程，副本里对应 _to */
+    private readonly LuaState                   _to;
+    private readonly Dictionary<object, object> _copies  = new Dictionary<object, object>(ReferenceEqualityComparer.Instance);
+    private readonly Queue<(object, object)>    _pending = new Queue<(object, object)>(); /* (源对象, 还没填内容的副本) */
+
+    private LuaStateCopier(LuaState from, LuaState to) {
+        _from = from;
+        _to   = to;
+    }
+
+    public static void Copy(LuaState from, LuaState to) {
+        LuaDebug.Assert(from.isMainThread && to.isMainThread);
+        LuaStateCopier copier = new LuaStateCopier(from, to);
+        to.globalState._CopyFrom(from.globalState, copier);
+        copier._Flush();
+    }
+
+    internal LuaValue CopyValue(in LuaValue value) {
+        if (!value.IsLuaObject)
+            return value;
+        LuaObject obj  = value.LObject<LuaObject>();
+        LuaObject copy = CopyObject(obj);
+        return ReferenceEquals(obj, copy) ? value : new LuaValue(copy);
+    }
+    internal LuaObject CopyObject(LuaObject obj) {
+        if (obj == null || obj is LuaString || obj is LuaProto)
+            return obj;
+        if (_copies.TryGetValue(obj, out object copy))
+            return (LuaObject)copy;
+        switch (obj) {
+        case LuaTable _:
+            copy = new LuaTable();
+            break;
+        case LClosure lclosure:
+            copy = new LClosure(lclosure.proto, lclosure.UpvalueCount);
+            break;
+        case CClosure cclosure:
+            copy = new CClosure(cclosure.func, cclosure.UpvalueCount);
+            break;
+        case LuaUserData _:
+            copy = new LuaUserData();
+            break;
+        case LuaState thread:
+            if (thread != _from)
+                throw new LuaNotSupportedError("copy a state that references coroutines");
+            return _to;
+        default:
+            throw new LuaCoreError($"Unknown object: {obj}");
+        }
+        _copies.Add(obj, copy);
+        _pending.Enqueue((obj, copy));
+        return (LuaObject)copy;
+    }
+    internal LuaTable CopyTable(LuaTable table) {
+        return (LuaTable)CopyObject(table);
+    }
+
+    private void _Flush() {
+        while (_pending.Count > 0) {
+            var (obj, copy) = _pending.Dequeue();
+            switch (obj) {
+            case LuaTable table:
+                ((LuaTable)copy)._CopyFrom(table, this);
+                break;
+            case LClosure lclosure:
+                _FillUpvalues(lclosure, (LClosure)copy);
+                break;
+            case CClosure cclosure:
+                for (int i = 1; i <= cclosure.UpvalueCount; i++)
+                    ((CClosure)copy).SetUpvalue(i, CopyValue(cclosure.GetUpvalue(i)));
+                break;
+            case LuaUserData userdata:
+                ((LuaUserData)copy).Metatable = CopyTable(userdata.Metatable);
+                break;
+            }
+        }
+    }
+    /* 同一个上值可能被多个闭包共享，也要只复制一次 */
+    private void _FillUpvalues(LClosure lclosure, LClosure copy) {
+        for (int i = 1; i <= lclosure.UpvalueCount; i++) {
+            Upvalue upvalue = lclosure.GetUpvalueObj(i);
+            if (upvalue == null)
+                continue;
+            if (upvalue.Open) /* 源 LuaState 还有函数在执行 */
+                throw new LuaNotSupportedError("copy a state that is running");
+            if (!_copies.TryGetValue(upvalue, out object upvalueCopy)) {
+                upvalueCopy = new Upvalue(CopyValue(upvalue._GetValue()));
+                _copies.Add(upvalue, upvalueCopy);
+            }
+            copy.SetUpvalueObj(i, (Upvalue)upvalueCopy);
+        }
+    }
+}
+
+internal partial class LuaGlobalState
+{
+    internal void _CopyFrom(LuaGlobalState from, LuaStateCopier copier) {
+        _registry    = copier.CopyTable(from._registry);
+        optimizeCode = from.optimizeCode;
+        for (int i = 0; i < _metaTables.Length; i++)
+            _metaTables[i] = copier.CopyTable(from._metaTables[i]);
+    }
+}
+
+internal partial class LuaTable
+{
+    /* 把 from 的内容复制到这张空表上，键值经过 copier 映射。失效的弱键值和死键不会复制；
+       哈希部分的容量和 from 一样，节点按原来的顺序插入，不需要 rehash */
+    internal void _CopyFrom(LuaTable from, LuaStateCopier copier) {
+        LuaDebug.Assert(IsDummy);
+        _weakKey   = from._weakKey;
+        _weakValue = from._weakValue;
+        _flags     = from._flags;
+        _metatable = copier.CopyTable(from._metatable);
+
+        if (from._array.Length > 0) {
+            _array = new LuaValue[from._array.Length];
+            for (int i = 0; i < _array.Length; i++) {
+                LuaValue value = from._GetArraySlot(i);
+                _array[i]      = value.IsNil ? LuaValue.NIL : _WrapValue(copier.CopyValue(value));
+            }
+        }
+        if (from._nodes.Length > 0) {
+            _nodes   = new Node[from._nodes.Length];
+            _buckets = new int[from._nodes.Length];
+            _layout  = _NewLayout(); /* 节点的位置可能和 from 不一样，不能共用内联缓存 */
+            for (int i = 0; i < from._nodeCount; i++) {
+                ref Node node = ref from._nodes[i];
+                if (!_IsLive(node))
+                    continue;
+                LuaValue key   = node.key.weak ? node.key._Clone() : node.key;
+                LuaValue value = from._ReadValue(node.value);
+                if (key.IsNil || value.IsNil) /* 弱键值刚好被回收了 */
+                    continue;
+                key   = copier.CopyValue(key);
+                value = copier.CopyValue(value);
+                _InsertNode(WeakKey && key.IsLuaObject ? key._Clone(true) : key, key.GetHashCode(), _WrapValue(value));
+            }
+        }
+        _hasWeak = WeakKey || WeakValue;
+    }
+}
+
+}
@@ -2,8 +2,11 @@ namespace YALuaToy.Core {
 
 using System;
 using System.Text;
+using System.Collections.Generic;
 using System.Runtime.InteropServices;
 using YALuaToy.Const;
+using YALuaToy.Compilation;
+using YALuaToy.Compilation.Antlr;
 
 /* Todo - 如果用户读取字符串，则在非托管堆上维护一个字符串的拷贝，该拷贝要额外添加 '\0' 结尾 */
 internal class CStringHandle
@@ -41,6 +44,9 @@ internal class LuaString : LuaObject
        其实可以出个配置来指定统一格式，这里暂时懒得搞。因为在 C# safe 代码里貌似没办法直接读取 utf8 以外编码的字节流。
        具体操作可以参考 LuaUtils.StringToDouble/LuaUtils.StringToLong */
     private readonly string _str;
+    private readonly bool   _short;
+    private int             _hash;
+    private bool            _hashed;
     private int             _utf8Length;
     private CStringHandle   _cstringHandle;
 
@@ -54,22 +60,41 @@ internal class LuaString : LuaObject
         }
     }
     public bool Reserved => _type.NotNoneVariant == LuaConst.TRESERVEDSTR;
+    public bool Short    => _short;
 
-    public LuaString(string str, bool reserved = false) {
+    private LuaString(string str, bool reserved) {
         if (reserved)
             _type = LuaConst.MarkLuaObject(LuaConst.TRESERVEDSTR);
         else
             _type = LuaConst.MarkLuaObject(LuaConst.TNORMALSTR);
         _str        = str;
+        _short      = str.Length <= LuaConfig.LUAI_MAXSHORTLEN;
+        _hashed     = _short; /* 短字符串创建时就要查字符串表，顺便把哈希值算好；长字符串用到时再算 */
+        _hash       = _short ? str.GetHashCode() : 0;
         _utf8Length = -1;
     }
 
+    /* 获取字符串对象（luaS_new）：短字符串从字符串表中取，同内容的短字符串全局只有一个对象；长字符串每次新建 */
+    public static LuaString New(string str) {
+        if (str.Length > LuaConfig.LUAI_MAXSHORTLEN)
+            return new LuaString(str, false);
+        return _Intern(str);
+    }
+
     protected override int HashCode() {
-        return _str.GetHashCode();
+        if (!_hashed) {
+            _hash   = _str.GetHashCode();
+            _hashed = true;
+        }
+        return _hash;
     }
     public override bool Equals(LuaObject other) {
-        if (other is LuaString str)
-            return _str.Equals(str._str);
+        if (ReferenceEquals(this, other))
+            return true;
+        if (_short) /* 短字符串都内部化了，不是同一个对象就一定不相等 */
+            return false;
+        if (other is LuaString str && !str._short)
+            return HashCode() == str.HashCode() && _str.Equals(str._str);
         return false;
     }
     public override string ToString() {
@@ -84,6 +109,66 @@ internal class LuaString : LuaObject
             _cstringHandle = new CStringHandle(_str);
         return _cstringHandle.cstringPtr;
     }
+
+    /* ---------------- String Table ---------------- */
+    /* 对应 CLua 的 stringtable，不过是全局（而不是每个 global_State 一份）的，因为很多地方创建字符串时拿不到 LuaState。
+       表里只存弱引用，没人用的字符串照样能被回收；保留字在这里预先内部化，并由 reservedWords 强引用，永远不会被回收
+       多个 LuaState 可能在不同的 OS 线程上同时创建字符串（见 LuaStatePool），所以表按哈希值分成 SHARD_COUNT 段，每段各自加锁、各自清理 */
+
+    private class Shard
+    {
+        public readonly Dictionary<string, WeakReference<LuaString>> table = new Dictionary<string, WeakReference<LuaString>>();
+        public int purgeThreshold = SHARD_PURGE_THRESHOLD;
+    }
+
+    private const int                   SHARD_COUNT           = 32; /* 必须是 2 的幂 */
+    private static readonly int         SHARD_PURGE_THRESHOLD = Math.Max(1, LuaConfig.LUA_STRING_PURGE_THRESHOLD / SHARD_COUNT);
+    private static readonly Shard[]     shards;
+    private static readonly LuaString[] reservedWords;
+
+    static LuaString() {
+        shards = new Shard[SHARD_COUNT];
+        for (int i = 0; i < SHARD_COUNT; i++)
+            shards[i] = new Shard();
+        reservedWords = new LuaString[LuaLexer.reservedWordCount];
+        for (int type = 1; type <= reservedWords.Length; type++) {
+            string word                = LuaLexerUtils.GetTypeName(type);
+            reservedWords[type - 1]    = new LuaString(word, true);
+            _ShardOf(word).table[word] = new WeakReference<LuaString>(reservedWords[type - 1]);
+        }
+    }
+
+    internal static LuaString[] ReservedWords => reservedWords;
+
+    private static Shard _ShardOf(string str) {
+        return shards[str.GetHashCode() & (SHARD_COUNT - 1)];
+    }
+    private static LuaString _Intern(string str) {
+        Shard shard = _ShardOf(str);
+        lock (shard) {
+            if (shard.table.TryGetValue(str, out WeakReference<LuaString> weakRef)) {
+                if (weakRef.TryGetTarget(out LuaString interned))
+                    return interned;
+                LuaString result = new LuaString(str, false); /* 原来的对象已被回收，复用弱引用 */
+                weakRef.SetTarget(result);
+                return result;
+            }
+            if (shard.table.Count >= shard.purgeThreshold)
+                _Purge(shard);
+            LuaString newString = new LuaString(str, false);
+            shard.table.Add(str, new WeakReference<LuaString>(newString));
+            return newString;
+        }
+    }
+    private static void _Purge(Shard shard) { /* 清理已被回收的字符串（类似 CLua 的 checkSizes），之后这一段再翻倍才会触发下一次 */
+        List<string> deadKeys = new List<string>();
+        foreach (var pair in shard.table)
+            if (!pair.Value.TryGetTarget(out _))
+                deadKeys.Add(pair.Key);
+        foreach (var key in deadKeys)
+            shard.table.Remove(key);
+        shard.purgeThreshold = Math.Max(SHARD_PURGE_THRESHOLD, shard.table.Count * 2);
+    }
 }
 
 /* UserData 需要用 NativeMemory API 分配内存 */
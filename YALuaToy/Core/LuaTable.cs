@@ -5,6 +5,7 @@ using System.Text;
 using System.Text.RegularExpressions;
 using System.Collections;
 using System.Collections.Generic;
+using System.Numerics;
 using System.Runtime.CompilerServices;
 using YALuaToy.Const;
 using YALuaToy.Debug;
@@ -13,39 +14,35 @@ internal partial class LuaTable
     : LuaObject,
       IEnumerable<KeyValuePair<LuaValue, LuaValue>>
 {
-    private class EqualityComparer : IEqualityComparer<LuaValue>
+    /* 哈希部分的节点，所有节点放在一个数组里，按插入顺序排列，用下标（而不是引用）串起同一个桶 */
+    private struct Node
     {
-        bool IEqualityComparer<LuaValue>.Equals(LuaValue x, LuaValue y) {
-            if (!x.CheckValidValue(out LuaObject xobj) || !y.CheckValidValue(out LuaObject yobj)) {
-                /* 无效弱值在用户访问时应返回 false，在内部遍历时返回 true；无效弱值直接比较哈希值 */
-                if (x._IsCompareByHash() || y._IsCompareByHash())
-                    return x.GetHashCode() == y.GetHashCode();
-                else
-                    return false;
-            }
-            if (xobj != null || yobj != null) /* 对象比较 */
-                return xobj != null && yobj != null && xobj.Equals(yobj);
-            return x.Equals(in y);
-        }
-        int IEqualityComparer<LuaValue>.GetHashCode(LuaValue luaValue) {
-            return luaValue.GetHashCode();
-        }
+        public LuaValue key;
+        public LuaValue value; /* 为 nil 时是死键：删除字段只清空值，键保留在原位，这样遍历中途删除字段后 next 仍能找到它 */
+        public int      hash;
+        public int      next;  /* 同一个桶中下一个节点的下标 + 1，0 表示结束 */
     }
 
-    private static readonly int              SWEEP_THRESHOLD  = LuaConfig.LUA_TABLE_SWEEP_THRESHOLD;
-    private static readonly int              THRESHOLD_FACTOR = 3;
-    private static readonly EqualityComparer equalityComparer = new EqualityComparer();
+    private static readonly int        SWEEP_THRESHOLD  = LuaConfig.LUA_TABLE_SWEEP_THRESHOLD;
+    private static readonly int        THRESHOLD_FACTOR = 3;
+    private static readonly int        MAXABITS         = LuaConfig.LUA_TABLE_MAXABITS;
+    private static readonly LuaValue[] EMPTY_ARRAY      = new LuaValue[0];
+    private static readonly Node[]     EMPTY_NODES      = new Node[0];
+    private static readonly int[]      EMPTY_BUCKETS    = new int[0];
 
     /* ---------------- Members ---------------- */
 
-    private bool                                          _hasWeak;
-    private bool                                          _weakKey;
-    private bool                                          _weakValue;
-    private byte                                          _flags; /* 当前 table 作为元表时，特定元方法“不”存在的位标记，位对应 TagMethod */
-    private int                                           _sweepCounter;
-    private LuaTable                                      _metatable;
-    private Dictionary<LuaValue, LuaValue>                _table;
-    private IEnumerator<KeyValuePair<LuaValue, LuaValue>> _enumeratorCache; /* 用于 LuaState.Next 接口 */
+    private bool       _hasWeak;
+    private bool       _weakKey;
+    private bool       _weakValue;
+    private byte       _flags; /* 当前 table 作为元表时，特定元方法“不”存在的位标记，位对应 TagMethod */
+    private int        _sweepCounter;
+    private LuaTable   _metatable;
+    private LuaValue[] _array;     /* 数组部分，_array[i] 对应键 i+1，空位为 nil */
+    private Node[]     _nodes;     /* 哈希部分，长度即容量（2 的幂），新键用完容量时 rehash（对应 CLua 哈希部分没有空闲节点） */
+    private int[]      _buckets;   /* 桶，存放链表头节点的下标 + 1，长度和 _nodes 相同 */
+    private int        _nodeCount; /* 已使用的节点数量（包括死键），新节点总是追加在末尾 */
+    private long       _layout;    /* 哈希部分布局的编号，每次重新分配 _nodes 都换一个全局唯一的编号，没有哈希部分时为 0，给内联缓存用 */
 
     public LuaTable() {
         _type    = LuaConst.MarkLuaObject(LuaConst.TTABLE);
@@ -54,13 +51,17 @@ internal partial class LuaTable
         _flags                = 0xFF;  /* 初始化为全 1 */
         _sweepCounter         = 0;
         _metatable            = null;
-        _table                = null;
-        _enumeratorCache      = null;
+        _array                = EMPTY_ARRAY;
+        _nodes                = EMPTY_NODES;
+        _buckets              = EMPTY_BUCKETS;
+        _nodeCount            = 0;
+        _layout               = 0;
     }
 
     /* ---------------- Properties ---------------- */
 
-    public bool IsDummy => _table == null;
+    public bool IsDummy   => _nodeCount == 0 && _array.Length == 0;
+    public int  ArraySize => _array.Length;
     public bool WeakKey {
         get => _weakKey;
         set { _weakKey = value; }
@@ -90,33 +91,52 @@ internal partial class LuaTable
 
     /* 如果 key 类型非法则会抛出错误，key 合法的情况下一定返回（最差也是 nil）；如果是弱键值，要新建一个 LuaValue 返回 */
     public LuaValue Get(in LuaValue key) { /* 兼顾 ContainsKey 的功能 */
-        if (IsDummy)
-            return LuaValue.NIL;
-        if (key.IsNil)
-            return LuaValue.NIL;
-        _AddSweepCount(1);
-
+        if (key.IsInt)
+            return GetInt(key.Int);
         if (key.IsFloat)
             if (key.ToInteger(out long i, ToIntMode.INT))
-                return _DoGet(new LuaValue(i));
+                return GetInt(i);
+        if (key.IsNil || _nodeCount == 0)
+            return LuaValue.NIL;
+        _AddSweepCount(1);
         return _DoGet(key);
     }
+    /* 整数键的快速路径，在数组范围内则直接读数组部分（luaH_getint） */
+    public LuaValue GetInt(long key) {
+        if ((ulong)(key - 1) < (ulong)_array.Length)
+            return _GetArraySlot((int)(key - 1));
+        if (_nodeCount == 0)
+            return LuaValue.NIL;
+        _AddSweepCount(1);
+        return _DoGet(new LuaValue(key));
+    }
     private LuaValue _DoGet(in LuaValue key) {
         LuaDebug.AssertNotNone(key.Type);
-        if (_table.TryGetValue(key, out LuaValue value)) {
-            if (value.Null)
-                return LuaValue.NIL;
-            if (!value.weak) {
-                return value;
-            } else if (value.CheckValidValue(out LuaObject obj)) {
-                LuaDebug.Check(WeakValue);
-                if (obj != null)
-                    return new LuaValue(obj);
-                return value._Clone();
-            }
+        int index = _FindNode(key, key.GetHashCode());
+        if (index < 0)
+            return LuaValue.NIL;
+        return _ReadValue(_nodes[index].value);
+    }
+    private LuaValue _GetArraySlot(int index) {
+        LuaValue value = _array[index];
+        if (!value.weak)
+            return value;
+        return _ReadValue(value);
+    }
+    private LuaValue _ReadValue(in LuaValue value) {
+        if (value.Null)
+            return LuaValue.NIL;
+        if (!value.weak) {
+            return value;
+        } else if (value.CheckValidValue(out LuaObject obj)) {
+            LuaDebug.Check(WeakValue);
+            if (obj != null)
+                return new LuaValue(obj);
+            return value._Clone();
         }
         return LuaValue.NIL;
     }
+
     /* 注意！！对表调用 Set 后，如果 key 是字符串，则还要检查一下是否要调用 _InvalidateFlags */
     public void Set(LuaValue key, in LuaValue value) {
         /* 弱键值这一特性**仅用于** LuaTable，其他地方是无感的，LuaTable 的 API 也不能暴露这点 */
@@ -124,65 +144,300 @@ internal partial class LuaTable
         LuaDebug.AssertNotNone(value.Type);
         if (key.IsNil)
             throw new LuaRuntimeError("Table index is nil.");
-        if (IsDummy)
-            _table = new Dictionary<LuaValue, LuaValue>(equalityComparer);
 
         if (key.IsFloat)
             if (key.ToInteger(out long i, ToIntMode.INT))
                 key = new LuaValue(i);
-
-        if (value.IsNil) {
-            _table.Remove(key);
-        } else if (WeakKey) {
-            _table[key._Clone(true)] = WeakValue ? value._Clone(true) : value;
-        } else {
-            _table[key] = WeakValue ? value._Clone(true) : value;
+        if (key.IsInt) {
+            SetInt(key.Int, value);
+            return;
+        }
+        _SetHash(key, value);
+    }
+    /* 整数键的快速路径，在数组范围内则直接写数组部分（luaH_setint） */
+    public void SetInt(long key, in LuaValue value) {
+        LuaDebug.AssertNotNone(value.Type);
+        if ((ulong)(key - 1) < (ulong)_array.Length) {
+            _array[key - 1] = value.IsNil ? LuaValue.NIL : _WrapValue(value);
+            _OnSet();
+            return;
         }
+        _SetHash(new LuaValue(key), value);
+    }
+    /* 不会触发 __newindex 时直接写入并返回 true（luaV_fastset）：没有元表，或者数组部分的对应位置已经有值 */
+    internal bool TrySetInt(long key, in LuaValue value) {
+        if (_metatable == null) {
+            SetInt(key, value);
+            return true;
+        }
+        if ((ulong)(key - 1) < (ulong)_array.Length && !_GetArraySlot((int)(key - 1)).IsNil) {
+            _array[key - 1] = value.IsNil ? LuaValue.NIL : _WrapValue(value);
+            _OnSet();
+            return true;
+        }
+        return false;
+    }
+    private void _SetHash(in LuaValue key, in LuaValue value) {
+        int hash  = key.GetHashCode();
+        int index = _FindNode(key, hash);
+        if (index >= 0) { /* 已有的键（包括死键）原地修改，不影响遍历 */
+            _nodes[index].value = value.IsNil ? LuaValue.NIL : _WrapValue(value);
+            _OnSet();
+            return;
+        }
+        if (value.IsNil)
+            return;
+        if (_nodeCount == _nodes.Length) { /* 新键且哈希部分已满，重新分配数组和哈希部分后再插入 */
+            _Rehash(key);
+            if (key.IsInt && (ulong)(key.Int - 1) < (ulong)_array.Length) {
+                SetInt(key.Int, value);
+                return;
+            }
+        }
+        _InsertNode(WeakKey && key.IsLuaObject ? key._Clone(true) : key, hash, _WrapValue(value));
+        _OnSet();
+    }
+    private LuaValue _WrapValue(in LuaValue value) {
+        return WeakValue && value.IsLuaObject ? value._Clone(true) : value;
+    }
+    private void _OnSet() {
         if (!_hasWeak)
             _hasWeak = WeakKey || WeakValue;
-        _enumeratorCache = null;
         _AddSweepCount(2);
     }
 
     /* 保证先遍历数组部分 */
     public IEnumerator<KeyValuePair<LuaValue, LuaValue>> GetEnumerator() {
-        if (IsDummy)
-            yield break;
-        int      arrayLength = 0;
-        LuaValue key         = new LuaValue(1);
-        LuaValue value       = _DoGet(key);
-        while (!value.IsNil) {
+        LuaValue key, value;
+        int      position = 0;
+        while ((position = _NextFrom(position, out key, out value)) > 0)
             yield return new KeyValuePair<LuaValue, LuaValue>(key, value);
-            arrayLength++;
-            key._RefChangeValue(arrayLength + 1);
-            value = _DoGet(key);
-        }
-        foreach (var pair in _table) {
-            if (pair.Key.Null || pair.Value.Null)
-                continue;
-            if (!pair.Key.CheckValidValue(out _) || !pair.Value.CheckValidValue(out _))
-                continue;
-            if (pair.Key.IsInt && pair.Key.Int > 0 && pair.Key.Int <= arrayLength)
-                continue;
-            yield return new KeyValuePair<LuaValue, LuaValue>(
-                pair.Key.weak ? pair.Key._Clone() : pair.Key, pair.Value.weak ? pair.Value._Clone() : pair.Value
-            );
-        }
     }
     IEnumerator IEnumerable.GetEnumerator() { /* ICollection 继承了非泛型版的 IEnumerable */
         return GetEnumerator();
     }
 
+    /* 返回表的一个边界（luaH_getn）：数组部分末尾为 nil 时在数组内二分，否则到哈希部分里无界查找 */
     public int GetArrayLength() {
-        if (IsDummy)
+        int j = _array.Length;
+        if (j > 0 && _GetArraySlot(j - 1).IsNil) {
+            int i = 0;
+            while (j - i > 1) {
+                int m = (i + j) / 2;
+                if (_GetArraySlot(m - 1).IsNil)
+                    j = m;
+                else
+                    i = m;
+            }
+            return i;
+        }
+        if (_nodeCount == 0)
+            return j;
+        return _UnboundSearch(j);
+    }
+    private int _UnboundSearch(int j) {
+        long i = j; /* i 为 0 或者非 nil 的位置 */
+        long k = j + 1;
+        while (!GetInt(k).IsNil) {
+            i = k;
+            if (k > int.MaxValue / 2) { /* 溢出，退回线性查找 */
+                i = 1;
+                while (!GetInt(i).IsNil)
+                    i++;
+                return (int)(i - 1);
+            }
+            k *= 2;
+        }
+        while (k - i > 1) { /* 在 i（非 nil）和 k（nil）之间二分 */
+            long m = (i + k) / 2;
+            if (GetInt(m).IsNil)
+                k = m;
+            else
+                i = m;
+        }
+        return (int)i;
+    }
+
+    /* 数组部分的长度至少为 size（luaH_resizearray），用于 SETLIST 之类已知元素数量的场合 */
+    internal void EnsureArraySize(int size) {
+        if (size > _array.Length)
+            _Resize(size, _nodes.Length);
+    }
+
+    /* ---------------- Hash Part ---------------- */
+
+    private int _FindNode(in LuaValue key, int hash) {
+        if (_nodeCount == 0)
+            return -1;
+        for (int i = _buckets[hash & (_buckets.Length - 1)] - 1; i >= 0; i = _nodes[i].next - 1) {
+            if (_nodes[i].hash == hash && _KeyEquals(_nodes[i].key, key))
+                return i;
+        }
+        return -1;
+    }
+    private static bool _KeyEquals(in LuaValue nodeKey, in LuaValue key) {
+        if (!nodeKey.weak)
+            return nodeKey.Equals(in key);
+        if (!nodeKey._TryGetLuaObject(out LuaObject obj)) /* 失效的弱键不和任何键相等 */
+            return false;
+        return key.IsLuaObject && obj.Equals(key.Object);
+    }
+    private void _InsertNode(in LuaValue key, int hash, in LuaValue value) {
+        LuaDebug.Assert(_nodeCount < _nodes.Length);
+        int      index  = _nodeCount++;
+        ref Node node   = ref _nodes[index];
+        int      bucket = hash & (_buckets.Length - 1);
+        node.key        = key;
+        node.value      = value;
+        node.hash       = hash;
+        node.next       = _buckets[bucket];
+        _buckets[bucket] = index + 1;
+    }
+    private static bool _IsLive(in Node node) { /* 不是死键，且弱键值都还有效 */
+        return !node.value.Null && node.key.CheckValidValue(out _) && node.value.CheckValidValue(out _);
+    }
+
+    /* ---------------- Traversal ---------------- */
+    /* 遍历位置：[0, _array.Length) 为数组部分，之后依次是哈希部分的节点，位置都可以由键直接算出来，所以 next 不需要保存任何遍历状态 */
+
+    /* 具体看 LuaState.Next 的接口描述；遍历过程中可以修改或删除已有字段，但不能新增字段（和 CLua 一样，新增可能导致 rehash） */
+    internal bool Next(in LuaValue currkey, out LuaValue nextKey, out LuaValue nextValue) {
+        return _NextFrom(_PositionAfter(currkey), out nextKey, out nextValue) > 0;
+    }
+    private int _PositionAfter(in LuaValue currkey) {
+        if (currkey.IsNil)
             return 0;
-        int      length = 0;
-        LuaValue key    = new LuaValue(1);
-        while (!_DoGet(key).IsNil) {
-            length++;
-            key._RefChangeValue(length + 1);
+        LuaValue key = currkey;
+        if (key.IsFloat && key.ToInteger(out long i, ToIntMode.INT))
+            key = new LuaValue(i);
+        if (key.IsInt && (ulong)(key.Int - 1) < (ulong)_array.Length)
+            return (int)key.Int;
+        int index = _FindNode(key, key.GetHashCode());
+        if (index < 0)
+            throw new LuaRuntimeError($"invalid key to 'next': {currkey}");
+        return _array.Length + index + 1;
+    }
+    /* 从遍历位置 position 开始找下一个有效的键值，返回它之后的位置，没有了则返回 0 */
+    private int _NextFrom(int position, out LuaValue key, out LuaValue value) {
+        for (; position < _array.Length; position++) {
+            value = _GetArraySlot(position);
+            if (!value.IsNil) {
+                key = new LuaValue(position + 1);
+                return position + 1;
+            }
+        }
+        for (int i = position - _array.Length; i < _nodeCount; i++) {
+            ref Node node = ref _nodes[i];
+            if (node.value.Null)
+                continue;
+            value = _ReadValue(node.value);
+            key   = node.key.weak ? node.key._Clone() : node.key;
+            if (!key.IsNil && !value.IsNil) /* 弱键值失效了会变成 nil */
+                return _array.Length + i + 1;
         }
-        return length;
+        key = value = LuaValue.NIL;
+        return 0;
+    }
+
+    /* ---------------- Rehash ---------------- */
+    /* 和 ltable.c 一样：统计所有整数键按 2 的幂分段的数量，取使用率超过一半的最大 2^n 作为数组部分大小，其余放哈希部分 */
+
+    private void _Rehash(in LuaValue extraKey) {
+        if (_hasWeak) /* 先清掉失效的弱键值，免得被计入 */
+            _Sweep();
+        int[] nums       = new int[MAXABITS + 1]; /* nums[i] 为 (2^(i-1), 2^i] 范围内的整数键数量 */
+        int   arrayCount = _NumUseArray(nums);
+        int   total      = arrayCount;
+        for (int i = 0; i < _nodeCount; i++) {
+            if (!_IsLive(_nodes[i]))
+                continue;
+            if (_nodes[i].key.IsInt)
+                arrayCount += _CountInt(_nodes[i].key.Int, nums);
+            total++;
+        }
+        if (extraKey.IsInt)
+            arrayCount += _CountInt(extraKey.Int, nums);
+        total++;
+        int arraySize = _ComputeSizes(nums, ref arrayCount);
+        _Resize(arraySize, total - arrayCount);
+    }
+    private int _NumUseArray(int[] nums) {
+        int count = 0;
+        int i     = 1;
+        for (int lg = 0, ttlg = 1; lg <= MAXABITS; lg++, ttlg *= 2) { /* 逐段统计 (2^(lg-1), 2^lg] */
+            int limit = ttlg;
+            if (limit > _array.Length) {
+                limit = _array.Length;
+                if (i > limit)
+                    break;
+            }
+            int sliceCount = 0;
+            for (; i <= limit; i++)
+                if (!_GetArraySlot(i - 1).IsNil)
+                    sliceCount++;
+            nums[lg] += sliceCount;
+            count    += sliceCount;
+        }
+        return count;
+    }
+    private static int _CountInt(long key, int[] nums) {
+        if (key < 1 || key > (1L << MAXABITS))
+            return 0;
+        nums[_CeilLog2(key)]++;
+        return 1;
+    }
+    private static int _ComputeSizes(int[] nums, ref int arrayCount) {
+        int a       = 0; /* 小于 2^i 的键数量 */
+        int na      = 0; /* 最终放进数组部分的键数量 */
+        int optimal = 0;
+        for (int i = 0, twotoi = 1; i <= MAXABITS && arrayCount > twotoi / 2; i++, twotoi *= 2) {
+            if (nums[i] > 0) {
+                a += nums[i];
+                if (a > twotoi / 2) {
+                    optimal = twotoi;
+                    na      = a;
+                }
+            }
+        }
+        arrayCount = na;
+        return optimal;
+    }
+    /* 重建数组部分和哈希部分（luaH_resize），死键和失效的弱键值在这里被丢掉 */
+    private void _Resize(int arraySize, int hashSize) {
+        LuaValue[] oldArray     = _array;
+        Node[]     oldNodes     = _nodes;
+        int        oldNodeCount = _nodeCount;
+        if (arraySize != oldArray.Length) {
+            _array = arraySize == 0 ? EMPTY_ARRAY : new LuaValue[arraySize];
+            Array.Copy(oldArray, _array, Math.Min(oldArray.Length, arraySize));
+        }
+        int capacity = _CeilPow2(hashSize);
+        _nodes       = capacity == 0 ? EMPTY_NODES : new Node[capacity];
+        _buckets     = capacity == 0 ? EMPTY_BUCKETS : new int[capacity];
+        _nodeCount   = 0;
+        _layout      = capacity == 0 ? 0 : _NewLayout();
+
+        for (int i = arraySize; i < oldArray.Length; i++) { /* 数组收缩，超出部分移到哈希部分 */
+            if (oldArray[i].Null || !oldArray[i].CheckValidValue(out _))
+                continue;
+            LuaValue key = new LuaValue(i + 1);
+            _InsertNode(key, key.GetHashCode(), oldArray[i]);
+        }
+        for (int i = 0; i < oldNodeCount; i++) {
+            ref Node node = ref oldNodes[i];
+            if (!_IsLive(node))
+                continue;
+            if (node.key.IsInt && (ulong)(node.key.Int - 1) < (ulong)arraySize) /* 落入数组范围的整数键移到数组部分 */
+                _array[node.key.Int - 1] = node.value;
+            else
+                _InsertNode(node.key, node.hash, node.value);
+        }
+    }
+    private static int _CeilLog2(long x) { /* ceil(log2(x))，x >= 1 */
+        return x == 1 ? 0 : BitOperations.Log2((ulong)(x - 1)) + 1;
+    }
+    private static int _CeilPow2(int x) {
+        return x <= 0 ? 0 : (int)BitOperations.RoundUpToPowerOf2((uint)x);
     }
 
     /* ---------------- Utils ---------------- */
@@ -224,60 +479,33 @@ internal partial class LuaTable
     }
 
     private void _AddSweepCount(int addCount = 1) {
-        if (IsDummy || !_hasWeak)
+        if (!_hasWeak)
             return;
         _sweepCounter += addCount;
-        if (_sweepCounter <= (THRESHOLD_FACTOR * Math.Max(SWEEP_THRESHOLD, _table.Count)))
+        if (_sweepCounter <= (THRESHOLD_FACTOR * Math.Max(SWEEP_THRESHOLD, _array.Length + _nodeCount)))
             return;
         _Sweep();
     }
 
+    /* 失效的弱键值变成 nil / 死键，节点留在原位（不影响正在进行的遍历），下次 rehash 时才真正移除 */
     internal int _Sweep() { /* 暴露给 internal 是仅供测试使用 */
-        List<LuaValue> keysToRemove = new List<LuaValue>();
-        foreach (var pair in _table) {
-            if (pair.Key.weak && !pair.Key.CheckValidValue(out _))
-                keysToRemove.Add(pair.Key);
-            if (pair.Value.weak && !pair.Value.CheckValidValue(out _))
-                keysToRemove.Add(pair.Key);
+        int removeCount = 0;
+        for (int i = 0; i < _array.Length; i++) { /* 数组部分只有值可能是弱的 */
+            if (_array[i].weak && !_array[i].CheckValidValue(out _)) {
+                _array[i] = LuaValue.NIL;
+                removeCount++;
+            }
         }
-        foreach (var key in keysToRemove) {
-            key.MarkCompareByHash();
-            _table.Remove(key);
+        for (int i = 0; i < _nodeCount; i++) {
+            ref Node node = ref _nodes[i];
+            if (node.value.Null || _IsLive(node))
+                continue;
+            node.value = LuaValue.NIL;
+            removeCount++;
         }
         _sweepCounter = 0;
         _hasWeak      = false;
-        return keysToRemove.Count;
-    }
-
-    internal bool GetEnumeratorNext(in LuaValue currkey, out IEnumerator<KeyValuePair<LuaValue, LuaValue>> result) {
-        /* 具体看 LuaState.Next 的接口描述 */
-        if (_enumeratorCache != null && _enumeratorCache.Current.Key.Equals(in currkey)) { /* 有效 cache */
-            if (_enumeratorCache.MoveNext()) {
-                result = _enumeratorCache;
-                return true;
-            }
-        } else { /* 无效 cache，重新获取 */
-            _enumeratorCache = GetEnumerator();
-            while (_enumeratorCache.MoveNext()) {
-                if (currkey.IsNil) {
-                    result = _enumeratorCache;
-                    return true;
-                }
-                if (!_enumeratorCache.Current.Key.Equals(in currkey))
-                    continue;
-                if (_enumeratorCache.MoveNext()) {
-                    result = _enumeratorCache;
-                    return true;
-                }
-                break;
-            }
-        }
-        /* 跑到头了 或 获取失败 */
-        _enumeratorCache = result = null;
-        if (currkey.IsNil || !Get(currkey).IsNil) /* 如果键为 nil 还获取失败，表示该表为空表；另外，如果有键，则表示跑到头了 */
-            return false;
-        else /* 获取失败的情况 */
-            throw new LuaRuntimeError($"invalid key to 'next': {currkey}");
+        return removeCount;
     }
 }
 
@@ -671,7 +671,8 @@ public partial class LuaState
         return result;
     }
     internal void Arith(Op op, in LuaValue lhs, in LuaValue rhs, RawIdx output) {
-        _stack[(int)output] = Arith(op, lhs, rhs);
+        Arith(op, lhs, rhs, out LuaValue result); /* 元方法可能扩栈，要等算完之后再取 _stack */
+        _stack[(int)output] = result;
     }
 }
 
@@ -14,8 +14,11 @@ public partial class LuaState
         LClosure       currClosure;
         List<LuaValue> constants;
         RawIdx         firstArg;
+        LuaTable.FieldCache[] fieldCaches;
         vmCI.SetCallStatusFlag(CallStatus.FRESH, true);
 
+        /* 栈是数组，扩栈时会整个换掉（见 ResizeStack）。_stack[(int)ra] = F() 会先取出数组再调用 F，F 里扩了栈的话就写到旧数组上去了，
+           所以会调用函数、元方法的操作要先把结果存到局部变量（或者用带 output 参数的版本）再写；寄存器的 ref 也只能在不会扩栈的指令里拿 */
         /* 通用获取，R 开头表示获取寄存器，RK 则是获取；注意这里不会做安全检查 */
         /* 另外，这里的 R 和 RK 表现和 CLua 的也不同。R 不是返回引用而是返回栈地址；而 RK 则直接返回值（这意味着涉及写入的场景要另想办法） */
         RawIdx RA(Instruction inst) {
@@ -48,6 +51,8 @@ public partial class LuaState
             LuaDebug.Assert(firstArg <= _top && _top < (RawIdx)0 + _StackSize);
             fetchCounter++;
             _vmCI = vmCI;
+            if ((_hookMask & (HookMask.LINE | HookMask.COUNT)) != 0)
+                _TraceExec(vmCI);
 #if DEBUG
             globalState.Logger?.LogLine(
                 "VM",
@@ -64,8 +69,9 @@ public partial class LuaState
         LuaDebug.Assert(vmCI == _currCI);
         currClosure = _stack[(int)vmCI.Func].LObject<LClosure>();
         LuaDebug.Assert(currClosure == _currCI.LClosure);
-        firstArg  = vmCI.FirstArg;
-        constants = currClosure.proto.Constants;
+        firstArg    = vmCI.FirstArg;
+        constants   = currClosure.proto.Constants;
+        fieldCaches = currClosure.proto.FieldCaches;
         while (true) {
             Fetch(out Instruction inst, out RawIdx ra);
             switch (inst.OpCode) {
@@ -97,22 +103,55 @@ public partial class LuaState
             case OpCode.GETUPVAL: /* 读取上值 | R(A) := Upvalue[B] */
                 _stack[(int)ra] = currClosure.GetUpvalue(inst.B.RKValue + 1);
                 break;
-            case OpCode.GETTABUP: { /* 上值表索引 | R(A) := Upvalue[B][RK(C)] */
-                LuaValue table  = currClosure.GetUpvalue(inst.B.RKValue + 1);
-                LuaValue key    = RKC(inst);
-                _stack[(int)ra] = Index(table, key);
+            case OpCode.GETTABUP:       /* 上值表索引 | R(A) := Upvalue[B][RK(C)] */
+            case OpCode.GETTABUPCALL: { /* 全局函数调用，GETTABUP 之后直接执行下一条 CALL | R(A) := Upvalue[B][RK(C)] */
+                LuaValue table = currClosure.GetUpvalue(inst.B.RKValue + 1);
+                LuaValue key   = RKC(inst);
+                LuaValue value;
+                if (!(table.IsTable && inst.C.IsConstantsIndex && key.IsString /* 常量字符串键先查内联缓存 */
+                      && table.LObject<LuaTable>().CachedGet(ref fieldCaches[vmCI.PC - 1], key, out value)))
+                    value = Index(table, key);
+                _stack[(int)ra] = value;
+                /* 有行钩子或计数钩子时 CALL 要经过 Fetch，这里就不跳过去了，下一轮照常取指 */
+                if (inst.OpCode == OpCode.GETTABUPCALL && (_hookMask & (HookMask.LINE | HookMask.COUNT)) == 0) {
+                    inst = vmCI.GetInstruction(vmCI.PC++);
+                    LuaDebug.Assert(inst.OpCode == OpCode.CALL && RA(inst) == ra);
+                    goto case OpCode.CALL;
+                }
                 break;
             }
             case OpCode.GETTABLE: { /* 栈上表索引 | R(A) := R(B)[RK(C)] */
-                LuaValue table  = _stack[(int)RB(inst)];
-                LuaValue key    = RKC(inst);
-                _stack[(int)ra] = Index(table, key);
+                LuaValue table = _stack[(int)RB(inst)];
+                LuaValue key   = RKC(inst);
+                if (table.IsTable && key.IsInt) { /* 整数键直接走数组部分，取到值或没有元表时不需要 Index */
+                    LuaTable t     = table.LObject<LuaTable>();
+                    LuaValue value = t.GetInt(key.Int);
+                    if (!value.IsNil || t.Metatable == null) {
+                        _stack[(int)ra] = value;
+                        break;
+                    }
+                } else if (table.IsTable && inst.C.IsConstantsIndex && key.IsString
+                           && table.LObject<LuaTable>().CachedGet(ref fieldCaches[vmCI.PC - 1], key, out LuaValue value)) {
+                    _stack[(int)ra] = value;
+                    break;
+                }
+                LuaValue result = Index(table, key);
+                _stack[(int)ra] = result;
                 break;
             }
             case OpCode.SETTABUP: { /* 上值表索引赋值 | Upvalue[A][RK(B)] := RK(C) */
                 LuaValue table = currClosure.GetUpvalue(inst.A.RKValue + 1);
                 LuaValue key   = RKB(inst);
                 LuaValue value = RKC(inst);
+                if (table.IsTable && inst.B.IsConstantsIndex && key.IsString) { /* 常量字符串键，覆盖已有的值时直接写入缓存的位置 */
+                    LuaTable                t    = table.LObject<LuaTable>();
+                    ref LuaTable.FieldCache slot = ref fieldCaches[vmCI.PC - 1];
+                    if (t.CachedSet(slot, value))
+                        break;
+                    NewIndex(table, key, value);
+                    t.UpdateSetCache(ref slot, key);
+                    break;
+                }
                 NewIndex(table, key, value);
                 break;
             }
@@ -128,6 +167,8 @@ public partial class LuaState
                 LuaValue table = _stack[(int)ra];
                 LuaValue key   = RKB(inst);
                 LuaValue value = RKC(inst);
+                if (table.IsTable && key.IsInt && table.LObject<LuaTable>().TrySetInt(key.Int, value))
+                    break; /* 整数键且不会触发 __newindex，直接写入 */
                 NewIndex(table, key, value);
                 break;
             }
@@ -141,50 +182,67 @@ public partial class LuaState
                 LuaValue key   = RKC(inst);
                 LuaDebug.AssertTag(key, LuaConst.TSTRING);
                 _stack[(int)(ra + 1)] = _stack[(int)rb];
-                _stack[(int)ra]       = Index(table, key);
+                if (table.IsTable && inst.C.IsConstantsIndex
+                    && table.LObject<LuaTable>().CachedGet(ref fieldCaches[vmCI.PC - 1], key, out LuaValue value)) {
+                    _stack[(int)ra] = value;
+                    break;
+                }
+                LuaValue result = Index(table, key);
+                _stack[(int)ra] = result;
                 break;
             }
             case OpCode.ADD: /* R(A) := RK(B) + RK(C)  */
-                _stack[(int)ra] = Arith(Op.ADD, RKB(inst), RKC(inst));
+                Arith(Op.ADD, RKB(inst), RKC(inst), ra);
+                break;
+            case OpCode.INCR: { /* 局部变量自增，两边都是数字时不走 Arith | R(A) := R(A) + Kst(C) */
+                ref LuaValue value = ref _stack[(int)ra];
+                LuaValue     step  = constants[inst.C.RKValue];
+                if (value.IsInt && step.IsInt)
+                    value = new LuaValue(value.Int + step.Int);
+                else if (value.IsFloat && step.IsFloat)
+                    value = new LuaValue(value.Float + step.Float);
+                else
+                    Arith(Op.ADD, value, step, ra);
                 break;
+            }
             case OpCode.SUB: /* R(A) := RK(B) - RK(C) */
-                _stack[(int)ra] = Arith(Op.SUB, RKB(inst), RKC(inst));
+                Arith(Op.SUB, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.MUL: /* R(A) := RK(B) * RK(C) */
-                _stack[(int)ra] = Arith(Op.MUL, RKB(inst), RKC(inst));
+                Arith(Op.MUL, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.DIV: /* 浮点数除法，float division (always with floats) | R(A) := RK(B) / RK(C) */
-                _stack[(int)ra] = Arith(Op.DIV, RKB(inst), RKC(inst));
+                Arith(Op.DIV, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.BAND: /* 按位与 | R(A) := RK(B) & RK(C) */
-                _stack[(int)ra] = Arith(Op.BAND, RKB(inst), RKC(inst));
+                Arith(Op.BAND, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.BOR: /* 按位或 | R(A) := RK(B) | RK(C) */
-                _stack[(int)ra] = Arith(Op.BOR, RKB(inst), RKC(inst));
+                Arith(Op.BOR, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.BXOR: /* 按位异或 | R(A) := RK(B) ^ RK(C) */
-                _stack[(int)ra] = Arith(Op.BXOR, RKB(inst), RKC(inst));
+                Arith(Op.BXOR, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.SHL: /* 逻辑左移 | R(A) := RK(B) << RK(C) */
-                _stack[(int)ra] = Arith(Op.SHL, RKB(inst), RKC(inst));
+                Arith(Op.SHL, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.SHR: /* 逻辑右移 | R(A) := RK(B) >> RK(C) */
-                _stack[(int)ra] = Arith(Op.SHR, RKB(inst), RKC(inst));
+                Arith(Op.SHR, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.MOD: /* 取模 | R(A) := RK(B) % RK(C) */
-                _stack[(int)ra] = Arith(Op.MOD, RKB(inst), RKC(inst));
+                Arith(Op.MOD, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.IDIV: /* 整型 floor 除（向下取整，向负无穷取整） | R(A) := RK(B) // RK(C) */
-                _stack[(int)ra] = Arith(Op.IDIV, RKB(inst), RKC(inst));
+                Arith(Op.IDIV, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.POW: /* 指数运算 | R(A) := RK(B) ^ RK(C) */
-                _stack[(int)ra] = Arith(Op.POW, RKB(inst), RKC(inst));
+                Arith(Op.POW, RKB(inst), RKC(inst), ra);
                 break;
             case OpCode.UNM: /* 取负数 | R(A) := -R(B) */
-                _stack[(int)ra] = Arith(Op.UNM, _stack[(int)RB(inst)], LuaValue.ZERO);
+                Arith(Op.UNM, _stack[(int)RB(inst)], LuaValue.ZERO, ra);
                 break;
             case OpCode.BNOT: /* 按位取反 | R(A) := ~R(B) */
-                _stack[(int)ra] = Arith(Op.BNOT, _stack[(int)RB(inst)], LuaValue.ZERO);
+                Arith(Op.BNOT, _stack[(int)RB(inst)], LuaValue.ZERO, ra);
                 break;
             case OpCode.NOT: { /* 逻辑否 | R(A) := not R(B) */
                 LuaValue b      = _stack[(int)RB(inst)];
@@ -227,6 +285,31 @@ public partial class LuaState
                     _DoNextJump(vmCI);
                 break;
             }
+            case OpCode.EQK: { /* 和数字常量比较，数字不会触发 __eq，直接 raw equal | if ((R(B) == Kst(C)) ~= A) then pc++ */
+                if (_stack[(int)firstArg + inst.B.RKValue].Equals(constants[inst.C.RKValue]) != (inst.A.RKValue != 0))
+                    vmCI.PC++;
+                else
+                    _DoNextJump(vmCI);
+                break;
+            }
+            case OpCode.LTK: { /* if ((R(B) <  Kst(C)) ~= A) then pc++ */
+                LuaValue b = _stack[(int)firstArg + inst.B.RKValue];
+                LuaValue k = constants[inst.C.RKValue];
+                if ((b.IsNumber ? LuaUtils.NumberLessThan(b, k) : LessThan(b, k)) != (inst.A.RKValue != 0))
+                    vmCI.PC++;
+                else
+                    _DoNextJump(vmCI);
+                break;
+            }
+            case OpCode.LEK: { /* if ((R(B) <= Kst(C)) ~= A) then pc++ */
+                LuaValue b = _stack[(int)firstArg + inst.B.RKValue];
+                LuaValue k = constants[inst.C.RKValue];
+                if ((b.IsNumber ? LuaUtils.NumberLessEqual(b, k) : LessEqual(b, k)) != (inst.A.RKValue != 0))
+                    vmCI.PC++;
+                else
+                    _DoNextJump(vmCI);
+                break;
+            }
             case OpCode.TEST: { /* 条件分支，从寄存器取值 | if not (R(A) <=> C) then pc++ */
                 LuaValue value = _stack[(int)ra];
                 if (value.ToBoolean() != (inst.C.RKValue != 0))
@@ -317,17 +400,17 @@ public partial class LuaState
                 }
             }
             case OpCode.FORLOOP: { /* for 循环；R(A)+=R(A+2); if R(A) <?= R(A+1) then { pc+=sBx; R(A+3)=R(A) } */
-                LuaValue indexVal = _stack[(int)ra];
-                LuaValue limitVal = _stack[(int)ra + 1];
-                LuaValue stepVal  = _stack[(int)ra + 2];
+                ref LuaValue indexVal = ref _stack[(int)ra]; /* 不会扩栈，直接拿寄存器的引用，省掉拷贝 */
+                ref LuaValue limitVal = ref _stack[(int)ra + 1];
+                ref LuaValue stepVal  = ref _stack[(int)ra + 2];
                 if (indexVal.IsInt) { /* 循环变量是整型 */
                     long step  = stepVal.Int;
                     long index = indexVal.Int + step;
                     long limit = limitVal.Int;
                     if (step > 0 ? index <= limit : index >= limit) { /* 是否在循环范围内 */
                         vmCI.PC += inst.sBx; /* 跳转到循环体（若不执行，就执行 FORLOOP 下一条指令，是一个跳转到函数体后的指令） */
-                        _stack[(int)ra]     = new LuaValue(index); /* 更新内部循环变量 */
-                        _stack[(int)ra + 3] = new LuaValue(index); /* 更新外部循环变量 */
+                        indexVal            = new LuaValue(index); /* 更新内部循环变量 */
+                        _stack[(int)ra + 3] = indexVal;            /* 更新外部循环变量 */
                     }
                 } else { /* 循环变量是浮点数 */
                     double step  = stepVal.Float;
@@ -335,8 +418,8 @@ public partial class LuaState
                     double limit = limitVal.Float;
                     if (step > 0 ? index <= limit : index >= limit) { /* 是否超出循环范围 */
                         vmCI.PC += inst.sBx;                          /* 跳转到循环体 */
-                        _stack[(int)ra]     = new LuaValue(index);    /* 更新内部循环变量 */
-                        _stack[(int)ra + 3] = new LuaValue(index);    /* 更新外部循环变量 */
+                        indexVal            = new LuaValue(index);    /* 更新内部循环变量 */
+                        _stack[(int)ra + 3] = indexVal;               /* 更新外部循环变量 */
                     }
                 }
                 break;
@@ -412,17 +495,16 @@ public partial class LuaState
                 }
 
                 LuaTable table     = _stack[(int)ra].LObject<LuaTable>();
-                LuaValue lastIndex = new LuaValue((start - 1) * LuaConfig.LFIELDS_PER_FLUSH + count);
-                for (; count > 0; count--) {
-                    table.Set(lastIndex, _stack[(int)ra + count]);
-                    lastIndex._RefChangeValue(lastIndex.Int - 1);
-                }
+                int      lastIndex = (start - 1) * LuaConfig.LFIELDS_PER_FLUSH + count;
+                table.EnsureArraySize(lastIndex); /* 预先分配数组部分，下面都是直接写数组 */
+                for (; count > 0; count--, lastIndex--)
+                    table.SetInt(lastIndex, _stack[(int)ra + count]);
                 _top = vmCI.Top;
                 break;
             }
             case OpCode.CLOSURE: { /* 将 Proto 和上值绑定，创建新闭包 | R(A) := closure(KPROTO[Bx]) */
                 LuaProto proto       = currClosure.proto.SubProtos[inst.Bx];
-                LClosure newLClosure = LuaVMUtils.GetCached(proto, currClosure, firstArg); /* 尝试复用上一个闭包 */
+                LClosure newLClosure = LuaVMUtils.GetCached(this, proto, currClosure, firstArg); /* 尝试复用上一个闭包 */
                 if (newLClosure == null)
                     _NewLClosureHelper(proto, currClosure, firstArg, ra);
                 else
@@ -475,7 +557,9 @@ public partial class LuaState
         case OpCode.UNM:
         case OpCode.BNOT:
         case OpCode.LEN:
+        case OpCode.INCR:
         case OpCode.GETTABUP:
+        case OpCode.GETTABUPCALL:
         case OpCode.GETTABLE:
         case OpCode.SELF: {
             /* 这些指令的【中断点】都在最后执行元方法时，所以假设 resume 时结果已经在栈顶 */
@@ -485,13 +569,15 @@ public partial class LuaState
         }
         case OpCode.LE:
         case OpCode.LT:
-        case OpCode.EQ: {
+        case OpCode.EQ:
+        case OpCode.LEK:
+        case OpCode.LTK: {
             /* OP_LE 有两个【中断点】（LE 或 LT 的元方法）；LT 和 EQ 只有一个【中断点】，也是元方法。同样都都假设 resume 时结果已压入栈 */
             bool result = _stack[(int)_top - 1].ToBoolean();
             _top--;
             if (currCI.GetCallStatusFlag(CallStatus.LEQ)) { /* "<=" using "<" instead? */
                 /* 尝试用 LT 代替 LE，恢复时要再执行 luaV_lessequal 元方法后的步骤 */
-                LuaDebug.Assert(inst.OpCode == OpCode.LE);
+                LuaDebug.Assert(inst.OpCode == OpCode.LE || inst.OpCode == OpCode.LEK);
                 currCI.SetCallStatusFlag(CallStatus.LEQ, false); /* clear mark */
                 result = !result;                                /* 用 '<=' 代替 '<' 的话，结果要取反 */
             }
@@ -597,10 +683,11 @@ internal static class LuaVMUtils
     }
 
     /// <summary>检查 proto 的闭包缓存是否还可重用（即，缓存的闭包的上值是否可以给新闭包使用）</summary>
+    /// <param name="thread">当前线程</param>
     /// <param name="proto">目标 proto</param>
     /// <param name="curr">当前闭包，与返回值是包含关系，拥有返回值闭包的上值</param>
     /// <returns>如果可以重用则返回缓存的闭包，否则返回 null</returns>
-    public static LClosure GetCached(LuaProto proto, LClosure curr, RawIdx firstArg) {
+    public static LClosure GetCached(LuaState thread, LuaProto proto, LClosure curr, RawIdx firstArg) {
         LClosure cache = proto.LClosureCache;
         /* 线程和上值数量必须一样才能复用 */
         if (cache == null || proto.UpvalueDescCount != curr.UpvalueCount)
@@ -610,8 +697,8 @@ internal static class LuaVMUtils
             Upvalue     cacheUpvalue = cache.GetUpvalueObj(i + 1);
             if (!cacheUpvalue.Open)
                 return null;
-            if (upvalueDesc.InStack && cacheUpvalue.RawIdx != firstArg + upvalueDesc.Ldx - 1)
-                return null;
+            if (upvalueDesc.InStack && (cacheUpvalue.Thread != thread || cacheUpvalue.RawIdx != firstArg + upvalueDesc.Ldx - 1))
+                return null; /* proto 可能被多个线程甚至多个 LuaState 共享（LuaChunkCache），只比较栈位置是不够的 */
             Upvalue currUpvalue = curr.GetUpvalueObj(upvalueDesc.Ldx);
             if (!currUpvalue.Open || currUpvalue.Thread != cacheUpvalue.Thread) /* 关于 Open 和 Instack 的区别，参考 Instack 属性的注释 */
                 return null;
@@ -5,6 +5,7 @@ using System;
 using System.Linq;
 using System.Text;
 using System.IO;
+using System.IO.MemoryMappedFiles;
 using System.Diagnostics;
 using System.Runtime.CompilerServices;
 using System.Collections.Generic;
@@ -189,23 +190,48 @@ public static class LuaAuxiliaryLib
 
     /* ---------------- Load File ---------------- */
 
-    public static ThreadStatus LoadFile(this LuaState state, string filepath) {
+    public static ThreadStatus LoadFile(this LuaState state, string filepath, string mode = null) {
         if (string.IsNullOrEmpty(filepath)) { /* 读取标准输入 */
             using (TextReader reader = Console.In) {
-                return state.Load(reader, "=stdin");
+                return state.Load(reader, "=stdin", mode);
             }
-        } else {
-            using (FileStream fs = new FileStream(filepath, FileMode.Open, FileAccess.Read)) {
-                using (TextReader reader = new StreamReader(fs)) {
-                    return state.Load(reader, filepath);
+        }
+        if (!LuaChunkCache.Enabled)
+            return state._LoadFileUncached(filepath, mode, out _);
+
+        /* 同一个文件编译过就直接用缓存的 proto 新建闭包，见 LuaChunkCache */
+        FileInfo file = new FileInfo(filepath);
+        if (LuaChunkCache.TryGet(file, state.OptimizeCode, out LuaChunkCache.Entry entry)) {
+            return state._ProtectedLoad(
+                state_ => LuaChunkCache.Instantiate(state_, entry), filepath, mode, entry.binary ? "binary" : "text"
+            );
+        }
+        file.Refresh(); /* 先记下修改时间和大小，编译期间文件被改了的话，下次加载会因为对不上而重新编译 */
+        ThreadStatus threadStatus = state._LoadFileUncached(filepath, mode, out bool binary);
+        if (threadStatus == ThreadStatus.OK)
+            LuaChunkCache.Add(file, state.GetStack(state.Top - 1).LObject<LClosure>(), binary, state.OptimizeCode);
+        return threadStatus;
+    }
+    private static ThreadStatus _LoadFileUncached(this LuaState state, string filepath, string mode, out bool binary) {
+        using (FileStream fs = new FileStream(filepath, FileMode.Open, FileAccess.Read)) {
+            binary = fs.ReadByte() == LuaConst.SIGNATURE[0];
+            if (binary) { /* 预编译块：把文件映射到内存直接读，不经过文本解码 */
+                using (MemoryMappedFile mmf = MemoryMappedFile.CreateFromFile(fs, null, 0, MemoryMappedFileAccess.Read, HandleInheritability.None, true))
+                using (MemoryMappedViewStream view = mmf.CreateViewStream(0, 0, MemoryMappedFileAccess.Read))
+                using (BinaryReader reader = new BinaryReader(view)) {
+                    return state.Load(reader, filepath, mode);
                 }
             }
+            fs.Seek(0, SeekOrigin.Begin);
+            using (TextReader reader = new StreamReader(fs)) {
+                return state.Load(reader, filepath, mode);
+            }
         }
     }
-    public static ThreadStatus LoadString(this LuaState state, string chunk, string chunkname = null) {
+    public static ThreadStatus LoadString(this LuaState state, string chunk, string chunkname = null, string mode = null) {
         using (StringReader reader = new StringReader(chunk)) {
             chunkname = string.IsNullOrEmpty(chunkname) ? "chunk" : chunkname;
-            return state.Load(reader, chunkname);
+            return state.Load(reader, chunkname, mode);
         }
     }
     public static ThreadStatus DoFile(this LuaState state, string filepath) {
@@ -0,0 +1,140 @@
+namespace YALuaToy {
+
+using System;
+using System.IO;
+using System.Text;
+using System.Collections.Generic;
+using System.Security.Cryptography;
+using YALuaToy.Core;
+using YALuaToy.Const;
+
+/* 进程级的编译结果缓存，LoadFile（也就是 require/loadfile/dofile）会用到
+   文件按 完整路径 + 修改时间 + 大小 缓存编译好的 LuaProto 树，之后任何 LuaState 再加载同一个文件时只需要新建一个闭包。
+   LuaProto 编译后就是只读的（会写的只有闭包缓存和内联缓存：前者 LuaVMUtils.GetCached 会检查线程，不会跨 LuaState 复用；后者是不可变对象，整个替换），所以可以直接共享
+   设置 DiskCacheDir 后还会把编译结果以预编译块的形式存到磁盘上，进程重启后也不用重新解析 */
+public static class LuaChunkCache
+{
+    internal struct Entry
+    {
+        public LuaProto proto;
+        public int      upvalueCount;
+        public bool     binary; /* 来源是否是预编译块，用于检查 load 的 mode */
+        public long     writeTicks;
+        public long     length;
+    }
+
+    private const string DISK_CACHE_EXT   = ".yluac";
+    private const string OPTIMIZED_SUFFIX = "?optimized"; /* 只用来区分缓存键和磁盘缓存的文件名 */
+
+    private static readonly Dictionary<string, Entry> entries = new Dictionary<string, Entry>();
+    private static bool                               enabled = true;
+    private static string                             diskCacheDir;
+
+    public static bool Enabled {
+        get => enabled;
+        set => enabled = value;
+    }
+    public static string DiskCacheDir { /* null 表示不使用磁盘缓存 */
+        get => diskCacheDir;
+        set => diskCacheDir = value;
+    }
+    public static int Count {
+        get {
+            lock (entries)
+                return entries.Count;
+        }
+    }
+    public static void Clear() { /* 只清理内存中的缓存 */
+        lock (entries)
+            entries.Clear();
+    }
+
+    /* ---------------- Internal ---------------- */
+
+    internal static bool TryGet(FileInfo file, bool optimized, out Entry entry) {
+        string key = _Key(file, optimized);
+        lock (entries) {
+            if (entries.TryGetValue(key, out entry) && _Match(entry, file))
+                return true;
+        }
+        if (diskCacheDir != null && _TryReadDisk(file, key, out entry)) {
+            lock (entries)
+                entries[key] = entry;
+            return true;
+        }
+        return false;
+    }
+    internal static void Add(FileInfo file, LClosure lclosure, bool binary, bool optimized) {
+        Entry entry = new Entry {
+            proto = lclosure.proto, upvalueCount = lclosure.UpvalueCount, binary = binary, writeTicks = file.LastWriteTimeUtc.Ticks,
+            length = file.Length,
+        };
+        string key = _Key(file, optimized);
+        lock (entries)
+            entries[key] = entry;
+        if (diskCacheDir != null && !binary) /* 预编译块本身就不需要解析了 */
+            _WriteDisk(file, key, entry);
+    }
+    /* 和 LuaDump.Undump 一样：新建主函数闭包并压栈 */
+    internal static LClosure Instantiate(LuaState state, in Entry entry) {
+        LClosure lclosure = new LClosure(entry.proto, entry.upvalueCount);
+        lclosure._InitAllUpvalues();
+        state.PushStack(lclosure);
+        return lclosure;
+    }
+
+    /* 开没开优化编译出来的代码不一样，分开缓存 */
+    private static string _Key(FileInfo file, bool optimized) {
+        return optimized ? file.FullName + OPTIMIZED_SUFFIX : file.FullName;
+    }
+    private static bool _Match(in Entry entry, FileInfo file) {
+        file.Refresh();
+        return file.Exists && entry.writeTicks == file.LastWriteTimeUtc.Ticks && entry.length == file.Length;
+    }
+
+    /* 磁盘缓存文件：源文件修改时间、大小，然后是 LuaDump 格式的预编译块；文件名是缓存键（完整路径）的哈希 */
+    private static string _DiskPath(string key) {
+        byte[] hash;
+        using (SHA256 sha256 = SHA256.Create())
+            hash = sha256.ComputeHash(Encoding.UTF8.GetBytes(key));
+        StringBuilder sb = new StringBuilder(hash.Length * 2);
+        foreach (byte b in hash)
+            sb.Append(b.ToString("x2"));
+        return Path.Combine(diskCacheDir, sb.ToString() + DISK_CACHE_EXT);
+    }
+    private static bool _TryReadDisk(FileInfo file, string key, out Entry entry) {
+        entry = default(Entry);
+        try {
+            string path = _DiskPath(key);
+            if (!File.Exists(path))
+                return false;
+            using (BinaryReader reader = new BinaryReader(new FileStream(path, FileMode.Open, FileAccess.Read))) {
+                entry.writeTicks = reader.ReadInt64();
+                entry.length     = reader.ReadInt64();
+                if (!_Match(entry, file))
+                    return false;
+                entry.proto = LuaDump.UndumpProto(reader, file.FullName, out entry.upvalueCount);
+            }
+            return true;
+        } catch (Exception e) when (e is IOException || e is UnauthorizedAccessException || e is LuaUndumpError) {
+            return false; /* 缓存损坏或读不了就当没有，重新编译 */
+        }
+    }
+    private static void _WriteDisk(FileInfo file, string key, in Entry entry) {
+        try {
+            Directory.CreateDirectory(diskCacheDir);
+            string path     = _DiskPath(key);
+            string tempPath = $"{path}.{Guid.NewGuid():N}.tmp"; /* 先写临时文件再替换，避免其他进程读到写了一半的文件 */
+            using (BinaryWriter writer = new BinaryWriter(new FileStream(tempPath, FileMode.CreateNew, FileAccess.Write))) {
+                writer.Write(entry.writeTicks);
+                writer.Write(entry.length);
+                LuaDump.Dump(entry.proto, entry.upvalueCount, writer, false);
+            }
+            File.Move(tempPath, path, true);
+        } catch (Exception e) when (e is IOException || e is UnauthorizedAccessException) {
+            /* 磁盘缓存只是加速手段，写不了就算了 */
+        }
+    }
+}
+
+}
@@ -0,0 +1,32 @@
+namespace YALuaToy {
+
+using System.Threading;
+using System.Threading.Tasks;
+using YALuaToy.Compilation;
+
+/* 前端（ANTLR 词法/语法分析）的进程级选项
+   解析默认是两阶段的：先 SLL，出错再 LL；ANTLR 的 DFA 缓存在进程内共享，编译得越多越快，
+   Prewarm 可以在启动时把常用的 DFA 状态先建好，第一次加载脚本就不用从零开始预测
+   字节码优化不是进程级的，按 LuaState 开启，见 LuaState.OptimizeCode */
+public static class LuaParseOptions
+{
+    private static int prewarmed; /* 0 未预热，1 已预热（或正在预热） */
+
+    public static bool TwoStage { /* false 表示总是直接用 LL 解析 */
+        get => LuaParserUtils.twoStage;
+        set => LuaParserUtils.twoStage = value;
+    }
+    public static bool Prewarmed => Volatile.Read(ref prewarmed) != 0;
+
+    /* 同步预热，重复调用只有第一次有效 */
+    public static void Prewarm() {
+        if (Interlocked.Exchange(ref prewarmed, 1) == 0)
+            LuaParserUtils.Prewarm();
+    }
+    /* 后台预热，适合交互环境启动时调用；DFA 缓存本身是线程安全的，和正在进行的编译并发也没问题 */
+    public static Task PrewarmAsync() {
+        return Task.Run(Prewarm);
+    }
+}
+
+}
@@ -0,0 +1,209 @@
+namespace YALuaToy {
+
+using System;
+using System.IO;
+using System.Linq;
+using System.Text;
+using System.Diagnostics;
+using System.Collections.Generic;
+using YALuaToy.Core;
+using YALuaToy.Const;
+
+/* 一个 Lua 函数（LuaProto）的统计结果 */
+public class LuaFunctionProfile
+{
+    internal readonly LuaProto              proto;
+    internal readonly string                name;
+    internal readonly Dictionary<int, long> lineInstructions = new Dictionary<int, long>(); /* 行号 -> 指令数 */
+    internal long                           calls;
+    internal long                           instructions;
+    internal long                           inclusiveTicks;
+    internal int                            activeCount; /* 当前有几层调用还没返回，递归时只统计最外层，避免重复计时 */
+    internal long                           activeStart;
+
+    internal LuaFunctionProfile(LuaProto proto) {
+        this.proto = proto;
+        name       = $"{proto.source.Str}:{(proto._firstLine == 0 ? "main" : proto._firstLine.ToString())}";
+    }
+
+    public string   Name          => name; /* 源码:定义行，主函数是 源码:main */
+    public string   Source        => proto.source.Str;
+    public int      LineDefined   => proto._firstLine;
+    public long     Calls         => calls;
+    public long     Instructions  => instructions; /* 采样得到的指令数，采样间隔为 1 时是精确值 */
+    public TimeSpan InclusiveTime => TimeSpan.FromSeconds((double)inclusiveTicks / Stopwatch.Frequency);
+    public IReadOnlyDictionary<int, long> LineInstructions => lineInstructions;
+
+    public override string ToString() {
+        return $"<profile {name}, calls: {calls}, instructions: {instructions}, inclusive: {InclusiveTime.TotalMilliseconds:F3}ms>";
+    }
+}
+
+/* 基于钩子的采样分析器
+   - COUNT 钩子每执行 sampleInterval 条指令采样一次，把这些指令记到当前函数、当前行和当前调用栈上（间隔为 1 时就是逐指令计数）
+   - CALL/RET 钩子统计调用次数和包含子调用的耗时；被错误跳过的 return 会在之后复用同一个 CallInfo 时补上
+   - 协程挂起期间，它上面还没返回的调用也会计时
+   不是线程安全的，不同 OS 线程上的 LuaState 请各用一个 */
+public class LuaProfiler
+{
+    private struct Frame
+    {
+        public CallInfo           ci;
+        public LuaFunctionProfile profile; /* 宿主函数为 null */
+    }
+
+    private const string C_FRAME_NAME = "[C]";
+
+    private readonly int                                      _sampleInterval;
+    private readonly LuaHook                                  _hook;
+    private readonly Dictionary<LuaProto, LuaFunctionProfile> _profiles     = new Dictionary<LuaProto, LuaFunctionProfile>();
+    private readonly Dictionary<string, long>                 _stacks       = new Dictionary<string, long>(); /* 折叠后的调用栈 -> 指令数 */
+    private readonly Dictionary<LuaState, List<Frame>>        _frames       = new Dictionary<LuaState, List<Frame>>(); /* 每个线程还没返回的调用 */
+    private readonly StringBuilder                            _stackBuilder = new StringBuilder();
+    private readonly List<string>                             _stackNames   = new List<string>();
+
+    public LuaProfiler(int sampleInterval = 1) {
+        if (sampleInterval <= 0)
+            throw new ArgumentOutOfRangeException(nameof(sampleInterval), "sample interval must be positive");
+        _sampleInterval = sampleInterval;
+        _hook           = _OnHook;
+    }
+
+    public int SampleInterval => _sampleInterval;
+
+    /* 给 state 挂上钩子（会覆盖原来的钩子）；之后在 state 上新建的协程会继承钩子 */
+    public void Start(LuaState state) {
+        if (!_frames.ContainsKey(state))
+            _frames[state] = new List<Frame>();
+        state.SetHook(_hook, HookMask.CALL | HookMask.RET | HookMask.COUNT, _sampleInterval);
+    }
+    /* 摘掉所有被挂上的钩子，还没返回的调用按现在的时间结算 */
+    public void Stop() {
+        long now = Stopwatch.GetTimestamp();
+        foreach (var pair in _frames) {
+            if (pair.Key.GetHook() == _hook)
+                pair.Key.SetHook(null, 0);
+            for (int i = pair.Value.Count - 1; i >= 0; i--)
+                _Finish(pair.Value[i], now);
+            pair.Value.Clear();
+        }
+        _frames.Clear();
+    }
+    public void Reset() {
+        _profiles.Clear();
+        _stacks.Clear();
+        foreach (var frames in _frames.Values)
+            frames.Clear();
+    }
+
+    /* ---------------- Report ---------------- */
+
+    /* 按指令数从多到少排列 */
+    public List<LuaFunctionProfile> Functions() {
+        return _profiles.Values.OrderByDescending(profile => profile.instructions).ThenBy(profile => profile.name).ToList();
+    }
+    /* 折叠栈格式（每行 "外层;内层;... 指令数"），可以直接交给 flamegraph.pl 或 speedscope */
+    public void WriteCollapsedStacks(TextWriter writer) {
+        foreach (var pair in _stacks.OrderBy(pair => pair.Key, StringComparer.Ordinal))
+            writer.WriteLine($"{pair.Key} {pair.Value}");
+    }
+    public string CollapsedStacks() {
+        using (StringWriter writer = new StringWriter()) {
+            WriteCollapsedStacks(writer);
+            return writer.ToString();
+        }
+    }
+
+    /* ---------------- Hook ---------------- */
+
+    private void _OnHook(LuaState state, LuaDebugInfo info) {
+        CallInfo ci = state.CurrCI;
+        switch (info.Event) {
+        case HookEvent.COUNT:
+            _Sample(ci);
+            break;
+        case HookEvent.CALL:
+            _Enter(_GetFrames(state), ci, info.proto, Stopwatch.GetTimestamp());
+            break;
+        case HookEvent.TAILCALL: { /* 尾调用会把新栈帧挪到调用者的 CallInfo 上，所以先结束调用者，再以调用者的 CallInfo 开始新调用 */
+            List<Frame> frames = _GetFrames(state);
+            long        now    = Stopwatch.GetTimestamp();
+            _Unwind(frames, ci.prev, now);
+            _Enter(frames, ci.prev, info.proto, now);
+            break;
+        }
+        case HookEvent.RET:
+            _Unwind(_GetFrames(state), ci, Stopwatch.GetTimestamp());
+            break;
+        }
+    }
+    private List<Frame> _GetFrames(LuaState state) {
+        if (!_frames.TryGetValue(state, out List<Frame> frames)) { /* 继承了钩子的协程 */
+            frames         = new List<Frame>();
+            _frames[state] = frames;
+        }
+        return frames;
+    }
+    private LuaFunctionProfile _GetProfile(LuaProto proto) {
+        if (!_profiles.TryGetValue(proto, out LuaFunctionProfile profile)) {
+            profile          = new LuaFunctionProfile(proto);
+            _profiles[proto] = profile;
+        }
+        return profile;
+    }
+
+    private void _Enter(List<Frame> frames, CallInfo ci, LuaProto proto, long now) {
+        _Unwind(frames, ci, now); /* 出错时被跳过 return 的调用还残留在栈上，它的 CallInfo 这次被复用了 */
+        LuaFunctionProfile profile = null;
+        if (proto != null) {
+            profile = _GetProfile(proto);
+            profile.calls++;
+            if (profile.activeCount++ == 0)
+                profile.activeStart = now;
+        }
+        frames.Add(new Frame { ci = ci, profile = profile });
+    }
+    /* 从栈顶往下找 ci 对应的帧，把它和它上面的帧都结束掉；碰到 ci 的调用者就停下（说明 ci 是开始分析前就进入的调用） */
+    private void _Unwind(List<Frame> frames, CallInfo ci, long now) {
+        for (int i = frames.Count - 1; i >= 0; i--) {
+            if (frames[i].ci == ci.prev)
+                return;
+            if (frames[i].ci == ci) {
+                for (int j = frames.Count - 1; j >= i; j--)
+                    _Finish(frames[j], now);
+                frames.RemoveRange(i, frames.Count - i);
+                return;
+            }
+        }
+    }
+    private static void _Finish(in Frame frame, long now) {
+        LuaFunctionProfile profile = frame.profile;
+        if (profile != null && --profile.activeCount == 0)
+            profile.inclusiveTicks += now - profile.activeStart;
+    }
+
+    private void _Sample(CallInfo ci) {
+        LuaFunctionProfile profile = _GetProfile(ci.LClosure.proto);
+        int                pc      = ci.PC - 1;
+        int                line    = pc >= 0 && pc < profile.proto.Lines.Count ? profile.proto.Lines[pc] : -1;
+        profile.instructions += _sampleInterval;
+        profile.lineInstructions.TryGetValue(line, out long lineCount);
+        profile.lineInstructions[line] = lineCount + _sampleInterval;
+
+        /* 折叠调用栈：从外到内，用 ';' 连接 */
+        _stackNames.Clear();
+        for (CallInfo curr = ci; curr != null && curr.prev != null; curr = curr.prev) /* 最底下的 CallInfo 是给宿主用的，不算调用 */
+            _stackNames.Add(curr.IsLua ? _GetProfile(curr.LClosure.proto).name : C_FRAME_NAME);
+        _stackBuilder.Clear();
+        for (int i = _stackNames.Count - 1; i >= 0; i--) {
+            _stackBuilder.Append(_stackNames[i]);
+            if (i > 0)
+                _stackBuilder.Append(';');
+        }
+        string stack = _stackBuilder.ToString();
+        _stacks.TryGetValue(stack, out long stackCount);
+        _stacks[stack] = stackCount + _sampleInterval;
+    }
+}
+
+}
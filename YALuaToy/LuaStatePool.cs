@@ -0,0 +1,181 @@
+namespace YALuaToy {
+
+using System;
+using System.Threading;
+using System.Security.Cryptography;
+using System.Runtime.InteropServices;
+using System.Threading.Tasks;
+using System.Collections.Generic;
+using System.Collections.Concurrent;
+using YALuaToy.Core;
+using YALuaToy.Const;
+
+/* 多核执行用的 LuaState 池。LuaState 是单线程的，想用满多个核就要同时跑多个互不相关的 LuaState，这里负责把它们的初始化开销降下来：
+   - 所有 LuaState 都从同一个快照（LuaStateSnapshot）复制出来，不需要各自打开标准库、执行初始化脚本
+   - 编译好的 LuaProto 和字符串（包括保留字）是进程级共享的只读数据：用 Load 加载的代码按内容的哈希缓存，同一段代码只编译一次；
+     缓存有容量上限，满了淘汰最久没用过的，也不会留着代码原文。LoadFile 本来就有 LuaChunkCache
+   - 固定数量的工作线程，每个线程独占一个 LuaState；任务放在有界队列里，队列满了 Submit 会阻塞调用者（背压），TrySubmit 则可以限时等待
+   - 任务之间 LuaState 默认不重置，全局变量会留给同一个线程上的下一个任务；ResetAfterJob 为 true 时每个任务都用新复制的 LuaState。
+     任务抛出异常、或者 LuaState 停在了调用中间时，一定会换一个新的
+   任务里拿到的 LuaState 只能在任务里用，不要把它或者 Lua 的值带到其他线程 */
+public sealed class LuaStatePool : IDisposable
+{
+    private const int QUEUE_CAPACITY_FACTOR        = 4;   /* 默认的队列容量是工作线程数的几倍 */
+    private const int DEFAULT_CHUNK_CACHE_CAPACITY = 256; /* 默认最多缓存多少段代码的编译结果 */
+
+    private readonly LuaStateSnapshot                                              _snapshot;
+    private readonly BlockingCollection<Func<LuaState, bool>>                      _queue; /* 任务返回 false 表示 LuaState 不能再用了 */
+    private readonly Thread[]                                                      _workers;
+    private readonly Dictionary<(string, string, bool), LinkedListNode<ChunkNode>> _chunks; /* (chunkname, 代码的哈希, 是否开了优化) -> 编译结果 */
+    private readonly LinkedList<ChunkNode>                                         _chunkOrder; /* 最近用过的在前面，满了从后面淘汰；和 _chunks 一起用 _chunks 加锁 */
+    private readonly int                                                           _chunkCapacity;
+    private volatile bool                                                          _resetAfterJob;
+
+    private struct ChunkNode
+    {
+        public (string, string, bool) key;
+        public LuaChunkCache.Entry    entry;
+    }
+
+    /* workerCount 为 0 时用 CPU 核数；queueCapacity 为 0 时用 workerCount 的 QUEUE_CAPACITY_FACTOR 倍；
+       chunkCacheCapacity 为 0 时用 DEFAULT_CHUNK_CACHE_CAPACITY */
+    public LuaStatePool(LuaStateSnapshot snapshot, int workerCount = 0, int queueCapacity = 0, int chunkCacheCapacity = 0) {
+        if (workerCount < 0 || queueCapacity < 0 || chunkCacheCapacity < 0)
+            throw new ArgumentOutOfRangeException(workerCount < 0 ? nameof(workerCount) : queueCapacity < 0 ? nameof(queueCapacity) : nameof(chunkCacheCapacity));
+        _snapshot      = snapshot ?? throw new ArgumentNullException(nameof(snapshot));
+        workerCount    = workerCount == 0 ? Environment.ProcessorCount : workerCount;
+        queueCapacity  = queueCapacity == 0 ? workerCount * QUEUE_CAPACITY_FACTOR : queueCapacity;
+        _chunkCapacity = chunkCacheCapacity == 0 ? DEFAULT_CHUNK_CACHE_CAPACITY : chunkCacheCapacity;
+        _chunks        = new Dictionary<(string, string, bool), LinkedListNode<ChunkNode>>();
+        _chunkOrder    = new LinkedList<ChunkNode>();
+        _queue         = new BlockingCollection<Func<LuaState, bool>>(new ConcurrentQueue<Func<LuaState, bool>>(), queueCapacity);
+        _workers       = new Thread[workerCount];
+        for (int i = 0; i < workerCount; i++) {
+            _workers[i] = new Thread(_Work) { IsBackground = true, Name = $"LuaStatePool worker {i}" };
+            _workers[i].Start();
+        }
+    }
+    public LuaStatePool(Action<LuaState> initializer, int workerCount = 0, int queueCapacity = 0, int chunkCacheCapacity = 0)
+    : this(LuaStateSnapshot.Create(initializer), workerCount, queueCapacity, chunkCacheCapacity) { }
+
+    public int  WorkerCount        => _workers.Length;
+    public int  QueueCapacity      => _queue.BoundedCapacity;
+    public int  QueuedCount        => _queue.Count;
+    public int  ChunkCacheCapacity => _chunkCapacity;
+    public int  CachedChunkCount {
+        get {
+            lock (_chunks)
+                return _chunks.Count;
+        }
+    }
+    public bool ResetAfterJob {
+        get => _resetAfterJob;
+        set => _resetAfterJob = value;
+    }
+
+    /* ---------------- Jobs ---------------- */
+
+    /* 队列满了会一直阻塞到有空位；Dispose 之后再提交会抛 InvalidOperationException */
+    public Task<T> Submit<T>(Func<LuaState, T> job) {
+        TaskCompletionSource<T> source = new TaskCompletionSource<T>(TaskCreationOptions.RunContinuationsAsynchronously);
+        _queue.Add(_Wrap(job, source));
+        return source.Task;
+    }
+    /* 等 millisecondsTimeout 毫秒（-1 表示一直等）还没有空位就返回 false，调用者可以自己决定丢弃、重试还是降级 */
+    public bool TrySubmit<T>(Func<LuaState, T> job, int millisecondsTimeout, out Task<T> task) {
+        TaskCompletionSource<T> source = new TaskCompletionSource<T>(TaskCreationOptions.RunContinuationsAsynchronously);
+        task = source.Task;
+        return _queue.TryAdd(_Wrap(job, source), millisecondsTimeout);
+    }
+    /* 加载并执行一段代码（不要返回值），结果是执行状态；需要错误信息或者返回值的话请用 Submit 自己取 */
+    public Task<ThreadStatus> DoString(string chunk, string chunkname = null) {
+        return Submit(state => {
+            ThreadStatus threadStatus = Load(state, chunk, chunkname);
+            if (threadStatus == ThreadStatus.OK)
+                threadStatus = state.PCall(0, 0, 0);
+            return threadStatus;
+        });
+    }
+
+    /* 和 LoadString 一样把代码编译成函数压到栈顶，不过同样的代码（和 chunkname）只编译一次，之后所有 LuaState 共用编译结果。
+       缓存满了之后淘汰最久没用过的，被淘汰的代码下次 Load 时重新编译 */
+    public ThreadStatus Load(LuaState state, string chunk, string chunkname = null) {
+        chunkname = string.IsNullOrEmpty(chunkname) ? "chunk" : chunkname;
+        (string, string, bool) key   = (chunkname, _Hash(chunk), state.OptimizeCode);
+        LuaChunkCache.Entry    entry = default;
+        bool                   found;
+        lock (_chunks) {
+            found = _chunks.TryGetValue(key, out LinkedListNode<ChunkNode> node);
+            if (found) {
+                entry = node.Value.entry;
+                _chunkOrder.Remove(node);
+                _chunkOrder.AddFirst(node);
+            }
+        }
+        if (found)
+            return state._ProtectedLoad(state_ => LuaChunkCache.Instantiate(state_, entry), chunkname, null, entry.binary ? "binary" : "text");
+
+        /* 多个线程同时编译同一段代码也没关系，后写的覆盖先写的 */
+        ThreadStatus threadStatus = state.LoadString(chunk, chunkname);
+        if (threadStatus == ThreadStatus.OK) {
+            LClosure lclosure = state.GetStack(state.Top - 1).LObject<LClosure>();
+            entry             = new LuaChunkCache.Entry {
+                proto = lclosure.proto, upvalueCount = lclosure.UpvalueCount, binary = chunk.Length > 0 && chunk[0] == LuaConst.SIGNATURE[0],
+            };
+            lock (_chunks)
+                _AddChunk(key, entry);
+        }
+        return threadStatus;
+    }
+
+    /* 不再接受新任务，等队列里的任务都执行完 */
+    public void Dispose() {
+        if (!_queue.IsAddingCompleted)
+            _queue.CompleteAdding();
+        foreach (Thread worker in _workers)
+            if (worker != Thread.CurrentThread)
+                worker.Join();
+    }
+
+    /* ---------------- Internal ---------------- */
+
+    /* 调用者持有 _chunks 的锁 */
+    private void _AddChunk((string, string, bool) key, LuaChunkCache.Entry entry) {
+        if (_chunks.TryGetValue(key, out LinkedListNode<ChunkNode> old))
+            _chunkOrder.Remove(old);
+        _chunks[key] = _chunkOrder.AddFirst(new ChunkNode { key = key, entry = entry });
+        while (_chunks.Count > _chunkCapacity) {
+            _chunks.Remove(_chunkOrder.Last.Value.key);
+            _chunkOrder.RemoveLast();
+        }
+    }
+    /* 直接对 UTF-16 码元求哈希，二进制块（每个字符是一个字节）和不成对的代理项也不会有损 */
+    private static string _Hash(string chunk) {
+        return Convert.ToBase64String(SHA256.HashData(MemoryMarshal.AsBytes(chunk.AsSpan())));
+    }
+
+    private static Func<LuaState, bool> _Wrap<T>(Func<LuaState, T> job, TaskCompletionSource<T> source) {
+        return state => {
+            try {
+                source.SetResult(job(state));
+            } catch (Exception e) {
+                source.SetException(e);
+                return false;
+            }
+            return state.ThreadStatus == ThreadStatus.OK && state.CallLevel == 0;
+        };
+    }
+    private void _Work() {
+        LuaState state = null;
+        foreach (Func<LuaState, bool> job in _queue.GetConsumingEnumerable()) {
+            if (state == null)
+                state = _snapshot.NewState();
+            if (job(state) && !_resetAfterJob)
+                state.ClearFrame(); /* 留给下一个任务 */
+            else
+                state = null;
+        }
+    }
+}
+
+}
@@ -0,0 +1,40 @@
+namespace YALuaToy {
+
+using System;
+using YALuaToy.Core;
+
+/* LuaState 的快照：记下一个初始化好的 LuaState（打开了标准库、执行过初始化脚本等）的全局数据，之后可以直接复制出和它一样的 LuaState，
+   不需要重新打开库、重新执行初始化脚本
+   - 复制的是注册表（全局表、package.loaded 等都在里面）和基元类型的元表，以及从这里能访问到的表、闭包、上值和 userdata，
+     字符串和编译好的 LuaProto 是只读的，所有 LuaState 共享同一份，见 LuaStateCopier
+   - 快照建好之后和原来的 LuaState 没有关系，原来的 LuaState 之后怎么改都不影响快照
+   - 快照本身不会再被修改，多个线程可以同时用它新建 LuaState
+   - 栈上的值、钩子不会进入快照；原 LuaState 里能访问到协程，或者还有函数没执行完时，不能建快照
+   - C# 函数原样共享，如果它们通过闭包捕获了原来的 LuaState，新的 LuaState 里调用时用的还是原来那个，注册函数时请只用参数里的 state */
+public sealed class LuaStateSnapshot
+{
+    private readonly LuaState _image; /* 快照内容，只用来复制，不在上面执行任何代码 */
+
+    private LuaStateSnapshot(LuaState image) {
+        _image = image;
+    }
+
+    public static LuaStateSnapshot Capture(LuaState state) {
+        LuaState image = LuaState.NewState();
+        LuaStateCopier.Copy(state.globalState.mainThread, image);
+        return new LuaStateSnapshot(image);
+    }
+    public static LuaStateSnapshot Create(Action<LuaState> initializer) { /* 在一个新的 LuaState 上执行 initializer，再对它建快照 */
+        LuaState state = LuaState.NewState();
+        initializer(state);
+        return Capture(state);
+    }
+
+    public LuaState NewState() {
+        LuaState state = LuaState.NewState();
+        LuaStateCopier.Copy(_image, state);
+        return state;
+    }
+}
+
+}